@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from academic_prompts.models import AcademicPrompt
+from ai_model.tts_cache import get_cached_tts_output
+
+
+class Command(BaseCommand):
+    help = 'Pre-synthesize TTS audio for every active academic prompt into the TTS asset cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language',
+            type=str,
+            help='Only warm prompts for this language code'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Maximum number of concurrent synthesis requests'
+        )
+
+    def _jobs(self, prompts):
+        """Yield one (text, language, model_code, gender, voice) tuple per cache entry a battle can hit."""
+        for prompt in prompts:
+            for model, voice in ((prompt.model_a, prompt.voice_a), (prompt.model_b, prompt.voice_b)):
+                if voice:
+                    yield (prompt.text, prompt.language, model.model_code, prompt.gender, voice)
+                elif prompt.gender:
+                    yield (prompt.text, prompt.language, model.model_code, prompt.gender, None)
+                else:
+                    # Battles pick a random gender when the prompt has none
+                    for gender in ('male', 'female'):
+                        yield (prompt.text, prompt.language, model.model_code, gender, None)
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+
+        prompts = AcademicPrompt.objects.filter(
+            is_active=True,
+            model_a__isnull=False,
+            model_b__isnull=False,
+            model_a__is_active=True,
+            model_b__is_active=True
+        ).select_related('model_a', 'model_b')
+        if options.get('language'):
+            prompts = prompts.filter(language=options['language'])
+
+        jobs = list(dict.fromkeys(self._jobs(prompts)))
+        self.stdout.write(f'Warming {len(jobs)} TTS assets with {workers} workers...')
+
+        hit_count = 0
+        synthesized_count = 0
+        error_count = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(get_cached_tts_output, text, language, model_code, gender=gender, voice=voice): (text, model_code, voice)
+                for text, language, model_code, gender, voice in jobs
+            }
+            for future in as_completed(futures):
+                text, model_code, voice = futures[future]
+                try:
+                    output = future.result()
+                    if output.get('cached'):
+                        hit_count += 1
+                    else:
+                        synthesized_count += 1
+                except Exception as e:
+                    error_count += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'✗ {model_code} ({voice or "default voice"}): {text[:40]}... - {str(e)}')
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted: {synthesized_count} synthesized, {hit_count} already cached, {error_count} errors'
+            )
+        )
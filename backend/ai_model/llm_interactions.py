@@ -51,6 +51,8 @@ import json
 from google import genai
 from google.genai import types
 from common.security_utils import sanitize_error_message
+from ai_model.provider_health import get_model_provider, track_stream
+import inspect
 
 GPT35 = "GPT3.5"
 GPT4 = "GPT4"
@@ -534,6 +536,9 @@ def get_model_output(system_prompt, user_prompt, history, model=GPT4OMini, image
         out = get_anthropic_output(system_prompt, user_prompt, history, model, image_url=image_url, log_context=log_context)
     else:
         out = get_deepinfra_output(system_prompt, user_prompt, history, model, image_url=image_url, log_context=log_context)
+    if inspect.isgenerator(out):
+        # Feeds the provider health used by load-aware sampling
+        out = track_stream(get_model_provider(model), out)
     return out
 
 def get_all_model_output(system_prompt, user_prompt, history, models_to_run, log_context=None):
@@ -0,0 +1,226 @@
+"""
+Live LLM provider health for load-aware sampling.
+
+The streaming path (get_model_output) wraps every LLM stream in
+track_stream(). That keeps per-minute request, error and time-to-first-token
+histogram counters plus an in-flight gauge in the shared cache (Redis in
+production).
+
+get_provider_health() reads the last HEALTH_WINDOW_MINUTES minutes and turns
+them into a sampling weight per provider:
+- 1.0 when the provider is healthy;
+- between MIN_WEIGHT and 1.0 when degraded (error rate, p95 TTFT or load
+  over the thresholds);
+- 0 when excluded.
+
+The weights only depend on provider state, never on vote outcomes. Pairs are
+still drawn from the same distributions, just reweighted, so the rating fit
+stays valid.
+"""
+import logging
+import os
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HEALTH_WINDOW_MINUTES = int(os.getenv('PROVIDER_HEALTH_WINDOW_MINUTES', 5))
+HEALTH_MIN_REQUESTS = int(os.getenv('PROVIDER_HEALTH_MIN_REQUESTS', 20))
+ERROR_RATE_DEGRADED = float(os.getenv('PROVIDER_ERROR_RATE_DEGRADED', 0.1))
+ERROR_RATE_EXCLUDED = float(os.getenv('PROVIDER_ERROR_RATE_EXCLUDED', 0.5))
+TTFT_DEGRADED_MS = float(os.getenv('PROVIDER_TTFT_DEGRADED_MS', 5000))
+TTFT_EXCLUDED_MS = float(os.getenv('PROVIDER_TTFT_EXCLUDED_MS', 20000))
+MAX_IN_FLIGHT = int(os.getenv('PROVIDER_MAX_IN_FLIGHT', 50))
+MIN_WEIGHT = 0.1
+HEALTH_REFRESH_SECONDS = 5
+
+# Upper bounds of the TTFT histogram buckets; the last bucket is open-ended
+TTFT_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+COUNTER_KEY = 'provider_health:{provider}:{metric}:{minute}'
+IN_FLIGHT_KEY = 'provider_health:{provider}:in_flight'
+COUNTER_TTL = (HEALTH_WINDOW_MINUTES + 1) * 60
+# Refreshed on every update, so only a gauge left behind by a killed worker
+# on a provider idle for this long expires
+IN_FLIGHT_TTL = 15 * 60
+
+_weights = {}
+
+
+def get_model_provider(model_code):
+    """Upstream API serving a model code. Mirrors get_model_output's dispatch."""
+    if model_code == "GPT3.5" or model_code.startswith("gpt"):
+        return 'openai'
+    if model_code == "LLAMA2":
+        return 'meta'
+    if model_code.lower().startswith("sarvam"):
+        return 'sarvam'
+    if model_code.startswith("gemini"):
+        return 'google'
+    if model_code.startswith("ibm"):
+        return 'ibm'
+    if model_code.startswith("claude"):
+        return 'anthropic'
+    return 'deepinfra'
+
+
+def _current_minute():
+    return int(timezone.now().timestamp() // 60)
+
+
+def _incr(key, ttl, delta=1):
+    cache.add(key, 0, ttl)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(key, delta, ttl)
+        return delta
+
+
+def _ttft_bucket(ttft_ms):
+    for index, bound in enumerate(TTFT_BUCKETS_MS):
+        if ttft_ms <= bound:
+            return index
+    return len(TTFT_BUCKETS_MS)
+
+
+def _record(provider, metric, delta=1):
+    key = COUNTER_KEY.format(provider=provider, metric=metric, minute=_current_minute())
+    try:
+        _incr(key, COUNTER_TTL, delta)
+    except Exception as e:
+        # Health tracking must never break a stream
+        logger.warning(f"Provider health update failed for {provider}: {e}")
+
+
+def _update_in_flight(provider, delta):
+    key = IN_FLIGHT_KEY.format(provider=provider)
+    try:
+        _incr(key, IN_FLIGHT_TTL, delta)
+        # add() only sets the TTL on creation and incr() keeps it, so a busy
+        # provider's gauge would otherwise reset mid-stream
+        cache.touch(key, IN_FLIGHT_TTL)
+    except Exception as e:
+        logger.warning(f"Provider in-flight update failed for {provider}: {e}")
+
+
+def track_stream(provider, stream):
+    """Pass through a model output stream while recording its health counters."""
+    started = time.monotonic()
+    first_chunk = True
+    _record(provider, 'requests')
+    _update_in_flight(provider, 1)
+    try:
+        for chunk in stream:
+            if first_chunk:
+                first_chunk = False
+                _record(provider, f"ttft_{_ttft_bucket((time.monotonic() - started) * 1000)}")
+            yield chunk
+    except Exception:
+        _record(provider, 'errors')
+        raise
+    finally:
+        _update_in_flight(provider, -1)
+
+
+def ttft_percentile(histogram, percentile=0.95):
+    """Bucket upper bound holding the percentile, or None without samples."""
+    total = sum(histogram)
+    if not total:
+        return None
+    running = 0
+    for index, count in enumerate(histogram):
+        running += count
+        if running >= percentile * total:
+            return float(TTFT_BUCKETS_MS[min(index, len(TTFT_BUCKETS_MS) - 1)])
+    return float(TTFT_BUCKETS_MS[-1])
+
+
+def health_weight(requests, errors, ttft_p95_ms, in_flight):
+    """(weight, status, reasons) for one provider's window."""
+    reasons = []
+    weight = 1.0
+    error_rate = errors / requests if requests else 0.0
+    enough_traffic = requests >= HEALTH_MIN_REQUESTS
+
+    if enough_traffic and error_rate >= ERROR_RATE_EXCLUDED:
+        return 0.0, 'excluded', [f"error rate {error_rate:.0%}"]
+    if enough_traffic and ttft_p95_ms is not None and ttft_p95_ms >= TTFT_EXCLUDED_MS:
+        return 0.0, 'excluded', [f"p95 TTFT {ttft_p95_ms:.0f}ms"]
+
+    if enough_traffic and error_rate > ERROR_RATE_DEGRADED:
+        weight *= 1.0 - error_rate
+        reasons.append(f"error rate {error_rate:.0%}")
+    if enough_traffic and ttft_p95_ms is not None and ttft_p95_ms > TTFT_DEGRADED_MS:
+        weight *= TTFT_DEGRADED_MS / ttft_p95_ms
+        reasons.append(f"p95 TTFT {ttft_p95_ms:.0f}ms")
+    if in_flight > MAX_IN_FLIGHT:
+        weight *= MAX_IN_FLIGHT / in_flight
+        reasons.append(f"{in_flight} in flight")
+
+    if not reasons:
+        return 1.0, 'healthy', reasons
+    return max(MIN_WEIGHT, weight), 'degraded', reasons
+
+
+def get_provider_health(providers):
+    """Windowed health and sampling weight for each provider, from one cache read."""
+    providers = sorted(set(providers))
+    minutes = range(_current_minute() - HEALTH_WINDOW_MINUTES + 1, _current_minute() + 1)
+    metrics = ['requests', 'errors'] + [f"ttft_{i}" for i in range(len(TTFT_BUCKETS_MS) + 1)]
+
+    keys = [IN_FLIGHT_KEY.format(provider=p) for p in providers]
+    keys += [
+        COUNTER_KEY.format(provider=p, metric=metric, minute=minute)
+        for p in providers for metric in metrics for minute in minutes
+    ]
+    values = cache.get_many(keys)
+
+    def window_sum(provider, metric):
+        return sum(
+            values.get(COUNTER_KEY.format(provider=provider, metric=metric, minute=minute), 0)
+            for minute in minutes
+        )
+
+    health = {}
+    for provider in providers:
+        requests = window_sum(provider, 'requests')
+        errors = window_sum(provider, 'errors')
+        ttft_p95_ms = ttft_percentile([window_sum(provider, f"ttft_{i}") for i in range(len(TTFT_BUCKETS_MS) + 1)])
+        in_flight = max(0, values.get(IN_FLIGHT_KEY.format(provider=provider), 0))
+        weight, status, reasons = health_weight(requests, errors, ttft_p95_ms, in_flight)
+        health[provider] = {
+            'provider': provider,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'ttft_p95_ms': ttft_p95_ms,
+            'in_flight': in_flight,
+            'weight': round(weight, 4),
+            'status': status,
+            'reasons': reasons,
+        }
+    return health
+
+
+def get_provider_weights(providers):
+    """
+    Sampling weight per provider, refreshed at most every
+    HEALTH_REFRESH_SECONDS per process. Falls back to 1.0 when the cache is
+    unreachable.
+    """
+    key = tuple(sorted(set(providers)))
+    cached = _weights.get(key)
+    if cached and time.monotonic() - cached[0] < HEALTH_REFRESH_SECONDS:
+        return cached[1]
+
+    try:
+        weights = {p: stats['weight'] for p, stats in get_provider_health(key).items()}
+    except Exception as e:
+        logger.warning(f"Provider health unavailable, sampling without it: {e}")
+        weights = {p: 1.0 for p in key}
+    _weights[key] = (time.monotonic(), weights)
+    return weights
@@ -0,0 +1,254 @@
+"""
+Precomputed state for active model sampling.
+
+A SamplerSnapshot holds everything ModelSelector needs to pick a pair:
+- the eligible models,
+- the cumulative mode ratios,
+- the cumulative BY_TRIALS and BY_CI weights,
+- the cumulative CLUSTER_BUSTER distribution over overlapping pairs.
+Each draw is then a binary search over a cumulative array. When provider
+health weights are passed in, the weights are rescaled for that draw only.
+
+Snapshots live in process memory, keyed by tenant database, model type,
+multimodal flag and academic mode. Saving or deleting an AIModel or a
+Leaderboard bumps a version in the shared cache, so every process rebuilds
+its snapshots on the next draw.
+"""
+import bisect
+import logging
+import random
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+from django.db import router
+
+from ai_model.models import AIModel
+from ai_model.provider_health import get_model_provider
+from leaderboards.models import Leaderboard
+from leaderboards.services import exclude_modality_slices
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_KEY = 'sampler_snapshot_version:{db}'
+
+# Models missing from the leaderboard get these stats
+DEFAULT_STATS = {'score': 1200.0, 'upper': 1260.0, 'lower': 1140.0, 'ci_width': 120.0, 'attempts': 0}
+
+_snapshots = {}
+
+
+def _cumulative(weights):
+    return np.cumsum(np.asarray(weights, dtype=float))
+
+
+def _draw_index(cumulative, exclude=None):
+    """
+    Index drawn with probability proportional to its weight, optionally
+    never returning `exclude`. None if there is no weight left to draw from.
+    """
+    if not len(cumulative):
+        return None
+    total = cumulative[-1]
+    if exclude is not None:
+        start = cumulative[exclude - 1] if exclude else 0.0
+        excluded = cumulative[exclude] - start
+        total -= excluded
+    if total <= 0:
+        return None
+
+    target = random.random() * total
+    if exclude is not None and target >= start:
+        # Skip over the excluded weight
+        target += excluded
+    index = bisect.bisect_right(cumulative, target)
+    index = min(index, len(cumulative) - 1)
+    if index == exclude:
+        # Only reachable through float rounding at the excluded boundary
+        index = index + 1 if index + 1 < len(cumulative) else index - 1
+    return index
+
+
+class SamplerSnapshot:
+    """Eligible models and their precomputed sampling distributions."""
+
+    def __init__(self, models, leaderboard_stats, alpha, ratios_with_freshers, ratios_no_freshers):
+        self.models = list(models)
+        if len(self.models) < 2:
+            raise ValueError("Not enough models available for comparison")
+
+        self.freshers = [m for m in self.models if m.is_fresh_model]
+        non_freshers = [m for m in self.models if not m.is_fresh_model]
+        self.pool = non_freshers if len(non_freshers) >= 2 else self.models
+
+        ratios = ratios_with_freshers if self.freshers else ratios_no_freshers
+        self.modes = list(ratios)
+        self.mode_cdf = _cumulative([max(0.0, float(v)) for v in ratios.values()])
+
+        stats = [self._get_stats(m, leaderboard_stats) for m in self.pool]
+        attempts = np.array([s['attempts'] for s in stats], dtype=float)
+        upper = np.array([s['upper'] for s in stats], dtype=float)
+        lower = np.array([s['lower'] for s in stats], dtype=float)
+
+        self.trials_weights = 1.0 / (attempts + 1) ** alpha
+        self.ci_weights = np.array([s['ci_width'] + 0.1 for s in stats], dtype=float)
+        self.trials_cdf = _cumulative(self.trials_weights)
+        self.ci_cdf = _cumulative(self.ci_weights)
+
+        # CLUSTER_BUSTER: every pair whose confidence intervals overlap,
+        # weighted by the squared overlap
+        first, second = np.triu_indices(len(self.pool), k=1)
+        overlap = np.minimum(upper[first], upper[second]) - np.maximum(lower[first], lower[second])
+        overlapping = overlap > 0
+        self.pairs = np.stack([first[overlapping], second[overlapping]], axis=1)
+        self.pair_weights = overlap[overlapping] ** 2
+        self.pairs_cdf = _cumulative(self.pair_weights)
+
+        # Upstream provider of each model, for load-aware draws
+        self.model_providers = [get_model_provider(m.model_code) for m in self.models]
+        self.pool_providers = [get_model_provider(m.model_code) for m in self.pool]
+        self.providers = sorted(set(self.model_providers))
+
+    @staticmethod
+    def _get_stats(model, leaderboard_stats):
+        # Match DB model_code with the leaderboard JSON model name
+        entry = leaderboard_stats.get(model.model_code)
+        if not entry:
+            return DEFAULT_STATS
+        return {
+            'score': entry['score'],
+            'upper': entry['ci_upper'],
+            'lower': entry['ci_lower'],
+            'ci_width': entry['ci_width'],
+            'attempts': entry['battles'],
+        }
+
+    def pick_mode(self):
+        index = _draw_index(self.mode_cdf)
+        return random.choice(self.modes) if index is None else self.modes[index]
+
+    def _draw_distinct(self, cumulative):
+        first = _draw_index(cumulative)
+        if first is None:
+            return None
+        # Second pick from the remaining weight rather than redrawing,
+        # which spins when one model holds most of the weight
+        second = _draw_index(cumulative, exclude=first)
+        if second is None:
+            return None
+        return self.pool[first], self.pool[second]
+
+    def _provider_factors(self, provider_weights):
+        """
+        Per-model and per-pool-model weight factors, or None when every
+        provider is healthy or fewer than two models would remain.
+        """
+        if not provider_weights or all(provider_weights.get(p, 1.0) >= 1.0 for p in self.providers):
+            return None
+        model_factors = np.array([provider_weights.get(p, 1.0) for p in self.model_providers])
+        pool_factors = np.array([provider_weights.get(p, 1.0) for p in self.pool_providers])
+        if np.count_nonzero(pool_factors) < 2:
+            # Never block session creation; sample as if all were healthy
+            return None
+        return model_factors, pool_factors
+
+    def draw(self, provider_weights=None):
+        """
+        Pick (model_a, model_b) with the active sampling strategy.
+        `provider_weights` ({provider: 0..1}) down-weights degraded providers
+        and excludes those at 0.
+        """
+        factors = self._provider_factors(provider_weights)
+        mode = self.pick_mode()
+
+        if factors is None:
+            model_factors = None
+            trials_cdf, ci_cdf, pairs_cdf = self.trials_cdf, self.ci_cdf, self.pairs_cdf
+        else:
+            model_factors, pool_factors = factors
+            trials_cdf = _cumulative(self.trials_weights * pool_factors)
+            ci_cdf = _cumulative(self.ci_weights * pool_factors)
+            pairs_cdf = _cumulative(self.pair_weights * pool_factors[self.pairs[:, 0]] * pool_factors[self.pairs[:, 1]])
+
+        if mode == "FRESHER" and self.freshers:
+            pair = self._draw_fresher(model_factors)
+        elif mode == "BY_TRIALS":
+            pair = self._draw_distinct(trials_cdf)
+        elif mode == "BY_CI":
+            pair = self._draw_distinct(ci_cdf)
+        elif mode == "CLUSTER_BUSTER":
+            index = _draw_index(pairs_cdf)
+            pair = None if index is None else (self.pool[self.pairs[index][0]], self.pool[self.pairs[index][1]])
+        else:
+            pair = None
+
+        # Fallback to random if cluster buster fails or mode is unrecognized
+        if pair:
+            return pair
+        if model_factors is None:
+            return tuple(random.sample(self.models, 2))
+        available = [m for m, factor in zip(self.models, model_factors) if factor > 0]
+        return tuple(random.sample(available if len(available) >= 2 else self.models, 2))
+
+    def _draw_fresher(self, model_factors):
+        if model_factors is None:
+            student = random.choice(self.freshers)
+            teacher = random.choice([m for m in self.models if m.id != student.id])
+        else:
+            factor = dict(zip((m.id for m in self.models), model_factors))
+            freshers = [m for m in self.freshers if factor[m.id] > 0]
+            if not freshers:
+                return None
+            student = random.choice(freshers)
+            opponents = [m for m in self.models if m.id != student.id and factor[m.id] > 0]
+            if not opponents:
+                return None
+            teacher = random.choices(opponents, weights=[factor[m.id] for m in opponents], k=1)[0]
+        # Randomize order so fresher isn't always model_a
+        return (student, teacher) if random.random() > 0.5 else (teacher, student)
+
+
+def get_leaderboard_stats(model_type):
+    """Active leaderboard rows keyed by model code; only LLM sessions are actively sampled."""
+    if model_type != "LLM":
+        return {}
+    leaderboard_entry = exclude_modality_slices(Leaderboard.objects.filter(
+        arena_type="llm", organization="ai4b", language="Overall", is_active=True
+    )).first()
+    if not leaderboard_entry:
+        logger.warning("active_sampling: no leaderboard entry found; all models will use default stats")
+        return {}
+    return {entry['model']: entry for entry in leaderboard_entry.leaderboard_json}
+
+
+def get_snapshot_version(db):
+    key = SNAPSHOT_VERSION_KEY.format(db=db)
+    version = cache.get(key)
+    if version is None:
+        # A fresh token, never a reset counter, so an evicted key cannot
+        # revive a snapshot built before the last change
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_snapshots(db='default'):
+    cache.set(SNAPSHOT_VERSION_KEY.format(db=db), uuid.uuid4().hex, None)
+
+
+def get_snapshot(model_type, requires_multimodal, academic, build):
+    """
+    Cached snapshot for one (model_type, requires_multimodal, academic) pool.
+    `build` returns a new SamplerSnapshot on a miss.
+    """
+    db = router.db_for_read(AIModel)
+    key = (db, model_type, requires_multimodal, academic)
+    version = get_snapshot_version(db)
+
+    cached = _snapshots.get(key)
+    if cached and version is not None and cached[0] == version:
+        return cached[1]
+
+    snapshot = build()
+    _snapshots[key] = (version, snapshot)
+    return snapshot
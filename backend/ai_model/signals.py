@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ai_model.models import AIModel
+from ai_model.sampler import invalidate_snapshots
+from leaderboards.models import Leaderboard
+
+
+@receiver(post_save, sender=AIModel)
+@receiver(post_delete, sender=AIModel)
+@receiver(post_save, sender=Leaderboard)
+@receiver(post_delete, sender=Leaderboard)
+def invalidate_sampler_snapshots(sender, using='default', **kwargs):
+    """Rebuild sampler snapshots once the model pool or leaderboard change is committed"""
+    transaction.on_commit(lambda: invalidate_snapshots(using), using=using)
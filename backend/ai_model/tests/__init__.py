@@ -0,0 +1 @@
+# ai_model tests package
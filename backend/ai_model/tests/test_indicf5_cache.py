@@ -0,0 +1,147 @@
+"""
+Tests for IndicF5 warm-path caching.
+
+Verifies that:
+- Triton clients are returned to a shared pool and reused by later
+  requests on other threads.
+- A client whose request raised is closed and replaced.
+- Waiting for a free client times out instead of blocking forever.
+- Reference speaker audio is decoded once per (path, sampling_rate), and
+  clips preloaded at startup are cache hits for requests.
+- Server startup preloads the reference clips in the background only when
+  INDICF5_WARM_REFERENCES is set.
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import TestCase
+
+from ai_model import tts_interactions
+
+
+class IndicF5ClientTests(TestCase):
+
+    def setUp(self):
+        self.pool = patch.object(tts_interactions, '_indicf5_client_pool', queue.LifoQueue(maxsize=2))
+        self.slots = patch.object(tts_interactions, '_indicf5_slots', threading.BoundedSemaphore(2))
+        self.pool.start()
+        self.slots.start()
+
+    def tearDown(self):
+        self.pool.stop()
+        self.slots.stop()
+
+    @patch('ai_model.tts_interactions._create_indicf5_client')
+    def test_client_is_reused_across_threads(self, mock_create):
+        mock_create.side_effect = lambda: MagicMock()
+
+        with tts_interactions.indicf5_client() as first:
+            pass
+
+        def borrow(clients):
+            with tts_interactions.indicf5_client() as client:
+                clients.append(client)
+
+        other = []
+        thread = threading.Thread(target=borrow, args=(other,))
+        thread.start()
+        thread.join()
+
+        self.assertIs(other[0], first)
+        # Two requests at once get two clients
+        with tts_interactions.indicf5_client() as a, tts_interactions.indicf5_client() as b:
+            self.assertIsNot(a, b)
+        self.assertEqual(mock_create.call_count, 2)
+
+    @patch('ai_model.tts_interactions._create_indicf5_client')
+    def test_failed_client_is_discarded(self, mock_create):
+        mock_create.side_effect = lambda: MagicMock()
+
+        with self.assertRaises(RuntimeError):
+            with tts_interactions.indicf5_client() as broken:
+                raise RuntimeError("connection reset")
+        with tts_interactions.indicf5_client() as replacement:
+            pass
+
+        self.assertIsNot(broken, replacement)
+        broken.close.assert_called_once()
+
+    @patch('ai_model.tts_interactions._create_indicf5_client', side_effect=lambda: MagicMock())
+    def test_busy_slots_time_out(self, mock_create):
+        with patch.object(tts_interactions, '_indicf5_slots', threading.BoundedSemaphore(1)), \
+                patch.object(tts_interactions, '_indicf5_client_pool', queue.LifoQueue(maxsize=1)):
+            with tts_interactions.indicf5_client():
+                with self.assertRaisesMessage(Exception, 'busy'):
+                    with tts_interactions.indicf5_client(timeout=0.01):
+                        pass
+            # The client is returned once the first request is done
+            with tts_interactions.indicf5_client(timeout=0.01):
+                pass
+
+
+class IndicF5ReferenceCacheTests(TestCase):
+
+    def setUp(self):
+        tts_interactions.load_reference_audio.cache_clear()
+        tts_interactions.get_indicf5_references.cache_clear()
+
+    def tearDown(self):
+        tts_interactions.load_reference_audio.cache_clear()
+        tts_interactions.get_indicf5_references.cache_clear()
+
+    @patch('librosa.load')
+    def test_reference_audio_decoded_once(self, mock_load):
+        mock_load.return_value = (np.zeros(10, dtype=np.float64), 24000)
+
+        first = tts_interactions.load_reference_audio('/refs/a.wav', 24000)
+        second = tts_interactions.load_reference_audio('/refs/a.wav', 24000)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.dtype, np.float32)
+        self.assertFalse(first.flags.writeable)
+        mock_load.assert_called_once_with('/refs/a.wav', sr=24000)
+
+    @patch('librosa.load')
+    def test_warmed_clips_serve_requests(self, mock_load):
+        mock_load.return_value = (np.zeros(10, dtype=np.float64), 24000)
+        with tempfile.TemporaryDirectory() as base:
+            os.makedirs(os.path.join(base, 'Hindi'))
+            with open(os.path.join(base, 'Hindi', 'train.jsonl'), 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'audio_filepath': 'm.wav', 'text': 'x', 'gender': 'male'}) + '\n')
+
+            with patch.object(tts_interactions, 'INDICF5_AUDIO_BASE', base):
+                self.assertEqual(tts_interactions.warm_indicf5_references(), 1)
+
+            path = os.path.join(base, 'Hindi', 'm.wav')
+            tts_interactions.load_reference_audio(path, tts_interactions.INDICF5_SAMPLING_RATE)
+
+        info = tts_interactions.load_reference_audio.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_references_grouped_by_gender(self):
+        with tempfile.TemporaryDirectory() as base:
+            os.makedirs(os.path.join(base, 'Hindi'))
+            with open(os.path.join(base, 'Hindi', 'train.jsonl'), 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'audio_filepath': 'm.wav', 'text': 'x', 'gender': 'Male'}) + '\n')
+                f.write(json.dumps({'audio_filepath': 'f.wav', 'text': 'y', 'gender': 'female'}) + '\n')
+
+            with patch.object(tts_interactions, 'INDICF5_AUDIO_BASE', base):
+                references = tts_interactions.get_indicf5_references('Hindi')
+
+        self.assertEqual([e['audio_filepath'] for e in references['male']], ['m.wav'])
+        self.assertEqual([e['audio_filepath'] for e in references['female']], ['f.wav'])
+
+    @patch('ai_model.tts_interactions.warm_indicf5_references', return_value=3)
+    def test_startup_warmup(self, mock_warm):
+        with patch.dict(os.environ, {'INDICF5_WARM_REFERENCES': ''}):
+            self.assertIsNone(tts_interactions.start_indicf5_warmup())
+        mock_warm.assert_not_called()
+
+        with patch.dict(os.environ, {'INDICF5_WARM_REFERENCES': 'true'}):
+            tts_interactions.start_indicf5_warmup().join()
+        mock_warm.assert_called_once_with()
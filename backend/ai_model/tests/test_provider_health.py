@@ -0,0 +1,151 @@
+"""
+Tests for live provider health and load-aware sampling.
+
+Verifies that:
+- track_stream counts requests, first-token latency and errors, and always
+  releases its in-flight slot.
+- The in-flight gauge's expiry is pushed out on every update, so it does not
+  reset while streams are open.
+- Providers are excluded or down-weighted only past the thresholds, and
+  only with enough traffic for error rates and TTFT.
+- Sampling never picks a model of an excluded provider, unless that would
+  leave fewer than two models.
+- The admin endpoint reports each provider's health and weight.
+"""
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ai_model import provider_health
+from ai_model.utils import ModelSelector
+from ai_model.view import AIModelViewSet
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_model(model_code):
+    return SimpleNamespace(id=uuid.uuid4(), model_code=model_code, is_fresh_model=False)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TrackStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_successful_stream(self):
+        chunks = list(provider_health.track_stream('openai', iter(['a', 'b'])))
+
+        self.assertEqual(chunks, ['a', 'b'])
+        health = provider_health.get_provider_health(['openai'])['openai']
+        self.assertEqual((health['requests'], health['errors'], health['in_flight']), (1, 0, 0))
+        self.assertEqual(health['ttft_p95_ms'], provider_health.TTFT_BUCKETS_MS[0])
+
+    def test_failed_stream(self):
+        def failing():
+            yield 'a'
+            raise RuntimeError('upstream 503')
+
+        with self.assertRaises(RuntimeError):
+            list(provider_health.track_stream('google', failing()))
+
+        health = provider_health.get_provider_health(['google'])['google']
+        self.assertEqual((health['requests'], health['errors'], health['in_flight']), (1, 1, 0))
+
+    def test_in_flight_while_streaming(self):
+        stream = provider_health.track_stream('anthropic', iter(['a', 'b']))
+        next(stream)
+        self.assertEqual(provider_health.get_provider_health(['anthropic'])['anthropic']['in_flight'], 1)
+        stream.close()
+        self.assertEqual(provider_health.get_provider_health(['anthropic'])['anthropic']['in_flight'], 0)
+
+
+    def test_in_flight_expiry_refreshed(self):
+        with patch.object(cache, 'touch', wraps=cache.touch) as mock_touch:
+            provider_health._update_in_flight('openai', 1)
+            provider_health._update_in_flight('openai', 1)
+
+        key = provider_health.IN_FLIGHT_KEY.format(provider='openai')
+        mock_touch.assert_called_with(key, provider_health.IN_FLIGHT_TTL)
+        self.assertEqual(mock_touch.call_count, 2)
+        self.assertEqual(cache.get(key), 2)
+
+
+class HealthWeightTests(TestCase):
+
+    def test_healthy(self):
+        self.assertEqual(provider_health.health_weight(100, 2, 1000, 3)[:2], (1.0, 'healthy'))
+
+    def test_excluded_on_error_rate(self):
+        self.assertEqual(provider_health.health_weight(100, 60, 1000, 0)[:2], (0.0, 'excluded'))
+
+    def test_degraded_on_ttft(self):
+        weight, status, reasons = provider_health.health_weight(100, 0, 10000, 0)
+        self.assertEqual(status, 'degraded')
+        self.assertAlmostEqual(weight, provider_health.TTFT_DEGRADED_MS / 10000)
+
+    def test_low_traffic_is_not_judged(self):
+        self.assertEqual(provider_health.health_weight(3, 3, 30000, 0)[:2], (1.0, 'healthy'))
+
+    def test_ttft_percentile(self):
+        histogram = [0] * (len(provider_health.TTFT_BUCKETS_MS) + 1)
+        histogram[1], histogram[4] = 90, 10
+        self.assertEqual(provider_health.ttft_percentile(histogram), provider_health.TTFT_BUCKETS_MS[4])
+        self.assertIsNone(provider_health.ttft_percentile([0, 0]))
+
+
+class LoadAwareSamplingTests(TestCase):
+
+    def setUp(self):
+        self.models = [make_model('gpt-5'), make_model('gpt-4o'), make_model('gemini-2.5-pro'),
+                       make_model('claude-sonnet-4')]
+        self.snapshot = ModelSelector.build_sampler(self.models, {})
+
+    def test_excluded_provider_never_drawn(self):
+        weights = {'openai': 0.0, 'google': 1.0, 'anthropic': 1.0}
+        for mode in ('BY_TRIALS', 'BY_CI', 'CLUSTER_BUSTER', 'UNKNOWN'):
+            with patch.object(self.snapshot, 'pick_mode', return_value=mode):
+                for _ in range(30):
+                    pair = self.snapshot.draw(weights)
+                    self.assertFalse({m.model_code for m in pair} & {'gpt-5', 'gpt-4o'})
+
+    def test_health_ignored_when_too_few_models_remain(self):
+        weights = {'openai': 0.0, 'google': 0.0, 'anthropic': 1.0}
+        with patch.object(self.snapshot, 'pick_mode', return_value='BY_TRIALS'):
+            model_a, model_b = self.snapshot.draw(weights)
+        self.assertNotEqual(model_a.id, model_b.id)
+
+    def test_healthy_weights_use_cached_distributions(self):
+        self.assertIsNone(self.snapshot._provider_factors({'openai': 1.0, 'google': 1.0}))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProviderHealthEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('ai_model.view.AIModel.objects.filter')
+    def test_reports_each_provider(self, mock_filter):
+        mock_filter.return_value = MagicMock(values_list=MagicMock(return_value=['gpt-5', 'gemini-2.5-pro']))
+        list(provider_health.track_stream('openai', iter(['a'])))
+
+        request = APIRequestFactory().get('/models/provider-health/')
+        force_authenticate(request, user=SimpleNamespace(pk=1, is_staff=True, is_authenticated=True))
+        response = AIModelViewSet.as_view({'get': 'provider_health'})(request)
+
+        self.assertEqual(response.status_code, 200)
+        providers = {p['provider']: p for p in response.data['providers']}
+        self.assertEqual(providers['openai']['requests'], 1)
+        self.assertEqual(providers['openai']['models'], ['gpt-5'])
+        self.assertEqual(providers['google']['status'], 'healthy')
+
+    def test_requires_admin(self):
+        request = APIRequestFactory().get('/models/provider-health/')
+        force_authenticate(request, user=SimpleNamespace(pk=2, is_staff=False, is_authenticated=True))
+        response = AIModelViewSet.as_view({'get': 'provider_health'})(request)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,157 @@
+"""
+Tests for the cached active-sampling snapshot.
+
+Verifies that:
+- CLUSTER_BUSTER only draws pairs whose confidence intervals overlap.
+- BY_TRIALS and BY_CI always return two distinct models, drawing the second
+  from the remaining weight, and BY_TRIALS favours models with few battles.
+- Snapshots are reused until an AIModel or Leaderboard change bumps the version.
+- get_random_models_for_comparison builds the pool once per snapshot.
+- Leaderboard stats come from the main board, never a per-modality slice.
+"""
+import random
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ai_model import sampler
+from ai_model.utils import ModelSelector
+from leaderboards.models import Leaderboard
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_models(count, fresh=()):
+    return [
+        SimpleNamespace(id=uuid.uuid4(), model_code=f"model-{i}", is_fresh_model=i in fresh)
+        for i in range(count)
+    ]
+
+
+def leaderboard_row(score, ci, battles):
+    return {'score': score, 'ci_upper': score + ci, 'ci_lower': score - ci, 'ci_width': 2 * ci, 'battles': battles}
+
+
+class SamplerSnapshotTests(TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        self.models = make_models(4)
+        self.stats = {
+            'model-0': leaderboard_row(1000, 10, 500),
+            'model-1': leaderboard_row(1005, 10, 500),
+            'model-2': leaderboard_row(1300, 10, 500),
+            'model-3': leaderboard_row(1600, 10, 0),
+        }
+        self.snapshot = ModelSelector.build_sampler(self.models, self.stats)
+
+    def test_cluster_buster_draws_overlapping_pairs(self):
+        self.assertEqual(len(self.snapshot.pairs), 1)
+        with patch.object(self.snapshot, 'pick_mode', return_value='CLUSTER_BUSTER'):
+            for _ in range(20):
+                pair = self.snapshot.draw()
+                self.assertEqual({m.model_code for m in pair}, {'model-0', 'model-1'})
+
+    def test_weighted_modes_draw_distinct_models(self):
+        for mode in ('BY_TRIALS', 'BY_CI'):
+            with patch.object(self.snapshot, 'pick_mode', return_value=mode):
+                for _ in range(50):
+                    model_a, model_b = self.snapshot.draw()
+                    self.assertNotEqual(model_a.id, model_b.id)
+
+    def test_by_trials_favours_unplayed_models(self):
+        with patch.object(self.snapshot, 'pick_mode', return_value='BY_TRIALS'):
+            counts = Counter(m.model_code for _ in range(200) for m in self.snapshot.draw())
+        self.assertEqual(counts['model-3'], 200)
+
+    def test_excluded_index_is_never_drawn(self):
+        cumulative = sampler._cumulative([1.0, 1000.0, 1.0])
+        draws = Counter(sampler._draw_index(cumulative, exclude=1) for _ in range(500))
+        self.assertNotIn(1, draws)
+        self.assertEqual(set(draws), {0, 2})
+        self.assertIsNone(sampler._draw_index(sampler._cumulative([0.0, 5.0]), exclude=1))
+
+    def test_fresher_mode_includes_fresh_model(self):
+        snapshot = ModelSelector.build_sampler(make_models(3, fresh={0}), {})
+        with patch.object(snapshot, 'pick_mode', return_value='FRESHER'):
+            pair = snapshot.draw()
+        self.assertIn('model-0', {m.model_code for m in pair})
+
+    def test_not_enough_models(self):
+        with self.assertRaises(ValueError):
+            ModelSelector.build_sampler(make_models(1), {})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SnapshotCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        sampler._snapshots.clear()
+
+    def test_reused_until_invalidated(self):
+        build = MagicMock(side_effect=lambda: object())
+
+        first = sampler.get_snapshot('LLM', False, False, build)
+        self.assertIs(sampler.get_snapshot('LLM', False, False, build), first)
+        build.assert_called_once()
+
+        sampler.invalidate_snapshots('default')
+        self.assertIsNot(sampler.get_snapshot('LLM', False, False, build), first)
+        self.assertEqual(build.call_count, 2)
+
+    def test_pools_are_cached_separately(self):
+        build = MagicMock(side_effect=lambda: object())
+        sampler.get_snapshot('LLM', False, False, build)
+        sampler.get_snapshot('LLM', True, False, build)
+        sampler.get_snapshot('LLM', False, True, build)
+        self.assertEqual(build.call_count, 3)
+
+    @patch('ai_model.utils.get_leaderboard_stats', return_value={})
+    @patch('ai_model.utils.AIModel.objects.filter')
+    def test_random_models_query_pool_once(self, mock_filter, mock_stats):
+        models = make_models(3)
+        queryset = MagicMock()
+        queryset.exclude.return_value = queryset
+        queryset.filter.return_value = queryset
+        queryset.__iter__.side_effect = lambda: iter(models)
+        mock_filter.return_value = queryset
+
+        for _ in range(5):
+            model_a, model_b = ModelSelector.get_random_models_for_comparison(model_type='LLM', mode='random')
+            self.assertNotEqual(model_a.id, model_b.id)
+
+        mock_filter.assert_called_once()
+        mock_stats.assert_called_once_with('LLM')
+
+    @patch('ai_model.utils.AIModel.objects.filter')
+    def test_multimodal_pool_too_small(self, mock_filter):
+        queryset = MagicMock()
+        queryset.exclude.return_value = queryset
+        queryset.filter.return_value = queryset
+        queryset.__iter__.side_effect = lambda: iter(make_models(1))
+        mock_filter.return_value = queryset
+
+        with self.assertRaisesMessage(ValueError, 'multimodal'):
+            ModelSelector.get_random_models_for_comparison(model_type='LLM', requires_multimodal=True)
+
+
+class LeaderboardStatsTests(TestCase):
+
+    def test_ignores_modality_slices(self):
+        Leaderboard.objects.create(
+            leaderboard_json=[{'model': 'model-0', **leaderboard_row(1400, 10, 50)}], arena_type='llm',
+            organization='ai4b', language='Overall', benchmark_name='llm-arena-image',
+        )
+        self.assertEqual(sampler.get_leaderboard_stats('LLM'), {})
+
+        Leaderboard.objects.create(
+            leaderboard_json=[{'model': 'model-0', **leaderboard_row(1000, 10, 500)}], arena_type='llm',
+            organization='ai4b', language='Overall', benchmark_name='llm-arena',
+        )
+        self.assertEqual(sampler.get_leaderboard_stats('LLM')['model-0']['score'], 1000)
+        self.assertEqual(sampler.get_leaderboard_stats('TTS'), {})
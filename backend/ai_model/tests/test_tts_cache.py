@@ -0,0 +1,81 @@
+"""
+Tests for the content-addressed TTS asset cache.
+
+Verifies that:
+- Cache keys depend on text, model, voice and language, and on gender only
+  when no explicit voice is given.
+- A cache hit returns the stored object without calling the provider.
+- A miss synthesizes once and moves the upload to its content-addressed path.
+- The lookup-only path (used before progressive streaming) treats storage
+  errors as a miss.
+"""
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from ai_model import tts_cache
+
+
+class TtsCacheKeyTests(TestCase):
+
+    def test_key_is_deterministic(self):
+        key_1 = tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', voice='v1')
+        key_2 = tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', voice='v1')
+        self.assertEqual(key_1, key_2)
+
+    def test_key_varies_with_inputs(self):
+        base = tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', voice='v1')
+        self.assertNotEqual(base, tts_cache.get_tts_cache_key('namaste!', 'hi', 'sonic-2', voice='v1'))
+        self.assertNotEqual(base, tts_cache.get_tts_cache_key('namaste', 'mr', 'sonic-2', voice='v1'))
+        self.assertNotEqual(base, tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-3', voice='v1'))
+        self.assertNotEqual(base, tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', voice='v2'))
+
+    def test_gender_ignored_when_voice_is_fixed(self):
+        self.assertEqual(
+            tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', gender='male', voice='v1'),
+            tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', gender='female', voice='v1'),
+        )
+        self.assertNotEqual(
+            tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', gender='male'),
+            tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', gender='female'),
+        )
+
+
+@patch('ai_model.tts_cache.generate_signed_url', return_value='https://signed')
+@patch('ai_model.tts_cache.cache')
+@patch('ai_model.tts_cache.get_bucket')
+class GetCachedTtsOutputTests(TestCase):
+
+    @patch('ai_model.tts_cache.get_tts_output')
+    def test_hit_skips_provider(self, mock_tts, mock_get_bucket, mock_cache, mock_sign):
+        mock_cache.get.return_value = 'tts-cache/abc.wav'
+
+        output = tts_cache.get_cached_tts_output('namaste', 'hi', 'sonic-2', voice='v1')
+
+        mock_tts.assert_not_called()
+        self.assertEqual(output, {'path': 'tts-cache/abc.wav', 'url': 'https://signed', 'cached': True})
+
+    @patch('ai_model.tts_cache.get_tts_output')
+    def test_miss_synthesizes_and_stores(self, mock_tts, mock_get_bucket, mock_cache, mock_sign):
+        mock_cache.get.return_value = None
+        bucket = MagicMock()
+        bucket.blob.return_value.exists.return_value = False
+        mock_get_bucket.return_value = bucket
+        mock_tts.return_value = {'path': 'tts-audios/tmp.wav', 'url': 'https://tmp'}
+
+        output = tts_cache.get_cached_tts_output('namaste', 'hi', 'sonic-2', voice='v1')
+
+        key = tts_cache.get_tts_cache_key('namaste', 'hi', 'sonic-2', voice='v1')
+        mock_tts.assert_called_once()
+        bucket.rename_blob.assert_called_once()
+        self.assertEqual(bucket.rename_blob.call_args[0][1], f'tts-cache/{key}.wav')
+        self.assertEqual(output['path'], f'tts-cache/{key}.wav')
+        self.assertFalse(output['cached'])
+
+    def test_lookup_failure_is_a_miss(self, mock_get_bucket, mock_cache, mock_sign):
+        mock_cache.get.return_value = None
+        mock_get_bucket.side_effect = ConnectionError('gcs unavailable')
+        self.assertIsNone(tts_cache.find_cached_tts_path('namaste', 'hi', 'sonic-2', voice='v1'))
+
+        mock_cache.get.return_value = 'tts-cache/abc.wav'
+        self.assertEqual(tts_cache.find_cached_tts_path('namaste', 'hi', 'sonic-2', voice='v1'), 'tts-cache/abc.wav')
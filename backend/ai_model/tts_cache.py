@@ -0,0 +1,102 @@
+"""
+Content-addressed cache for synthesized TTS audio.
+
+Academic mode replays a fixed set of (prompt, model, voice) tuples, so the
+synthesized WAV for a tuple is stored once in GCS under a name derived from
+its content hash and reused for every later battle.
+"""
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+
+from ai_model.tts_interactions import get_tts_output
+from common.storage_signer import get_bucket
+from message.utils import generate_signed_url
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_FOLDER = 'tts-cache'
+TTS_CACHE_PREFIX = 'tts_asset'
+TTS_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+TTS_SIGNED_URL_EXPIRATION = 900
+
+
+def get_tts_cache_key(tts_input, lang, model, gender=None, voice=None):
+    """
+    Hash of everything that determines the synthesized audio. Gender only
+    participates when no explicit voice is given, because then it drives the
+    provider's voice choice.
+    """
+    payload = json.dumps(
+        [tts_input, model, voice or '', '' if voice else (gender or '').lower(), lang or ''],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_tts_cache_path(cache_key):
+    return f"{TTS_CACHE_FOLDER}/{cache_key}.wav"
+
+
+def _lookup_cached_path(cache_key):
+    """Return the GCS path for a cache key if the object exists."""
+    redis_key = f"{TTS_CACHE_PREFIX}:{cache_key}"
+    path = cache.get(redis_key)
+    if path:
+        return path
+
+    path = get_tts_cache_path(cache_key)
+    bucket = get_bucket()
+    if bucket.blob(path).exists():
+        cache.set(redis_key, path, TTS_CACHE_TIMEOUT)
+        return path
+    return None
+
+
+def _store_in_cache(cache_key, output):
+    """Move a freshly uploaded WAV to its content-addressed name."""
+    path = get_tts_cache_path(cache_key)
+    bucket = get_bucket()
+    bucket.rename_blob(bucket.blob(output['path']), path)
+    cache.set(f"{TTS_CACHE_PREFIX}:{cache_key}", path, TTS_CACHE_TIMEOUT)
+    return path
+
+
+def find_cached_tts_path(tts_input, lang, model, gender=None, voice=None):
+    """GCS path of previously synthesized audio for a request, or None. Lookup failures count as a miss."""
+    try:
+        return _lookup_cached_path(get_tts_cache_key(tts_input, lang, model, gender=gender, voice=voice))
+    except Exception as e:
+        logger.warning(f"TTS cache lookup failed for {model}: {e}")
+        return None
+
+
+def get_cached_tts_output(tts_input, lang, model, gender=None, voice=None, **kwargs):
+    """
+    Drop-in replacement for get_tts_output that serves identical requests from
+    the stored GCS object. Returns the same {'path', 'url'} dict plus a
+    'cached' flag. Cache failures never block synthesis.
+    """
+    cache_key = get_tts_cache_key(tts_input, lang, model, gender=gender, voice=voice)
+
+    try:
+        path = _lookup_cached_path(cache_key)
+        if path:
+            url = generate_signed_url(path, TTS_SIGNED_URL_EXPIRATION)
+            if url:
+                return {'path': path, 'url': url, 'cached': True}
+    except Exception as e:
+        logger.warning(f"TTS cache lookup failed for {model}: {e}")
+
+    output = get_tts_output(tts_input, lang, model, gender=gender, voice=voice, **kwargs)
+
+    try:
+        path = _store_in_cache(cache_key, output)
+        # The original object has been renamed, so its URL is no longer valid
+        return {'path': path, 'url': generate_signed_url(path, TTS_SIGNED_URL_EXPIRATION), 'cached': False}
+    except Exception as e:
+        logger.warning(f"TTS cache store failed for {model}: {e}")
+
+    return {**output, 'cached': False}
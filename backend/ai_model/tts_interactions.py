@@ -14,10 +14,16 @@ from elevenlabs.client import ElevenLabs
 import tritonclient.http as http_client
 from tritonclient.utils import np_to_triton_dtype
 import numpy as np
-import librosa
 from scipy.io.wavfile import write as scipy_wav_write
 import io
 import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
 
 misc_tts_url = os.getenv("MISC_TTS_API_URL")
 indo_aryan_tts_url = os.getenv("INDO_ARYAN_TTS_API_URL")
@@ -29,6 +35,11 @@ openai_api_key = os.getenv("OPENAI_API_KEY_GPT_5")
 minimax_api_key = os.getenv("MINIMAX_API_KEY")
 cartesia_api_key = os.getenv("CARTESIA_API_KEY")
 indicf5_api_key = os.getenv("INDICF5_API_KEY")
+indicf5_endpoint = os.getenv("INDICF5_ENDPOINT")
+INDICF5_CLIENT_POOL_SIZE = int(os.getenv("INDICF5_CLIENT_POOL_SIZE", 4))
+INDICF5_CLIENT_WAIT_SECONDS = float(os.getenv("INDICF5_CLIENT_WAIT_SECONDS", 30))
+INDICF5_SAMPLING_RATE = 24000
+INDICF5_AUDIO_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "academic_prompts", "indicF5Audios")
 elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
 sarvam_api_url = os.getenv("SARVAM_API_URL")
 sarvam_api_key = os.getenv("SARVAM_API_KEY_BULBUL")
@@ -42,6 +53,44 @@ LANG_CODE_TO_NAME = {
     "sat": "Santali", "sa": "Sanskrit", "gom": "Konkani", "en": "English",
 }
 
+GEMINI_SPEAKERS_MALE = ["Achird", "Algenib", "Algieba", "Alnilam", "Charon", "Enceladus", "Fenrir", "Iapetus", "Orus", "Puck", "Rasalgethi", "Sadachbia", "Sadaltager", "Schedar", "Umbriel", "Zubenelgenubi"]
+GEMINI_SPEAKERS_FEMALE = ["Achernar", "Aoede", "Autonoe", "Callirrhoe", "Despina", "Erinome", "Gacrux", "Kore", "Laomedeia", "Leda", "Pulcherrima", "Sulafat", "Vindemiatrix", "Zephyr"]
+
+ELEVENLABS_VOICE_MAP = {
+    "male": [
+        "JBFqnCBsd6RMkjVDRZzb",  # George
+        "TX3LPaxmHKxFdv7VOQHJ",  # Liam
+        "pqHfZKP75CvOlQylNhV4",  # Bill
+    ],
+    "female": [
+        "EXAVITQu4vr4xnSDxMaL",  # Sarah
+        "XB0fDUnXU5powFXDhCwa",  # Charlotte
+        "Xb7hH8MSUJpSbSDYk0k2",  # Alice
+    ]
+}
+
+OPENAI_VOICE_MAP = {
+    "male": ["onyx", "echo", "ash", "fable", "verse", "ballad", "cedar"],
+    "female": ["nova", "shimmer", "coral", "alloy", "sage", "marin", "breeze", "cove", "ember", "juniper", "maple"]
+}
+
+OPENAI_TTS_INSTRUCTIONS = (
+    "Speak clearly and naturally with a warm, conversational tone. "
+    "Pronounce Indian names, places, and words accurately with proper emphasis. "
+    "Maintain a steady, moderate pace suitable for easy comprehension."
+)
+
+CARTESIA_VOICE_MAP = {
+    "male": [
+        "c961b81c-a935-4c17-bfb3-ba2239de8c2f",  # Kyle
+        "a0e99841-438c-4a64-b679-ae501e7d6091",  # Barbershop Man
+    ],
+    "female": [
+        "6ccbfb76-1fc6-48f7-b71d-91ac6298247b",  # Tessa
+        "f9836c6e-a0bd-460e-9d3c-f7299fa60f94",  # Default Female
+    ]
+}
+
 def get_tts_url(language):
     if language in ["brx", "en", "mni"]:
         return misc_tts_url
@@ -122,8 +171,6 @@ def get_sarvam_tts_output(tts_input, lang, model, gender, voice=None, log_contex
 
 def get_gemini_output(tts_input, lang, model, gender, voice=None, log_context=None):
     PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-    speakerMale = ["Achird", "Algenib", "Algieba", "Alnilam", "Charon", "Enceladus", "Fenrir", "Iapetus", "Orus", "Puck", "Rasalgethi", "Sadachbia", "Sadaltager", "Schedar", "Umbriel", "Zubenelgenubi"]
-    speakerFemale = ["Achernar", "Aoede", "Autonoe", "Callirrhoe", "Despina", "Erinome", "Gacrux", "Kore", "Laomedeia", "Leda", "Pulcherrima", "Sulafat", "Vindemiatrix", "Zephyr"]
     lang = "kok" if lang == "gom" else lang
     try:
         client = texttospeech.TextToSpeechClient(client_options=ClientOptions(api_endpoint="texttospeech.googleapis.com"))
@@ -132,9 +179,9 @@ def get_gemini_output(tts_input, lang, model, gender, voice=None, log_context=No
         if voice:
             speaker = voice
         elif gender == "female":
-            speaker = random.choice(speakerFemale)
+            speaker = random.choice(GEMINI_SPEAKERS_FEMALE)
         else:
-            speaker = random.choice(speakerMale)
+            speaker = random.choice(GEMINI_SPEAKERS_MALE)
 
         language_code = "bn-BD" if lang == "bn" else "ur-PK" if lang == "ur" else f"{lang}-IN"
         voice = texttospeech.VoiceSelectionParams(
@@ -190,19 +237,6 @@ def get_elevenlabs_output(tts_input, lang, gender, voice=None, log_context=None)
         log_and_raise(e, model_code='elevenlabs', provider='elevenlabs', custom_message=f"ElevenLabs TTS error: {sanitize_error_message(e)}", log_context=log_context)
 
 def get_elevenlabs_tts_output(tts_input, model, gender, voice=None, log_context=None):
-    ELEVENLABS_VOICE_MAP = {
-        "male": [
-            "JBFqnCBsd6RMkjVDRZzb",  # George
-            "TX3LPaxmHKxFdv7VOQHJ",  # Liam
-            "pqHfZKP75CvOlQylNhV4",  # Bill
-        ],
-        "female": [
-            "EXAVITQu4vr4xnSDxMaL",  # Sarah
-            "XB0fDUnXU5powFXDhCwa",  # Charlotte
-            "Xb7hH8MSUJpSbSDYk0k2",  # Alice
-        ]
-    }
-
     try:
         client = ElevenLabs(api_key=elevenlabs_api_key)
         if voice:
@@ -265,17 +299,6 @@ def get_parler_output(tts_input, lang, gender, voice=None, log_context=None):
         log_and_raise(e, model_code='indicparlertts', provider='ai4bharat', custom_message=f"IndicParlerTTS error: {sanitize_error_message(e)}", log_context=log_context)
 
 def get_openai_tts_output(tts_input, model, gender, voice=None, log_context=None):
-    OPENAI_VOICE_MAP = {
-        "male": ["onyx", "echo", "ash", "fable", "verse", "ballad", "cedar"],
-        "female": ["nova", "shimmer", "coral", "alloy", "sage", "marin", "breeze", "cove", "ember", "juniper", "maple"]
-    }
-
-    INSTRUCTIONS = (
-        "Speak clearly and naturally with a warm, conversational tone. "
-        "Pronounce Indian names, places, and words accurately with proper emphasis. "
-        "Maintain a steady, moderate pace suitable for easy comprehension."
-    )
-
     try:
         if voice:
             selected_voice = voice
@@ -287,7 +310,7 @@ def get_openai_tts_output(tts_input, model, gender, voice=None, log_context=None
             "input": tts_input,
             "voice": selected_voice,
             "response_format": "wav",
-            "instructions": INSTRUCTIONS
+            "instructions": OPENAI_TTS_INSTRUCTIONS
         }
 
         response = requests.post(
@@ -373,17 +396,6 @@ def get_minimax_tts_output(tts_input, lang, model, gender, voice=None, log_conte
         log_and_raise(e, model_code=model, provider='minimax', custom_message=f"MiniMax TTS error: {sanitize_error_message(e)}", log_context=log_context)
 
 def get_cartesia_tts_output(tts_input, model, gender, voice=None, log_context=None):
-    CARTESIA_VOICE_MAP = {
-        "male": [
-            "c961b81c-a935-4c17-bfb3-ba2239de8c2f",  # Kyle
-            "a0e99841-438c-4a64-b679-ae501e7d6091",  # Barbershop Man
-        ],
-        "female": [
-            "6ccbfb76-1fc6-48f7-b71d-91ac6298247b",  # Tessa
-            "f9836c6e-a0bd-460e-9d3c-f7299fa60f94",  # Default Female
-        ]
-    }
-
     try:
         client = Cartesia(api_key=cartesia_api_key)
         if voice:
@@ -413,30 +425,124 @@ def get_cartesia_tts_output(tts_input, model, gender, voice=None, log_context=No
     except Exception as e:
         log_and_raise(e, model_code=model, provider='cartesia', custom_message=f"Cartesia TTS error: {sanitize_error_message(e)}", log_context=log_context)
 
+# IndicF5 keeps its Triton clients and decoded reference audio for the life of
+# the worker process, so a warm request does no connection setup and no decoding.
+# Clients live in one process-wide pool shared by every request thread (TTS
+# battles start a new thread per side), created lazily up to
+# INDICF5_CLIENT_POOL_SIZE.
+_indicf5_client_pool = queue.LifoQueue(maxsize=INDICF5_CLIENT_POOL_SIZE)
+_indicf5_slots = threading.BoundedSemaphore(INDICF5_CLIENT_POOL_SIZE)
+
+def _create_indicf5_client():
+    import gevent.ssl
+    return http_client.InferenceServerClient(
+        url=indicf5_endpoint,
+        verbose=False,
+        ssl=True,
+        ssl_context_factory=gevent.ssl._create_default_https_context,
+    )
+
+@contextmanager
+def indicf5_client(timeout=INDICF5_CLIENT_WAIT_SECONDS):
+    """
+    Check a Triton client out of the shared pool and return it afterwards.
+    Waits up to `timeout` seconds for one of the INDICF5_CLIENT_POOL_SIZE
+    slots; a free slot reuses an idle client or creates one. A client whose
+    request failed is closed instead of being returned.
+    """
+    if not _indicf5_slots.acquire(timeout=timeout):
+        raise Exception(f"IndicF5 is busy: no client freed up within {timeout}s")
+    try:
+        try:
+            client = _indicf5_client_pool.get_nowait()
+        except queue.Empty:
+            client = _create_indicf5_client()
+        try:
+            yield client
+        except Exception:
+            try:
+                client.close()
+            except Exception:
+                pass
+            raise
+        # Holding a slot guarantees room in the pool
+        _indicf5_client_pool.put_nowait(client)
+    finally:
+        _indicf5_slots.release()
+
+@lru_cache(maxsize=None)
+def get_indicf5_references(lang_name):
+    """Parse train.jsonl for a language once, grouped by lower-cased gender."""
+    jsonl_path = os.path.join(INDICF5_AUDIO_BASE, lang_name, "train.jsonl")
+    if not os.path.exists(jsonl_path):
+        raise Exception(f"Reference audio data not found for language: {lang_name} at {jsonl_path}")
+
+    references = {}
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line.strip())
+            references.setdefault(entry.get('gender', '').lower(), []).append(entry)
+    return references
+
+@lru_cache(maxsize=512)
+def load_reference_audio(path, sampling_rate=INDICF5_SAMPLING_RATE):
+    """
+    Decode and resample a reference speaker clip once per (path, sampling_rate).
+    librosa is imported here rather than at module load because its numba JIT
+    import is slow and only the IndicF5 path needs it.
+    """
+    import librosa
+
+    audio, _ = librosa.load(path, sr=sampling_rate)
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    # Shared across requests - guard against accidental in-place edits
+    audio.setflags(write=False)
+    return audio
+
+def warm_indicf5_references(languages=None):
+    """Preload every reference clip for the given language names (default: all on disk)."""
+    if languages is None:
+        languages = [d for d in os.listdir(INDICF5_AUDIO_BASE) if os.path.isdir(os.path.join(INDICF5_AUDIO_BASE, d))] if os.path.isdir(INDICF5_AUDIO_BASE) else []
+    loaded = 0
+    for lang_name in languages:
+        for entries in get_indicf5_references(lang_name).values():
+            for entry in entries:
+                # Same arguments as the request path, so both share one lru_cache entry
+                load_reference_audio(os.path.join(INDICF5_AUDIO_BASE, lang_name, entry['audio_filepath']), INDICF5_SAMPLING_RATE)
+                loaded += 1
+    return loaded
+
+def start_indicf5_warmup():
+    """
+    Preload the reference clips in a background thread of this server
+    process when INDICF5_WARM_REFERENCES is set. Called from the WSGI and
+    ASGI entry points, so management commands and Celery workers skip it.
+    """
+    if os.getenv("INDICF5_WARM_REFERENCES", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    def warm():
+        try:
+            logger.info(f"IndicF5: preloaded {warm_indicf5_references()} reference clips")
+        except Exception as e:
+            logger.error(f"IndicF5 reference warmup failed: {sanitize_error_message(e)}")
+
+    thread = threading.Thread(target=warm, name="indicf5-warmup", daemon=True)
+    thread.start()
+    return thread
+
 def get_indicf5_tts_output(tts_input, lang, model, gender, voice=None, log_context=None):
-    import json
-    INDICF5_ENDPOINT = os.getenv("INDICF5_ENDPOINT")
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    INDICF5_AUDIO_BASE = os.path.join(backend_dir, "academic_prompts", "indicF5Audios")
+    sampling_rate = INDICF5_SAMPLING_RATE
 
     try:
         if voice:
             ref_audio_path = voice
             ref_transcript = ""
-            sampling_rate = 24000
         else:
             lang_name = LANG_CODE_TO_NAME.get(lang, lang)
-            jsonl_path = os.path.join(INDICF5_AUDIO_BASE, lang_name, "train.jsonl")
-
-            if not os.path.exists(jsonl_path):
-                raise Exception(f"Reference audio data not found for language: {lang} ({lang_name}) at {jsonl_path}")
-
-            matching_entries = []
-            with open(jsonl_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    entry = json.loads(line.strip())
-                    if entry.get('gender', '').lower() == gender.lower():
-                        matching_entries.append(entry)
+            matching_entries = get_indicf5_references(lang_name).get(gender.lower(), [])
 
             if not matching_entries:
                 raise Exception(f"No reference audio found for language: {lang} ({lang_name}), gender: {gender}")
@@ -444,15 +550,6 @@ def get_indicf5_tts_output(tts_input, lang, model, gender, voice=None, log_conte
             selected_entry = random.choice(matching_entries)
             ref_audio_path = os.path.join(INDICF5_AUDIO_BASE, lang_name, selected_entry['audio_filepath'])
             ref_transcript = selected_entry['text']
-            sampling_rate = 24000
-
-        import gevent.ssl
-        triton_client = http_client.InferenceServerClient(
-            url=INDICF5_ENDPOINT,
-            verbose=False,
-            ssl=True,
-            ssl_context_factory=gevent.ssl._create_default_https_context,
-        )
 
         def make_string_input(value, name):
             arr = np.array([value], dtype="object")
@@ -461,8 +558,7 @@ def get_indicf5_tts_output(tts_input, lang, model, gender, voice=None, log_conte
             return inp
 
         def make_audio_input(path, name):
-            audio, _ = librosa.load(path, sr=sampling_rate)
-            audio = audio.astype(np.float32)
+            audio = load_reference_audio(path, sampling_rate)
             inp = http_client.InferInput(name, audio.shape, "FP32")
             inp.set_data_from_numpy(audio)
             return inp
@@ -473,13 +569,14 @@ def get_indicf5_tts_output(tts_input, lang, model, gender, voice=None, log_conte
             make_string_input(ref_transcript, "TEXT_PROMPT"),
         ]
 
-        response = triton_client.infer(
-            model_name="tts",
-            model_version="1",
-            inputs=inputs,
-            outputs=[http_client.InferRequestedOutput("OUTPUT_GENERATED_AUDIO")],
-            headers={"Authorization": f"Bearer {indicf5_api_key}"},
-        )
+        with indicf5_client() as triton_client:
+            response = triton_client.infer(
+                model_name="tts",
+                model_version="1",
+                inputs=inputs,
+                outputs=[http_client.InferRequestedOutput("OUTPUT_GENERATED_AUDIO")],
+                headers={"Authorization": f"Bearer {indicf5_api_key}"},
+            )
 
         generated_audio = response.as_numpy("OUTPUT_GENERATED_AUDIO")
         if generated_audio.ndim > 1:
@@ -518,3 +615,147 @@ def get_tts_output(tts_input, lang, model, gender=None, voice=None, **kwargs):
     elif model.startswith("eleven"):
         out = get_elevenlabs_tts_output(tts_input, model, gender, voice=voice, log_context=log_context)
     return out
+
+
+# Progressive (chunked) synthesis. Every streaming provider is asked for raw
+# 16-bit little-endian mono PCM at TTS_STREAM_SAMPLE_RATE so the relay can put
+# a single WAV header in front of the chunks without transcoding.
+TTS_STREAM_SAMPLE_RATE = 24000
+TTS_STREAM_CHUNK_SIZE = 4096
+
+def supports_tts_streaming(model):
+    return (
+        model.startswith("sonic")
+        or model.startswith("gpt")
+        or model.startswith("gemini")
+        or (model.startswith("eleven") and model != "elevenlabs")
+    )
+
+def stream_gemini_output(tts_input, lang, model, gender, voice=None, log_context=None):
+    lang = "kok" if lang == "gom" else lang
+    try:
+        client = texttospeech.TextToSpeechClient(client_options=ClientOptions(api_endpoint="texttospeech.googleapis.com"))
+
+        if voice:
+            speaker = voice
+        elif gender == "female":
+            speaker = random.choice(GEMINI_SPEAKERS_FEMALE)
+        else:
+            speaker = random.choice(GEMINI_SPEAKERS_MALE)
+
+        language_code = "bn-BD" if lang == "bn" else "ur-PK" if lang == "ur" else f"{lang}-IN"
+        streaming_config = texttospeech.StreamingSynthesizeConfig(
+            voice=texttospeech.VoiceSelectionParams(
+                language_code=language_code,
+                name=speaker,
+                model_name=model,
+            ),
+            streaming_audio_config=texttospeech.StreamingAudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.PCM,
+                sample_rate_hertz=TTS_STREAM_SAMPLE_RATE,
+            ),
+        )
+
+        def request_generator():
+            yield texttospeech.StreamingSynthesizeRequest(streaming_config=streaming_config)
+            yield texttospeech.StreamingSynthesizeRequest(
+                input=texttospeech.StreamingSynthesisInput(text=tts_input, prompt="synthesize speech from input text")
+            )
+
+        for response in client.streaming_synthesize(request_generator()):
+            if response.audio_content:
+                yield response.audio_content
+    except Exception as e:
+        log_and_raise(e, model_code=model, provider='google', log_context=log_context)
+
+def stream_elevenlabs_tts_output(tts_input, model, gender, voice=None, log_context=None):
+    try:
+        client = ElevenLabs(api_key=elevenlabs_api_key)
+        if voice:
+            voice_id = voice
+        else:
+            voice_id = random.choice(ELEVENLABS_VOICE_MAP.get(gender.lower(), ELEVENLABS_VOICE_MAP["male"]))
+
+        for chunk in client.text_to_speech.stream(
+            text=tts_input,
+            voice_id=voice_id,
+            model_id=model,
+            output_format=f"pcm_{TTS_STREAM_SAMPLE_RATE}"
+        ):
+            if chunk:
+                yield chunk
+    except Exception as e:
+        log_and_raise(e, model_code=model, provider='elevenlabs', custom_message=f"ElevenLabs TTS error: {sanitize_error_message(e)}", log_context=log_context)
+
+def stream_openai_tts_output(tts_input, model, gender, voice=None, log_context=None):
+    try:
+        if voice:
+            selected_voice = voice
+        else:
+            selected_voice = random.choice(OPENAI_VOICE_MAP.get(gender.lower(), OPENAI_VOICE_MAP["male"]))
+
+        # "pcm" is raw 24kHz 16-bit signed little-endian, which is what the relay expects
+        payload = {
+            "model": model,
+            "input": tts_input,
+            "voice": selected_voice,
+            "response_format": "pcm",
+            "instructions": OPENAI_TTS_INSTRUCTIONS
+        }
+
+        with requests.post(
+            "https://api.openai.com/v1/audio/speech",
+            headers={
+                "Authorization": f"Bearer {openai_api_key}",
+                "Content-Type": "application/json"
+            },
+            json=payload,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=TTS_STREAM_CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+    except Exception as e:
+        log_and_raise(e, model_code=model, provider='openai', custom_message=f"OpenAI TTS error: {sanitize_error_message(e)}", log_context=log_context)
+
+def stream_cartesia_tts_output(tts_input, model, gender, voice=None, log_context=None):
+    try:
+        client = Cartesia(api_key=cartesia_api_key)
+        if voice:
+            voice_id = voice
+        else:
+            voice_id = random.choice(CARTESIA_VOICE_MAP.get(gender.lower(), CARTESIA_VOICE_MAP["male"]))
+
+        output_format = {
+            "container": "raw",
+            "sample_rate": TTS_STREAM_SAMPLE_RATE,
+            "encoding": "pcm_s16le"
+        }
+
+        for chunk in client.tts.bytes(
+            model_id=model,
+            transcript=tts_input,
+            voice={"mode": "id", "id": voice_id},
+            output_format=output_format
+        ):
+            if chunk:
+                yield chunk
+    except Exception as e:
+        log_and_raise(e, model_code=model, provider='cartesia', custom_message=f"Cartesia TTS error: {sanitize_error_message(e)}", log_context=log_context)
+
+def stream_tts_output(tts_input, lang, model, gender=None, voice=None, **kwargs):
+    """
+    Yield raw PCM chunks (s16le, mono, TTS_STREAM_SAMPLE_RATE) as the provider
+    produces them. Only valid for models where supports_tts_streaming() is True.
+    """
+    log_context = kwargs.get('context')
+    if model.startswith("gemini"):
+        return stream_gemini_output(tts_input, lang, model, gender, voice=voice, log_context=log_context)
+    elif model.startswith("gpt"):
+        return stream_openai_tts_output(tts_input, model, gender, voice=voice, log_context=log_context)
+    elif model.startswith("sonic"):
+        return stream_cartesia_tts_output(tts_input, model, gender, voice=voice, log_context=log_context)
+    elif model.startswith("eleven") and model != "elevenlabs":
+        return stream_elevenlabs_tts_output(tts_input, model, gender, voice=voice, log_context=log_context)
+    raise ValueError(f"Streaming synthesis is not supported for model: {model}")
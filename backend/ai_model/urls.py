@@ -24,6 +24,7 @@ urlpatterns = [
 # DELETE /api/models/{id}/ - Delete model (admin only)
 # GET /api/models/providers/ - Get available providers
 # GET /api/models/capabilities/ - Get available capabilities
+# GET /api/models/provider-health/ - Live LLM provider health (admin only)
 # POST /api/models/{id}/test/ - Test a model
 # GET /api/models/{id}/validate/ - Validate model configuration
 # POST /api/models/compare/ - Compare two models
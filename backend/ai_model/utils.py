@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional
 from django.core.cache import cache
 from django.db.models import F
+from django.utils import timezone
 import math
 import logging
 from django.http import JsonResponse
@@ -10,7 +11,8 @@ from model_metrics.models import ModelMetric
 import markdown
 import re
 from typing import List, Optional
-from leaderboards.models import Leaderboard
+from ai_model.sampler import SamplerSnapshot, get_leaderboard_stats, get_snapshot
+from ai_model.provider_health import get_provider_weights
 
 logger = logging.getLogger(__name__)
 
@@ -94,7 +96,8 @@ class EloRatingCalculator:
                     total_comparisons=F('total_comparisons') + 1,
                     wins=F('wins') + (1 if won else 0),
                     losses=F('losses') + (1 if lost else 0),
-                    ties=F('ties') + (1 if tied else 0)
+                    ties=F('ties') + (1 if tied else 0),
+                    updated_at=timezone.now()
                 )
             else:
                 # Create new metric
@@ -169,129 +172,20 @@ class ModelSelector:
     }
 
     @staticmethod
-    def _pick_mode_from_ratios(ratios: dict) -> str:
-        items = list(ratios.items())
-        modes = [k for k, _ in items]
-        weights = [max(0.0, float(v)) for _, v in items]
-        total = sum(weights)
-        if total <= 0:
-            return random.choice(modes)
-        weights = [w / total for w in weights]
-        return random.choices(modes, weights=weights, k=1)[0]
+    def build_sampler(models, leaderboard_stats: dict) -> SamplerSnapshot:
+        """Precompute the active sampling distributions for a pool of models"""
+        return SamplerSnapshot(
+            models,
+            leaderboard_stats,
+            alpha=ModelSelector.ALPHA,
+            ratios_with_freshers=ModelSelector.DEFAULT_RATIOS_WITH_FRESHERS,
+            ratios_no_freshers=ModelSelector.DEFAULT_RATIOS_NO_FRESHERS,
+        )
 
     @staticmethod
     def active_sampling(queryset, leaderboard_stats: dict) -> tuple:
         """Core active sampling logic taking only queryset and leaderboard stats"""
-        models_list = list(queryset)
-        
-        if len(models_list) < 2:
-            raise ValueError("Not enough models available for comparison")
-            
-        def get_stats(m):
-            # Match DB model_code with JSON model name
-            if m.model_code in leaderboard_stats:
-                s = leaderboard_stats[m.model_code]
-                return {
-                    'score': s['score'],
-                    'upper': s['ci_upper'],
-                    'lower': s['ci_lower'],
-                    'ci_width': s['ci_width'],
-                    'attempts': s['battles']
-                }
-            # Fallback if model not in JSON
-            return {
-                'score': 1200.0,
-                'upper': 1260.0,
-                'lower': 1140.0,
-                'ci_width': 120.0,
-                'attempts': 0
-            }
-
-        # Identify freshers using the database flag
-        active_freshers = [m for m in models_list if m.is_fresh_model]
-
-        # Determine mode
-        if active_freshers:
-            ratios = ModelSelector.DEFAULT_RATIOS_WITH_FRESHERS
-        else:
-            ratios = ModelSelector.DEFAULT_RATIOS_NO_FRESHERS
-            
-        mode = ModelSelector._pick_mode_from_ratios(ratios)
-
-        # 1. FRESHER Mode
-        if mode == "FRESHER" and active_freshers:
-            student = random.choice(active_freshers)
-            
-            # Play with anyone at random (excluding the student itself)
-            possible_opponents = [m for m in models_list if m.id != student.id]
-            teacher = random.choice(possible_opponents)
-                
-            # Randomize order so fresher isn't always model_a
-            return (student, teacher) if random.random() > 0.5 else (teacher, student)
-
-        # 2. BY_TRIALS Mode
-        elif mode == "BY_TRIALS":
-            non_fresher_models = [m for m in models_list if not m.is_fresh_model]
-            pool = non_fresher_models if len(non_fresher_models) >= 2 else models_list
-
-            weights = []
-            for m in pool:
-                stats = get_stats(m)
-                w = 1.0 / ((stats['attempts'] + 1) ** ModelSelector.ALPHA)
-                weights.append(w)
-
-            m1, m2 = random.choices(pool, weights=weights, k=2)
-            while m1.id == m2.id:
-                m2 = random.choices(pool, weights=weights, k=1)[0]
-                
-            return m1, m2
-
-        elif mode == "BY_CI":
-            weights = []
-            
-            non_fresher_models = [m for m in models_list if not m.is_fresh_model]
-            pool = non_fresher_models if len(non_fresher_models) >= 2 else models_list
-            
-            for m in pool:
-                stats = get_stats(m)
-                weights.append(stats['ci_width'] + 0.1)
-                
-            m1, m2 = random.choices(pool, weights=weights, k=2)
-            while m1.id == m2.id:
-                m2 = random.choices(pool, weights=weights, k=1)[0]
-                
-            return m1, m2
-
-        # 4. CLUSTER_BUSTER Mode
-        elif mode == "CLUSTER_BUSTER":
-            candidates = []
-            total_weight = 0.0
-
-            non_fresher_models = [m for m in models_list if not m.is_fresh_model]
-            pool = non_fresher_models if len(non_fresher_models) >= 2 else models_list
-
-            for i in range(len(pool)):
-                for j in range(i + 1, len(pool)):
-                    m1, m2 = pool[i], pool[j]
-                    stats1 = get_stats(m1)
-                    stats2 = get_stats(m2)
-                    
-                    overlap = min(stats1['upper'], stats2['upper']) - max(stats1['lower'], stats2['lower'])
-                    if overlap > 0:
-                        weight = overlap ** 2
-                        candidates.append((m1, m2, weight))
-                        total_weight += weight
-
-            if total_weight > 0:
-                pick = random.uniform(0, total_weight)
-                curr = 0.0
-                for m1, m2, weight in candidates:
-                    curr += weight
-                    if curr >= pick:
-                        return m1, m2
-
-        # Fallback to random if cluster buster fails or mode is unrecognized
-        return tuple(random.sample(models_list, 2))
+        return ModelSelector.build_sampler(queryset, leaderboard_stats).draw()
     
     # Academic-only models that should only be used in academic mode
     ACADEMIC_ONLY_MODELS = ['elevenlabs', 'indicparlertts']
@@ -305,44 +199,46 @@ class ModelSelector:
         mode: Optional[str] = None,
     ) -> tuple:
         """Get two random models for comparison"""
-        queryset = AIModel.objects.filter(is_active=True)
-        
-        # Exclude academic-only models unless:
-        # 1. Mode is academic AND
-        if mode != 'academic':
-            queryset = queryset.exclude(model_code__in=ModelSelector.ACADEMIC_ONLY_MODELS)
-        
-        if category:
-            queryset = queryset.filter(capabilities__contains=[category])
-        
-        if exclude_ids:
-            queryset = queryset.exclude(id__in=exclude_ids)
+        def eligible_models():
+            queryset = AIModel.objects.filter(is_active=True)
+            
+            # Exclude academic-only models unless:
+            # 1. Mode is academic AND
+            if mode != 'academic':
+                queryset = queryset.exclude(model_code__in=ModelSelector.ACADEMIC_ONLY_MODELS)
+            
+            if category:
+                queryset = queryset.filter(capabilities__contains=[category])
+            
+            if exclude_ids:
+                queryset = queryset.exclude(id__in=exclude_ids)
 
-        if model_type:
-            queryset = queryset.filter(model_type=model_type)
+            if model_type:
+                queryset = queryset.filter(model_type=model_type)
 
-        if requires_multimodal:
-            queryset = queryset.filter(model_code__in=MULTIMODAL_MODELS_NAMES)
+            if requires_multimodal:
+                queryset = queryset.filter(model_code__in=MULTIMODAL_MODELS_NAMES)
+            
+            return list(queryset)
         
-        models = list(queryset)
+        def build():
+            models = eligible_models()
+            if len(models) < 2 and requires_multimodal:
+                # Raising error is safer to prevent sending image to a blind model
+                raise ValueError("Not enough multimodal models available for comparison")
+            return ModelSelector.build_sampler(models, get_leaderboard_stats(model_type))
         
-        if len(models) < 2:
-            if requires_multimodal:
-                 # If explicit multimodal required but not enough found, log a warning and fall back (soft fail) or raise error?
-                 # Raising error is safer to prevent sending image to a blind model
-                 raise ValueError("Not enough multimodal models available for comparison")
-            raise ValueError("Not enough models available for comparison")
+        if category or exclude_ids:
+            # Ad-hoc pools are not worth caching
+            sampler = build()
+        else:
+            sampler = get_snapshot(model_type, requires_multimodal, mode == 'academic', build)
         
         if model_type == "LLM":
-            leaderboard_entry = Leaderboard.objects.filter(arena_type="llm",organization="ai4b",language="Overall", is_active=True).first()
-            if leaderboard_entry:
-                leaderboard_stats = {entry['model']: entry for entry in leaderboard_entry.leaderboard_json}
-            else:
-                logger.warning("active_sampling: no leaderboard entry found; all models will use default stats")
-                leaderboard_stats = {}
-            return ModelSelector.active_sampling(queryset, leaderboard_stats)
+            # Steer away from providers that are currently failing or slow
+            return sampler.draw(get_provider_weights(sampler.providers))
         
-        return random.sample(models, 2)
+        return tuple(random.sample(sampler.models, 2))
     
     @staticmethod
     def get_recommended_model(
@@ -12,9 +12,10 @@ from ai_model.serializers import (
     ModelComparisonSerializer, ModelTestSerializer, ModelCapabilitySerializer
 )
 from ai_model.services import AIModelService
+from ai_model import provider_health as health_settings
+from ai_model.provider_health import get_model_provider, get_provider_health
 from user.authentication import FirebaseAuthentication, AnonymousTokenAuthentication
-from message.models import Message
-from feedback.models import Feedback
+from model_metrics.rollups import get_model_totals, get_pair_totals
 
 class AIModelViewSet(viewsets.ModelViewSet):
     """ViewSet for AI Model management"""
@@ -22,7 +23,7 @@ class AIModelViewSet(viewsets.ModelViewSet):
     authentication_classes = [FirebaseAuthentication, AnonymousTokenAuthentication]
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'provider_health']:
             return [IsAdminUser()]
         return [AllowAny()]
     
@@ -124,6 +125,35 @@ class AIModelViewSet(viewsets.ModelViewSet):
         
         return Response(provider_info)
     
+    @action(detail=False, methods=['get'], url_path='provider-health')
+    def provider_health(self, request):
+        """Live LLM provider health and the sampling weight it currently gets"""
+        model_codes = {}
+        for model_code in AIModel.objects.filter(
+            is_active=True, model_type='LLM'
+        ).values_list('model_code', flat=True):
+            model_codes.setdefault(get_model_provider(model_code), []).append(model_code)
+        
+        health = get_provider_health(model_codes)
+        providers = [
+            {**health[provider], 'models': sorted(codes)}
+            for provider, codes in model_codes.items()
+        ]
+        providers.sort(key=lambda p: (p['weight'], p['provider']))
+        
+        return Response({
+            'window_minutes': health_settings.HEALTH_WINDOW_MINUTES,
+            'thresholds': {
+                'min_requests': health_settings.HEALTH_MIN_REQUESTS,
+                'error_rate_degraded': health_settings.ERROR_RATE_DEGRADED,
+                'error_rate_excluded': health_settings.ERROR_RATE_EXCLUDED,
+                'ttft_degraded_ms': health_settings.TTFT_DEGRADED_MS,
+                'ttft_excluded_ms': health_settings.TTFT_EXCLUDED_MS,
+                'max_in_flight': health_settings.MAX_IN_FLIGHT,
+            },
+            'providers': providers,
+        })
+    
     @action(detail=False, methods=['get'])
     def capabilities(self, request):
         """Get all available capabilities"""
@@ -311,19 +341,17 @@ class ModelStatsView(views.APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Calculate statistics
-        
+        # Usage counters come from the hourly rollups. Each session is counted
+        # once, in the hour of its first reply from the model.
+        totals = get_model_totals([model.id]).get(model.id, {})
         stats = {
             'model': AIModelSerializer(model).data,
             'usage': {
-                'total_messages': Message.objects.filter(model=model).count(),
-                'total_sessions': Message.objects.filter(
-                    model=model
-                ).values('session').distinct().count(),
-                'average_rating': Feedback.objects.filter(
-                    message__model=model,
-                    rating__isnull=False
-                ).aggregate(avg=Avg('rating'))['avg'],
+                'total_messages': totals.get('message_count', 0),
+                'total_sessions': totals.get('session_count', 0),
+                'average_rating': (
+                    totals['rating_sum'] / totals['ratings_count'] if totals.get('ratings_count') else None
+                ),
             },
             'performance': self._get_performance_metrics(model),
             'comparisons': self._get_comparison_stats(model),
@@ -357,38 +385,19 @@ class ModelStatsView(views.APIView):
     
     def _get_comparison_stats(self, model):
         """Get comparison statistics against other models"""
+        head_to_head = get_pair_totals(model.id, modes=['compare'])
+        opponents = AIModel.objects.in_bulk(list(head_to_head))
         
-        # Get all comparisons where this model participated
-        comparisons = Feedback.objects.filter(
-            feedback_type='preference',
-            session__mode='compare'
-        ).filter(
-            Q(session__model_a=model) | Q(session__model_b=model)
-        ).select_related('session__model_a', 'session__model_b', 'preferred_model')
-        
-        # Calculate win/loss against specific models
         versus_stats = {}
-        for feedback in comparisons:
-            if feedback.session.model_a == model:
-                opponent = feedback.session.model_b
-                won = feedback.preferred_model == model
-            else:
-                opponent = feedback.session.model_a
-                won = feedback.preferred_model == model
-            
-            if opponent.id not in versus_stats:
-                versus_stats[opponent.id] = {
-                    'opponent': AIModelListSerializer(opponent).data,
-                    'wins': 0,
-                    'losses': 0,
-                    'total': 0
-                }
-            
-            versus_stats[opponent.id]['total'] += 1
-            if won:
-                versus_stats[opponent.id]['wins'] += 1
-            elif feedback.preferred_model == opponent:
-                versus_stats[opponent.id]['losses'] += 1
+        for opponent_id, totals in head_to_head.items():
+            if opponent_id not in opponents:
+                continue
+            versus_stats[opponent_id] = {
+                'opponent': AIModelListSerializer(opponents[opponent_id]).data,
+                'wins': totals['wins'],
+                'losses': totals['losses'],
+                'total': totals['votes']
+            }
         
         # Calculate win rates
         for stats in versus_stats.values():
@@ -17,6 +17,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arena_backend.settings')
 from django.core.asgi import get_asgi_application
 django_asgi_app = get_asgi_application()
 
+# Decode the IndicF5 reference clips before the first request needs them
+from ai_model.tts_interactions import start_indicf5_warmup
+start_indicf5_warmup()
+
 # Now import Channels and your consumers
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
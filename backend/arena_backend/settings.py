@@ -343,6 +343,58 @@ CELERY_BEAT_SCHEDULE = {
     'cleanup-old-metrics': {
         'task': 'apps.ai_model.tasks.cleanup_old_metrics',
         'schedule': crontab(day_of_month=1, hour=3, minute=0),  # Monthly
+    },
+    'detect-vote-anomalies': {
+        # Before the leaderboards are rebuilt with the new weights
+        'task': 'leaderboards.tasks.detect_vote_anomalies_task',
+        'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
+    },
+    'compute-arena-leaderboards': {
+        # The Overall / all-modality board of each arena
+        'task': 'leaderboards.tasks.compute_arena_leaderboards',
+        'schedule': crontab(hour=1, minute=30),  # Daily at 1:30 AM
+    },
+    'build-slice-leaderboards': {
+        # Every other language and modality slice
+        'task': 'leaderboards.tasks.build_slice_leaderboards_task',
+        'schedule': crontab(hour=1, minute=45),  # Daily at 1:45 AM
+    },
+    'flush-vote-stream': {
+        'task': 'feedback.tasks.flush_vote_stream',
+        'schedule': 5.0,  # Every 5 seconds
+    },
+    'consume-feedback-events': {
+        'task': 'feedback.tasks.consume_feedback_events',
+        'schedule': 15.0,  # Every 15 seconds
+    },
+    'snapshot-model-ratings': {
+        'task': 'feedback.tasks.snapshot_model_ratings',
+        'schedule': crontab(minute=5),  # Hourly
+    },
+    'refresh-model-rollups': {
+        'task': 'model_metrics.tasks.refresh_model_rollups',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    'detect-metric-anomalies': {
+        'task': 'model_metrics.tasks.detect_anomalous_metrics',
+        'schedule': crontab(hour=0, minute=30),  # Daily, after the daily metrics
+    },
+    'refresh-contributor-rollups': {
+        'task': 'leaderboards.tasks.refresh_contributor_rollups_task',
+        'schedule': 60.0,  # Every minute
+    },
+    'expire-stale-tts-streams': {
+        'task': 'message.tasks.expire_stale_tts_streams',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    'export-battles': {
+        'task': 'feedback.tasks.export_battles_task',
+        'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM
+    },
+    'cleanup-session-exports': {
+        # Archives outlive their signed links otherwise
+        'task': 'chat_session.tasks.cleanup_session_exports',
+        'schedule': crontab(hour=3, minute=30),  # Daily at 3:30 AM
     }
 }
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "arena_backend.settings")
 
 application = get_wsgi_application()
+
+# Decode the IndicF5 reference clips before the first request needs them
+from ai_model.tts_interactions import start_indicf5_warmup  # noqa: E402
+
+start_indicf5_warmup()
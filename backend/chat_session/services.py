@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from django.db import transaction
 from django.utils import timezone
 import random
@@ -13,6 +13,13 @@ from django.db.models import Avg, Count, Q, Max
 from ai_model.utils import count_tokens, ModelCostCalculator
 from datetime import timedelta
 
+EXPORT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'markdown': 'text/markdown',
+    'txt': 'text/plain',
+}
+EXPORT_MESSAGE_CHUNK_SIZE = 500
+
 
 class ChatSessionService:
     """Service for managing chat sessions"""
@@ -131,24 +138,51 @@ class ChatSessionService:
         Export session data in various formats
         Returns: (content, content_type)
         """
-        messages = session.messages.order_by('position')
+        if format not in EXPORT_CONTENT_TYPES:
+            raise ValueError(f"Unsupported format: {format}")
+        
+        content = ''.join(ChatSessionService.iter_session_export(
+            session, format, include_metadata, include_timestamps
+        ))
+        return content, EXPORT_CONTENT_TYPES[format]
+    
+    @staticmethod
+    def iter_session_export(
+        session: ChatSession,
+        format: str = 'json',
+        include_metadata: bool = False,
+        include_timestamps: bool = True,
+        chunk_size: int = EXPORT_MESSAGE_CHUNK_SIZE
+    ) -> Iterator[str]:
+        """
+        Yield an export of the session piece by piece, one message at a time.
+        Messages are read through a server-side cursor with their model's
+        display name joined in, so memory does not grow with the session.
+        """
+        if format not in EXPORT_CONTENT_TYPES:
+            raise ValueError(f"Unsupported format: {format}")
+        
+        messages = session.messages.select_related('model').only(
+            'session', 'role', 'content', 'participant', 'created_at', 'metadata', 'model__display_name'
+        ).order_by('position').iterator(chunk_size=chunk_size)
         
         if format == 'json':
             data = {
-                'session': {
-                    'id': str(session.id),
-                    'mode': session.mode,
-                    'title': session.title,
-                    'created_at': session.created_at.isoformat() if include_timestamps else None,
-                    'model_a': session.model_a.display_name if session.model_a else None,
-                    'model_b': session.model_b.display_name if session.model_b else None,
-                },
-                'messages': []
+                'id': str(session.id),
+                'mode': session.mode,
+                'title': session.title,
+                'created_at': session.created_at.isoformat() if include_timestamps else None,
+                'model_a': session.model_a.display_name if session.model_a else None,
+                'model_b': session.model_b.display_name if session.model_b else None,
             }
             
             if include_metadata:
-                data['session']['metadata'] = session.metadata
+                data['metadata'] = session.metadata
+            
+            # Same text as json.dumps({'session': ..., 'messages': [...]}, indent=2)
+            yield '{\n  "session": ' + json.dumps(data, indent=2).replace('\n', '\n  ') + ',\n  "messages": ['
             
+            separator = '\n    '
             for msg in messages:
                 msg_data = {
                     'role': msg.role,
@@ -163,9 +197,10 @@ class ChatSessionService:
                 if include_metadata:
                     msg_data['metadata'] = msg.metadata
                 
-                data['messages'].append(msg_data)
+                yield separator + json.dumps(msg_data, indent=2).replace('\n', '\n    ')
+                separator = ',\n    '
             
-            return json.dumps(data, indent=2), 'application/json'
+            yield ']\n}' if separator == '\n    ' else '\n  ]\n}'
         
         elif format == 'markdown':
             lines = [
@@ -182,8 +217,10 @@ class ChatSessionService:
                 lines.append(f"**Created**: {session.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
             
             lines.append("\n---\n")
+            yield '\n'.join(lines)
             
             for msg in messages:
+                lines = []
                 if msg.role == 'user':
                     lines.append(f"### User\n{msg.content}\n")
                 else:
@@ -196,18 +233,19 @@ class ChatSessionService:
                     lines.append(f"*{msg.created_at.strftime('%H:%M:%S')}*\n")
                 
                 lines.append("")
-            
-            return '\n'.join(lines), 'text/markdown'
+                yield ''.join('\n' + line for line in lines)
         
-        elif format == 'txt':
+        else:
             lines = [
                 f"{session.title or 'Chat Session'}",
                 f"Mode: {session.get_mode_display()}",
                 "=" * 50,
                 ""
             ]
+            yield '\n'.join(lines)
             
             for msg in messages:
+                lines = []
                 if msg.role == 'user':
                     lines.append(f"USER: {msg.content}")
                 else:
@@ -220,11 +258,7 @@ class ChatSessionService:
                     lines.append(f"[{msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}]")
                 
                 lines.append("")
-            
-            return '\n'.join(lines), 'text/plain'
-        
-        else:
-            raise ValueError(f"Unsupported format: {format}")
+                yield ''.join('\n' + line for line in lines)
     
     @staticmethod
     def get_session_statistics(session: ChatSession) -> Dict:
@@ -8,11 +8,16 @@ from chat_session.services import ChatSessionService
 from django.core.mail import EmailMessage
 from chat_session.utils import SessionAnalyzer
 from django.core.cache import cache
+from common.storage_signer import MAX_SIGNED_URL_EXPIRATION, get_bucket, sign_url
+import tempfile
+import uuid
 import zipfile
-import io
 
 logger = logging.getLogger(__name__)
 
+SESSION_EXPORT_PREFIX = 'session_exports'
+SESSION_EXPORT_LINK_EXPIRATION = MAX_SIGNED_URL_EXPIRATION
+
 
 @shared_task
 def cleanup_expired_sessions():
@@ -70,44 +75,75 @@ def calculate_session_analytics():
     return f"Calculated analytics for {recent_sessions.count()} sessions"
 
 
+def write_sessions_zip(fileobj, sessions, format: str = 'json'):
+    """
+    Write one entry per session into a zip on `fileobj`, streaming each
+    export into its entry so neither the archive nor a session is held in
+    memory. Returns the number of sessions written.
+    """
+    count = 0
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for session in sessions:
+            filename = f"{session.title or 'untitled'}_{session.id}.{format}"
+            with zip_file.open(filename, 'w', force_zip64=True) as entry:
+                for piece in ChatSessionService.iter_session_export(
+                    session=session,
+                    format=format,
+                    include_metadata=True,
+                    include_timestamps=True
+                ):
+                    entry.write(piece.encode('utf-8'))
+            count += 1
+    return count
+
+
 @shared_task
 def export_session_batch(session_ids: list, user_email: str, format: str = 'json'):
-    """Export multiple sessions and send to user"""
+    """Export multiple sessions to a zip in storage and email the user a download link"""
     
-    sessions = ChatSession.objects.filter(id__in=session_ids)
+    sessions = ChatSession.objects.filter(id__in=session_ids).select_related('model_a', 'model_b').only(
+        'id', 'mode', 'title', 'created_at', 'metadata',
+        'model_a', 'model_a__display_name', 'model_b', 'model_b__display_name'
+    ).order_by('created_at')
     
-    if not sessions:
-        return "No sessions found"
+    filename = f'chat_sessions_export_{timezone.now().strftime("%Y%m%d")}.zip'
+    blob_name = f'{SESSION_EXPORT_PREFIX}/{uuid.uuid4()}/{filename}'
     
-    # Create zip file in memory
-    zip_buffer = io.BytesIO()
+    # Built on disk, then uploaded, so memory stays flat whatever the export size
+    with tempfile.TemporaryFile() as zip_file:
+        count = write_sessions_zip(zip_file, sessions.iterator(chunk_size=100), format)
+        if not count:
+            return "No sessions found"
+        
+        zip_file.seek(0)
+        get_bucket().blob(blob_name).upload_from_file(zip_file, content_type='application/zip')
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for session in sessions:
-            content, _ = ChatSessionService.export_session(
-                session=session,
-                format=format,
-                include_metadata=True,
-                include_timestamps=True
-            )
-            
-            filename = f"{session.title or 'untitled'}_{session.id}.{format}"
-            zip_file.writestr(filename, content)
+    url = sign_url(blob_name, expiration=SESSION_EXPORT_LINK_EXPIRATION)
+    if not url:
+        raise RuntimeError(f"Could not sign the export link for {blob_name}")
     
-    # Send email with attachment
     email = EmailMessage(
         subject='Your Chat Sessions Export',
-        body=f'Please find attached your exported {len(sessions)} chat sessions.',
+        body=(
+            f'Your export of {count} chat sessions is ready. Download it here:\n\n{url}\n\n'
+            f'The link expires in {SESSION_EXPORT_LINK_EXPIRATION // 86400} days.'
+        ),
         to=[user_email]
     )
-    
-    zip_buffer.seek(0)
-    email.attach(
-        f'chat_sessions_export_{timezone.now().strftime("%Y%m%d")}.zip',
-        zip_buffer.read(),
-        'application/zip'
-    )
-    
     email.send()
     
-    return f"Exported {len(sessions)} sessions and sent to {user_email}"
\ No newline at end of file
+    return f"Exported {count} sessions and sent a download link to {user_email}"
+
+
+@shared_task
+def cleanup_session_exports():
+    """Delete export archives whose download link has expired"""
+    cutoff = timezone.now() - timedelta(seconds=SESSION_EXPORT_LINK_EXPIRATION)
+    deleted = 0
+    for blob in get_bucket().list_blobs(prefix=f'{SESSION_EXPORT_PREFIX}/'):
+        if blob.time_created and blob.time_created < cutoff:
+            blob.delete()
+            deleted += 1
+    
+    logger.info(f"Deleted {deleted} expired session exports")
+    return deleted
@@ -0,0 +1,175 @@
+"""
+Tests for streamed session exports.
+
+Verifies that:
+- iter_session_export produces the same JSON, markdown and text as a
+  one-shot render, reading messages and their model names in one query.
+- write_sessions_zip writes one entry per session.
+- export_session_batch uploads the zip to storage and emails a signed link
+  instead of attaching the archive.
+- cleanup_session_exports deletes only archives older than the link lifetime.
+"""
+import io
+import json
+import zipfile
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from ai_model.models import AIModel
+from chat_session.models import ChatSession
+from chat_session.services import ChatSessionService
+from chat_session.tasks import (
+    SESSION_EXPORT_LINK_EXPIRATION, cleanup_session_exports, export_session_batch, write_sessions_zip
+)
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from user.models import User
+
+
+class SessionExportFixtureMixin:
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='owner', auth_provider='google')
+        self.model_a_id = create_ai_model('model-a')
+        self.model_b_id = create_ai_model('model-b')
+
+    def session(self, title='Greetings', replies=2):
+        session = ChatSession.objects.create(
+            user=self.user, mode='compare', title=title, model_a_id=self.model_a_id, model_b_id=self.model_b_id,
+            metadata={'source': 'test'}
+        )
+        Message.objects.create(session=session, role='user', content='Hi\nthere', position=0)
+        for index, (participant, model_id) in enumerate([('a', self.model_a_id), ('b', self.model_b_id)][:replies]):
+            Message.objects.create(
+                session=session, role='assistant', content=f'Hello "{participant}"', position=index + 1,
+                participant=participant, model_id=model_id, metadata={'tokens': index}
+            )
+        session = ChatSession.objects.get(id=session.id)
+        # In-memory models, as export_session_batch's select_related loads them
+        session.model_a = AIModel(id=self.model_a_id, display_name='model-a')
+        session.model_b = AIModel(id=self.model_b_id, display_name='model-b')
+        return session
+
+
+class IterSessionExportTests(SessionExportFixtureMixin, TestCase):
+
+    def expected_json(self, session):
+        messages = session.messages.order_by('position')
+        return json.dumps({
+            'session': {
+                'id': str(session.id),
+                'mode': session.mode,
+                'title': session.title,
+                'created_at': session.created_at.isoformat(),
+                'model_a': 'model-a',
+                'model_b': 'model-b',
+                'metadata': session.metadata,
+            },
+            'messages': [
+                {
+                    'role': msg.role,
+                    'content': msg.content,
+                    'model': 'model-' + msg.participant if msg.participant else None,
+                    'participant': msg.participant,
+                    'created_at': msg.created_at.isoformat(),
+                    'metadata': msg.metadata,
+                }
+                for msg in messages
+            ]
+        }, indent=2)
+
+    def test_json_matches_one_shot_render(self):
+        session = self.session()
+        content, content_type = ChatSessionService.export_session(session, include_metadata=True)
+        self.assertEqual(content_type, 'application/json')
+        self.assertEqual(content, self.expected_json(session))
+
+    def test_json_without_messages(self):
+        session = ChatSession.objects.create(user=self.user, mode='direct')
+        content, _ = ChatSessionService.export_session(session, include_timestamps=False)
+        self.assertEqual(json.loads(content)['messages'], [])
+        self.assertIn('"messages": []\n}', content)
+
+    def test_markdown_and_txt(self):
+        session = self.session()
+        markdown, _ = ChatSessionService.export_session(session, format='markdown', include_timestamps=False)
+        self.assertEqual(markdown, '\n'.join([
+            '# Greetings', '\n**Mode**: Compare Models', '**Model A**: model-a', '**Model B**: model-b', '\n---\n',
+            '### User\nHi\nthere\n', '', '### model-a (A)\nHello "a"\n', '', '### model-b (B)\nHello "b"\n', '',
+        ]))
+        text, content_type = ChatSessionService.export_session(session, format='txt', include_timestamps=False)
+        self.assertEqual(content_type, 'text/plain')
+        self.assertEqual(text.splitlines()[4:], ['USER: Hi', 'there', '', 'model-a (A): Hello "a"', '', 'model-b (B): Hello "b"'])
+
+    def test_messages_read_in_one_query(self):
+        session = self.session()
+        with self.assertNumQueries(1):
+            pieces = list(ChatSessionService.iter_session_export(session, format='txt'))
+        # Header, then one piece per message
+        self.assertEqual(len(pieces), 4)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            ChatSessionService.export_session(self.session(), format='pdf')
+
+
+class ExportSessionBatchTests(SessionExportFixtureMixin, TestCase):
+
+    def test_write_sessions_zip(self):
+        sessions = [self.session(), self.session(title='', replies=1)]
+        buffer = io.BytesIO()
+        self.assertEqual(write_sessions_zip(buffer, sessions, format='markdown'), 2)
+
+        with zipfile.ZipFile(buffer) as archive:
+            names = archive.namelist()
+            self.assertEqual(names, [f'Greetings_{sessions[0].id}.markdown', f'untitled_{sessions[1].id}.markdown'])
+            self.assertEqual(
+                archive.read(names[0]).decode(),
+                ChatSessionService.export_session(sessions[0], format='markdown', include_metadata=True)[0]
+            )
+
+    @patch('chat_session.tasks.sign_url', return_value='https://storage.example.com/export.zip?sig=1')
+    @patch('chat_session.tasks.get_bucket')
+    def test_uploads_and_emails_link(self, mock_bucket, mock_sign):
+        sessions = [self.session(), self.session()]
+        uploaded = {}
+
+        def upload(fileobj, content_type):
+            uploaded['names'] = zipfile.ZipFile(fileobj).namelist()
+
+        blob = mock_bucket.return_value.blob.return_value
+        blob.upload_from_file.side_effect = upload
+
+        result = export_session_batch([str(session.id) for session in sessions], 'owner@example.com')
+
+        self.assertEqual(result, 'Exported 2 sessions and sent a download link to owner@example.com')
+        self.assertEqual(len(uploaded['names']), 2)
+        blob_name = mock_bucket.return_value.blob.call_args.args[0]
+        self.assertTrue(blob_name.startswith('session_exports/'))
+        mock_sign.assert_called_once_with(blob_name, expiration=7 * 24 * 60 * 60)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('https://storage.example.com/export.zip?sig=1', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].attachments, [])
+
+    @patch('chat_session.tasks.get_bucket')
+    def test_no_sessions(self, mock_bucket):
+        self.assertEqual(export_session_batch([], 'owner@example.com'), 'No sessions found')
+        mock_bucket.assert_not_called()
+        self.assertEqual(mail.outbox, [])
+
+    @patch('chat_session.tasks.get_bucket')
+    def test_cleanup_deletes_expired_exports(self, mock_bucket):
+        now = timezone.now()
+        expired = MagicMock(time_created=now - timedelta(seconds=SESSION_EXPORT_LINK_EXPIRATION + 60))
+        live = MagicMock(time_created=now - timedelta(days=1))
+        mock_bucket.return_value.list_blobs.return_value = [expired, live]
+
+        self.assertEqual(cleanup_session_exports(), 1)
+
+        mock_bucket.return_value.list_blobs.assert_called_once_with(prefix='session_exports/')
+        expired.delete.assert_called_once()
+        live.delete.assert_not_called()
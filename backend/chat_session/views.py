@@ -1,4 +1,3 @@
-from datetime import datetime
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -9,7 +8,7 @@ from django.http import HttpResponse, Http404
 from django.db.models import Count, Prefetch, Q
 from message.models import Message
 from chat_session.models import ChatSession
-from feedback.models import Feedback
+from feedback import quotas
 
 # Maximum number of detailed votes allowed in TTS Academic mode
 MAX_ACADEMIC_TTS_VOTES = 150
@@ -24,7 +23,7 @@ from chat_session.permissions import IsSessionOwner, CanAccessSharedSession
 from user.authentication import FirebaseAuthentication, AnonymousTokenAuthentication
 from ai_model.llm_interactions import get_model_output
 import re
-from message.utils import generate_signed_url
+from message.utils import generate_signed_urls
 
 
 class ChatSessionViewSet(viewsets.ModelViewSet):
@@ -111,16 +110,8 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
     
     def _get_academic_tts_votes_count(self, user):
         """Get count of detailed votes submitted in TTS Academic mode"""
-        cutoff_date = timezone.make_aware(datetime(2026, 1, 28, 0, 0, 0))
-        return Feedback.objects.filter(
-            user=user,
-            session__mode='academic',
-            session__session_type='TTS',
-            additional_feedback_json__isnull=False,
-            created_at__gte=cutoff_date
-        ).exclude(
-            additional_feedback_json={}
-        ).count()
+        # Cached counter, backfilled from Postgres on a miss
+        return quotas.get_count(user, quotas.ACADEMIC_TTS_VOTES)
 
     def create(self, request, *args, **kwargs):
         try:
@@ -342,9 +333,10 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
         try:
             session = self.get_object()
             
-            messages = Message.objects.filter(
+            messages = list(Message.objects.filter(
                 session=session
-            ).order_by('-position')[:50]
+            ).order_by('-position')[:50])
+            audio_urls = generate_signed_urls(msg.audio_path for msg in messages)
             
             session_data = ChatSessionRetrieveSerializer(session, context={'request': request}).data
             
@@ -363,7 +355,7 @@ class ChatSessionViewSet(viewsets.ModelViewSet):
                         'audio_path': msg.audio_path,
                         'language': msg.language,
                         'has_detailed_feedback': msg.has_detailed_feedback,
-                        **({'temp_audio_url': generate_signed_url(msg.audio_path)} if msg.audio_path else {})
+                        **({'temp_audio_url': audio_urls.get(msg.audio_path)} if msg.audio_path else {})
                     }
                     for msg in reversed(messages)
                 ]
@@ -484,9 +476,10 @@ class SharedChatSessionView(viewsets.ReadOnlyModelViewSet):
         session = self.get_object()
         
         # Fetch messages for this session
-        messages = Message.objects.filter(
+        messages = list(Message.objects.filter(
             session=session
-        ).order_by('position')
+        ).order_by('position'))
+        audio_urls = generate_signed_urls(msg.audio_path for msg in messages)
         
         response_data = {
             'session': ChatSessionSerializer(
@@ -505,7 +498,7 @@ class SharedChatSessionView(viewsets.ReadOnlyModelViewSet):
                     'created_at': msg.created_at.isoformat(),
                     'audio_path': msg.audio_path,
                     'language': msg.language,
-                    'temp_audio_url': generate_signed_url(msg.audio_path)
+                    'temp_audio_url': audio_urls.get(msg.audio_path)
                 }
                 for msg in messages
             ]
@@ -0,0 +1,102 @@
+"""
+Shared GCS client and V4 signed-URL generation.
+
+One storage client (and its credentials) is kept per process instead of being
+rebuilt for every upload or signed URL. With service-account credentials V4
+signing is a local RSA operation, so signing needs no network round trip.
+Signed URLs are memoized per (blob, expiry bucket): every caller inside the
+same bucket gets the same URL, and that URL stays valid for at least the
+requested lifetime.
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from google.cloud import storage
+
+from common.security_utils import sanitize_error_message
+
+logger = logging.getLogger(__name__)
+
+SIGNED_URL_CACHE_SIZE = 4096
+# V4 signed URLs cannot outlive 7 days
+MAX_SIGNED_URL_EXPIRATION = 7 * 24 * 60 * 60
+
+_client_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+
+def get_storage_client():
+    """
+    Process-wide storage client. Re-created after a fork so prefork workers
+    (gunicorn, celery) never share HTTP connections with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = storage.Client()
+                _client_pid = pid
+                _sign_blob.cache_clear()
+    return _client
+
+
+def get_bucket(bucket_name=None):
+    return get_storage_client().bucket(bucket_name or settings.GS_BUCKET_NAME)
+
+
+def _expiry_bucket(expiration, now=None):
+    """
+    Split time into windows of half the requested lifetime and return
+    (window index, absolute expiry). Signing against the end of the window
+    means a URL handed out anywhere inside it is valid for >= `expiration`.
+    """
+    window = max(1, expiration // 2)
+    now = int(now if now is not None else time.time())
+    index = now // window
+    expires_at = min((index + 1) * window + expiration, now + MAX_SIGNED_URL_EXPIRATION)
+    return index, expires_at
+
+
+@lru_cache(maxsize=SIGNED_URL_CACHE_SIZE)
+def _sign_blob(bucket_name, blob_name, method, expiration, window_index, expires_at):
+    client = get_storage_client()
+    blob = client.bucket(bucket_name).blob(blob_name)
+    return blob.generate_signed_url(
+        version="v4",
+        expiration=datetime.datetime.fromtimestamp(expires_at, tz=datetime.timezone.utc),
+        method=method,
+    )
+
+
+def sign_url(blob_name, expiration=300, method="GET", bucket_name=None):
+    """Return a V4 signed URL for a blob, or None if it cannot be signed."""
+    if not blob_name:
+        return None
+    try:
+        expiration = min(int(expiration), MAX_SIGNED_URL_EXPIRATION)
+        window_index, expires_at = _expiry_bucket(expiration)
+        return _sign_blob(
+            bucket_name or settings.GS_BUCKET_NAME, blob_name, method,
+            expiration, window_index, expires_at
+        )
+    except Exception as e:
+        logger.error(f"Error generating signed URL: {sanitize_error_message(e)}")
+        return None
+
+
+def sign_urls(blob_names, expiration=300, method="GET", bucket_name=None):
+    """
+    Batch form of sign_url for views that return many media objects at once.
+    Returns {blob_name: url}; empty names are skipped and duplicates signed once.
+    """
+    return {
+        blob_name: sign_url(blob_name, expiration, method=method, bucket_name=bucket_name)
+        for blob_name in dict.fromkeys(name for name in blob_names if name)
+    }
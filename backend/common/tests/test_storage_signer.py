@@ -0,0 +1,74 @@
+"""
+Tests for common.storage_signer.
+
+Verifies that:
+- The storage client is created once per process.
+- Signed URLs are memoized within an expiry bucket and stay valid for at
+  least the requested lifetime.
+- The batch API skips empty names and signs duplicates once.
+"""
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from common import storage_signer
+
+
+class StorageSignerTests(TestCase):
+
+    def setUp(self):
+        storage_signer._client = None
+        storage_signer._client_pid = None
+        storage_signer._sign_blob.cache_clear()
+
+    def tearDown(self):
+        storage_signer._client = None
+        storage_signer._client_pid = None
+        storage_signer._sign_blob.cache_clear()
+
+    @patch('common.storage_signer.storage')
+    def test_client_created_once(self, mock_storage):
+        first = storage_signer.get_storage_client()
+        second = storage_signer.get_storage_client()
+
+        self.assertIs(first, second)
+        mock_storage.Client.assert_called_once()
+
+    @patch('common.storage_signer.storage')
+    def test_sign_url_is_memoized(self, mock_storage):
+        blob = mock_storage.Client.return_value.bucket.return_value.blob.return_value
+        blob.generate_signed_url.return_value = 'https://signed/a'
+
+        with patch('common.storage_signer.time.time', return_value=1_000_050):
+            first = storage_signer.sign_url('tts-audios/a.wav', 300)
+        with patch('common.storage_signer.time.time', return_value=1_000_190):
+            second = storage_signer.sign_url('tts-audios/a.wav', 300)
+
+        self.assertEqual(first, second)
+        blob.generate_signed_url.assert_called_once()
+
+    def test_expiry_bucket_covers_requested_lifetime(self):
+        for now in (1_000_000, 1_000_149, 1_000_150, 1_000_299):
+            _, expires_at = storage_signer._expiry_bucket(300, now=now)
+            self.assertGreaterEqual(expires_at - now, 300)
+            self.assertLessEqual(expires_at - now, 450)
+
+    def test_sign_url_empty_blob(self):
+        self.assertIsNone(storage_signer.sign_url(None))
+        self.assertIsNone(storage_signer.sign_url(''))
+
+    @patch('common.storage_signer.sign_url')
+    def test_sign_urls_batch(self, mock_sign):
+        mock_sign.side_effect = lambda name, *args, **kwargs: f'https://signed/{name}'
+
+        urls = storage_signer.sign_urls(['a.wav', None, 'b.wav', 'a.wav', ''])
+
+        self.assertEqual(urls, {'a.wav': 'https://signed/a.wav', 'b.wav': 'https://signed/b.wav'})
+        self.assertEqual(mock_sign.call_count, 2)
+
+    @patch('common.storage_signer.storage')
+    def test_sign_url_returns_none_on_error(self, mock_storage):
+        blob = mock_storage.Client.return_value.bucket.return_value.blob.return_value
+        blob.generate_signed_url.side_effect = Exception('no signer')
+
+        self.assertIsNone(storage_signer.sign_url('tts-audios/a.wav'))
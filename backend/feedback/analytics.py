@@ -1,13 +1,63 @@
 from typing import Dict, List, Optional
-from django.db.models import Count, Avg, Q, F
+from django.db import connections
+from django.db.models import Count, Avg, Q, F, StdDev
+from django.db.models.functions import ExtractIsoWeekDay
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, timezone as dt_timezone
 import pandas as pd
 from collections import defaultdict
-import statistics
 from feedback.models import Feedback
 from ai_model.models import AIModel
 
+FEEDBACK_TYPES = ['rating', 'preference', 'report']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Both run over the filtered feedback queryset as a subquery
+CATEGORY_COUNTS_SQL = """
+    SELECT category, count(*) AS count
+    FROM ({scoped}) AS scoped
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(scoped.categories) = 'array' THEN scoped.categories ELSE '[]'::jsonb END
+    ) AS category
+    GROUP BY category
+    ORDER BY count DESC, category
+"""
+
+PREFERRED_MODEL_COUNTS_SQL = """
+    SELECT model.display_name, count(*) AS count
+    FROM ({scoped}) AS scoped
+    CROSS JOIN LATERAL unnest(scoped.preferred_model_ids) AS preferred (model_id)
+    JOIN {models_table} AS model ON model.id = preferred.model_id
+    GROUP BY model.display_name
+    ORDER BY count DESC, model.display_name
+"""
+
+
+def _fetch(feedbacks, sql, fields, limit=None, **tables):
+    """Run `sql` over the rows of a Feedback queryset, inlined as a subquery."""
+    scoped, params = feedbacks.order_by().values(*fields).query.sql_with_params()
+    sql = sql.format(scoped=scoped, **tables)
+    if limit:
+        sql += ' LIMIT %s'
+        params = (*params, limit)
+    with connections[feedbacks.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def category_counts(feedbacks, limit=None) -> List[tuple]:
+    """(category, count) across the categories lists of the feedbacks, most mentioned first."""
+    return _fetch(feedbacks, CATEGORY_COUNTS_SQL, ['categories'], limit)
+
+
+def preferred_model_counts(feedbacks, limit=None) -> List[tuple]:
+    """(model display name, count) across the preferred models of the feedbacks, most preferred first."""
+    return _fetch(
+        feedbacks, PREFERRED_MODEL_COUNTS_SQL, ['preferred_model_ids'], limit,
+        models_table=AIModel._meta.db_table
+    )
+
+
 class FeedbackAnalyzer:
     """Advanced analytics for feedback data"""
     
@@ -21,72 +71,39 @@ class FeedbackAnalyzer:
             start_date = timezone.now() - time_period
             feedbacks = feedbacks.filter(created_at__gte=start_date)
         
+        # Counts per type and weekday and the average rating in one pass
+        weekday = ExtractIsoWeekDay('created_at', tzinfo=dt_timezone.utc)
+        totals = feedbacks.annotate(weekday=weekday).aggregate(
+            total=Count('id'),
+            average_rating=Avg('rating', filter=Q(feedback_type='rating')),
+            **{feedback_type: Count('id', filter=Q(feedback_type=feedback_type)) for feedback_type in FEEDBACK_TYPES},
+            **{day: Count('id', filter=Q(weekday=index + 1)) for index, day in enumerate(DAY_NAMES)}
+        )
+        
         analysis = {
-            'total_feedback_given': feedbacks.count(),
-            'feedback_by_type': {},
+            'total_feedback_given': totals['total'],
+            'feedback_by_type': {feedback_type: totals[feedback_type] for feedback_type in FEEDBACK_TYPES},
             'average_rating_given': None,
             'preferred_models': [],
             'favorite_categories': [],
-            'feedback_frequency': {},
+            'feedback_frequency': {day: totals[day] for day in DAY_NAMES if totals[day]},
             'consistency_score': 0
         }
         
-        # Feedback by type
-        for feedback_type in ['rating', 'preference', 'report']:
-            count = feedbacks.filter(feedback_type=feedback_type).count()
-            analysis['feedback_by_type'][feedback_type] = count
+        if totals['average_rating'] is not None:
+            analysis['average_rating_given'] = round(totals['average_rating'], 2)
         
-        # Average rating given
-        ratings = feedbacks.filter(
-            feedback_type='rating',
-            rating__isnull=False
-        )
-        if ratings.exists():
-            analysis['average_rating_given'] = round(
-                ratings.aggregate(avg=Avg('rating'))['avg'], 2
+        analysis['preferred_models'] = [
+            {'model': display_name, 'count': count}
+            for display_name, count in preferred_model_counts(
+                feedbacks.filter(feedback_type='preference'), limit=5
             )
+        ]
         
-        # Preferred models
-        model_preferences = defaultdict(int)
-        preference_feedbacks = feedbacks.filter(
-            feedback_type='preference',
-            preferred_model__isnull=False
-        )
-        
-        for feedback in preference_feedbacks:
-            model_preferences[feedback.preferred_model.display_name] += 1
-        
-        analysis['preferred_models'] = sorted(
-            [{'model': k, 'count': v} for k, v in model_preferences.items()],
-            key=lambda x: x['count'],
-            reverse=True
-        )[:5]
-        
-        # Favorite categories
-        all_categories = []
-        for feedback in feedbacks:
-            if feedback.categories:
-                all_categories.extend(feedback.categories)
-        
-        category_counts = defaultdict(int)
-        for category in all_categories:
-            category_counts[category] += 1
-        
-        analysis['favorite_categories'] = sorted(
-            [{'category': k, 'count': v} for k, v in category_counts.items()],
-            key=lambda x: x['count'],
-            reverse=True
-        )[:5]
-        
-        # Feedback frequency (by day of week)
-        feedback_dates = feedbacks.values_list('created_at', flat=True)
-        day_counts = defaultdict(int)
-        
-        for date in feedback_dates:
-            day_name = date.strftime('%A')
-            day_counts[day_name] += 1
-        
-        analysis['feedback_frequency'] = dict(day_counts)
+        analysis['favorite_categories'] = [
+            {'category': category, 'count': count}
+            for category, count in category_counts(feedbacks, limit=5)
+        ]
         
         # Calculate consistency score
         analysis['consistency_score'] = FeedbackAnalyzer._calculate_consistency_score(
@@ -98,25 +115,21 @@ class FeedbackAnalyzer:
     @staticmethod
     def _calculate_consistency_score(feedbacks) -> float:
         """Calculate how consistent a user is in their feedback"""
-        # Check rating consistency
-        model_ratings = defaultdict(list)
-        
-        for feedback in feedbacks.filter(
+        # Rating standard deviation per model, computed by the database
+        model_ratings = feedbacks.filter(
             feedback_type='rating',
             rating__isnull=False,
             message__model__isnull=False
-        ):
-            model_ratings[feedback.message.model_id].append(feedback.rating)
-        
-        # Calculate standard deviation for each model
-        consistency_scores = []
-        
-        for model_id, ratings in model_ratings.items():
-            if len(ratings) > 1:
-                std_dev = statistics.stdev(ratings)
-                # Lower std dev = higher consistency
-                consistency = max(0, 100 - (std_dev * 20))
-                consistency_scores.append(consistency)
+        ).order_by().values('message__model_id').annotate(
+            ratings=Count('rating'),
+            std_dev=StdDev('rating', sample=True)
+        ).filter(ratings__gt=1)
+        
+        # Lower std dev = higher consistency
+        consistency_scores = [
+            max(0, 100 - (row['std_dev'] * 20))
+            for row in model_ratings
+        ]
         
         if consistency_scores:
             return round(sum(consistency_scores) / len(consistency_scores), 2)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class FeedbackConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'feedback'
+
+    def ready(self):
+        import feedback.signals  # noqa: F401
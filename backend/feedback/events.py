@@ -0,0 +1,282 @@
+"""
+Feedback event log and its incremental rating consumer.
+
+Every resolved pairwise vote is appended to FeedbackEvent in the same
+transaction as the Feedback row. When a voter changes their preference, a
+retraction of the previous outcome and the new outcome are appended, so the
+ratings follow the stored vote. A single consumer reads the log in id order
+in micro-batches. For each batch it applies Elo and win/loss/tie deltas to
+ModelRating and advances its FeedbackEventOffset, all in one transaction, so
+each event is applied exactly once even if the worker dies mid-batch. Cost
+per vote is constant instead of a rescan of the last hour.
+
+Ids are assigned at insert but become visible at commit, so the consumer can
+read an id while a lower one is still in flight. Skipped ids are kept as
+gaps on the offset and picked up by later batches once they commit. A gap
+is dropped after EVENT_GAP_TIMEOUT_SECONDS. Ids also go missing for good:
+rolled back inserts, and conflicts of the ON CONFLICT DO NOTHING insert,
+consume sequence values. The loss bound is therefore a vote whose
+transaction commits more than EVENT_GAP_TIMEOUT_SECONDS after a later event
+was written; it is logged and never applied.
+"""
+import logging
+import os
+
+from django.db import transaction
+from django.utils import timezone
+
+from ai_model.utils import EloRatingCalculator
+from feedback.models import FeedbackEvent, FeedbackEventOffset
+from message.models import Message
+from model_metrics.models import ModelMetric, ModelRating
+
+logger = logging.getLogger(__name__)
+
+RATING_CONSUMER = 'model_ratings'
+RATED_MODES = ('compare', 'random', 'academic')
+EVENT_BATCH_SIZE = 1000
+# How long a skipped id is waited for, far above any vote transaction
+EVENT_GAP_TIMEOUT_SECONDS = int(os.getenv('FEEDBACK_EVENT_GAP_TIMEOUT_SECONDS', 600))
+
+
+def get_vote_outcome(preferred_model_ids, model_a_id, model_b_id):
+    preferred = [str(model_id) for model_id in preferred_model_ids or []]
+    if len(preferred) == 2:
+        return 'tie'
+    if not preferred:
+        return 'both_bad'
+    if preferred[0] == str(model_a_id):
+        return 'a'
+    if preferred[0] == str(model_b_id):
+        return 'b'
+    return None
+
+
+def record_feedback_event(feedback, using='default', created=True):
+    """
+    Append a vote to the event log, with a retraction of its previous
+    outcome when an existing vote changed. Returns the appended events, or
+    an empty list if it is not a resolvable pairwise vote or is unchanged.
+    """
+    if feedback.feedback_type != 'preference' or not feedback.message_id:
+        return []
+    # Detailed feedback carries no preference of its own
+    if feedback.additional_feedback_json:
+        return []
+
+    session = feedback.session
+    if session.mode not in RATED_MODES:
+        return []
+
+    # Set by FeedbackCreateSerializer, which has already loaded the replies
+    pair = getattr(feedback.message, 'participant_models', None)
+    if pair is None:
+        pair = dict(
+            Message.objects.using(using).filter(
+                id__in=feedback.message.child_ids, participant__in=['a', 'b']
+            ).values_list('participant', 'model_id')
+        )
+    if not pair.get('a') or not pair.get('b'):
+        return []
+
+    previous = None if created else latest_feedback_events([feedback.id], using=using).get(feedback.id)
+    events = build_feedback_events(
+        feedback.id, pair['a'], pair['b'], feedback.preferred_model_ids, session.mode, session.session_type,
+        previous=previous
+    )
+
+    # INSERT ... ON CONFLICT DO NOTHING on (feedback, revision) keeps the log idempotent
+    FeedbackEvent.objects.using(using).bulk_create(events, ignore_conflicts=True)
+    return events
+
+
+def latest_feedback_events(feedback_ids, using='default'):
+    """The last applied event of each feedback: {feedback_id: (revision, model_a_id, model_b_id, outcome)}."""
+    latest = (
+        FeedbackEvent.objects.using(using).filter(feedback_id__in=feedback_ids, weight=1)
+        .order_by('feedback_id', '-revision').distinct('feedback_id')
+        .values_list('feedback_id', 'revision', 'model_a_id', 'model_b_id', 'outcome')
+    )
+    return {feedback_id: tuple(rest) for feedback_id, *rest in latest}
+
+
+def build_feedback_events(feedback_id, model_a_id, model_b_id, preferred_model_ids, session_mode, session_type,
+                          previous=None):
+    """
+    Unsaved FeedbackEvents for a resolved vote: its outcome, preceded by a
+    retraction of `previous` (as returned by latest_feedback_events) when the
+    outcome changed. Empty if the vote is unchanged or its preference
+    matches neither model.
+    """
+    outcome = get_vote_outcome(preferred_model_ids, model_a_id, model_b_id)
+    if outcome is None:
+        return []
+
+    events, revision = [], 0
+    if previous:
+        previous_revision, previous_a_id, previous_b_id, previous_outcome = previous
+        if (previous_outcome, str(previous_a_id), str(previous_b_id)) == (outcome, str(model_a_id), str(model_b_id)):
+            return []
+        events.append(FeedbackEvent(
+            feedback_id=feedback_id,
+            revision=previous_revision + 1,
+            weight=-1,
+            model_a_id=previous_a_id,
+            model_b_id=previous_b_id,
+            outcome=previous_outcome,
+            session_mode=session_mode,
+            session_type=session_type,
+        ))
+        revision = previous_revision + 2
+
+    events.append(FeedbackEvent(
+        feedback_id=feedback_id,
+        revision=revision,
+        model_a_id=model_a_id,
+        model_b_id=model_b_id,
+        outcome=outcome,
+        session_mode=session_mode,
+        session_type=session_type,
+    ))
+    return events
+
+
+def apply_events(events, states):
+    """
+    Apply (model_a_id, model_b_id, outcome[, weight]) events in order to a
+    dict of ModelRating keyed by model id. Missing states are created in the
+    dict. A weight of -1 retracts the outcome: counts are decremented and the
+    Elo update it would make at the current ratings is reversed.
+    """
+    for model_a_id, model_b_id, outcome, *weight in events:
+        weight = weight[0] if weight else 1
+        state_a = states.setdefault(model_a_id, ModelRating(model_id=model_a_id))
+        state_b = states.setdefault(model_b_id, ModelRating(model_id=model_b_id))
+        state_a.total_comparisons += weight
+        state_b.total_comparisons += weight
+
+        if outcome == 'a':
+            score_a = 1.0
+            state_a.wins += weight
+            state_b.losses += weight
+        elif outcome == 'b':
+            score_a = 0.0
+            state_a.losses += weight
+            state_b.wins += weight
+        else:
+            score_a = 0.5
+            state_a.ties += weight
+            state_b.ties += weight
+
+        expected_a = EloRatingCalculator.calculate_expected_score(state_a.elo_rating, state_b.elo_rating)
+        delta = weight * EloRatingCalculator.K_FACTOR * (score_a - expected_a)
+        state_a.elo_rating += delta
+        state_b.elo_rating -= delta
+    return states
+
+
+def _track_gaps(offset, events, late_ids, now):
+    """
+    Gaps left after this batch: the previous ones minus those that have now
+    been read, plus the ids skipped inside the batch, minus expired ones.
+    """
+    gaps = {event_id: seen for event_id, seen in offset.gaps.items() if int(event_id) not in late_ids}
+    cutoff = now.timestamp() - EVENT_GAP_TIMEOUT_SECONDS
+    expected = offset.last_event_id + 1
+    for event_id, created_at in events:
+        # A transaction open longer than the timeout is not waited for
+        if created_at.timestamp() >= cutoff:
+            gaps.update((str(missing), now.timestamp()) for missing in range(expected, event_id))
+        expected = event_id + 1
+
+    expired = [event_id for event_id, seen in gaps.items() if seen < cutoff]
+    if expired:
+        logger.warning(f"Feedback events never committed within {EVENT_GAP_TIMEOUT_SECONDS}s: {len(expired)} ids dropped")
+        for event_id in expired:
+            del gaps[event_id]
+    return gaps
+
+
+def consume_batch(batch_size=EVENT_BATCH_SIZE, consumer=RATING_CONSUMER):
+    """Apply one micro-batch, including skipped events that have since committed. Returns the number applied."""
+    FeedbackEventOffset.objects.get_or_create(consumer=consumer)
+    fields = ('id', 'model_a_id', 'model_b_id', 'outcome', 'weight', 'created_at')
+
+    with transaction.atomic():
+        # The row lock serialises concurrent consumers
+        offset = FeedbackEventOffset.objects.select_for_update().get(consumer=consumer)
+        now = timezone.now()
+        events = list(
+            FeedbackEvent.objects.filter(id__gt=offset.last_event_id).order_by('id').values_list(*fields)[:batch_size]
+        )
+        late = list(
+            FeedbackEvent.objects.filter(id__in=[int(event_id) for event_id in offset.gaps])
+            .order_by('id').values_list(*fields)
+        ) if offset.gaps else []
+
+        gaps = _track_gaps(offset, [(e[0], e[5]) for e in events], {e[0] for e in late}, now)
+        if gaps != offset.gaps:
+            offset.gaps = gaps
+            offset.save(update_fields=['gaps', 'updated_at'])
+        if not events and not late:
+            return 0
+
+        applied = late + events
+        model_ids = {e[1] for e in applied} | {e[2] for e in applied}
+        states = {state.model_id: state for state in ModelRating.objects.filter(model_id__in=model_ids)}
+        existing = set(states)
+
+        apply_events([e[1:5] for e in applied], states)
+
+        rating_fields = ['elo_rating', 'total_comparisons', 'wins', 'losses', 'ties', 'updated_at']
+        for state in states.values():
+            state.updated_at = now
+        ModelRating.objects.bulk_update([states[m] for m in existing], rating_fields)
+        ModelRating.objects.bulk_create([states[m] for m in states if m not in existing])
+
+        if events:
+            offset.last_event_id = events[-1][0]
+            offset.save(update_fields=['last_event_id', 'updated_at'])
+
+    return len(applied)
+
+
+def consume_feedback_events(batch_size=EVENT_BATCH_SIZE, max_batches=100, consumer=RATING_CONSUMER):
+    """Drain the log in micro-batches. Returns the total number of events applied."""
+    total = 0
+    for _ in range(max_batches):
+        applied = consume_batch(batch_size, consumer)
+        total += applied
+        if applied < batch_size:
+            break
+    return total
+
+
+def snapshot_model_ratings(category='overall'):
+    """
+    Write the running ratings into hourly ModelMetric rows. They use their
+    own 'running' period so they never overwrite the all-time rows written
+    by calculate_period_metrics.
+    """
+    calculated_at = timezone.now().replace(minute=0, second=0, microsecond=0)
+    snapshots = [
+        ModelMetric(
+            model_id=state.model_id,
+            category=category,
+            period='running',
+            calculated_at=calculated_at,
+            elo_rating=round(state.elo_rating),
+            total_comparisons=state.total_comparisons,
+            wins=state.wins,
+            losses=state.losses,
+            ties=state.ties,
+        )
+        for state in ModelRating.objects.all()
+    ]
+    ModelMetric.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['model', 'category', 'period', 'calculated_at'],
+        update_fields=['elo_rating', 'total_comparisons', 'wins', 'losses', 'ties', 'updated_at'],
+    )
+    return len(snapshots)
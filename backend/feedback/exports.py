@@ -0,0 +1,205 @@
+"""
+Streaming battle export for offline leaderboards and research.
+
+A battle is a pairwise preference vote with its prompt, both replies, the
+two models, the outcome, language, input modality and reply latencies.
+
+iter_battles() reads votes in created_at order through a server-side cursor
+(.iterator(chunk_size=...)) and yields one list of rows per chunk, loading
+the replies of each chunk in one extra query. The writers turn every chunk
+into a Parquet row group or a block of gzipped NDJSON lines. Memory stays
+bounded by the chunk size whatever the size of the export.
+
+export_battles() exports the votes created after the previous run, tracked
+with a RollupWatermark per destination. The watermark only moves once the
+file is complete, so a failed run is exported again by the next one.
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from ai_model.models import AIModel
+from feedback.events import RATED_MODES, get_vote_outcome
+from feedback.models import Feedback
+from message.models import Message
+from model_metrics.models import RollupWatermark
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.getenv('BATTLE_EXPORT_CHUNK_SIZE', 5000))
+# Votes younger than this may still be committing; they go in the next export
+EXPORT_SETTLE = timedelta(minutes=5)
+EXPORT_WATERMARK = 'battle_export:{name}'
+EXPORT_FORMATS = {'parquet': 'parquet', 'ndjson': 'ndjson.gz'}
+OUTCOMES = {'a': 'model_a', 'b': 'model_b', 'tie': 'tie', 'both_bad': 'both_bad'}
+
+BATTLE_COLUMNS = [
+    ('battle_id', 'string'),
+    ('created_at', 'timestamp'),
+    ('session_id', 'string'),
+    ('mode', 'string'),
+    ('arena_type', 'string'),
+    ('language', 'string'),
+    ('input_modality', 'string'),
+    ('model_a', 'string'),
+    ('model_b', 'string'),
+    ('winner', 'string'),
+    ('prompt', 'string'),
+    ('response_a', 'string'),
+    ('response_b', 'string'),
+    ('latency_a_ms', 'float'),
+    ('latency_b_ms', 'float'),
+    ('detailed_feedback', 'string'),
+]
+
+
+def battle_schema():
+    types = {'string': pa.string(), 'timestamp': pa.timestamp('us', tz='UTC'), 'float': pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind in BATTLE_COLUMNS])
+
+
+def _battle_votes(since=None, until=None):
+    votes = Feedback.objects.filter(
+        feedback_type='preference',
+        message__isnull=False,
+        session__mode__in=RATED_MODES,
+    )
+    if since:
+        votes = votes.filter(created_at__gt=since)
+    if until:
+        votes = votes.filter(created_at__lte=until)
+    return votes.order_by('created_at', 'id').values_list(
+        'id', 'created_at', 'session_id', 'session__mode', 'session__session_type', 'input_modality',
+        'preferred_model_ids', 'additional_feedback_json',
+        'message__content', 'message__language', 'message__child_ids',
+    )
+
+
+def _build_rows(votes, model_codes):
+    replies = {}
+    child_ids = [child_id for vote in votes for child_id in vote[-1] or []]
+    for reply_id, participant, content, model_id, latency_ms in Message.objects.filter(
+        id__in=child_ids, participant__in=['a', 'b']
+    ).values_list('id', 'participant', 'content', 'model_id', 'latency_ms'):
+        replies[reply_id] = (participant, content, model_id, latency_ms)
+
+    rows = []
+    for (feedback_id, created_at, session_id, mode, session_type, input_modality,
+         preferred_model_ids, detailed, prompt, language, children) in votes:
+        pair = {}
+        for child_id in children or []:
+            if child_id in replies:
+                participant, content, model_id, latency_ms = replies[child_id]
+                pair[participant] = (content, model_id, latency_ms)
+        if 'a' not in pair or 'b' not in pair:
+            continue
+        outcome = get_vote_outcome(preferred_model_ids, pair['a'][1], pair['b'][1])
+        if outcome is None:
+            continue
+        rows.append({
+            'battle_id': str(feedback_id),
+            'created_at': created_at,
+            'session_id': str(session_id),
+            'mode': mode,
+            'arena_type': session_type,
+            'language': language,
+            'input_modality': input_modality,
+            'model_a': model_codes.get(pair['a'][1]),
+            'model_b': model_codes.get(pair['b'][1]),
+            'winner': OUTCOMES[outcome],
+            'prompt': prompt,
+            'response_a': pair['a'][0],
+            'response_b': pair['b'][0],
+            'latency_a_ms': pair['a'][2],
+            'latency_b_ms': pair['b'][2],
+            'detailed_feedback': json.dumps(detailed) if detailed else None,
+        })
+    return rows
+
+
+def iter_battles(since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield battles created in (since, until] as lists of at most chunk_size rows."""
+    model_codes = dict(AIModel.objects.values_list('id', 'model_code'))
+    votes = _battle_votes(since, until).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(votes, chunk_size))
+        if not chunk:
+            return
+        rows = _build_rows(chunk, model_codes)
+        if rows:
+            yield rows
+
+
+def write_ndjson(path, chunks):
+    """Write row chunks as gzipped NDJSON. Returns the number of rows written."""
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for rows in chunks:
+            f.writelines(json.dumps(row, default=str, ensure_ascii=False) + '\n' for row in rows)
+            count += len(rows)
+    return count
+
+
+def write_parquet(path, chunks):
+    """Write row chunks as Parquet, one row group per chunk. Returns the number of rows written."""
+    if pq is None:
+        raise ValueError("Parquet export requires pyarrow")
+    schema = battle_schema()
+    count = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    return count
+
+
+WRITERS = {'parquet': write_parquet, 'ndjson': write_ndjson}
+
+
+def export_battles(directory, format='parquet', name='default', full=False, publish=None,
+                   chunk_size=EXPORT_CHUNK_SIZE, now=None):
+    """
+    Export the battles created since the last export named `name` into a new
+    file in `directory`, then pass its path to `publish` (e.g. an upload)
+    before moving the watermark. Returns (path, rows); path is None when
+    there was nothing new.
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    until = (now or timezone.now()) - EXPORT_SETTLE
+    watermark_name = EXPORT_WATERMARK.format(name=name)
+    watermark = RollupWatermark.objects.filter(name=watermark_name).first()
+    since = None if full or watermark is None else watermark.processed_until
+    if since and since >= until:
+        return None, 0
+
+    start_label = f"{since:%Y%m%dT%H%M%S}" if since else 'start'
+    path = os.path.join(directory, f"battles_{start_label}_{until:%Y%m%dT%H%M%S}.{EXPORT_FORMATS[format]}")
+    os.makedirs(directory, exist_ok=True)
+    try:
+        rows = WRITERS[format](path, iter_battles(since, until, chunk_size))
+        if not rows:
+            os.remove(path)
+            path = None
+        elif publish:
+            publish(path)
+    except Exception:
+        if path and os.path.exists(path):
+            os.remove(path)
+        raise
+
+    RollupWatermark.objects.update_or_create(name=watermark_name, defaults={'processed_until': until})
+    logger.info(f"Exported {rows} battles to {path}")
+    return path, rows
@@ -0,0 +1,362 @@
+"""
+Queued vote ingestion for voting peaks.
+
+POST /feedback/ingest/ validates a vote with FeedbackCreateSerializer (one
+joined query), resolves it into a plain JSON record and appends it to a
+Redis stream, then acks with 202. A retry with the same client-provided
+idempotency key (the Idempotency-Key header) is acknowledged without a
+second append. Votes without one get a per-request key, so changing a vote
+back and forth is never mistaken for a retry.
+
+Each vote records the tenant whose database validated it. The
+flush_vote_stream task reads the stream through a consumer group, splits
+each batch by tenant and writes every part against that tenant's database
+with write_votes():
+- one Feedback upsert (bulk_create with update_conflicts) per set of
+  submitted fields, so a detailed follow-up never resets the vote itself,
+  and one read of the stored ids;
+- one event log insert for the rating consumer, after one read of the
+  previous outcomes of changed votes so they are retracted;
+- one message feedback UPDATE, and one academic prompt counter UPDATE per
+  distinct increment;
+- one UPDATE of the voters' activity summaries, and the cached quota
+  counters once the batch commits.
+Entries are acknowledged and deleted only after their batch commits, and
+entries left pending by a dead worker are reclaimed after
+VOTE_CLAIM_IDLE_MS. Votes that cannot be written, whatever the error, go to
+a dead-letter stream so one bad entry never blocks the stream.
+"""
+import json
+import logging
+import os
+import socket
+import uuid
+from collections import Counter, defaultdict
+
+from academic_prompts.models import AcademicPrompt
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from feedback import quotas
+from feedback.events import RATED_MODES, build_feedback_events, latest_feedback_events
+from feedback.models import Feedback, FeedbackEvent
+from message.models import Message
+from tenants.config import get_tenant_by_slug
+from tenants.context import clear_current_tenant, get_current_tenant, set_current_tenant
+from user import activity
+
+logger = logging.getLogger(__name__)
+
+VOTE_STREAM = os.getenv('VOTE_STREAM_NAME', 'feedback:votes')
+DEAD_LETTER_STREAM = f"{VOTE_STREAM}:dead"
+VOTE_CONSUMER_GROUP = 'vote_writers'
+VOTE_BATCH_SIZE = int(os.getenv('VOTE_BATCH_SIZE', 500))
+# Pending entries idle this long belonged to a worker that died mid-batch
+VOTE_CLAIM_IDLE_MS = 60 * 1000
+IDEMPOTENCY_KEY = 'feedback:vote_idempotency:{user_id}:{key}'
+IDEMPOTENCY_TTL = 24 * 60 * 60
+PENDING = 'pending'
+
+FEEDBACK_KEY_FIELDS = ['user', 'session', 'message', 'feedback_type']
+
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+_group_ready = False
+
+
+def get_stream_client():
+    return get_redis_connection('default')
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _feedback_key(vote):
+    return vote['user_id'], vote['session_id'], vote['message_id'], vote['feedback_type']
+
+
+def build_vote(serializer, validated_data, user, idempotency_key=None):
+    """Resolve a validated FeedbackCreateSerializer payload into a JSON-serializable vote."""
+    session, message, preference, is_detailed = serializer.resolve_vote(validated_data)
+    pair = getattr(message, 'participant_models', {})
+    vote = {
+        'user_id': str(user.pk),
+        'session_id': str(session.id),
+        'message_id': str(message.id),
+        'feedback_type': validated_data['feedback_type'],
+        # Only the submitted fields, so an upsert leaves the others untouched
+        'fields': {name: value for name, value in validated_data.items() if name != 'feedback_type'},
+        'preference': preference,
+        'is_detailed': is_detailed,
+        'session_mode': session.mode,
+        'session_type': session.session_type,
+        'model_a_id': str(pair['a']) if pair.get('a') else None,
+        'model_b_id': str(pair['b']) if pair.get('b') else None,
+        'academic_prompt_id': (message.metadata or {}).get('academic_prompt_id') if session.mode == 'academic' else None,
+        # The consumer runs without a request, so it needs to know the database
+        'tenant': (get_current_tenant() or {}).get('slug'),
+    }
+    vote = json.loads(json.dumps(vote, cls=DjangoJSONEncoder))
+    if not idempotency_key:
+        # Only a client key identifies a retry; identical content may be a
+        # deliberate revote (A, then B, then A again)
+        idempotency_key = uuid.uuid4().hex
+    vote['idempotency_key'] = str(idempotency_key)[:200]
+    vote['received_at'] = timezone.now().isoformat()
+    return vote
+
+
+def enqueue_vote(vote, client=None):
+    """Append a vote to the stream. Returns (entry id, duplicate)."""
+    client = client or get_stream_client()
+    key = IDEMPOTENCY_KEY.format(user_id=vote['user_id'], key=vote['idempotency_key'])
+    if not client.set(key, PENDING, nx=True, ex=IDEMPOTENCY_TTL):
+        return _decode(client.get(key)) or PENDING, True
+
+    try:
+        entry_id = _decode(client.xadd(VOTE_STREAM, {'vote': json.dumps(vote)}))
+    except Exception:
+        # Let the client retry with the same key
+        client.delete(key)
+        raise
+    client.set(key, entry_id, ex=IDEMPOTENCY_TTL)
+    return entry_id, False
+
+
+def _increment_prompt_usage(usage):
+    """One UPDATE per distinct increment instead of one per vote."""
+    by_increment = defaultdict(list)
+    for prompt_id, count in usage.items():
+        by_increment[count].append(prompt_id)
+    for increment, prompt_ids in by_increment.items():
+        updated = AcademicPrompt.objects.filter(id__in=prompt_ids).update(
+            usage_count=F('usage_count') + increment
+        )
+        if updated < len(prompt_ids):
+            logger.warning(f"Academic prompts not found when incrementing usage: {prompt_ids}")
+
+
+def write_votes(votes):
+    """
+    Upsert a batch of votes with their event log rows and message and prompt
+    counters, in one transaction. The last vote per feedback key wins.
+    Returns the Feedback rows.
+    """
+    latest = {}
+    for vote in votes:
+        latest[_feedback_key(vote)] = vote
+    votes = list(latest.values())
+    if not votes:
+        return []
+
+    groups = defaultdict(list)
+    for vote in votes:
+        groups[tuple(sorted(vote['fields']))].append(vote)
+
+    feedbacks = {}
+    with transaction.atomic():
+        for update_fields, group in groups.items():
+            rows = [
+                Feedback(
+                    user_id=vote['user_id'],
+                    session_id=vote['session_id'],
+                    message_id=vote['message_id'],
+                    feedback_type=vote['feedback_type'],
+                    **vote['fields']
+                )
+                for vote in group
+            ]
+            Feedback.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=FEEDBACK_KEY_FIELDS,
+                # updated_at tells the model stats rollups to rebuild the vote's hour
+                update_fields=[*update_fields, 'updated_at'],
+            )
+            feedbacks.update(zip(map(_feedback_key, group), rows))
+
+        # bulk_create keeps the client-side id on rows that hit an existing
+        # feedback, so read the stored ids back in one query
+        stored = Feedback.objects.filter(
+            message_id__in={vote['message_id'] for vote in votes},
+            user_id__in={vote['user_id'] for vote in votes},
+        ).values_list('id', 'user_id', 'session_id', 'message_id', 'feedback_type')
+        inserted = set()
+        for feedback_id, *key in stored:
+            key = tuple(str(part) for part in key)
+            feedback = feedbacks.get(key)
+            if feedback is not None:
+                if feedback.id == feedback_id:
+                    inserted.add(key)
+                feedback.id = feedback_id
+
+        rated = [
+            vote for vote in votes
+            if vote['feedback_type'] == 'preference' and not vote['is_detailed']
+            and vote['session_mode'] in RATED_MODES and vote['model_a_id'] and vote['model_b_id']
+        ]
+        # Only votes that updated an existing feedback can have earlier events
+        changed = [feedbacks[_feedback_key(vote)].id for vote in rated if _feedback_key(vote) not in inserted]
+        previous = latest_feedback_events(changed) if changed else {}
+        events = []
+        for vote in rated:
+            feedback_id = feedbacks[_feedback_key(vote)].id
+            events.extend(build_feedback_events(
+                feedback_id, vote['model_a_id'], vote['model_b_id'], vote['fields'].get('preferred_model_ids'),
+                vote['session_mode'], vote['session_type'], previous=previous.get(feedback_id)
+            ))
+        FeedbackEvent.objects.bulk_create(events, ignore_conflicts=True)
+
+        preferences = {
+            vote['message_id']: vote['preference']
+            for vote in votes if vote['preference'] and not vote['is_detailed']
+        }
+        if preferences:
+            Message.objects.filter(id__in=preferences).update(feedback=Case(
+                *[When(id=message_id, then=Value(preference)) for message_id, preference in preferences.items()],
+                default=F('feedback'),
+            ))
+
+        detailed = {vote['message_id']: vote for vote in votes if vote['is_detailed']}
+        first_detailed = set()
+        if detailed:
+            first_detailed = {
+                str(message_id) for message_id in Message.objects.select_for_update().filter(
+                    id__in=detailed, has_detailed_feedback=False
+                ).values_list('id', flat=True)
+            }
+            Message.objects.filter(id__in=first_detailed).update(has_detailed_feedback=True)
+            _increment_prompt_usage(Counter(
+                detailed[message_id]['academic_prompt_id']
+                for message_id in first_detailed if detailed[message_id]['academic_prompt_id']
+            ))
+
+        # bulk_create skips post_save, so bump the activity summaries and
+        # quota counters here
+        vote_counts = defaultdict(lambda: (0, 0, 0))
+        quota_counts = Counter()
+        for vote in votes:
+            created = _feedback_key(vote) in inserted
+            became_detailed = vote['message_id'] in first_detailed
+            additional_feedback_json = vote['fields'].get('additional_feedback_json')
+            counts = activity.vote_counts(
+                vote['session_mode'], vote['session_type'], additional_feedback_json,
+                created=created, became_detailed=became_detailed
+            )
+            vote_counts[vote['user_id']] = tuple(map(sum, zip(vote_counts[vote['user_id']], counts)))
+            quota_counts.update(
+                (vote['user_id'], scope) for scope in quotas.vote_scopes(
+                    vote['session_mode'], vote['session_type'], vote['feedback_type'], additional_feedback_json,
+                    created=created, became_detailed=became_detailed
+                )
+            )
+        activity.record_votes(vote_counts)
+        quotas.record_votes(quota_counts)
+
+    return list(feedbacks.values())
+
+
+def _ensure_group(client):
+    global _group_ready
+    if _group_ready:
+        return
+    try:
+        client.xgroup_create(VOTE_STREAM, VOTE_CONSUMER_GROUP, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+    _group_ready = True
+
+
+def _read_entries(client, count):
+    """Stale pending entries first, then new ones."""
+    claimed = client.xautoclaim(
+        VOTE_STREAM, VOTE_CONSUMER_GROUP, CONSUMER_NAME, VOTE_CLAIM_IDLE_MS, start_id='0-0', count=count
+    )
+    entries = list(claimed[1]) if claimed else []
+    if len(entries) < count:
+        response = client.xreadgroup(
+            VOTE_CONSUMER_GROUP, CONSUMER_NAME, {VOTE_STREAM: '>'}, count=count - len(entries)
+        )
+        for _stream, stream_entries in response or []:
+            entries.extend(stream_entries)
+    return entries
+
+
+def _write_batch(votes):
+    """Write (raw, vote) pairs, one by one if the batch fails. Returns the dead-lettered pairs."""
+    try:
+        write_votes([vote for _, vote in votes])
+        return []
+    except Exception as e:
+        logger.warning(f"Vote batch of {len(votes)} failed, writing one by one: {e}")
+
+    dead = []
+    for raw, vote in votes:
+        try:
+            write_votes([vote])
+        except Exception as vote_error:
+            # Malformed votes raise KeyError/TypeError too; never leave
+            # them pending, or the stream would be retried forever
+            dead.append((raw, f"{type(vote_error).__name__}: {vote_error}"))
+    return dead
+
+
+def consume_vote_batch(client, batch_size=VOTE_BATCH_SIZE):
+    """Write one batch from the stream. Returns the number of entries handled."""
+    entries = _read_entries(client, batch_size)
+    if not entries:
+        return 0
+
+    votes, dead = [], []
+    for entry_id, fields in entries:
+        raw = fields.get(b'vote', fields.get('vote'))
+        try:
+            votes.append((entry_id, raw, json.loads(raw)))
+        except (TypeError, ValueError):
+            dead.append((raw, 'unreadable entry'))
+
+    by_tenant = defaultdict(list)
+    for entry_id, raw, vote in votes:
+        by_tenant[vote.get('tenant') if isinstance(vote, dict) else None].append((raw, vote))
+    for tenant_slug, tenant_votes in by_tenant.items():
+        tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+        if tenant_slug and not tenant:
+            dead.extend((raw, f"unknown tenant {tenant_slug}") for raw, _ in tenant_votes)
+            continue
+        if tenant:
+            set_current_tenant(tenant)
+        try:
+            dead.extend(_write_batch(tenant_votes))
+        finally:
+            if tenant:
+                clear_current_tenant()
+
+    pipeline = client.pipeline()
+    for raw, error in dead:
+        pipeline.xadd(DEAD_LETTER_STREAM, {'vote': raw or '', 'error': error[:500]})
+    entry_ids = [entry_id for entry_id, _ in entries]
+    pipeline.xack(VOTE_STREAM, VOTE_CONSUMER_GROUP, *entry_ids)
+    pipeline.xdel(VOTE_STREAM, *entry_ids)
+    pipeline.execute()
+
+    if dead:
+        logger.error(f"{len(dead)} votes moved to {DEAD_LETTER_STREAM}")
+    return len(entries)
+
+
+def consume_vote_stream(batch_size=VOTE_BATCH_SIZE, max_batches=20, client=None):
+    """Drain the vote stream in batches. Returns the total number of entries handled."""
+    client = client or get_stream_client()
+    _ensure_group(client)
+    total = 0
+    for _ in range(max_batches):
+        handled = consume_vote_batch(client, batch_size)
+        total += handled
+        if handled < batch_size:
+            break
+    return total
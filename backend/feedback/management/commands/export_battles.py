@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback.exports import EXPORT_CHUNK_SIZE, WRITERS, export_battles
+
+
+class Command(BaseCommand):
+    help = 'Export the battles created since the last export to a Parquet or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='.',
+            help='Directory to write the export file into'
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(WRITERS),
+            default='parquet',
+            help='File format of the export'
+        )
+        parser.add_argument(
+            '--name',
+            type=str,
+            default='default',
+            help='Export name; each name keeps its own watermark'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Export every battle instead of the ones since the last export'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Votes read per database round trip'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            path, rows = export_battles(
+                options['output'],
+                format=options['format'],
+                name=options['name'],
+                full=options['full'],
+                chunk_size=max(1, options['chunk_size']),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if path:
+            self.stdout.write(self.style.SUCCESS(f'Exported {rows} battles to {path}'))
+        else:
+            self.stdout.write('No new battles to export')
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_model', '0012_merge_0011_aimodel_url_0011_alter_aimodel_provider'),
+        ('feedback', '0007_feedback_tracking_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackEventOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'feedback_event_offsets',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedbackEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('feedback_id', models.UUIDField(unique=True)),
+                ('outcome', models.CharField(choices=[('a', 'Model A wins'), ('b', 'Model B wins'), ('tie', 'Tie'), ('both_bad', 'Both bad')], max_length=10)),
+                ('session_mode', models.CharField(max_length=50)),
+                ('session_type', models.CharField(default='LLM', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('model_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_events_as_a', to='ai_model.aimodel')),
+                ('model_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_events_as_b', to='ai_model.aimodel')),
+            ],
+            options={
+                'db_table': 'feedback_events',
+                'indexes': [models.Index(fields=['created_at'], name='feedback_ev_created_d2d5a3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0008_feedbackeventoffset_feedbackevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackevent',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedbackevent',
+            name='weight',
+            field=models.SmallIntegerField(default=1, help_text='1 applies the outcome, -1 retracts it'),
+        ),
+        migrations.AlterField(
+            model_name='feedbackevent',
+            name='feedback_id',
+            field=models.UUIDField(),
+        ),
+        migrations.AddConstraint(
+            model_name='feedbackevent',
+            constraint=models.UniqueConstraint(fields=('feedback_id', 'revision'), name='unique_feedback_event_revision'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0009_feedbackevent_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackeventoffset',
+            name='gaps',
+            field=models.JSONField(blank=True, default=dict, help_text='Skipped event id -> epoch seconds first seen'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0010_feedbackeventoffset_gaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['updated_at'], name='feedback_updated_c56034_idx'),
+        ),
+    ]
@@ -74,6 +74,7 @@ class Feedback(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'feedback'
@@ -82,6 +83,7 @@ class Feedback(models.Model):
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['feedback_type']),
             models.Index(fields=['input_modality']),  # For leaderboard filtering by modality
+            models.Index(fields=['updated_at']),  # For re-rolling model stats of changed votes
         ]
         ordering = ['-created_at']
         unique_together = [
@@ -91,6 +93,61 @@ class Feedback(models.Model):
     def __str__(self):
         return f"{self.feedback_type} by {self.user.display_name}"
 
+
+class FeedbackEvent(models.Model):
+    """
+    Append-only log of resolved pairwise votes. The auto-increment id is the
+    stream offset read by consumers; rows are never updated or deleted. A
+    changed vote appends a retraction of its previous outcome (weight -1)
+    followed by the new outcome, each with the next revision of the feedback.
+    """
+    OUTCOME_CHOICES = [
+        ('a', 'Model A wins'),
+        ('b', 'Model B wins'),
+        ('tie', 'Tie'),
+        ('both_bad', 'Both bad'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    feedback_id = models.UUIDField()
+    revision = models.PositiveIntegerField(default=0)
+    weight = models.SmallIntegerField(default=1, help_text="1 applies the outcome, -1 retracts it")
+    model_a = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='feedback_events_as_a')
+    model_b = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='feedback_events_as_b')
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    session_mode = models.CharField(max_length=50)
+    session_type = models.CharField(max_length=100, default='LLM')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'feedback_events'
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['feedback_id', 'revision'], name='unique_feedback_event_revision'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.model_a_id} vs {self.model_b_id}: {self.outcome}"
+
+
+class FeedbackEventOffset(models.Model):
+    """
+    Last FeedbackEvent id applied by a named consumer, and the lower ids it
+    skipped because their transaction had not committed yet.
+    """
+    consumer = models.CharField(max_length=100, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=dict, blank=True, help_text="Skipped event id -> epoch seconds first seen")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'feedback_event_offsets'
+
+    def __str__(self):
+        return f"{self.consumer} @ {self.last_event_id}"
+
 # class CeilRestrictedUser(models.Model):
 #     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='ceil_restriction')
 #     created_at = models.DateTimeField(auto_now_add=True)
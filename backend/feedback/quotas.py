@@ -0,0 +1,121 @@
+"""
+Per-user vote quota counters.
+
+Quota checks (the academic TTS vote cap on session create, the random mode
+VOTE_LIMIT) read a per (user, scope) counter from the shared cache (Redis in
+production) instead of counting the user's feedback.
+
+- A missing counter is backfilled from Postgres on the next read.
+- Votes bump existing counters once their transaction commits, so a rolled
+  back vote is never counted. A counter that is not cached yet is left alone;
+  the backfill will count the committed vote.
+- Deleting a feedback drops the user's counters.
+
+A vote committed between a backfill's count and its cache write can be
+missed, so counters expire after QUOTA_TTL and are recounted.
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils import timezone
+
+from feedback.models import Feedback
+
+logger = logging.getLogger(__name__)
+
+ACADEMIC_TTS_VOTES = 'academic_tts_votes'
+RANDOM_VOTES = 'random_votes'
+
+# Detailed TTS academic votes count towards the cap from this date
+ACADEMIC_TTS_VOTES_SINCE = datetime(2026, 1, 28)
+
+QUOTA_KEY = 'vote_quota:{scope}:{user_id}'
+QUOTA_TTL = 24 * 60 * 60
+
+
+def _academic_tts_votes(user_id):
+    return Feedback.objects.filter(
+        user_id=user_id,
+        session__mode='academic',
+        session__session_type='TTS',
+        additional_feedback_json__isnull=False,
+        created_at__gte=timezone.make_aware(ACADEMIC_TTS_VOTES_SINCE)
+    ).exclude(
+        additional_feedback_json={}
+    )
+
+
+def _random_votes(user_id):
+    return Feedback.objects.filter(
+        user_id=user_id,
+        session__mode='random',
+        feedback_type='preference'
+    )
+
+
+SCOPES = {
+    ACADEMIC_TTS_VOTES: _academic_tts_votes,
+    RANDOM_VOTES: _random_votes,
+}
+
+
+def _key(scope, user_id):
+    return QUOTA_KEY.format(scope=scope, user_id=user_id)
+
+
+def get_count(user, scope):
+    """The user's vote count in a quota scope."""
+    key = _key(scope, user.pk)
+    try:
+        count = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Vote quota read failed for {key}: {e}")
+        return SCOPES[scope](user.pk).count()
+
+    if count is None:
+        count = SCOPES[scope](user.pk).count()
+        try:
+            cache.add(key, count, QUOTA_TTL)
+        except Exception as e:
+            logger.warning(f"Vote quota backfill failed for {key}: {e}")
+    return count
+
+
+def vote_scopes(session_mode, session_type, feedback_type, additional_feedback_json, created, became_detailed=False):
+    """Quota scopes counting one written feedback."""
+    scopes = []
+    if created and session_mode == 'random' and feedback_type == 'preference':
+        scopes.append(RANDOM_VOTES)
+    is_detailed = session_mode == 'academic' and session_type == 'TTS' and bool(additional_feedback_json)
+    if is_detailed and (created or became_detailed):
+        scopes.append(ACADEMIC_TTS_VOTES)
+    return scopes
+
+
+def _increment(counts):
+    for (user_id, scope), delta in counts.items():
+        key = _key(scope, user_id)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Not cached; the next read counts this vote
+            pass
+        except Exception as e:
+            logger.warning(f"Vote quota update failed for {key}: {e}")
+
+
+def record_votes(counts, using=None):
+    """Add {(user_id, scope): votes} to cached counters once the transaction commits."""
+    counts = Counter({key: delta for key, delta in counts.items() if delta})
+    if counts:
+        transaction.on_commit(lambda: _increment(counts), using=using or router.db_for_write(Feedback))
+
+
+def reset(user_id):
+    try:
+        cache.delete_many([_key(scope, user_id) for scope in SCOPES])
+    except Exception as e:
+        logger.warning(f"Vote quota reset failed for user {user_id}: {e}")
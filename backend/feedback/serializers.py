@@ -1,13 +1,19 @@
 import logging
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery
 from feedback.models import Feedback
 from ai_model.models import AIModel
 from chat_session.models import ChatSession
 from message.models import Message
 from ai_model.serializers import AIModelListSerializer
 from feedback.services import FeedbackAnalyticsService
+from feedback.ingestion import build_vote, write_votes
+from feedback import quotas
+from user import activity
 from chat_session.serializers import ChatSessionSerializer
 from academic_prompts.models import AcademicPrompt
 import os
@@ -107,31 +113,54 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
                 )
         return value
     
+    def _load_vote_messages(self, attrs, user):
+        """
+        The user message with its session and assistant replies, in one
+        joined query. Each row is annotated with the id of the user's
+        existing feedback of this type, if any.
+        """
+        existing_feedback = Feedback.objects.filter(
+            user_id=user.pk,
+            session_id=OuterRef('session_id'),
+            message_id=OuterRef('pk'),
+            feedback_type=attrs.get('feedback_type'),
+        ).order_by().values('id')[:1]
+        return list(
+            Message.objects.select_related('session').filter(
+                Q(id=attrs['message_id']) | Q(parent_message_ids__contains=[attrs['message_id']]),
+                session_id=attrs['session_id'],
+            ).annotate(existing_feedback_id=Subquery(existing_feedback)).order_by()
+        )
+
     def validate(self, attrs):
         feedback_type = attrs.get('feedback_type')
+        user = self.context['request'].user
         
-        # Validate session exists and user has access
+        # Validate session and message together
         try:
-            session = ChatSession.objects.get(id=attrs['session_id'])
-        except ChatSession.DoesNotExist:
-            raise serializers.ValidationError("Session not found")
+            rows = self._load_vote_messages(attrs, user) if attrs.get('message_id') else []
+        except (TypeError, ValueError, DjangoValidationError):
+            raise serializers.ValidationError("Message not found in session")
+        message = next((row for row in rows if str(row.id) == str(attrs.get('message_id'))), None)
         
-        # Check if user has access to the session
-        user = self.context['request'].user
-        if session.user != user and not session.is_public:
-            raise serializers.ValidationError("You don't have access to this session")
-        
-        # Validate message if provided
-        if attrs.get('message_id'):
+        if message:
+            session = message.session
+            # Assistant replies, as listed on the user message
+            child_ids = {str(child_id) for child_id in message.child_ids or []}
+            attrs['model_messages'] = [row for row in rows if str(row.id) in child_ids]
+            attrs['message'] = message
+        else:
             try:
-                message = Message.objects.get(
-                    id=attrs['message_id'],
-                    session=session
-                )
-                attrs['message'] = message
-            except Message.DoesNotExist:
+                session = ChatSession.objects.get(id=attrs['session_id'])
+            except ChatSession.DoesNotExist:
+                raise serializers.ValidationError("Session not found")
+            if attrs.get('message_id'):
                 raise serializers.ValidationError("Message not found in session")
         
+        # Check if user has access to the session
+        if session.user_id != user.pk and not session.is_public:
+            raise serializers.ValidationError("You don't have access to this session")
+        
         # Type-specific validations
         if feedback_type == 'preference':
             if session.mode == 'direct':
@@ -148,19 +177,22 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
         attrs['session'] = session
         return attrs
     
-    def create(self, validated_data):
-        # Remove the ID fields
+    def resolve_vote(self, validated_data):
+        """
+        Pop the lookup fields and derive preferred_model_ids and the modality
+        flags from the rows loaded in validate(). validated_data is left with
+        the Feedback fields. Returns (session, userMessage, preference,
+        is_detailed_feedback).
+        """
         session = validated_data.pop('session', None)
-        message = validated_data.pop('message', None)
+        userMessage = validated_data.pop('message', None)
+        model_messages = validated_data.pop('model_messages', [])
         validated_data.pop('session_id', None)
-        message_id = validated_data.pop('message_id', None)
+        validated_data.pop('message_id', None)
         preference = validated_data.pop('preference', None)
         feedback_type = validated_data.get('feedback_type')
-        user = self.context['request'].user
 
-        try:
-            userMessage = Message.objects.get(id=message_id)
-        except Message.DoesNotExist:
+        if userMessage is None:
             raise serializers.ValidationError("User Message not found")
 
         is_detailed_feedback = bool(validated_data.get('additional_feedback_json'))
@@ -171,23 +203,24 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
         #     and session.mode == 'random'
         #     and CeilRestrictedUser.objects.filter(user=user).exists()
         # ):
-        #     vote_count = Feedback.objects.filter(
-        #         user=user,
-        #         session__mode='random',
-        #         feedback_type='preference'
-        #     ).count()
+        #     vote_count = quotas.get_count(user, quotas.RANDOM_VOTES)
         #     if vote_count >= VOTE_LIMIT:
         #         raise PermissionDenied(
         #             f"You have reached the maximum limit of {VOTE_LIMIT} votes in random mode."
         #         )
 
         if feedback_type == 'preference' and not is_detailed_feedback:
-            for modelMessage in userMessage.child_ids:
-                modelMessageObj = Message.objects.get(id=modelMessage)
-                if modelMessageObj.participant == 'a':
-                    modelAId = str(modelMessageObj.model_id)
-                elif modelMessageObj.participant == 'b':
-                    modelBId = str(modelMessageObj.model_id)
+            participant_models = {
+                modelMessage.participant: modelMessage.model_id
+                for modelMessage in model_messages
+                if modelMessage.participant in ('a', 'b')
+            }
+            if 'a' not in participant_models or 'b' not in participant_models:
+                raise serializers.ValidationError("Model responses not found for this message")
+            modelAId = str(participant_models['a'])
+            modelBId = str(participant_models['b'])
+            # Reused by the feedback event log instead of reloading the pair
+            userMessage.participant_models = participant_models
 
             if preference == 'model_a':
                 preferred_model_ids = [modelAId]
@@ -222,15 +255,49 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
         else:
             validated_data['input_modality'] = 'text'
 
-        # Use update_or_create to handle both initial feedback and detailed feedback updates
-        with transaction.atomic():
-            feedback, created = Feedback.objects.update_or_create(
-                user=user,
+        return session, userMessage, preference, is_detailed_feedback
+
+    def create(self, validated_data):
+        session, userMessage, preference, is_detailed_feedback = self.resolve_vote(validated_data)
+        try:
+            return self.write_feedback(validated_data, session, userMessage, preference, is_detailed_feedback)
+        except IntegrityError:
+            if userMessage.existing_feedback_id is not None:
+                raise
+            # A concurrent first vote inserted the row after our lookup (the
+            # unique key is user, session, message, feedback_type); the
+            # transaction rolled back, so redo the write as an update
+            userMessage.refresh_from_db(fields=['feedback', 'has_detailed_feedback'])
+            userMessage.existing_feedback_id = Feedback.objects.filter(
+                user=self.context['request'].user,
                 session=session,
                 message=userMessage,
-                feedback_type=feedback_type,
-                defaults=validated_data
-            )
+                feedback_type=validated_data.get('feedback_type'),
+            ).values_list('id', flat=True).first()
+            return self.write_feedback(validated_data, session, userMessage, preference, is_detailed_feedback)
+
+    def write_feedback(self, validated_data, session, userMessage, preference, is_detailed_feedback):
+        feedback_type = validated_data.get('feedback_type')
+        user = self.context['request'].user
+
+        # Insert the first feedback; update_or_create handles detailed feedback updates
+        with transaction.atomic():
+            if userMessage.existing_feedback_id is None:
+                # First feedback of this type: a plain insert, no locking read
+                feedback = Feedback.objects.create(
+                    user=user,
+                    session=session,
+                    message=userMessage,
+                    **validated_data
+                )
+            else:
+                feedback, created = Feedback.objects.update_or_create(
+                    user=user,
+                    session=session,
+                    message=userMessage,
+                    feedback_type=feedback_type,
+                    defaults=validated_data
+                )
 
             message_update_fields = []
 
@@ -260,6 +327,20 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
             if message_update_fields:
                 userMessage.save(update_fields=message_update_fields)
 
+            # New feedback is counted by the post_save signal; an update only
+            # counts when it turns the vote into a detailed one
+            if is_detailed_feedback and is_first_detailed_feedback and userMessage.existing_feedback_id is not None:
+                activity.record_votes({user.pk: activity.vote_counts(
+                    session.mode, session.session_type, validated_data.get('additional_feedback_json'),
+                    created=False, became_detailed=True
+                )})
+                quotas.record_votes({
+                    (user.pk, scope): 1 for scope in quotas.vote_scopes(
+                        session.mode, session.session_type, feedback_type,
+                        validated_data.get('additional_feedback_json'), created=False, became_detailed=True
+                    )
+                })
+
         # Trigger analytics update
         # FeedbackAnalyticsService.process_new_feedback(feedback)
 
@@ -275,18 +356,17 @@ class BulkFeedbackSerializer(serializers.Serializer):
     )
     
     def create(self, validated_data):
-        feedbacks_data = validated_data['feedbacks']
-        created_feedbacks = []
-        
-        with transaction.atomic():
-            for feedback_data in feedbacks_data:
-                feedback_data['user'] = self.context['request'].user
-                feedback = Feedback.objects.create(**feedback_data)
-                created_feedbacks.append(feedback)
+        feedback_serializer = self.fields['feedbacks'].child
+        user = self.context['request'].user
+        votes = [
+            build_vote(feedback_serializer, feedback_data, user)
+            for feedback_data in validated_data['feedbacks']
+        ]
+
+        # One batched write; ratings follow through the feedback event log
+        created_feedbacks = write_votes(votes)
         
-        # Process analytics for all feedbacks
-        for feedback in created_feedbacks:
-            FeedbackAnalyticsService.process_new_feedback(feedback)
+        cache.delete_many({f"session_feedback:{vote['session_id']}" for vote in votes})
         
         return created_feedbacks
 
@@ -3,13 +3,28 @@ from django.db.models import Count, Avg, Q, F
 from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
+import logging
 import statistics
+import time
 from feedback.models import Feedback
+from feedback.analytics import category_counts
 from model_metrics.models import AIModel, ModelMetric
+from model_metrics.rollups import get_model_totals, get_pair_totals
 from chat_session.models import ChatSession
 from ai_model.utils import EloRatingCalculator
 from django.core.cache import cache
 from model_metrics.models import ModelMetric
+from tenants.context import get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+TRENDING_CATEGORIES_LIMIT = 10
+TRENDING_CATEGORIES_MAX_DAYS = 90
+TRENDING_CATEGORIES_CACHE_KEY = 'trending_categories:{tenant}:{days}'
+# Fresh for 5 minutes, then served stale while it is recomputed, for up to a day
+TRENDING_CATEGORIES_FRESH = 300
+TRENDING_CATEGORIES_TTL = 86400
+TRENDING_CATEGORIES_LOCK_TTL = 60
 
 
 class FeedbackService:
@@ -20,9 +35,28 @@ class FeedbackService:
         """Get comprehensive feedback summary for a session"""
         feedbacks = Feedback.objects.filter(session=session)
         
+        preference_models = [
+            model for model in [session.model_a, session.model_b] if model
+        ] if session.mode == 'compare' else []
+        
+        # Rating and preference counts in one conditional aggregation
+        ratings = Q(feedback_type='rating', rating__isnull=False)
+        preferences = Q(feedback_type='preference')
+        totals = feedbacks.aggregate(
+            total=Count('id'),
+            ratings=Count('id', filter=ratings),
+            average_rating=Avg('rating', filter=ratings),
+            preferences=Count('id', filter=preferences),
+            **{f'rating_{rating}': Count('id', filter=ratings & Q(rating=rating)) for rating in range(1, 6)},
+            **{
+                f'preferred_{index}': Count('id', filter=preferences & Q(preferred_model_ids__contains=[model.id]))
+                for index, model in enumerate(preference_models)
+            }
+        )
+        
         summary = {
             'session_id': str(session.id),
-            'total_feedback_count': feedbacks.count(),
+            'total_feedback_count': totals['total'],
             'average_rating': None,
             'rating_distribution': {},
             'preferences': {},
@@ -31,44 +65,25 @@ class FeedbackService:
         }
         
         # Rating statistics
-        ratings = feedbacks.filter(
-            feedback_type='rating',
-            rating__isnull=False
-        )
-        
-        if ratings.exists():
-            summary['average_rating'] = round(
-                ratings.aggregate(avg=Avg('rating'))['avg'], 2
-            )
-            
-            # Rating distribution
-            for rating in range(1, 6):
-                count = ratings.filter(rating=rating).count()
-                summary['rating_distribution'][rating] = count
+        if totals['ratings']:
+            summary['average_rating'] = round(totals['average_rating'], 2)
+            summary['rating_distribution'] = {
+                rating: totals[f'rating_{rating}'] for rating in range(1, 6)
+            }
         
         # Preference statistics for compare mode
-        if session.mode == 'compare':
-            preferences = feedbacks.filter(feedback_type='preference')
-            
-            for model in [session.model_a, session.model_b]:
-                if model:
-                    pref_count = preferences.filter(preferred_model=model).count()
-                    summary['preferences'][model.display_name] = {
-                        'count': pref_count,
-                        'percentage': round(
-                            (pref_count / preferences.count() * 100) 
-                            if preferences.count() > 0 else 0, 2
-                        )
-                    }
+        for index, model in enumerate(preference_models):
+            pref_count = totals[f'preferred_{index}']
+            summary['preferences'][model.display_name] = {
+                'count': pref_count,
+                'percentage': round(
+                    (pref_count / totals['preferences'] * 100)
+                    if totals['preferences'] > 0 else 0, 2
+                )
+            }
         
         # Category analysis
-        all_categories = []
-        for feedback in feedbacks:
-            if feedback.categories:
-                all_categories.extend(feedback.categories)
-        
-        for category in set(all_categories):
-            summary['categories_mentioned'][category] = all_categories.count(category)
+        summary['categories_mentioned'] = dict(category_counts(feedbacks))
         
         # Recent comments
         recent_feedbacks = feedbacks.exclude(
@@ -96,77 +111,50 @@ class FeedbackService:
         time_period: Optional[timedelta] = None
     ) -> Dict:
         """Get feedback statistics for a specific model"""
-        # Base query
-        feedbacks = Feedback.objects.filter(
-            Q(message__model=model) |
-            Q(session__model_a=model) |
-            Q(session__model_b=model)
-        )
-        
-        if time_period:
-            start_date = timezone.now() - time_period
-            feedbacks = feedbacks.filter(created_at__gte=start_date)
-        
-        # Rating statistics
-        ratings = feedbacks.filter(
-            feedback_type='rating',
-            rating__isnull=False,
-            message__model=model
-        )
-        
+        start_date = timezone.now() - time_period if time_period else None
+        # Counters come from the hourly rollups; only categories need raw rows
+        totals = get_model_totals([model.id], since=start_date).get(model.id, {})
+        compare_totals = get_model_totals([model.id], since=start_date, mode='compare').get(model.id, {})
+
         stats = {
             'model': model,
-            'total_ratings': ratings.count(),
+            'total_ratings': totals.get('ratings_count', 0),
             'average_rating': None,
             'rating_breakdown': {},
-            'total_preferences': 0,
-            'win_count': 0,
-            'loss_count': 0,
+            'total_preferences': compare_totals.get('votes', 0),
+            'win_count': compare_totals.get('wins', 0),
+            'loss_count': compare_totals.get('losses', 0),
             'win_rate': 0,
             'categories_performance': {}
         }
-        
-        if ratings.exists():
-            stats['average_rating'] = round(
-                ratings.aggregate(avg=Avg('rating'))['avg'], 2
-            )
-            
+
+        if stats['total_ratings']:
+            stats['average_rating'] = round(totals['rating_sum'] / stats['total_ratings'], 2)
+
             # Rating breakdown
             for rating in range(1, 6):
-                stats['rating_breakdown'][rating] = ratings.filter(rating=rating).count()
-        
-        # Preference statistics (for compare mode)
-        preference_feedbacks = Feedback.objects.filter(
-            feedback_type='preference',
-            session__mode='compare'
-        ).filter(
-            Q(session__model_a=model) | Q(session__model_b=model)
-        )
-        
-        if time_period:
-            preference_feedbacks = preference_feedbacks.filter(created_at__gte=start_date)
-        
-        stats['total_preferences'] = preference_feedbacks.count()
-        stats['win_count'] = preference_feedbacks.filter(preferred_model=model).count()
-        stats['loss_count'] = preference_feedbacks.exclude(
-            preferred_model=model
-        ).exclude(
-            preferred_model__isnull=True
-        ).count()
-        
+                stats['rating_breakdown'][rating] = totals[f'rating_{rating}']
+
         if stats['total_preferences'] > 0:
             stats['win_rate'] = round(
                 (stats['win_count'] / stats['total_preferences']) * 100, 2
             )
-        
+
         # Category performance
+        ratings = Feedback.objects.filter(
+            feedback_type='rating',
+            rating__isnull=False,
+            message__model_id=model.id
+        ).exclude(categories=[])
+        if start_date:
+            ratings = ratings.filter(created_at__gte=start_date)
+
         category_ratings = {}
-        for feedback in ratings:
-            if feedback.categories:
-                for category in feedback.categories:
-                    if category not in category_ratings:
-                        category_ratings[category] = []
-                    category_ratings[category].append(feedback.rating)
+        for categories, rating in ratings.values_list('categories', 'rating'):
+            for category in categories or []:
+                if category not in category_ratings:
+                    category_ratings[category] = []
+                category_ratings[category].append(rating)
         
         for category, ratings_list in category_ratings.items():
             stats['categories_performance'][category] = {
@@ -183,25 +171,14 @@ class FeedbackService:
         time_period: Optional[timedelta] = None
     ) -> Dict:
         """Calculate head-to-head comparison statistics"""
-        comparisons = Feedback.objects.filter(
-            feedback_type='preference',
-            session__mode='compare',
-            session__model_a=model_a,
-            session__model_b=model_b
-        ) | Feedback.objects.filter(
-            feedback_type='preference',
-            session__mode='compare',
-            session__model_a=model_b,
-            session__model_b=model_a
-        )
-        
-        if time_period:
-            start_date = timezone.now() - time_period
-            comparisons = comparisons.filter(created_at__gte=start_date)
-        
-        total = comparisons.count()
-        model_a_wins = comparisons.filter(preferred_model=model_a).count()
-        model_b_wins = comparisons.filter(preferred_model=model_b).count()
+        start_date = timezone.now() - time_period if time_period else None
+        head_to_head = get_pair_totals(
+            model_a.id, opponent_ids=[model_b.id], since=start_date, modes=['compare']
+        ).get(model_b.id, {})
+
+        total = head_to_head.get('votes', 0)
+        model_a_wins = head_to_head.get('wins', 0)
+        model_b_wins = head_to_head.get('losses', 0)
         ties = total - model_a_wins - model_b_wins
         
         return {
@@ -316,24 +293,45 @@ class FeedbackAnalyticsService:
     
     @staticmethod
     def get_trending_feedback_categories(days: int = 7) -> List[Dict]:
-        """Get trending feedback categories"""
+        """Top feedback categories of the last `days` days, counted in the database"""
         start_date = timezone.now() - timedelta(days=days)
-        
-        feedbacks = Feedback.objects.filter(
-            created_at__gte=start_date,
-            categories__isnull=False
-        )
-        
-        category_counts = {}
-        for feedback in feedbacks:
-            for category in feedback.categories:
-                category_counts[category] = category_counts.get(category, 0) + 1
-        
-        # Sort by count
-        trending = sorted(
-            [{'category': k, 'count': v} for k, v in category_counts.items()],
-            key=lambda x: x['count'],
-            reverse=True
-        )
-        
-        return trending[:10]
\ No newline at end of file
+        feedbacks = Feedback.objects.filter(created_at__gte=start_date)
+        return [
+            {'category': category, 'count': count}
+            for category, count in category_counts(feedbacks, limit=TRENDING_CATEGORIES_LIMIT)
+        ]
+    
+    @staticmethod
+    def refresh_trending_feedback_categories(days: int = 7, tenant_slug: Optional[str] = None) -> List[Dict]:
+        """Recompute one window and cache it with a new freshness deadline"""
+        trending = FeedbackAnalyticsService.get_trending_feedback_categories(days)
+        key = TRENDING_CATEGORIES_CACHE_KEY.format(tenant=tenant_slug or 'default', days=days)
+        cache.set(key, {'value': trending, 'fresh_until': time.time() + TRENDING_CATEGORIES_FRESH}, TRENDING_CATEGORIES_TTL)
+        cache.delete(f"{key}:refreshing")
+        return trending
+    
+    @staticmethod
+    def get_cached_trending_feedback_categories(days: int = 7) -> List[Dict]:
+        """
+        Trending categories per window size, served from the cache. A stale
+        entry is returned as is while one background task recomputes it, so
+        only the first request for a window waits for the database.
+        """
+        days = min(max(days, 1), TRENDING_CATEGORIES_MAX_DAYS)
+        tenant = get_current_tenant()
+        tenant_slug = tenant['slug'] if tenant else None
+        key = TRENDING_CATEGORIES_CACHE_KEY.format(tenant=tenant_slug or 'default', days=days)
+        
+        entry = cache.get(key)
+        if entry is None:
+            return FeedbackAnalyticsService.refresh_trending_feedback_categories(days, tenant_slug)
+        
+        if entry['fresh_until'] <= time.time() and cache.add(f"{key}:refreshing", 1, TRENDING_CATEGORIES_LOCK_TTL):
+            from feedback.tasks import refresh_trending_categories
+            try:
+                refresh_trending_categories.delay(days, tenant_slug)
+            except Exception as e:
+                # Keep serving the stale entry; the next request retries
+                logger.error(f"Could not queue trending categories refresh: {e}")
+                cache.delete(f"{key}:refreshing")
+        return entry['value']
@@ -1,26 +1,40 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from feedback.models import Feedback
-from ai_model.utils import EloRatingCalculator
-from feedback.tasks import update_model_metrics_from_feedback
+from feedback.events import record_feedback_event
+from feedback import quotas
+from model_metrics.rollups import mark_bucket_dirty
 
 
 @receiver(post_save, sender=Feedback)
-def process_feedback_signal(sender, instance, created, **kwargs):
-    """Process feedback after creation"""
+def process_feedback_signal(sender, instance, created, using='default', **kwargs):
+    """Append new and changed pairwise votes to the feedback event log"""
+    # Written in the vote's transaction; ratings are applied by the
+    # consume_feedback_events task in micro-batches
+    if instance.feedback_type == 'preference':
+        record_feedback_event(instance, using=using, created=created)
+
+
+@receiver(post_save, sender=Feedback)
+def count_quota_votes(sender, instance, created, using='default', **kwargs):
+    """Bump the voter's cached quota counters once the vote commits"""
     if not created:
         return
-    
-    # Update ELO ratings for preference feedback
-    if instance.feedback_type == 'preference' and instance.session.mode == 'compare':
-        if instance.preferred_model:
-            # Determine result
-            if instance.preferred_model == instance.session.model_a:
-                result = 'a_wins'
-            elif instance.preferred_model == instance.session.model_b:
-                result = 'b_wins'
-            else:
-                result = 'tie'
-            
-            # Update ratings asynchronously
-            update_model_metrics_from_feedback.delay()
\ No newline at end of file
+
+    session = instance.session
+    scopes = quotas.vote_scopes(
+        session.mode, session.session_type, instance.feedback_type, instance.additional_feedback_json, created=True
+    )
+    quotas.record_votes({(instance.user_id, scope): 1 for scope in scopes}, using=using)
+
+
+@receiver(post_delete, sender=Feedback)
+def reset_quota_votes(sender, instance, **kwargs):
+    """Recount the voter's quotas from Postgres on the next check"""
+    quotas.reset(instance.user_id)
+
+
+@receiver(post_delete, sender=Feedback)
+def mark_rollup_bucket_dirty(sender, instance, using='default', **kwargs):
+    """Deletes are not visible to the rollup watermark, so flag the vote's hour for the next refresh"""
+    mark_bucket_dirty(instance.created_at, using=using)
@@ -2,6 +2,8 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 import logging
+import os
+import tempfile
 from feedback.models import Feedback
 from model_metrics.models import ModelMetric, AIModel
 from django.db.models import Count, Avg, Q
@@ -9,6 +11,13 @@ logger = logging.getLogger(__name__)
 from feedback.utils import FeedbackMetrics, FeedbackValidator
 from user.models import User
 from feedback.analytics import FeedbackAnalyzer
+from feedback import events as feedback_events
+from feedback import ingestion
+from feedback.exports import export_battles
+from feedback.services import FeedbackAnalyticsService
+from common.storage_signer import get_bucket
+from tenants.config import get_tenant_by_slug
+from tenants.context import set_current_tenant, clear_current_tenant
 from django.core.mail import send_mail
 from django.conf import settings
 
@@ -86,6 +95,71 @@ def update_model_metrics_from_feedback():
     return len(models_to_update)
 
 
+@shared_task
+def consume_feedback_events():
+    """Apply pending feedback events to the running model ratings"""
+    applied = feedback_events.consume_feedback_events()
+    if applied:
+        logger.info(f"Applied {applied} feedback events")
+    return applied
+
+
+@shared_task
+def flush_vote_stream():
+    """Write queued votes from the ingestion stream in batches"""
+    handled = ingestion.consume_vote_stream()
+    if handled:
+        logger.info(f"Flushed {handled} queued votes")
+    return handled
+
+
+@shared_task
+def snapshot_model_ratings():
+    """Snapshot running model ratings into ModelMetric"""
+    return feedback_events.snapshot_model_ratings()
+
+
+@shared_task
+def refresh_trending_categories(days=7, tenant_slug=None):
+    """Recompute a stale trending categories window in the background"""
+
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+
+    try:
+        return FeedbackAnalyticsService.refresh_trending_feedback_categories(days, tenant_slug)
+    finally:
+        if tenant:
+            clear_current_tenant()
+
+
+@shared_task
+def export_battles_task(format='parquet', name='research', tenant_slug=None):
+    """Export the battles since the last run and upload the file to the export bucket"""
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+
+    prefix = f"battle_exports/{tenant_slug or 'default'}/{name}"
+
+    def upload(path):
+        blob = get_bucket().blob(f"{prefix}/{os.path.basename(path)}")
+        blob.upload_from_filename(path)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path, rows = export_battles(directory, format=format, name=name, publish=upload)
+        return {'file': f"{prefix}/{os.path.basename(path)}" if path else None, 'rows': rows}
+    finally:
+        if tenant:
+            clear_current_tenant()
+
+
 @shared_task
 def detect_feedback_anomalies():
     """Detect unusual feedback patterns"""
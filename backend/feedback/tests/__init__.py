@@ -0,0 +1 @@
+# feedback tests package
@@ -0,0 +1,148 @@
+"""
+Tests for the streaming battle export.
+
+Verifies that:
+- iter_battles yields one row per rated pairwise vote with both replies,
+  models, winner, language and latencies, and skips other votes.
+- The export reads the models once, the votes through one cursor and the
+  replies in one query per chunk, whatever the number of votes.
+- NDJSON exports are gzipped JSON lines, and Parquet exports (when pyarrow
+  is installed) keep the battle schema.
+- Repeated exports only contain the votes since the previous one, an export
+  with nothing new writes no file, and a failed publish leaves the
+  watermark where it was.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from chat_session.models import ChatSession
+from feedback import exports
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from model_metrics.models import RollupWatermark
+from user.models import User
+
+NOW = datetime(2026, 3, 10, 12, tzinfo=dt_timezone.utc)
+
+
+class BattleFixtureMixin:
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='voter', auth_provider='google')
+        self.model_a_id = create_ai_model('model-a')
+        self.model_b_id = create_ai_model('model-b')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def battle(self, preferred, created_at, mode='random', latency=(120.0, 340.0)):
+        session = ChatSession.objects.create(user=self.user, mode=mode, session_type='LLM')
+        prompt = Message.objects.create(session=session, role='user', content='Namaste', position=0, language='hi')
+        replies = [
+            Message.objects.create(
+                session=session, role='assistant', content=f'Reply {participant}', position=index + 1,
+                participant=participant, model_id=model_id, latency_ms=latency_ms
+            )
+            for index, (participant, model_id, latency_ms) in enumerate(
+                [('a', self.model_a_id, latency[0]), ('b', self.model_b_id, latency[1])]
+            )
+        ]
+        prompt.child_ids = [reply.id for reply in replies]
+        prompt.save(update_fields=['child_ids'])
+        feedback = Feedback.objects.create(
+            user=self.user, session=session, message=prompt, feedback_type='preference',
+            preferred_model_ids=preferred, input_modality='text', additional_feedback_json={}
+        )
+        Feedback.objects.filter(id=feedback.id).update(created_at=created_at)
+        return feedback
+
+    def read_ndjson(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+
+class IterBattlesTests(BattleFixtureMixin, TestCase):
+
+    def test_rows(self):
+        first = self.battle([self.model_b_id], NOW - timedelta(hours=2))
+        self.battle([self.model_a_id, self.model_b_id], NOW - timedelta(hours=1))
+        self.battle([], NOW - timedelta(minutes=30))
+        # Not a rated mode
+        self.battle([self.model_a_id], NOW - timedelta(minutes=20), mode='direct')
+
+        rows = [row for chunk in exports.iter_battles() for row in chunk]
+
+        self.assertEqual([row['winner'] for row in rows], ['model_b', 'tie', 'both_bad'])
+        self.assertEqual(rows[0]['battle_id'], str(first.id))
+        self.assertEqual(
+            (rows[0]['model_a'], rows[0]['model_b'], rows[0]['response_a'], rows[0]['response_b']),
+            ('model-a', 'model-b', 'Reply a', 'Reply b')
+        )
+        self.assertEqual((rows[0]['prompt'], rows[0]['language'], rows[0]['arena_type']), ('Namaste', 'hi', 'LLM'))
+        self.assertEqual((rows[0]['latency_a_ms'], rows[0]['latency_b_ms']), (120.0, 340.0))
+        self.assertEqual(set(rows[0]), {name for name, _ in exports.BATTLE_COLUMNS})
+
+    def test_query_count_per_chunk(self):
+        for minutes in range(5):
+            self.battle([self.model_a_id], NOW - timedelta(minutes=minutes))
+
+        # Models, the vote cursor, then one reply query for each of the 3 chunks
+        with self.assertNumQueries(5):
+            chunks = list(exports.iter_battles(chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+
+class ExportBattlesTests(BattleFixtureMixin, TestCase):
+
+    def test_incremental_ndjson(self):
+        self.battle([self.model_a_id], NOW - timedelta(hours=2))
+
+        path, rows = exports.export_battles(self.directory, format='ndjson', name='test', now=NOW)
+        self.assertEqual(rows, 1)
+        self.assertTrue(path.endswith('.ndjson.gz'))
+        self.assertEqual(self.read_ndjson(path)[0]['winner'], 'model_a')
+
+        later = NOW + timedelta(hours=1)
+        self.battle([self.model_b_id], later - timedelta(minutes=30))
+        path, rows = exports.export_battles(self.directory, format='ndjson', name='test', now=later)
+        self.assertEqual([row['winner'] for row in self.read_ndjson(path)], ['model_b'])
+
+        self.assertEqual(exports.export_battles(self.directory, format='ndjson', name='test', now=later), (None, 0))
+        # A full export ignores the watermark
+        path, rows = exports.export_battles(self.directory, format='ndjson', name='test', full=True, now=later)
+        self.assertEqual(rows, 2)
+
+    def test_nothing_new_writes_no_file(self):
+        self.assertEqual(exports.export_battles(self.directory, format='ndjson', now=NOW), (None, 0))
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertTrue(RollupWatermark.objects.filter(name='battle_export:default').exists())
+
+    def test_failed_publish_keeps_watermark(self):
+        self.battle([self.model_a_id], NOW - timedelta(hours=2))
+
+        def publish(path):
+            raise ConnectionError('upload failed')
+
+        with self.assertRaises(ConnectionError):
+            exports.export_battles(self.directory, format='ndjson', publish=publish, now=NOW)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertFalse(RollupWatermark.objects.filter(name='battle_export:default').exists())
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            exports.export_battles(self.directory, format='csv')
+
+    @unittest.skipUnless(exports.pq, 'pyarrow is not installed')
+    def test_parquet(self):
+        self.battle([self.model_a_id], NOW - timedelta(hours=2))
+        path, rows = exports.export_battles(self.directory, now=NOW)
+        table = exports.pq.read_table(path)
+        self.assertEqual(table.schema, exports.battle_schema())
+        self.assertEqual(table.column('winner').to_pylist(), ['model_a'])
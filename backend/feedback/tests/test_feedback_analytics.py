@@ -0,0 +1,136 @@
+"""
+Tests for database-side feedback analytics.
+
+Verifies that:
+- analyze_user_preferences runs a fixed number of aggregate queries however
+  many feedbacks the user has, with counts per type and weekday, top
+  preferred models and categories.
+- The consistency score uses the per-model rating standard deviation.
+- get_session_feedback_summary builds the rating distribution, compare
+  mode preferences and category counts without per-value queries.
+- Categories that are not lists are ignored.
+"""
+import statistics
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import TestCase
+
+from ai_model.models import AIModel
+from chat_session.models import ChatSession
+from feedback.analytics import FeedbackAnalyzer, category_counts
+from feedback.models import Feedback
+from feedback.services import FeedbackService
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from user.models import User
+
+
+class AnalyticsFixtureMixin:
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='rater', auth_provider='google')
+        self.model_a_id = create_ai_model('model-a')
+        self.model_b_id = create_ai_model('model-b')
+        self.position = 0
+
+    def message(self, session, model_id=None):
+        self.position += 1
+        return Message.objects.create(
+            session=session, role='assistant' if model_id else 'user', content='Hi',
+            position=self.position, model_id=model_id, participant='a' if model_id else None
+        )
+
+    def feedback(self, session, message, feedback_type, created_at=None, **fields):
+        feedback = Feedback.objects.create(
+            user=self.user, session=session, message=message, feedback_type=feedback_type,
+            additional_feedback_json={}, **fields
+        )
+        if created_at:
+            Feedback.objects.filter(id=feedback.id).update(created_at=created_at)
+        return feedback
+
+
+class AnalyzeUserPreferencesTests(AnalyticsFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ratings = {self.model_a_id: [5, 3, 4], self.model_b_id: [2, 2]}
+        monday = datetime(2026, 3, 2, 12, tzinfo=dt_timezone.utc)
+        for model_id, ratings in self.ratings.items():
+            for rating in ratings:
+                session = ChatSession.objects.create(user=self.user, mode='direct')
+                self.feedback(
+                    session, self.message(session, model_id), 'rating', rating=rating,
+                    categories=['accuracy', 'fluency'] if rating > 3 else ['accuracy'], created_at=monday
+                )
+        for preferred in [[self.model_a_id], [self.model_a_id], [self.model_a_id, self.model_b_id]]:
+            session = ChatSession.objects.create(user=self.user, mode='random')
+            self.feedback(
+                session, self.message(session), 'preference', preferred_model_ids=preferred, categories='n/a',
+                created_at=datetime(2026, 3, 4, 12, tzinfo=dt_timezone.utc)
+            )
+
+    def test_fixed_query_count(self):
+        # Totals, preferred models, categories, consistency
+        with self.assertNumQueries(4):
+            analysis = FeedbackAnalyzer.analyze_user_preferences(self.user)
+
+        self.assertEqual(analysis['total_feedback_given'], 8)
+        self.assertEqual(analysis['feedback_by_type'], {'rating': 5, 'preference': 3, 'report': 0})
+        self.assertEqual(analysis['average_rating_given'], 3.2)
+        self.assertEqual(analysis['preferred_models'], [
+            {'model': 'model-a', 'count': 3}, {'model': 'model-b', 'count': 1}
+        ])
+        self.assertEqual(analysis['favorite_categories'], [
+            {'category': 'accuracy', 'count': 5}, {'category': 'fluency', 'count': 2}
+        ])
+        self.assertEqual(analysis['feedback_frequency'], {'Monday': 5, 'Wednesday': 3})
+
+    def test_consistency_score(self):
+        expected = statistics.mean(
+            max(0, 100 - statistics.stdev(ratings) * 20) for ratings in self.ratings.values()
+        )
+        analysis = FeedbackAnalyzer.analyze_user_preferences(self.user)
+        self.assertAlmostEqual(analysis['consistency_score'], round(expected, 2))
+
+    def test_no_feedback(self):
+        stranger = User.objects.create(display_name='stranger', auth_provider='google')
+        analysis = FeedbackAnalyzer.analyze_user_preferences(stranger)
+        self.assertEqual(analysis['total_feedback_given'], 0)
+        self.assertIsNone(analysis['average_rating_given'])
+        self.assertEqual((analysis['preferred_models'], analysis['consistency_score']), ([], 0.0))
+
+
+class SessionFeedbackSummaryTests(AnalyticsFixtureMixin, TestCase):
+
+    def test_summary(self):
+        session = ChatSession.objects.create(
+            user=self.user, mode='compare', model_a_id=self.model_a_id, model_b_id=self.model_b_id
+        )
+        for rating in [5, 5, 4]:
+            self.feedback(session, self.message(session, self.model_a_id), 'rating', rating=rating,
+                          categories=['fluency'], comment='nice')
+        self.feedback(session, None, 'preference', preferred_model_ids=[self.model_b_id])
+        session = ChatSession.objects.get(id=session.id)
+        # In-memory models, as select_related would load them
+        session.model_a = AIModel(id=self.model_a_id, display_name='model-a')
+        session.model_b = AIModel(id=self.model_b_id, display_name='model-b')
+
+        # Aggregates, categories, recent comments
+        with self.assertNumQueries(3):
+            summary = FeedbackService.get_session_feedback_summary(session)
+
+        self.assertEqual(summary['total_feedback_count'], 4)
+        self.assertEqual(summary['average_rating'], 4.67)
+        self.assertEqual(summary['rating_distribution'], {1: 0, 2: 0, 3: 0, 4: 1, 5: 2})
+        self.assertEqual(summary['preferences'], {
+            'model-a': {'count': 0, 'percentage': 0.0},
+            'model-b': {'count': 1, 'percentage': 100.0},
+        })
+        self.assertEqual(summary['categories_mentioned'], {'fluency': 3})
+        self.assertEqual(len(summary['recent_comments']), 3)
+
+    def test_non_list_categories_are_ignored(self):
+        session = ChatSession.objects.create(user=self.user, mode='direct')
+        self.feedback(session, self.message(session), 'report', categories={'accuracy': True})
+        self.assertEqual(category_counts(Feedback.objects.all()), [])
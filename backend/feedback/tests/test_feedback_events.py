@@ -0,0 +1,207 @@
+"""
+Tests for the feedback event log consumer.
+
+Verifies that:
+- Votes map to a/b/tie/both_bad outcomes from preferred_model_ids.
+- apply_events updates Elo symmetrically and keeps win/loss/tie totals.
+- Applying a batch in one call matches applying events one by one, so
+  micro-batch size does not change the ratings.
+- record_feedback_event ignores detailed feedback and non-pairwise modes.
+- The consumer skips ids that are not committed yet, applies them once they
+  appear, and drops them after EVENT_GAP_TIMEOUT_SECONDS.
+- Rating snapshots use the 'running' period and leave the all-time metrics
+  of calculate_period_metrics alone.
+- A changed vote is logged as a retraction of the previous outcome plus the
+  new one, and applying the retraction undoes the vote's counts.
+"""
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.test import TestCase
+from django.utils import timezone
+
+from feedback import events
+from feedback.models import FeedbackEvent, FeedbackEventOffset
+from feedback.tests.test_vote_resolution import create_ai_model
+from model_metrics.models import ModelMetric, ModelRating
+
+
+class VoteOutcomeTests(TestCase):
+
+    def test_outcomes(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        self.assertEqual(events.get_vote_outcome([a], a, b), 'a')
+        self.assertEqual(events.get_vote_outcome([str(b)], a, b), 'b')
+        self.assertEqual(events.get_vote_outcome([a, b], a, b), 'tie')
+        self.assertEqual(events.get_vote_outcome([], a, b), 'both_bad')
+        self.assertIsNone(events.get_vote_outcome([uuid.uuid4()], a, b))
+
+
+class ApplyEventsTests(TestCase):
+
+    def test_single_win(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        states = events.apply_events([(a, b, 'a')], {})
+
+        self.assertAlmostEqual(states[a].elo_rating, 1516)
+        self.assertAlmostEqual(states[b].elo_rating, 1484)
+        self.assertEqual((states[a].wins, states[a].losses, states[a].total_comparisons), (1, 0, 1))
+        self.assertEqual((states[b].wins, states[b].losses, states[b].total_comparisons), (0, 1, 1))
+
+    def test_ties_and_both_bad_count_as_ties(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        states = events.apply_events([(a, b, 'tie'), (b, a, 'both_bad')], {})
+
+        self.assertEqual(states[a].ties, 2)
+        self.assertEqual(states[b].ties, 2)
+        self.assertAlmostEqual(states[a].elo_rating + states[b].elo_rating, 3000)
+
+    def test_batching_is_order_preserving(self):
+        models = [uuid.uuid4() for _ in range(3)]
+        stream = [(models[i % 3], models[(i + 1) % 3], ('a', 'b', 'tie')[i % 3 if i % 4 else 0]) for i in range(50)]
+
+        batched = events.apply_events(stream, {})
+        one_by_one = {}
+        for event in stream:
+            events.apply_events([event], one_by_one)
+
+        for model_id in models:
+            self.assertAlmostEqual(batched[model_id].elo_rating, one_by_one[model_id].elo_rating)
+            self.assertEqual(batched[model_id].wins, one_by_one[model_id].wins)
+
+    def test_retraction_undoes_counts(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        states = events.apply_events([(a, b, 'a', 1), (a, b, 'a', -1), (a, b, 'b', 1)], {})
+
+        self.assertEqual((states[a].wins, states[a].losses, states[a].total_comparisons), (0, 1, 1))
+        self.assertEqual((states[b].wins, states[b].losses, states[b].total_comparisons), (1, 0, 1))
+        self.assertLess(states[a].elo_rating, 1500)
+        self.assertAlmostEqual(states[a].elo_rating + states[b].elo_rating, 3000)
+
+    def test_existing_state_is_updated_in_place(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        existing = ModelRating(model_id=a, elo_rating=1600, wins=10, total_comparisons=10)
+        states = events.apply_events([(a, b, 'b')], {a: existing})
+
+        self.assertIs(states[a], existing)
+        self.assertEqual(existing.losses, 1)
+        self.assertLess(existing.elo_rating, 1600)
+
+
+class RecordFeedbackEventTests(TestCase):
+
+    def feedback(self, **overrides):
+        values = {
+            'feedback_type': 'preference',
+            'message_id': uuid.uuid4(),
+            'additional_feedback_json': None,
+            'session': SimpleNamespace(mode='random', session_type='LLM'),
+        }
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def test_skips_non_votes(self):
+        self.assertEqual(events.record_feedback_event(self.feedback(feedback_type='rating')), [])
+        self.assertEqual(events.record_feedback_event(self.feedback(additional_feedback_json={'reason': 'x'})), [])
+        self.assertEqual(events.record_feedback_event(self.feedback(session=SimpleNamespace(mode='direct'))), [])
+
+    def test_changed_vote_is_retracted(self):
+        feedback_id, a, b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        self.assertEqual(events.build_feedback_events(feedback_id, a, b, [a], 'random', 'LLM', previous=(0, a, b, 'a')), [])
+
+        retraction, vote = events.build_feedback_events(feedback_id, a, b, [b], 'random', 'LLM', previous=(0, a, b, 'a'))
+        self.assertEqual((retraction.revision, retraction.weight, retraction.outcome), (1, -1, 'a'))
+        self.assertEqual((vote.revision, vote.weight, vote.outcome), (2, 1, 'b'))
+
+
+class ConsumeFeedbackEventsTests(TestCase):
+
+    def test_empty_log_keeps_offset(self):
+        self.assertEqual(events.consume_feedback_events(), 0)
+
+        offset = FeedbackEventOffset.objects.get(consumer=events.RATING_CONSUMER)
+        self.assertEqual(offset.last_event_id, 0)
+
+    def setUp(self):
+        self.model_a_id, self.model_b_id = create_ai_model('model-a'), create_ai_model('model-b')
+
+    def event(self, outcome='a', **values):
+        return FeedbackEvent.objects.create(
+            feedback_id=uuid.uuid4(), model_a_id=self.model_a_id, model_b_id=self.model_b_id,
+            outcome=outcome, session_mode='random', **values
+        )
+
+    def start_after(self, event):
+        # Ids of other tests' rolled back events are not gaps of this log
+        FeedbackEventOffset.objects.create(consumer=events.RATING_CONSUMER, last_event_id=event.id - 1)
+
+    def missing(self, event):
+        event_id = event.id
+        event.delete()
+        return event_id
+
+    def wins(self):
+        return ModelRating.objects.get(model_id=self.model_a_id).wins
+
+    def test_uncommitted_ids_are_applied_once_they_appear(self):
+        first, in_flight, last = self.event(), self.event(), self.event()
+        self.start_after(first)
+        # Not visible yet: its transaction has not committed
+        in_flight_id = self.missing(in_flight)
+
+        self.assertEqual(events.consume_feedback_events(), 2)
+        offset = FeedbackEventOffset.objects.get(consumer=events.RATING_CONSUMER)
+        self.assertEqual((offset.last_event_id, list(offset.gaps)), (last.id, [str(in_flight_id)]))
+
+        self.event(id=in_flight_id)
+        self.assertEqual(events.consume_feedback_events(), 1)
+        self.assertEqual(self.wins(), 3)
+        self.assertEqual(FeedbackEventOffset.objects.get(consumer=events.RATING_CONSUMER).gaps, {})
+        self.assertEqual(events.consume_feedback_events(), 0)
+
+    def test_gaps_expire(self):
+        lost, last = self.event(), self.event()
+        self.start_after(lost)
+        lost_id = self.missing(lost)
+        events.consume_feedback_events()
+
+        expired = (timezone.now() - timedelta(seconds=events.EVENT_GAP_TIMEOUT_SECONDS + 1)).timestamp()
+        FeedbackEventOffset.objects.filter(consumer=events.RATING_CONSUMER).update(gaps={str(lost_id): expired})
+        with self.assertLogs('feedback.events', 'WARNING'):
+            events.consume_feedback_events()
+        self.assertEqual(FeedbackEventOffset.objects.get(consumer=events.RATING_CONSUMER).gaps, {})
+
+        # Committing after the timeout is the loss bound: the vote is never applied
+        self.event(id=lost_id)
+        self.assertEqual(events.consume_feedback_events(), 0)
+        self.assertEqual(self.wins(), 1)
+
+    def test_old_missing_ids_are_not_tracked(self):
+        skipped, last = self.event(), self.event()
+        self.start_after(skipped)
+        self.missing(skipped)
+        FeedbackEvent.objects.filter(id=last.id).update(
+            created_at=timezone.now() - timedelta(seconds=events.EVENT_GAP_TIMEOUT_SECONDS + 1)
+        )
+
+        self.assertEqual(events.consume_feedback_events(), 1)
+        self.assertEqual(FeedbackEventOffset.objects.get(consumer=events.RATING_CONSUMER).gaps, {})
+
+
+class SnapshotModelRatingsTests(TestCase):
+
+    def test_snapshot_does_not_overwrite_all_time_metrics(self):
+        model_id = create_ai_model('model-a')
+        calculated_at = timezone.now().replace(minute=0, second=0, microsecond=0)
+        ModelMetric.objects.create(
+            model_id=model_id, category='overall', period='all_time', calculated_at=calculated_at, elo_rating=1400
+        )
+        ModelRating.objects.create(model_id=model_id, elo_rating=1620.4, total_comparisons=3, wins=3)
+
+        self.assertEqual(events.snapshot_model_ratings(), 1)
+        self.assertEqual(events.snapshot_model_ratings(), 1)
+
+        self.assertEqual(
+            dict(ModelMetric.objects.values_list('period', 'elo_rating')), {'all_time': 1400, 'running': 1620}
+        )
@@ -0,0 +1,117 @@
+"""
+Tests for trending feedback categories.
+
+Verifies that:
+- Categories of the window are counted in one query, most mentioned first,
+  ignoring older feedback and categories that are not lists.
+- Windows are cached per tenant and size, and clamped to 1..90 days.
+- A stale window is served as is while a single background refresh is
+  queued, and a failed enqueue keeps serving it.
+- The endpoint rejects a non-integer days parameter.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.services import (
+    TRENDING_CATEGORIES_CACHE_KEY, TRENDING_CATEGORIES_MAX_DAYS, FeedbackAnalyticsService,
+)
+from feedback.views import FeedbackViewSet
+from tenants.context import clear_current_tenant, set_current_tenant
+from user.models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TrendingCategoriesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(display_name='rater', auth_provider='google')
+        self.session = ChatSession.objects.create(user=self.user, mode='direct')
+
+    def feedback(self, feedback_type, categories, days_ago=0):
+        feedback = Feedback.objects.create(
+            user=self.user, session=self.session, feedback_type=feedback_type, categories=categories,
+            additional_feedback_json={}
+        )
+        Feedback.objects.filter(id=feedback.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_counts_in_one_query(self):
+        self.feedback('rating', ['accuracy', 'fluency'])
+        self.feedback('preference', ['accuracy'], days_ago=2)
+        self.feedback('report', {'accuracy': True})
+        # Outside the window
+        self.feedback('rating', ['creativity'], days_ago=30)
+
+        with self.assertNumQueries(1):
+            trending = FeedbackAnalyticsService.get_trending_feedback_categories(7)
+
+        self.assertEqual(trending, [{'category': 'accuracy', 'count': 2}, {'category': 'fluency', 'count': 1}])
+
+    @patch('feedback.services.FeedbackAnalyticsService.get_trending_feedback_categories')
+    def test_cached_per_tenant_and_window(self, mock_trending):
+        mock_trending.return_value = [{'category': 'accuracy', 'count': 1}]
+
+        FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+        FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+        FeedbackAnalyticsService.get_cached_trending_feedback_categories(100000)
+        FeedbackAnalyticsService.get_cached_trending_feedback_categories(TRENDING_CATEGORIES_MAX_DAYS)
+        set_current_tenant({'slug': 'aquarium', 'db': 'default'})
+        try:
+            FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+        finally:
+            clear_current_tenant()
+
+        self.assertEqual([call.args[0] for call in mock_trending.call_args_list], [7, TRENDING_CATEGORIES_MAX_DAYS, 7])
+
+    @patch('feedback.tasks.refresh_trending_categories.delay')
+    def test_stale_window_is_served_while_refreshing(self, mock_delay):
+        key = TRENDING_CATEGORIES_CACHE_KEY.format(tenant='default', days=7)
+        cache.set(key, {'value': [{'category': 'old', 'count': 3}], 'fresh_until': 0})
+
+        with self.assertNumQueries(0):
+            first = FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+            second = FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, [{'category': 'old', 'count': 3}])
+        mock_delay.assert_called_once_with(7, None)
+
+        # The task replaces the entry and releases the lock
+        self.feedback('rating', ['fluency'])
+        FeedbackAnalyticsService.refresh_trending_feedback_categories(7)
+        self.assertEqual(
+            FeedbackAnalyticsService.get_cached_trending_feedback_categories(7), [{'category': 'fluency', 'count': 1}]
+        )
+        self.assertIsNone(cache.get(f'{key}:refreshing'))
+
+    @patch('feedback.tasks.refresh_trending_categories.delay', side_effect=ConnectionError('broker down'))
+    def test_failed_enqueue_serves_stale(self, mock_delay):
+        key = TRENDING_CATEGORIES_CACHE_KEY.format(tenant='default', days=7)
+        cache.set(key, {'value': [], 'fresh_until': 0})
+
+        self.assertEqual(FeedbackAnalyticsService.get_cached_trending_feedback_categories(7), [])
+        FeedbackAnalyticsService.get_cached_trending_feedback_categories(7)
+        self.assertEqual(mock_delay.call_count, 2)
+
+    def test_endpoint(self):
+        self.feedback('rating', ['accuracy'])
+        view = FeedbackViewSet.as_view({'get': 'trending_categories'})
+
+        def get(**params):
+            request = APIRequestFactory().get('/feedback/trending_categories/', params)
+            force_authenticate(request, user=self.user)
+            return view(request)
+
+        response = get(days=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'category': 'accuracy', 'count': 1}])
+        self.assertEqual(get(days='week').status_code, 400)
@@ -0,0 +1,266 @@
+"""
+Tests for queued vote ingestion.
+
+Verifies that:
+- write_votes upserts a batch with a constant number of queries, records
+  one event per new vote and keeps the last submission per feedback key,
+  retracting the previous outcome of a changed vote.
+- A detailed follow-up keeps the original preference and bumps the academic
+  prompt usage only once.
+- Only a client-provided idempotency key marks a retry, so revoting A, B,
+  then A again queues three votes.
+- enqueue_vote acknowledges a retried idempotency key without appending
+  again, and frees the key when the append fails.
+- The consumer writes a batch, dead-letters unreadable entries and votes
+  that fail with any error, and acks everything it read.
+- The ingest endpoint answers 202 and falls back to a direct write when
+  Redis is down.
+- A vote ingested under a tenant prefix is written to that tenant's
+  database by the consumer, which runs without a tenant.
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from academic_prompts.models import AcademicPrompt
+from chat_session.models import ChatSession
+from feedback import ingestion
+from feedback.models import Feedback, FeedbackEvent
+from feedback.serializers import FeedbackCreateSerializer
+from feedback.tests.test_vote_resolution import create_ai_model
+from feedback.views import FeedbackViewSet
+from message.models import Message
+from tenants.context import clear_current_tenant, set_current_tenant
+from user.models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TENANT = {'id': 'aq', 'name': 'Aquarium', 'slug': 'aquarium', 'db': 'aquarium'}
+
+
+class VoteFixtureMixin:
+    db_alias = 'default'
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='voter', auth_provider='google')
+        self.prompt = AcademicPrompt.objects.create(text='Say hi', language='en')
+        self.session = ChatSession.objects.create(user=self.user, mode='academic', is_public=True)
+        self.model_a_id = create_ai_model('model-a', using=self.db_alias)
+        self.model_b_id = create_ai_model('model-b', using=self.db_alias)
+        self.user_message = Message.objects.create(
+            session=self.session, role='user', content='Hi', position=0,
+            metadata={'academic_prompt_id': str(self.prompt.id)}
+        )
+        children = [
+            Message.objects.create(
+                session=self.session, role='assistant', content='Hello', position=index + 1,
+                participant=participant, model_id=model_id, parent_message_ids=[self.user_message.id]
+            )
+            for index, (participant, model_id) in enumerate([('a', self.model_a_id), ('b', self.model_b_id)])
+        ]
+        self.user_message.child_ids = [child.id for child in children]
+        self.user_message.save(update_fields=['child_ids'])
+
+    def build(self, preference='model_a', user=None, idempotency_key=None, **overrides):
+        data = {
+            'session_id': str(self.session.id),
+            'message_id': str(self.user_message.id),
+            'feedback_type': 'preference',
+            'preference': preference,
+        }
+        data.update(overrides)
+        serializer = FeedbackCreateSerializer(
+            data=data, context={'request': SimpleNamespace(user=user or self.user)}
+        )
+        serializer.is_valid(raise_exception=True)
+        return ingestion.build_vote(serializer, dict(serializer.validated_data), user or self.user, idempotency_key)
+
+
+class WriteVotesTests(VoteFixtureMixin, TestCase):
+
+    def test_batch_is_written_in_constant_queries(self):
+        voters = [User.objects.create(display_name=f"voter-{i}", auth_provider='google') for i in range(5)]
+        votes = [self.build('model_b', user=voter) for voter in voters]
+
+        # Savepoint, feedback upsert, id read, event insert, message update,
+        # activity summary update, release
+        with self.assertNumQueries(7):
+            ingestion.write_votes(votes)
+
+        self.assertEqual(Feedback.objects.count(), 5)
+        self.assertEqual(set(FeedbackEvent.objects.values_list('outcome', flat=True)), {'b'})
+        self.assertEqual(FeedbackEvent.objects.count(), 5)
+        self.user_message.refresh_from_db()
+        self.assertEqual(self.user_message.feedback, 'model_b')
+
+    def test_last_vote_per_key_wins(self):
+        ingestion.write_votes([self.build('model_a')])
+        ingestion.write_votes([self.build('model_a'), self.build('model_b')])
+
+        feedback = Feedback.objects.get()
+        self.assertEqual(feedback.preferred_model_ids, [self.model_b_id])
+        # The changed vote retracts the first outcome before logging the new one
+        self.assertEqual(
+            list(FeedbackEvent.objects.filter(feedback_id=feedback.id).order_by('revision')
+                 .values_list('weight', 'outcome')),
+            [(1, 'a'), (-1, 'a'), (1, 'b')]
+        )
+        ingestion.write_votes([self.build('model_b')])
+        self.assertEqual(FeedbackEvent.objects.count(), 3)
+
+    def test_detailed_follow_up_keeps_preference(self):
+        ingestion.write_votes([self.build('tie')])
+        detailed = {'additional_feedback_json': {'naturalness': 4}}
+        ingestion.write_votes([self.build('tie', **detailed)])
+        ingestion.write_votes([self.build('tie', **detailed)])
+
+        feedback = Feedback.objects.get()
+        self.assertEqual(feedback.preferred_model_ids, [self.model_a_id, self.model_b_id])
+        self.assertEqual(feedback.additional_feedback_json, {'naturalness': 4})
+        self.prompt.refresh_from_db()
+        self.assertEqual(self.prompt.usage_count, 1)
+        self.user_message.refresh_from_db()
+        self.assertTrue(self.user_message.has_detailed_feedback)
+
+
+class BuildVoteTests(VoteFixtureMixin, TestCase):
+
+    def test_only_client_keys_identify_retries(self):
+        keys = [self.build(preference)['idempotency_key'] for preference in ('model_a', 'model_b', 'model_a')]
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(self.build('model_a', idempotency_key='retry-1')['idempotency_key'], 'retry-1')
+
+
+class EnqueueVoteTests(TestCase):
+
+    def vote(self):
+        return {'user_id': 'u1', 'idempotency_key': 'k1'}
+
+    def test_retry_is_acknowledged_once(self):
+        client = MagicMock()
+        client.set.return_value = True
+        client.xadd.return_value = b'1-0'
+        self.assertEqual(ingestion.enqueue_vote(self.vote(), client), ('1-0', False))
+
+        client.set.return_value = False
+        client.get.return_value = b'1-0'
+        self.assertEqual(ingestion.enqueue_vote(self.vote(), client), ('1-0', True))
+        client.xadd.assert_called_once()
+
+    def test_failed_append_frees_key(self):
+        client = MagicMock()
+        client.set.return_value = True
+        client.xadd.side_effect = RedisConnectionError('down')
+
+        with self.assertRaises(RedisConnectionError):
+            ingestion.enqueue_vote(self.vote(), client)
+        client.delete.assert_called_once_with('feedback:vote_idempotency:u1:k1')
+
+
+class ConsumeVoteStreamTests(VoteFixtureMixin, TestCase):
+
+    def test_writes_and_acks_batch(self):
+        client = MagicMock()
+        client.xautoclaim.return_value = [b'0-0', [], []]
+        client.xreadgroup.return_value = [[
+            ingestion.VOTE_STREAM.encode(),
+            [(b'1-0', {b'vote': json.dumps(self.build('model_a')).encode()}), (b'2-0', {b'vote': b'not json'})]
+        ]]
+        pipeline = client.pipeline.return_value
+
+        self.assertEqual(ingestion.consume_vote_batch(client), 2)
+
+        self.assertEqual(Feedback.objects.get().preferred_model_ids, [self.model_a_id])
+        pipeline.xack.assert_called_once_with(ingestion.VOTE_STREAM, ingestion.VOTE_CONSUMER_GROUP, b'1-0', b'2-0')
+        pipeline.xdel.assert_called_once_with(ingestion.VOTE_STREAM, b'1-0', b'2-0')
+        self.assertEqual(pipeline.xadd.call_args.args[0], ingestion.DEAD_LETTER_STREAM)
+
+    def test_any_write_error_is_dead_lettered(self):
+        broken = {**self.build('model_b'), 'fields': None}
+        client = MagicMock()
+        client.xautoclaim.return_value = [b'0-0', [], []]
+        client.xreadgroup.return_value = [[
+            ingestion.VOTE_STREAM.encode(),
+            [(b'1-0', {b'vote': json.dumps(self.build('model_a')).encode()}), (b'2-0', {b'vote': json.dumps(broken)})]
+        ]]
+        pipeline = client.pipeline.return_value
+
+        self.assertEqual(ingestion.consume_vote_batch(client), 2)
+
+        self.assertEqual(Feedback.objects.get().preferred_model_ids, [self.model_a_id])
+        dead = pipeline.xadd.call_args.args[1]
+        self.assertEqual(json.loads(dead['vote'])['fields'], None)
+        self.assertTrue(dead['error'].startswith('TypeError'), dead['error'])
+        pipeline.xack.assert_called_once_with(ingestion.VOTE_STREAM, ingestion.VOTE_CONSUMER_GROUP, b'1-0', b'2-0')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IngestEndpointTests(VoteFixtureMixin, TestCase):
+
+    def post(self):
+        request = APIRequestFactory().post('/feedback/ingest/', {
+            'session_id': str(self.session.id),
+            'message_id': str(self.user_message.id),
+            'feedback_type': 'preference',
+            'preference': 'model_b',
+        }, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        force_authenticate(request, user=self.user)
+        return FeedbackViewSet.as_view({'post': 'ingest'})(request)
+
+    @patch('feedback.views.enqueue_vote', return_value=('5-0', False))
+    def test_queues_vote(self, mock_enqueue):
+        response = self.post()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['vote_id'], '5-0')
+        vote = mock_enqueue.call_args.args[0]
+        self.assertEqual((vote['idempotency_key'], vote['preference']), ('retry-1', 'model_b'))
+        self.assertFalse(Feedback.objects.exists())
+
+    @patch('feedback.views.enqueue_vote', side_effect=RedisConnectionError('down'))
+    def test_writes_directly_when_queue_is_down(self, mock_enqueue):
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Feedback.objects.get().preferred_model_ids, [self.model_b_id])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@patch('feedback.ingestion.get_tenant_by_slug', {'aquarium': TENANT}.get)
+@patch('tenants.middleware.get_tenant_by_slug', {'aquarium': TENANT}.get)
+class TenantVoteIngestionTests(VoteFixtureMixin, TestCase):
+    databases = {'default', 'aquarium'}
+    db_alias = 'aquarium'
+
+    def setUp(self):
+        set_current_tenant(TENANT)
+        try:
+            super().setUp()
+        finally:
+            clear_current_tenant()
+
+    @patch('feedback.views.enqueue_vote', return_value=('7-0', False))
+    def test_vote_lands_in_tenant_database(self, mock_enqueue):
+        api = APIClient()
+        api.force_authenticate(user=self.user)
+        response = api.post('/aquarium/feedback/ingest/', {
+            'session_id': str(self.session.id),
+            'message_id': str(self.user_message.id),
+            'feedback_type': 'preference',
+            'preference': 'model_b',
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        vote = mock_enqueue.call_args.args[0]
+        self.assertEqual(vote['tenant'], 'aquarium')
+
+        client = MagicMock()
+        client.xautoclaim.return_value = [b'0-0', [], []]
+        client.xreadgroup.return_value = [[ingestion.VOTE_STREAM.encode(), [(b'1-0', {b'vote': json.dumps(vote)})]]]
+        self.assertEqual(ingestion.consume_vote_batch(client), 1)
+
+        self.assertEqual(Feedback.objects.using('aquarium').get().preferred_model_ids, [self.model_b_id])
+        self.assertFalse(Feedback.objects.using('default').exists())
+        client.pipeline.return_value.xadd.assert_not_called()
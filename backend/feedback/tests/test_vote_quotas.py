@@ -0,0 +1,130 @@
+"""
+Tests for the cached vote quota counters.
+
+Verifies that:
+- A missing counter is backfilled from Postgres once, then read from the cache.
+- Committed votes bump a cached counter without a query; rolled back votes
+  and uncached counters are left alone.
+- A detailed follow-up counts towards the academic TTS quota once, and
+  batched votes from write_votes are counted too.
+- Deleting a feedback drops the counters.
+- The academic TTS session create check is served from the counter.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat_session.models import ChatSession
+from chat_session.views import MAX_ACADEMIC_TTS_VOTES, ChatSessionViewSet
+from feedback import ingestion, quotas
+from feedback.models import Feedback
+from feedback.tests.test_vote_ingestion import VoteFixtureMixin
+from message.models import Message
+from user.models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class VoteQuotaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(display_name='voter', auth_provider='google')
+        self.session = ChatSession.objects.create(user=self.user, mode='random')
+
+    def vote(self, session=None, **fields):
+        session = session or self.session
+        message = Message.objects.create(session=session, role='user', content='Hi', position=0)
+        return Feedback.objects.create(
+            user=self.user, session=session, message=message, feedback_type='preference', **fields
+        )
+
+    def test_backfills_once(self):
+        self.vote()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 1)
+
+    def test_committed_vote_increments(self):
+        quotas.get_count(self.user, quotas.RANDOM_VOTES)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vote()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 1)
+
+    def test_rolled_back_vote_is_not_counted(self):
+        quotas.get_count(self.user, quotas.RANDOM_VOTES)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.vote()
+                raise RuntimeError('rollback')
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 0)
+
+    def test_uncached_counter_is_backfilled_after_vote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vote()
+
+        self.assertIsNone(cache.get(quotas._key(quotas.RANDOM_VOTES, self.user.pk)))
+        self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 1)
+
+    def test_academic_tts_scope(self):
+        academic = ChatSession.objects.create(user=self.user, mode='academic', session_type='TTS')
+        self.assertEqual(quotas.get_count(self.user, quotas.ACADEMIC_TTS_VOTES), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vote(session=academic, additional_feedback_json={'naturalness': 4})
+            self.vote(session=academic, additional_feedback_json={})
+
+        self.assertEqual(quotas.get_count(self.user, quotas.ACADEMIC_TTS_VOTES), 1)
+        cache.clear()
+        self.assertEqual(quotas.get_count(self.user, quotas.ACADEMIC_TTS_VOTES), 1)
+
+    def test_delete_resets(self):
+        feedback = self.vote()
+        quotas.get_count(self.user, quotas.RANDOM_VOTES)
+
+        feedback.delete()
+
+        self.assertEqual(quotas.get_count(self.user, quotas.RANDOM_VOTES), 0)
+
+    def test_session_create_reads_counter(self):
+        cache.set(quotas._key(quotas.ACADEMIC_TTS_VOTES, self.user.pk), MAX_ACADEMIC_TTS_VOTES)
+        request = APIRequestFactory().post('/sessions/', {'mode': 'academic', 'session_type': 'TTS'}, format='json')
+        force_authenticate(request, user=self.user)
+
+        response = ChatSessionViewSet.as_view({'post': 'create'})(request)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['votes_count'], MAX_ACADEMIC_TTS_VOTES)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BatchedVoteQuotaTests(VoteFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.session.session_type = 'TTS'
+        self.session.save(update_fields=['session_type'])
+
+    def test_detailed_follow_up_counts_once(self):
+        self.assertEqual(quotas.get_count(self.user, quotas.ACADEMIC_TTS_VOTES), 0)
+        detailed = {'additional_feedback_json': {'naturalness': 4}}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingestion.write_votes([self.build('tie')])
+        with self.captureOnCommitCallbacks(execute=True):
+            ingestion.write_votes([self.build('tie', **detailed)])
+        with self.captureOnCommitCallbacks(execute=True):
+            ingestion.write_votes([self.build('tie', **detailed)])
+
+        self.assertEqual(quotas.get_count(self.user, quotas.ACADEMIC_TTS_VOTES), 1)
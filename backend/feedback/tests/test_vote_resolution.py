@@ -0,0 +1,154 @@
+"""
+Tests for vote resolution in FeedbackCreateSerializer.
+
+Verifies that:
+- A pairwise vote is validated, resolved and stored in at most 4 queries
+  (besides BEGIN/COMMIT): the joined message lookup, the feedback insert,
+  the event log insert and the message update, plus one activity summary
+  bump.
+- preferred_model_ids and the modality flags come from the loaded rows.
+- A repeated submission updates the existing feedback instead of inserting,
+  and a changed preference retracts the previous outcome in the event log.
+- Two first votes racing past the lookup end in one updated row instead of
+  an IntegrityError.
+- Messages outside the session and private sessions of other users are rejected.
+"""
+import uuid
+from types import SimpleNamespace
+
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback, FeedbackEvent
+from feedback.serializers import FeedbackCreateSerializer
+from message.models import Message
+from user.models import User
+
+
+def create_ai_model(model_code, using='default'):
+    # The ai_model migrations lag behind the model (is_fresh_model,
+    # random_only, license), so only the migrated columns are written
+    model_id = uuid.uuid4()
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO ai_models (id, provider, model_name, model_code, model_type, display_name, "
+            "description, capabilities, supported_languages, supports_streaming, is_thinking_model, "
+            "is_active, release_date, config, created_at, meta_stats_json) "
+            "VALUES (%s, 'openai', %s, %s, 'LLM', %s, '', '[]', '[]', true, false, true, "
+            "'2020-01-01', '{}', now(), '{}')",
+            [model_id, model_code, model_code, model_code]
+        )
+    return model_id
+
+
+class VoteResolutionTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='voter', auth_provider='google')
+        self.session = ChatSession.objects.create(user=self.user, mode='compare')
+        self.model_a_id = create_ai_model('model-a')
+        self.model_b_id = create_ai_model('model-b')
+        self.user_message = Message.objects.create(
+            session=self.session, role='user', content='Hi', position=0, image_path='prompt.png'
+        )
+        children = [
+            Message.objects.create(
+                session=self.session, role='assistant', content='Hello', position=index + 1,
+                participant=participant, model_id=model_id, parent_message_ids=[self.user_message.id]
+            )
+            for index, (participant, model_id) in enumerate([('a', self.model_a_id), ('b', self.model_b_id)])
+        ]
+        self.user_message.child_ids = [child.id for child in children]
+        self.user_message.save(update_fields=['child_ids'])
+
+    def vote(self, preference='model_a', user=None, **overrides):
+        data = {
+            'session_id': str(self.session.id),
+            'message_id': str(self.user_message.id),
+            'feedback_type': 'preference',
+            'preference': preference,
+        }
+        data.update(overrides)
+        return FeedbackCreateSerializer(
+            data=data, context={'request': SimpleNamespace(user=user or self.user)}
+        )
+
+    def test_vote_path_query_count(self):
+        serializer = self.vote('model_b')
+        with CaptureQueriesContext(connection) as captured:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            feedback = serializer.save()
+
+        statements = [q['sql'] for q in captured.captured_queries if q['sql'] not in ('BEGIN', 'COMMIT')]
+        summary_updates = [sql for sql in statements if 'user_activity_summaries' in sql]
+        self.assertEqual(len(summary_updates), 1)
+        self.assertLessEqual(len(statements) - len(summary_updates), 4, '\n'.join(statements))
+
+        feedback.refresh_from_db()
+        self.assertEqual(feedback.preferred_model_ids, [self.model_b_id])
+        self.assertEqual((feedback.input_modality, feedback.has_image_input), ('image', True))
+
+        event = FeedbackEvent.objects.get(feedback_id=feedback.id)
+        self.assertEqual((event.model_a_id, event.model_b_id, event.outcome), (self.model_a_id, self.model_b_id, 'b'))
+        self.user_message.refresh_from_db()
+        self.assertEqual(self.user_message.feedback, 'model_b')
+
+    def test_tie_prefers_both(self):
+        serializer = self.vote('tie')
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        feedback = serializer.save()
+        self.assertEqual(feedback.preferred_model_ids, [str(self.model_a_id), str(self.model_b_id)])
+
+    def test_repeat_vote_updates_existing_feedback(self):
+        first = self.vote('model_a')
+        first.is_valid(raise_exception=True)
+        first.save()
+
+        second = self.vote('model_b')
+        second.is_valid(raise_exception=True)
+        second.save()
+
+        feedback = Feedback.objects.get()
+        self.assertEqual(feedback.preferred_model_ids, [self.model_b_id])
+        self.assertEqual(
+            list(FeedbackEvent.objects.order_by('revision').values_list('revision', 'weight', 'outcome')),
+            [(0, 1, 'a'), (1, -1, 'a'), (2, 1, 'b')]
+        )
+
+        # Resubmitting the same preference logs nothing new
+        third = self.vote('model_b')
+        third.is_valid(raise_exception=True)
+        third.save()
+        self.assertEqual(FeedbackEvent.objects.count(), 3)
+
+    def test_racing_first_votes_update_one_row(self):
+        # Both requests resolve before either inserts, so both take the insert path
+        first, second = self.vote('model_a'), self.vote('model_b')
+        first.is_valid(raise_exception=True)
+        second.is_valid(raise_exception=True)
+
+        first.save()
+        feedback = second.save()
+
+        self.assertEqual(Feedback.objects.get().id, feedback.id)
+        self.assertEqual(Feedback.objects.get().preferred_model_ids, [self.model_b_id])
+        self.assertEqual(
+            list(FeedbackEvent.objects.order_by('revision').values_list('revision', 'weight', 'outcome')),
+            [(0, 1, 'a'), (1, -1, 'a'), (2, 1, 'b')]
+        )
+        self.user_message.refresh_from_db()
+        self.assertEqual(self.user_message.feedback, 'model_b')
+
+    def test_message_from_another_session(self):
+        other_session = ChatSession.objects.create(user=self.user, mode='compare')
+        serializer = self.vote(session_id=str(other_session.id))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('Message not found in session', str(serializer.errors))
+
+    def test_private_session_of_another_user(self):
+        stranger = User.objects.create(display_name='stranger', auth_provider='google')
+        serializer = self.vote(user=stranger)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("don't have access", str(serializer.errors))
@@ -20,6 +20,7 @@ urlpatterns = [
 # PATCH /api/feedback/{id}/ - Update feedback
 # DELETE /api/feedback/{id}/ - Delete feedback
 # POST /api/feedback/bulk_create/ - Create multiple feedbacks
+# POST /api/feedback/ingest/ - Queue a vote for batched writing (202)
 # GET /api/feedback/session_summary/ - Get session feedback summary
 # GET /api/feedback/my_stats/ - Get user's feedback statistics
 # GET /api/feedback/model_comparison/ - Compare two models
@@ -1,3 +1,4 @@
+import logging
 from rest_framework import viewsets, status, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -6,6 +7,7 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Count, Avg, Q, Prefetch
 from datetime import timedelta, datetime, timezone as dt_timezone
 from django.utils import timezone
+from redis.exceptions import RedisError
 
 from feedback.models import Feedback
 from feedback.serializers import (
@@ -15,6 +17,7 @@ from feedback.serializers import (
 )
 from feedback.services import FeedbackService, FeedbackAnalyticsService
 from feedback.analytics import FeedbackAnalyzer
+from feedback.ingestion import build_vote, enqueue_vote, write_votes
 from feedback.permissions import IsFeedbackOwner, HasAdminApiKey
 from user.authentication import FirebaseAuthentication, AnonymousTokenAuthentication
 from user.models import User
@@ -22,6 +25,8 @@ from chat_session.models import ChatSession
 from message.models import Message
 from ai_model.models import AIModel
 
+logger = logging.getLogger(__name__)
+
 
 class FeedbackViewSet(viewsets.ModelViewSet):
     """ViewSet for feedback management"""
@@ -80,6 +85,40 @@ class FeedbackViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
     
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """Validate a vote and queue it for a batched write"""
+        serializer = FeedbackCreateSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        
+        # Retries carrying the same key are acknowledged once
+        idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+        vote = build_vote(serializer, dict(serializer.validated_data), request.user, idempotency_key)
+        
+        try:
+            vote_id, duplicate = enqueue_vote(vote)
+        except RedisError as e:
+            # Never drop a vote: write it synchronously when the queue is down
+            logger.warning(f"Vote queue unavailable, writing directly: {e}")
+            write_votes([vote])
+            return Response(
+                {'status': 'stored', 'idempotency_key': vote['idempotency_key']},
+                status=status.HTTP_201_CREATED
+            )
+        
+        return Response(
+            {
+                'status': 'queued',
+                'vote_id': vote_id,
+                'idempotency_key': vote['idempotency_key'],
+                'duplicate': duplicate
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+    
     @action(detail=False, methods=['get'])
     def session_summary(self, request):
         """Get feedback summary for a session"""
@@ -170,8 +209,12 @@ class FeedbackViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def trending_categories(self, request):
         """Get trending feedback categories"""
-        days = int(request.query_params.get('days', 7))
-        trending = FeedbackAnalyticsService.get_trending_feedback_categories(days)
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        # Clamped to 1..TRENDING_CATEGORIES_MAX_DAYS and cached per window
+        trending = FeedbackAnalyticsService.get_cached_trending_feedback_categories(days)
 
         return Response(trending)
 
@@ -3,7 +3,7 @@ from rest_framework import status, permissions, views
 
 logger = logging.getLogger(__name__)
 from rest_framework.response import Response
-from google.cloud import storage
+from common.storage_signer import get_storage_client
 from django.conf import settings
 import json
 import uuid
@@ -62,7 +62,7 @@ class FrontendErrorLogView(views.APIView):
 def _get_storage_client():
     # Let google library pick up credentials from environment; allow an optional
     # service account json path in settings.GOOGLE_APPLICATION_CREDENTIALS or repo
-    return storage.Client()
+    return get_storage_client()
 
 
 def write_log_to_gcs(entry):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Leaderboard
+from .models import ContributorRollup, FlaggedVoter, Leaderboard
 
 # Register your models here.
 @admin.register(Leaderboard)
@@ -11,4 +11,25 @@ class LeaderboardAdmin(admin.ModelAdmin):
     list_filter = ('arena_type', 'organization', 'language')
     
     # Allows you to search by benchmark name
-    search_fields = ('benchmark_name',)
\ No newline at end of file
+    search_fields = ('benchmark_name',)
+
+
+@admin.register(ContributorRollup)
+class ContributorRollupAdmin(admin.ModelAdmin):
+    # Maintained by leaderboards.contributors
+    list_display = ('user', 'arena_type', 'language', 'mode', 'sessions', 'votes', 'is_stale', 'updated_at')
+    list_filter = ('arena_type', 'mode', 'is_stale')
+    search_fields = ('user__email', 'user__display_name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(FlaggedVoter)
+class FlaggedVoterAdmin(admin.ModelAdmin):
+    # Maintained by leaderboards.vote_anomalies; tick is_cleared to restore full weight
+    list_display = ('user', 'score', 'votes', 'vote_weight', 'is_cleared', 'detected_at')
+    list_filter = ('is_cleared',)
+    list_editable = ('is_cleared',)
+    search_fields = ('user__email', 'user__display_name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('score', 'features', 'votes', 'vote_weight', 'detected_at')
@@ -0,0 +1,170 @@
+"""
+Top contributors rollup.
+
+ContributorRollup keeps each user's session and vote counts per (arena type,
+language, mode), including the totals across each dimension, so the top
+contributors board is one ordered index read instead of a fan-out join of
+users, sessions, feedback and messages.
+
+refresh_contributor_rollups() rebuilds the rows of every user with a
+session, vote or message since the watermark, and of users whose rows were
+marked stale by a deleted session or feedback (leaderboards.signals). A
+vote counts towards the arena type, mode and message languages of the
+session it was cast in, as in the former aggregate.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from leaderboards.models import ContributorRollup
+from message.models import Message
+from model_metrics.models import RollupWatermark
+from user.models import User
+
+logger = logging.getLogger(__name__)
+
+CONTRIBUTORS_WATERMARK = 'contributors'
+# Rows committed shortly after their created_at are picked up on the next run
+WATERMARK_OVERLAP = timedelta(minutes=5)
+REFRESH_CHUNK = 500
+TOP_CONTRIBUTORS_LIMIT = 500
+BREAKDOWN_MODES = {
+    'direct': 'Direct Chat',
+    'compare': 'Comparison',
+    'random': 'Random',
+}
+
+
+def build_rollups(user_ids):
+    """ContributorRollup rows for the given users, computed without saving."""
+    user_ids = {str(user_id) for user_id in user_ids}
+    sessions = {
+        session['id']: session
+        for session in ChatSession.objects.filter(
+            Q(user_id__in=user_ids) | Q(feedbacks__user_id__in=user_ids)
+        ).values('id', 'user_id', 'mode', 'session_type').distinct()
+    }
+    languages = defaultdict(set)
+    for session_id, language in Message.objects.filter(
+        session_id__in=list(sessions), language__gt=''
+    ).values_list('session_id', Lower('language')).distinct():
+        languages[session_id].add(language)
+    votes = Feedback.objects.filter(user_id__in=user_ids).values_list('user_id', 'session_id').annotate(
+        count=Count('id')
+    ).order_by()
+
+    counts = defaultdict(lambda: [0, 0])
+
+    def add(user_id, session_id, field, value):
+        session = sessions[session_id]
+        for arena_type in ('', (session['session_type'] or '').lower()):
+            for language in ('', *languages[session_id]):
+                for mode in ('', session['mode']):
+                    counts[(user_id, arena_type, language, mode)][field] += value
+
+    for session_id, session in sessions.items():
+        if str(session['user_id']) in user_ids:
+            add(session['user_id'], session_id, 0, 1)
+    for user_id, session_id, count in votes:
+        add(user_id, session_id, 1, count)
+
+    return [
+        ContributorRollup(
+            user_id=user_id, arena_type=arena_type, language=language, mode=mode,
+            sessions=session_count, votes=vote_count,
+        )
+        for (user_id, arena_type, language, mode), (session_count, vote_count) in counts.items()
+    ]
+
+
+def refresh_contributors(user_ids):
+    """Replace the rollup rows of the given users. Returns the number of rows written."""
+    user_ids = list(user_ids)
+    rows = 0
+    for start in range(0, len(user_ids), REFRESH_CHUNK):
+        chunk = user_ids[start:start + REFRESH_CHUNK]
+        rollups = build_rollups(chunk)
+        with transaction.atomic():
+            ContributorRollup.objects.filter(user_id__in=chunk).delete()
+            ContributorRollup.objects.bulk_create(rollups, batch_size=1000)
+        rows += len(rollups)
+    return rows
+
+
+def _active_users(since):
+    """Ids of users whose counts may have changed since `since`, or of every contributor."""
+    if since is None:
+        user_ids = set(ChatSession.objects.values_list('user_id', flat=True).distinct())
+        user_ids |= set(Feedback.objects.values_list('user_id', flat=True).distinct())
+    else:
+        # New messages can add a language to the session's owner and voters
+        new_message_sessions = Message.objects.filter(created_at__gte=since).values('session_id')
+        user_ids = set(ChatSession.objects.filter(
+            Q(updated_at__gte=since) | Q(id__in=new_message_sessions)
+        ).values_list('user_id', flat=True).distinct())
+        user_ids |= set(Feedback.objects.filter(
+            Q(created_at__gte=since) | Q(session_id__in=new_message_sessions)
+        ).values_list('user_id', flat=True).distinct())
+        user_ids |= set(ContributorRollup.objects.filter(is_stale=True).values_list('user_id', flat=True).distinct())
+    # Anonymous users are never listed
+    return list(User.objects.filter(id__in=user_ids, is_anonymous=False).values_list('id', flat=True))
+
+
+def refresh_contributor_rollups(now=None):
+    """Rebuild the rollups of users active since the watermark. Returns the number of users refreshed."""
+    now = now or timezone.now()
+    watermark = RollupWatermark.objects.filter(name=CONTRIBUTORS_WATERMARK).first()
+    since = watermark.processed_until - WATERMARK_OVERLAP if watermark else None
+
+    user_ids = _active_users(since)
+    rows = refresh_contributors(user_ids)
+
+    RollupWatermark.objects.update_or_create(name=CONTRIBUTORS_WATERMARK, defaults={'processed_until': now})
+    logger.info(f"Contributor rollups refreshed for {len(user_ids)} users ({rows} rows)")
+    return len(user_ids)
+
+
+def mark_stale(user_id, using=None):
+    """Flag a user's rows for the next refresh after a session or feedback is deleted."""
+    rollups = ContributorRollup.objects.using(using) if using else ContributorRollup.objects
+    rollups.filter(user_id=user_id, is_stale=False).update(is_stale=True)
+
+
+def get_top_contributors(language=None, arena_type=None, limit=TOP_CONTRIBUTORS_LIMIT):
+    """Top contributors by votes then sessions, in the shape UserContributorSerializer expects."""
+    filters = {
+        'arena_type': (arena_type or '').lower(),
+        'language': (language or '').lower(),
+    }
+    top = list(
+        ContributorRollup.objects.filter(
+            mode='', user__is_active=True, user__is_anonymous=False, **filters
+        ).select_related('user').order_by('-votes', '-sessions')[:limit]
+    )
+    modes = dict(BREAKDOWN_MODES)
+    if filters['arena_type'] == 'tts':
+        modes['academic'] = 'Academic Benchmarking'
+
+    breakdowns = defaultdict(dict)
+    for user_id, mode, votes in ContributorRollup.objects.filter(
+        user_id__in=[rollup.user_id for rollup in top], mode__in=list(modes), **filters
+    ).values_list('user_id', 'mode', 'votes'):
+        breakdowns[user_id][mode] = votes
+
+    return [
+        {
+            'email': rollup.user.email,
+            'display_name': rollup.user.display_name,
+            'chat_sessions_count': rollup.sessions,
+            'total_votes': rollup.votes,
+            'votes_breakdown': {label: breakdowns[rollup.user_id].get(mode, 0) for mode, label in modes.items()},
+        }
+        for rollup in top
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboards', '0005_alter_leaderboard_unique_together_and_more'),
+        ('user', '0003_useractivitysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arena_type', models.CharField(blank=True, help_text='Lowercased session type', max_length=100)),
+                ('language', models.CharField(blank=True, help_text='Lowercased message language', max_length=100)),
+                ('mode', models.CharField(blank=True, max_length=50)),
+                ('sessions', models.IntegerField(default=0)),
+                ('votes', models.IntegerField(default=0)),
+                ('is_stale', models.BooleanField(default=False, help_text='Rebuilt by the next refresh')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributor_rollups', to='user.user')),
+            ],
+            options={
+                'db_table': 'contributor_rollups',
+                'indexes': [models.Index(fields=['arena_type', 'language', 'mode', '-votes', '-sessions'], name='contributor_rollup_top_idx'), models.Index(condition=models.Q(('is_stale', True)), fields=['is_stale'], name='contributor_rollup_stale_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'arena_type', 'language', 'mode'), name='unique_contributor_rollup')],
+            },
+        ),
+    ]
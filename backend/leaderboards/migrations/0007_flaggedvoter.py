@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaderboards', '0006_contributorrollup'),
+        ('user', '0003_useractivitysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlaggedVoter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Isolation forest score; lower is more anomalous')),
+                ('features', models.JSONField(blank=True, default=dict, help_text='Feature values the user was scored on')),
+                ('votes', models.IntegerField(default=0, help_text='Votes in the detection window')),
+                ('vote_weight', models.FloatField(default=1.0)),
+                ('is_cleared', models.BooleanField(default=False, help_text='Reviewed as legitimate; votes keep full weight')),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='voter_flag', to='user.user')),
+            ],
+            options={
+                'db_table': 'flagged_voters',
+                'ordering': ['score'],
+            },
+        ),
+    ]
@@ -106,4 +106,58 @@ class Leaderboard(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.benchmark_name} ({self.language}) - {self.get_arena_type_display()}"
\ No newline at end of file
+        return f"{self.benchmark_name} ({self.language}) - {self.get_arena_type_display()}"
+
+class ContributorRollup(models.Model):
+    """
+    Per-user session and vote counts behind the top contributors board, one
+    row per (arena type, language, mode). An empty arena_type, language or
+    mode holds the total across that dimension. Each tenant database keeps
+    its own rows; see leaderboards.contributors.
+    """
+    user = models.ForeignKey('user.User', on_delete=models.CASCADE, related_name='contributor_rollups')
+    arena_type = models.CharField(max_length=100, blank=True, help_text="Lowercased session type")
+    language = models.CharField(max_length=100, blank=True, help_text="Lowercased message language")
+    mode = models.CharField(max_length=50, blank=True)
+    sessions = models.IntegerField(default=0)
+    votes = models.IntegerField(default=0)
+    is_stale = models.BooleanField(default=False, help_text="Rebuilt by the next refresh")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'contributor_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'arena_type', 'language', 'mode'],
+                name='unique_contributor_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['arena_type', 'language', 'mode', '-votes', '-sessions'], name='contributor_rollup_top_idx'),
+            models.Index(fields=['is_stale'], condition=models.Q(is_stale=True), name='contributor_rollup_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ({self.arena_type or 'all'}/{self.language or 'all'}/{self.mode or 'all'})"
+
+
+class FlaggedVoter(models.Model):
+    """
+    A user whose voting pattern was scored as an outlier by
+    leaderboards.vote_anomalies. The rating engine counts each of their
+    votes with vote_weight instead of 1 until the flag is cleared.
+    """
+    user = models.OneToOneField('user.User', on_delete=models.CASCADE, related_name='voter_flag')
+    score = models.FloatField(help_text="Isolation forest score; lower is more anomalous")
+    features = models.JSONField(default=dict, blank=True, help_text="Feature values the user was scored on")
+    votes = models.IntegerField(default=0, help_text="Votes in the detection window")
+    vote_weight = models.FloatField(default=1.0)
+    is_cleared = models.BooleanField(default=False, help_text="Reviewed as legitimate; votes keep full weight")
+    detected_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'flagged_voters'
+        ordering = ['score']
+
+    def __str__(self):
+        return f"{self.user_id} ({self.score:.3f})"
@@ -0,0 +1,344 @@
+"""
+Batch Bradley-Terry rating engine.
+
+Loads every preference vote for an arena into NumPy arrays of
+(model_a_idx, model_b_idx, outcome), collapses them into per-(pair, outcome)
+counts, fits Bradley-Terry by maximum likelihood and bootstraps confidence
+intervals. The fit runs on the collapsed counts, so its cost depends on the
+number of distinct model pairs rather than the number of votes. Bootstrap
+rounds are refitted one after another in the calling process, which is all
+a Celery prefork worker allows. Millions of votes take seconds, most of it
+in the database read.
+
+Votes of users flagged by leaderboards.vote_anomalies count with their
+FlaggedVoter.vote_weight instead of 1.
+
+Scores use the usual arena scale: a 400-point gap means 10:1 odds.
+"""
+import logging
+import math
+import os
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import expit
+from django.db import transaction
+from django.utils import timezone
+
+from ai_model.models import AIModel
+from feedback.models import Feedback
+from message.models import Message
+from leaderboards.models import FlaggedVoter, Leaderboard
+from leaderboards.services import exclude_modality_slices
+
+logger = logging.getLogger(__name__)
+
+BT_SCALE = 400
+BT_BASE = 10
+BT_INIT_RATING = 1000
+BT_L2 = 1e-6
+BOOTSTRAP_ROUNDS = int(os.getenv('LEADERBOARD_BOOTSTRAP_ROUNDS', 200))
+BLIND_MODES = ('random', 'academic')
+
+# Outcome codes, from model_a's point of view
+OUTCOME_B_WINS = 0
+OUTCOME_A_WINS = 1
+OUTCOME_TIE = 2
+
+SESSION_TYPE_BY_ARENA = {'llm': 'LLM', 'asr': 'ASR', 'tts': 'TTS'}
+
+
+def load_battles(arena_type='llm', modes=BLIND_MODES, feedback_filter=None, extra_fields=()):
+    """
+    Return the preference votes of an arena as NumPy arrays.
+
+    Two flat queries: the votes and the assistant replies they judged. The
+    replies are joined to votes through the replies' parent user message.
+    Votes whose pair cannot be resolved (missing reply or model) are dropped.
+
+    Returns a dict with 'model_ids' (index -> AIModel id), integer arrays
+    'model_a', 'model_b', 'outcome', a float array 'weight', and one object
+    array per name in `extra_fields` (Feedback values() lookups, e.g.
+    'message__language') plus 'user_id'.
+    """
+    extra_fields = tuple(extra_fields)
+    if 'user_id' not in extra_fields:
+        extra_fields += ('user_id',)
+    feedback = Feedback.objects.filter(
+        feedback_type='preference',
+        session__session_type=SESSION_TYPE_BY_ARENA.get(arena_type, arena_type.upper()),
+    )
+    if modes:
+        feedback = feedback.filter(session__mode__in=modes)
+    if feedback_filter is not None:
+        feedback = feedback.filter(feedback_filter)
+
+    votes = feedback.values_list('message_id', 'preferred_model_ids', *extra_fields)
+    replies = Message.objects.filter(
+        role='assistant',
+        participant__in=['a', 'b'],
+        model__isnull=False,
+        session_id__in=feedback.values('session_id'),
+    ).values_list('parent_message_ids', 'participant', 'model_id')
+
+    battles = resolve_battles(votes.iterator(chunk_size=10000), replies.iterator(chunk_size=10000), extra_fields)
+    battles['weight'] = vote_weights(battles['user_id'])
+    return battles
+
+
+def vote_weights(user_ids):
+    """Per-vote weights: 1 for every vote except those of flagged, uncleared users."""
+    weights = np.ones(len(user_ids))
+    flagged = dict(
+        FlaggedVoter.objects.filter(is_cleared=False, vote_weight__lt=1).values_list('user_id', 'vote_weight')
+    )
+    if flagged and len(user_ids):
+        weights = np.fromiter((flagged.get(user_id, 1.0) for user_id in user_ids), dtype=np.float64, count=len(user_ids))
+    return weights
+
+
+def resolve_battles(votes, replies, extra_fields=()):
+    """
+    Join votes (message_id, preferred_model_ids, *extras) to the assistant
+    replies (parent_message_ids, participant, model_id) of the same prompt.
+    """
+    pair_by_message = {}
+    for parent_ids, participant, model_id in replies:
+        for parent_id in parent_ids or ():
+            pair_by_message.setdefault(parent_id, {})[participant] = model_id
+
+    model_index = {}
+    model_a, model_b, outcome = [], [], []
+    extras = [[] for _ in extra_fields]
+    for row in votes:
+        message_id, preferred = row[0], row[1] or []
+        pair = pair_by_message.get(message_id)
+        if not pair or 'a' not in pair or 'b' not in pair or pair['a'] == pair['b']:
+            continue
+        a_id, b_id = pair['a'], pair['b']
+
+        if len(preferred) == 1 and preferred[0] == a_id:
+            result = OUTCOME_A_WINS
+        elif len(preferred) == 1 and preferred[0] == b_id:
+            result = OUTCOME_B_WINS
+        else:
+            # Both preferred (tie) or neither (both bad)
+            result = OUTCOME_TIE
+
+        model_a.append(model_index.setdefault(a_id, len(model_index)))
+        model_b.append(model_index.setdefault(b_id, len(model_index)))
+        outcome.append(result)
+        for values, value in zip(extras, row[2:]):
+            values.append(value)
+
+    if not outcome:
+        return _empty_battles(extra_fields)
+
+    battles = {
+        'model_ids': list(model_index),
+        'model_a': np.asarray(model_a, dtype=np.int32),
+        'model_b': np.asarray(model_b, dtype=np.int32),
+        'outcome': np.asarray(outcome, dtype=np.int8),
+    }
+    for name, values in zip(extra_fields, extras):
+        battles[name] = np.asarray(values, dtype=object)
+    return battles
+
+
+def _empty_battles(extra_fields=()):
+    battles = {
+        'model_ids': [],
+        'model_a': np.empty(0, dtype=np.int32),
+        'model_b': np.empty(0, dtype=np.int32),
+        'outcome': np.empty(0, dtype=np.int8),
+    }
+    for name in extra_fields:
+        battles[name] = np.empty(0, dtype=object)
+    return battles
+
+
+def aggregate_battles(model_a, model_b, outcome, weight=None):
+    """
+    Collapse individual votes into unique (i, j, wins_i) rows with weights:
+    the vote count, or the sum of the per-vote weights when given.
+    Ties count as half a win for each side.
+    """
+    wins_a = np.where(outcome == OUTCOME_A_WINS, 1.0, np.where(outcome == OUTCOME_TIE, 0.5, 0.0))
+    keys = np.stack([model_a, model_b, (wins_a * 2).astype(np.int32)], axis=1)
+    unique, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    if weight is None:
+        weights = counts.astype(np.float64)
+    else:
+        weights = np.bincount(inverse.ravel(), weights=weight, minlength=len(unique))
+    return unique[:, 0], unique[:, 1], unique[:, 2] / 2.0, weights
+
+
+def _negative_log_likelihood(theta, rows_i, rows_j, wins_i, weights):
+    diff = theta[rows_i] - theta[rows_j]
+    # log(1 + e^-x) written stably for large |x|
+    loss_i = np.logaddexp(0, -diff)
+    loss_j = np.logaddexp(0, diff)
+    nll = np.sum(weights * (wins_i * loss_i + (1 - wins_i) * loss_j)) + BT_L2 * np.dot(theta, theta)
+
+    residual = weights * (expit(diff) - wins_i)
+    grad = np.bincount(rows_i, residual, minlength=len(theta)) - np.bincount(rows_j, residual, minlength=len(theta))
+    return nll, grad + 2 * BT_L2 * theta
+
+
+def fit_bradley_terry(rows_i, rows_j, wins_i, weights, n_models, theta0=None):
+    """
+    Maximum-likelihood Bradley-Terry strengths on aggregated rows.
+    Returns ratings on the arena scale, centred on BT_INIT_RATING.
+    """
+    if n_models == 0:
+        return np.empty(0)
+    theta0 = np.zeros(n_models) if theta0 is None else theta0
+    result = minimize(
+        _negative_log_likelihood, theta0,
+        args=(rows_i, rows_j, wins_i, weights),
+        jac=True, method='L-BFGS-B',
+        options={'maxiter': 1000, 'gtol': 1e-8},
+    )
+    theta = result.x - result.x.mean()
+    return BT_INIT_RATING + BT_SCALE * theta / math.log(BT_BASE)
+
+
+def bootstrap_bradley_terry(rows_i, rows_j, wins_i, weights, n_models, rounds=BOOTSTRAP_ROUNDS, seed=42):
+    """
+    Bootstrap rating samples: refit on multinomial resamples of the votes
+    (equivalent to resampling individual votes). Rounds run serially in the
+    calling process, since Celery prefork workers cannot start child
+    processes. Each refit works on the collapsed pair counts, so a round
+    costs milliseconds whatever the number of votes.
+    """
+    if rounds <= 0 or n_models == 0:
+        return np.empty((0, n_models))
+
+    rng = np.random.default_rng(seed)
+    # Down-weighted votes shrink the resample to the effective number of votes
+    total = max(1, int(round(weights.sum())))
+    resampled = rng.multinomial(total, weights / weights.sum(), size=rounds).astype(np.float64)
+    return np.vstack([
+        fit_bradley_terry(rows_i, rows_j, wins_i, round_weights, n_models) for round_weights in resampled
+    ])
+
+
+def compute_ratings(battles, rounds=BOOTSTRAP_ROUNDS):
+    """
+    Fit ratings and 95% bootstrap intervals for a battles dict from load_battles.
+    Returns a list of per-model dicts sorted by score.
+    """
+    n_models = len(battles['model_ids'])
+    if n_models == 0 or len(battles['outcome']) == 0:
+        return []
+
+    rows_i, rows_j, wins_i, weights = aggregate_battles(
+        battles['model_a'], battles['model_b'], battles['outcome'], battles.get('weight')
+    )
+    scores = fit_bradley_terry(rows_i, rows_j, wins_i, weights, n_models)
+    samples = bootstrap_bradley_terry(rows_i, rows_j, wins_i, weights, n_models, rounds=rounds)
+    if len(samples):
+        ci_lower, ci_upper = np.percentile(samples, [2.5, 97.5], axis=0)
+    else:
+        ci_lower, ci_upper = scores, scores
+
+    votes = np.bincount(battles['model_a'], minlength=n_models) + np.bincount(battles['model_b'], minlength=n_models)
+    wins = (
+        np.bincount(battles['model_a'][battles['outcome'] == OUTCOME_A_WINS], minlength=n_models)
+        + np.bincount(battles['model_b'][battles['outcome'] == OUTCOME_B_WINS], minlength=n_models)
+    )
+    ties = (
+        np.bincount(battles['model_a'][battles['outcome'] == OUTCOME_TIE], minlength=n_models)
+        + np.bincount(battles['model_b'][battles['outcome'] == OUTCOME_TIE], minlength=n_models)
+    )
+
+    ratings = [
+        {
+            'model_id': battles['model_ids'][k],
+            'score': float(scores[k]),
+            'ci_lower': float(ci_lower[k]),
+            'ci_upper': float(ci_upper[k]),
+            'votes': int(votes[k]),
+            'wins': int(wins[k]),
+            'ties': int(ties[k]),
+        }
+        for k in range(n_models)
+    ]
+    ratings.sort(key=lambda r: r['score'], reverse=True)
+    return ratings
+
+
+def build_leaderboard_json(ratings):
+    """
+    Shape ratings like existing leaderboard_json rows. Rank follows the
+    arena convention: 1 + number of models whose lower bound is above this
+    model's upper bound, so statistically tied models share a rank.
+    """
+    models = AIModel.objects.in_bulk([r['model_id'] for r in ratings])
+    lowers = np.array([r['ci_lower'] for r in ratings])
+
+    rows = []
+    for r in ratings:
+        model = models.get(r['model_id'])
+        if model is None:
+            continue
+        rows.append({
+            'rank': int(1 + np.sum(lowers > r['ci_upper'])),
+            'model': model.model_code,
+            'display_name': model.display_name,
+            'organization': model.provider,
+            'license': model.license,
+            'url': model.url,
+            'score': round(r['score'], 2),
+            'ci_lower': round(r['ci_lower'], 2),
+            'ci_upper': round(r['ci_upper'], 2),
+            'ci_width': round(r['ci_upper'] - r['ci_lower'], 2),
+            'ci': f"+{r['ci_upper'] - r['score']:.0f}/-{r['score'] - r['ci_lower']:.0f}",
+            'votes': r['votes'],
+            'battles': r['votes'],
+            'wins': r['wins'],
+            'ties': r['ties'],
+        })
+    return rows
+
+
+def publish_leaderboard(rows, arena_type, language='Overall', organization='ai4b', benchmark_name=None):
+    """
+    Replace the active leaderboard for (arena_type, organization, language,
+    benchmark). Without an explicit benchmark the current active row's name
+    is reused so readers that take `.first()` keep seeing a single row;
+    per-modality slices are never picked, so the main board cannot replace
+    one.
+    """
+    active = Leaderboard.objects.filter(
+        arena_type=arena_type, organization=organization, language=language, is_active=True
+    )
+    if benchmark_name is None:
+        benchmark_name = (
+            exclude_modality_slices(active).values_list('benchmark_name', flat=True).first()
+            or f"{arena_type}-arena"
+        )
+
+    with transaction.atomic():
+        active.filter(benchmark_name=benchmark_name).update(is_active=False)
+        return Leaderboard.objects.create(
+            leaderboard_json=rows,
+            arena_type=arena_type,
+            organization=organization,
+            language=language,
+            benchmark_name=benchmark_name,
+            calculated_at=timezone.now().date(),
+            is_active=True,
+        )
+
+
+def compute_arena_leaderboard(arena_type='llm', organization='ai4b', language='Overall', benchmark_name=None,
+                              modes=BLIND_MODES, rounds=BOOTSTRAP_ROUNDS, publish=True):
+    """Load votes, fit, bootstrap and (optionally) publish one leaderboard."""
+    battles = load_battles(arena_type, modes=modes)
+    ratings = compute_ratings(battles, rounds=rounds)
+    rows = build_leaderboard_json(ratings)
+    if publish and rows:
+        publish_leaderboard(rows, arena_type, language=language, organization=organization, benchmark_name=benchmark_name)
+    logger.info(f"Computed {arena_type} leaderboard: {len(rows)} models from {len(battles['outcome'])} votes")
+    return rows
@@ -1,7 +1,21 @@
-from django.db.models import Count, Q
-from user.models import User
 from tenants.config import get_tenant_by_slug
 from tenants.context import set_current_tenant, clear_current_tenant
+from feedback.models import Feedback
+from leaderboards.contributors import get_top_contributors
+
+# Per-modality slices are published as '<arena>-arena-<modality>' benchmarks
+MODALITY_BENCHMARK_SUFFIXES = [f"-{choice}" for choice, _ in Feedback._meta.get_field('input_modality').choices]
+
+
+def exclude_modality_slices(leaderboards):
+    """
+    Drop per-modality slice rows from a Leaderboard queryset. Every lookup of
+    the default board goes through this: the leaderboard views, the sampler's
+    stats, get_benchmark_name and publish_leaderboard.
+    """
+    for suffix in MODALITY_BENCHMARK_SUFFIXES:
+        leaderboards = leaderboards.exclude(benchmark_name__endswith=suffix)
+    return leaderboards
 
 def mask_email(email):
     if not email:
@@ -18,7 +32,8 @@ def mask_email(email):
 
 def calculate_top_contributors(tenant_slug, language=None, arena_type=None):
     """
-    Calculates top contributors based on chat sessions and feedback votes.
+    Top contributors based on chat sessions and feedback votes, read from
+    the tenant's contributor rollups.
     Returns a list of dictionaries with user stats.
     """
     if not tenant_slug:
@@ -31,71 +46,9 @@ def calculate_top_contributors(tenant_slug, language=None, arena_type=None):
     set_current_tenant(tenant)
 
     try:
-        session_filters = Q()
-        feedback_filters = Q()
-
-        if arena_type:
-            session_filters &= Q(chat_sessions__session_type__iexact=arena_type)
-            feedback_filters &= Q(feedbacks__session__session_type__iexact=arena_type)
-        
-        if language:
-            session_filters &= Q(chat_sessions__messages__language__iexact=language)
-            feedback_filters &= Q(feedbacks__session__messages__language__iexact=language)
-
-        users = User.objects.filter(is_active=True, is_anonymous=False).annotate(
-            chat_sessions_count=Count(
-                'chat_sessions',
-                filter=session_filters,
-                distinct=True
-            ),
-            total_votes=Count(
-                'feedbacks',
-                filter=feedback_filters,
-                distinct=True
-            ),
-            votes_direct=Count(
-                'feedbacks',
-                filter=feedback_filters & Q(feedbacks__session__mode='direct'),
-                distinct=True
-            ),
-            votes_compare=Count(
-                'feedbacks',
-                filter=feedback_filters & Q(feedbacks__session__mode='compare'),
-                distinct=True
-            ),
-            votes_random=Count(
-                'feedbacks',
-                filter=feedback_filters & Q(feedbacks__session__mode='random'),
-                distinct=True
-            ),
-            votes_academic=Count(
-                'feedbacks',
-                filter=feedback_filters & Q(feedbacks__session__mode='academic'),
-                distinct=True
-            )
-        ).filter(
-            Q(chat_sessions_count__gt=0) | Q(total_votes__gt=0)
-        ).order_by('-total_votes', '-chat_sessions_count')[:500]
-
-        results = []
-        for user in users:
-            breakdown = {
-                'Direct Chat': user.votes_direct,
-                'Comparison': user.votes_compare,
-                'Random': user.votes_random
-            }
-            
-            if arena_type and arena_type.lower() == 'tts':
-                breakdown['Academic Benchmarking'] = user.votes_academic
-
-            results.append({
-                'email': mask_email(user.email),
-                'display_name': user.display_name,
-                'chat_sessions_count': user.chat_sessions_count,
-                'total_votes': user.total_votes,
-                'votes_breakdown': breakdown
-            })
-        
+        results = get_top_contributors(language=language, arena_type=arena_type)
+        for result in results:
+            result['email'] = mask_email(result['email'])
         return results
 
     finally:
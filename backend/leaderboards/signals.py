@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from leaderboards.contributors import mark_stale
+
+
+@receiver(post_delete, sender=ChatSession)
+@receiver(post_delete, sender=Feedback)
+def mark_contributor_rollups_stale(sender, instance, using='default', **kwargs):
+    """Deletes are not visible to the watermark, so flag the user for the next refresh"""
+    mark_stale(instance.user_id, using=using)
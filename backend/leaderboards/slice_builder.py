@@ -0,0 +1,143 @@
+"""
+Per-language and per-modality leaderboards.
+
+Votes are loaded once (leaderboards.rating_engine.load_battles) and grouped
+by (language, input_modality) with pandas. Each slice is then fitted and
+bootstrapped in turn on its own rows, in the calling process (the builder
+runs in a Celery prefork worker, which cannot start child processes), and
+its wall time is reported.
+
+Each slice is published as one Leaderboard row. Language comes from the
+prompt message, and the modality is part of the benchmark name:
+    (llm, Hindi, <active name>), (llm, Hindi, llm-arena-image), ...
+The all-modality slices keep the benchmark name already being served. The
+Overall all-modality board belongs to compute_arena_leaderboards and is not
+rebuilt here.
+"""
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ai_model.tts_interactions import LANG_CODE_TO_NAME
+from leaderboards import rating_engine
+from leaderboards.models import Leaderboard
+from leaderboards.services import exclude_modality_slices
+
+logger = logging.getLogger(__name__)
+
+SLICE_MIN_VOTES = int(os.getenv('LEADERBOARD_SLICE_MIN_VOTES', 50))
+ALL_MODALITIES = 'all'
+# Published by rating_engine.compute_arena_leaderboard
+OVERALL_SLICE = ('Overall', ALL_MODALITIES)
+VALID_LANGUAGES = {code for code, _ in Leaderboard.LANGUAGE_CHOICES}
+
+
+def get_language_name(language):
+    """Map a message language code ('hi') to a Leaderboard language ('Hindi')."""
+    if not isinstance(language, str) or not language:
+        return None
+    if language in LANG_CODE_TO_NAME:
+        return LANG_CODE_TO_NAME[language]
+    name = language.strip().title()
+    return name if name in VALID_LANGUAGES else None
+
+
+def get_benchmark_name(arena_type, modality, organization='ai4b', language='Overall'):
+    """Modality slices get their own benchmark; the all-modality slice keeps the name already served."""
+    if modality != ALL_MODALITIES:
+        return f"{arena_type}-arena-{modality}"
+    active = exclude_modality_slices(Leaderboard.objects.filter(
+        arena_type=arena_type, organization=organization, language=language, is_active=True
+    ))
+    return active.values_list('benchmark_name', flat=True).first() or f"{arena_type}-arena"
+
+
+def group_slices(battles, min_votes=SLICE_MIN_VOTES):
+    """
+    Return {(language, modality): row indices} for every slice with at least
+    min_votes votes, including the 'Overall' language and 'all' modality rollups.
+    """
+    frame = pd.DataFrame({
+        'language': pd.Series(battles['message__language']).map(get_language_name),
+        'modality': battles['input_modality'],
+    })
+
+    slices = {('Overall', ALL_MODALITIES): frame.index.to_numpy()}
+    for modality, rows in frame.groupby('modality').indices.items():
+        slices[('Overall', modality)] = rows
+    languages = frame.dropna(subset=['language'])
+    for language, rows in languages.groupby('language').indices.items():
+        slices[(language, ALL_MODALITIES)] = languages.index.to_numpy()[rows]
+    for (language, modality), rows in languages.groupby(['language', 'modality']).indices.items():
+        slices[(language, modality)] = languages.index.to_numpy()[rows]
+
+    return {key: np.asarray(rows, dtype=np.int64) for key, rows in slices.items() if len(rows) >= min_votes}
+
+
+def rate_slice(battles, rows, rounds):
+    """
+    Fit and bootstrap one slice on its rows of the vote arrays.
+    Returns (ratings keyed by global model index, seconds).
+    """
+    started = time.perf_counter()
+    model_a = battles['model_a'][rows]
+    model_b = battles['model_b'][rows]
+    weight = battles['weight'][rows] if 'weight' in battles else None
+
+    # Compact to the models present in this slice
+    model_ids, local = np.unique(np.concatenate([model_a, model_b]), return_inverse=True)
+    slice_battles = {
+        'model_ids': list(model_ids),
+        'model_a': local[:len(rows)].astype(np.int32),
+        'model_b': local[len(rows):].astype(np.int32),
+        'outcome': battles['outcome'][rows],
+    }
+    if weight is not None:
+        slice_battles['weight'] = weight
+    ratings = rating_engine.compute_ratings(slice_battles, rounds=rounds)
+    return ratings, time.perf_counter() - started
+
+
+def build_slice_leaderboards(arena_type='llm', organization='ai4b', modes=rating_engine.BLIND_MODES,
+                             rounds=rating_engine.BOOTSTRAP_ROUNDS, min_votes=SLICE_MIN_VOTES, publish=True):
+    """
+    Build and publish one leaderboard per (language, modality) slice, except
+    the Overall all-modality board.
+    Returns {(language, benchmark_name): {'models', 'votes', 'seconds'}}.
+    """
+    started = time.perf_counter()
+    battles = rating_engine.load_battles(
+        arena_type, modes=modes, extra_fields=('message__language', 'input_modality')
+    )
+    slices = group_slices(battles, min_votes=min_votes)
+    slices.pop(OVERALL_SLICE, None)
+    logger.info(f"{arena_type}: {len(battles['outcome'])} votes in {len(slices)} slices "
+                f"(loaded in {time.perf_counter() - started:.2f}s)")
+    if not slices:
+        return {}
+
+    results = {}
+    for (language, modality), slice_rows in slices.items():
+        ratings, seconds = rate_slice(battles, slice_rows, rounds)
+        # rate_slice returns global model indices; map back to AIModel ids
+        for rating in ratings:
+            rating['model_id'] = battles['model_ids'][rating['model_id']]
+        rows = rating_engine.build_leaderboard_json(ratings)
+        benchmark_name = get_benchmark_name(arena_type, modality, organization, language)
+        if publish and rows:
+            rating_engine.publish_leaderboard(
+                rows, arena_type, language=language, organization=organization, benchmark_name=benchmark_name
+            )
+        results[(language, benchmark_name)] = {
+            'models': len(rows),
+            'votes': len(slice_rows),
+            'seconds': round(seconds, 3),
+        }
+        logger.info(f"{arena_type}/{language}/{benchmark_name}: {len(rows)} models, "
+                    f"{len(slice_rows)} votes in {seconds:.2f}s")
+
+    logger.info(f"{arena_type}: built {len(results)} slice leaderboards in {time.perf_counter() - started:.2f}s")
+    return results
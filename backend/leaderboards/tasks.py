@@ -0,0 +1,109 @@
+from celery import shared_task
+import logging
+from leaderboards.rating_engine import compute_arena_leaderboard
+from leaderboards.slice_builder import build_slice_leaderboards
+from leaderboards.contributors import refresh_contributor_rollups
+from leaderboards.vote_anomalies import detect_vote_anomalies
+from tenants.config import TENANT_REGISTRY, get_tenant_by_slug
+from tenants.context import set_current_tenant, clear_current_tenant
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def compute_arena_leaderboards(tenant_slug=None, arena_types=('llm', 'asr', 'tts'), organization='ai4b'):
+    """Recompute the Bradley-Terry leaderboards from all blind-mode votes"""
+
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+
+    try:
+        results = {}
+        for arena_type in arena_types:
+            try:
+                rows = compute_arena_leaderboard(arena_type=arena_type, organization=organization)
+                results[arena_type] = len(rows)
+            except Exception as e:
+                logger.error(f"Error computing {arena_type} leaderboard: {e}")
+        return results
+    finally:
+        if tenant:
+            clear_current_tenant()
+
+
+@shared_task
+def build_slice_leaderboards_task(tenant_slug=None, arena_types=('llm', 'asr', 'tts'), organization='ai4b'):
+    """Rebuild the per-language and per-modality leaderboards"""
+
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+
+    try:
+        timings = {}
+        for arena_type in arena_types:
+            try:
+                slices = build_slice_leaderboards(arena_type=arena_type, organization=organization)
+                timings[arena_type] = {
+                    f"{language}/{benchmark}": result['seconds'] for (language, benchmark), result in slices.items()
+                }
+            except Exception as e:
+                logger.error(f"Error building {arena_type} slice leaderboards: {e}")
+        return timings
+    finally:
+        if tenant:
+            clear_current_tenant()
+
+
+
+@shared_task
+def refresh_contributor_rollups_task(tenant_slug=None):
+    """
+    Rebuild the top contributors rollups of users active since the last run.
+    Without a tenant, every tenant database is refreshed once, starting with
+    the default one.
+    """
+
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+        try:
+            return refresh_contributor_rollups()
+        finally:
+            clear_current_tenant()
+
+    refreshed = {'default': refresh_contributor_rollups()}
+    for tenant in TENANT_REGISTRY.values():
+        if tenant['db'] in refreshed:
+            continue
+        set_current_tenant(tenant)
+        try:
+            refreshed[tenant['db']] = refresh_contributor_rollups()
+        except Exception as e:
+            logger.error(f"Error refreshing contributor rollups for tenant {tenant['slug']}: {e}")
+        finally:
+            clear_current_tenant()
+    return refreshed
+
+
+@shared_task
+def detect_vote_anomalies_task(tenant_slug=None):
+    """Flag voters with automated-looking vote patterns so the leaderboards down-weight them"""
+
+    tenant = get_tenant_by_slug(tenant_slug) if tenant_slug else None
+    if tenant_slug and not tenant:
+        raise ValueError("Invalid tenant")
+    if tenant:
+        set_current_tenant(tenant)
+
+    try:
+        return detect_vote_anomalies()
+    finally:
+        if tenant:
+            clear_current_tenant()
@@ -0,0 +1 @@
+# leaderboards tests package
@@ -0,0 +1,196 @@
+"""
+Tests for the top contributors rollup.
+
+Verifies that:
+- Rollups count a user's sessions and votes per arena type, language and
+  mode like the former aggregate, with votes attributed to the session
+  they were cast in.
+- The board is read in two queries and leaves out anonymous users.
+- The watermark job only rebuilds users active since the last run, plus
+  users whose session or feedback was deleted.
+- The scheduled task refreshes every tenant database once, not only the
+  default one.
+- TopContributorsView caches per tenant and filters, and errors are not cached.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from leaderboards import contributors
+from leaderboards.tasks import refresh_contributor_rollups_task
+from leaderboards.models import ContributorRollup
+from leaderboards.views import TopContributorsView
+from message.models import Message
+from model_metrics.models import RollupWatermark
+from tenants.context import get_current_tenant
+from user.models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ContributorFixtureMixin:
+
+    def setUp(self):
+        self.alice = User.objects.create(email='alice@example.com', display_name='alice', auth_provider='google')
+        self.bob = User.objects.create(email='bob@example.com', display_name='bob', auth_provider='google')
+
+    def session(self, user, mode='random', session_type='LLM', language='Hindi'):
+        session = ChatSession.objects.create(user=user, mode=mode, session_type=session_type, is_public=True)
+        Message.objects.create(session=session, role='user', content='Hi', position=0, language=language)
+        return session
+
+    def vote(self, user, session):
+        message = session.messages.first()
+        return Feedback.objects.create(
+            user=user, session=session, message=message, feedback_type='preference', additional_feedback_json={}
+        )
+
+
+class ContributorRollupTests(ContributorFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        llm = self.session(self.alice)
+        tts = self.session(self.alice, mode='academic', session_type='TTS', language='en')
+        self.session(self.alice, mode='direct', language=None)
+        self.vote(self.alice, llm)
+        self.vote(self.alice, tts)
+        self.vote(self.bob, llm)
+        contributors.refresh_contributors([self.alice.id, self.bob.id])
+
+    def board(self, **filters):
+        return {row['display_name']: row for row in contributors.get_top_contributors(**filters)}
+
+    def test_overall(self):
+        with self.assertNumQueries(2):
+            board = self.board()
+
+        self.assertEqual(list(board), ['alice', 'bob'])
+        self.assertEqual((board['alice']['chat_sessions_count'], board['alice']['total_votes']), (3, 2))
+        self.assertEqual(board['alice']['votes_breakdown'], {'Direct Chat': 0, 'Comparison': 0, 'Random': 1})
+        # Bob voted in Alice's session without creating one
+        self.assertEqual((board['bob']['chat_sessions_count'], board['bob']['total_votes']), (0, 1))
+
+    def test_filters(self):
+        board = self.board(arena_type='tts')
+        self.assertEqual(list(board), ['alice'])
+        self.assertEqual(board['alice']['votes_breakdown']['Academic Benchmarking'], 1)
+
+        board = self.board(language='hindi', arena_type='LLM')
+        self.assertEqual(
+            {name: (row['chat_sessions_count'], row['total_votes']) for name, row in board.items()},
+            {'alice': (1, 1), 'bob': (0, 1)}
+        )
+
+    def test_anonymous_and_inactive_users_are_hidden(self):
+        User.objects.filter(id=self.bob.id).update(is_active=False)
+        self.assertEqual(list(self.board()), ['alice'])
+
+
+class RefreshContributorRollupsTests(ContributorFixtureMixin, TestCase):
+
+    def test_first_run_builds_everyone_then_only_active_users(self):
+        session = self.session(self.alice)
+        anonymous = User.objects.create(display_name='guest', auth_provider='anonymous', is_anonymous=True)
+        self.session(anonymous)
+
+        self.assertEqual(contributors.refresh_contributor_rollups(), 1)
+        self.assertFalse(ContributorRollup.objects.filter(user=anonymous).exists())
+
+        # Move the watermark past the existing history
+        RollupWatermark.objects.filter(name=contributors.CONTRIBUTORS_WATERMARK).update(
+            processed_until=timezone.now() + timedelta(hours=1)
+        )
+        self.assertEqual(contributors.refresh_contributor_rollups(), 0)
+
+        RollupWatermark.objects.filter(name=contributors.CONTRIBUTORS_WATERMARK).update(
+            processed_until=timezone.now()
+        )
+        self.vote(self.bob, session)
+        with patch('leaderboards.contributors.refresh_contributors', return_value=0) as mock_refresh:
+            contributors.refresh_contributor_rollups()
+        self.assertEqual(set(mock_refresh.call_args.args[0]), {self.alice.id, self.bob.id})
+
+    def test_deleted_session_is_refreshed(self):
+        session = self.session(self.alice)
+        self.vote(self.bob, session)
+        contributors.refresh_contributor_rollups()
+        RollupWatermark.objects.filter(name=contributors.CONTRIBUTORS_WATERMARK).update(
+            processed_until=timezone.now() + timedelta(hours=1)
+        )
+
+        session.delete()
+        self.assertTrue(ContributorRollup.objects.filter(user=self.alice, is_stale=True).exists())
+        self.assertTrue(ContributorRollup.objects.filter(user=self.bob, is_stale=True).exists())
+
+        self.assertEqual(contributors.refresh_contributor_rollups(), 2)
+        self.assertFalse(ContributorRollup.objects.exists())
+
+
+class RefreshContributorRollupsTaskTests(TestCase):
+
+    TENANTS = {
+        'arena': {'id': '1', 'name': 'Arena', 'slug': 'arena', 'db': 'default'},
+        'aquarium': {'id': '2', 'name': 'Aquarium', 'slug': 'aquarium', 'db': 'aquarium'},
+        'lake': {'id': '3', 'name': 'Lake', 'slug': 'lake', 'db': 'lake'},
+    }
+
+    @patch('leaderboards.tasks.refresh_contributor_rollups')
+    def test_refreshes_every_tenant_database(self, mock_refresh):
+        databases = []
+
+        def refresh():
+            tenant = get_current_tenant()
+            databases.append(tenant['db'] if tenant else 'default')
+            if databases[-1] == 'aquarium':
+                raise ConnectionError('database unavailable')
+            return len(databases)
+
+        mock_refresh.side_effect = refresh
+        with patch.dict('leaderboards.tasks.TENANT_REGISTRY', self.TENANTS, clear=True):
+            result = refresh_contributor_rollups_task()
+
+        self.assertEqual(databases, ['default', 'aquarium', 'lake'])
+        # A failing tenant does not stop the others
+        self.assertEqual(result, {'default': 1, 'lake': 3})
+        self.assertIsNone(get_current_tenant())
+
+    @patch('leaderboards.tasks.refresh_contributor_rollups', side_effect=lambda: get_current_tenant()['db'])
+    def test_single_tenant(self, mock_refresh):
+        with patch.dict('tenants.config.TENANT_REGISTRY', self.TENANTS, clear=True):
+            self.assertEqual(refresh_contributor_rollups_task('lake'), 'lake')
+            with self.assertRaises(ValueError):
+                refresh_contributor_rollups_task('unknown')
+        mock_refresh.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TopContributorsViewTests(TestCase):
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/leaderboard/contributors/', params)
+        return TopContributorsView.as_view()(request)
+
+    @patch('leaderboards.views.calculate_top_contributors')
+    def test_caches_per_tenant_and_filters(self, mock_calculate):
+        mock_calculate.return_value = [{
+            'email': 'al***e@example.com', 'display_name': 'alice', 'chat_sessions_count': 1,
+            'total_votes': 2, 'votes_breakdown': {'Random': 2},
+        }]
+
+        first = self.get(tenant='arena', arena_type='LLM')
+        second = self.get(tenant='arena', arena_type='llm')
+        self.get(tenant='arena', arena_type='tts')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(mock_calculate.call_count, 2)
+
+    def test_missing_tenant(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(self.get(tenant='unknown').status_code, 404)
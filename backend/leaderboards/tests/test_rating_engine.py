@@ -0,0 +1,181 @@
+"""
+Tests for the batch Bradley-Terry rating engine.
+
+Verifies that:
+- The vectorized fit recovers the ordering and the 400-point scale of known
+  win rates, and treats ties as half a win.
+- Per-vote weights are summed when votes are collapsed.
+- Bootstrap intervals contain the point estimate and overlapping models
+  share a rank.
+- resolve_battles maps votes (a, b, tie, both-bad) to pairs through the
+  replies' parent message and drops unresolvable votes.
+- publish_leaderboard keeps exactly one active row per benchmark and never
+  replaces a per-modality slice by default.
+"""
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from django.test import TestCase
+
+from leaderboards import rating_engine
+from leaderboards.models import Leaderboard
+
+
+def synthetic_battles(n_models=4, n_votes=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    strengths = np.linspace(0, 1.5, n_models)
+    a = rng.integers(0, n_models, n_votes)
+    b = (a + rng.integers(1, n_models, n_votes)) % n_models
+    p_a = 1 / (1 + np.exp(-(strengths[a] - strengths[b])))
+    outcome = (rng.random(n_votes) < p_a).astype(np.int8)
+    return {
+        'model_ids': [f'm{k}' for k in range(n_models)],
+        'model_a': a.astype(np.int32),
+        'model_b': b.astype(np.int32),
+        'outcome': outcome,
+    }, strengths
+
+
+class BradleyTerryFitTests(TestCase):
+
+    def test_recovers_known_strengths(self):
+        battles, strengths = synthetic_battles()
+        rows = rating_engine.aggregate_battles(battles['model_a'], battles['model_b'], battles['outcome'])
+        scores = rating_engine.fit_bradley_terry(*rows, n_models=4)
+
+        self.assertEqual(list(np.argsort(scores)), [0, 1, 2, 3])
+        self.assertAlmostEqual(scores.mean(), rating_engine.BT_INIT_RATING)
+        # 1.5 nats of strength is 1.5 * 400 / ln(10) rating points
+        expected_gap = 1.5 * rating_engine.BT_SCALE / np.log(rating_engine.BT_BASE)
+        self.assertAlmostEqual(scores[3] - scores[0], expected_gap, delta=25)
+
+    def test_ties_split_evenly(self):
+        outcome = np.array([rating_engine.OUTCOME_TIE] * 10, dtype=np.int8)
+        rows = rating_engine.aggregate_battles(np.zeros(10, dtype=np.int32), np.ones(10, dtype=np.int32), outcome)
+        scores = rating_engine.fit_bradley_terry(*rows, n_models=2)
+        self.assertAlmostEqual(scores[0], scores[1], places=3)
+
+    def test_aggregation_collapses_duplicates(self):
+        battles, _ = synthetic_battles(n_votes=5000)
+        rows_i, _, _, weights = rating_engine.aggregate_battles(battles['model_a'], battles['model_b'], battles['outcome'])
+        self.assertLessEqual(len(rows_i), 4 * 3 * 2)
+        self.assertEqual(weights.sum(), 5000)
+
+    def test_aggregation_sums_vote_weights(self):
+        outcome = np.array([rating_engine.OUTCOME_A_WINS] * 4, dtype=np.int8)
+        weight = np.array([1.0, 1.0, 0.2, 0.2])
+        rows_i, _, _, weights = rating_engine.aggregate_battles(
+            np.zeros(4, dtype=np.int32), np.ones(4, dtype=np.int32), outcome, weight
+        )
+        self.assertEqual(len(rows_i), 1)
+        self.assertAlmostEqual(weights[0], 2.4)
+
+
+class ComputeRatingsTests(TestCase):
+
+    def test_intervals_contain_score(self):
+        battles, _ = synthetic_battles(n_votes=4000)
+        ratings = rating_engine.compute_ratings(battles, rounds=20)
+
+        self.assertEqual([r['model_id'] for r in ratings], ['m3', 'm2', 'm1', 'm0'])
+        for r in ratings:
+            self.assertLessEqual(r['ci_lower'], r['score'])
+            self.assertGreaterEqual(r['ci_upper'], r['score'])
+        self.assertEqual(sum(r['votes'] for r in ratings), 2 * 4000)
+
+    def test_bootstrap_is_deterministic_per_seed(self):
+        battles, _ = synthetic_battles(n_votes=1000)
+        rows = rating_engine.aggregate_battles(battles['model_a'], battles['model_b'], battles['outcome'])
+        first = rating_engine.bootstrap_bradley_terry(*rows, n_models=4, rounds=5)
+        second = rating_engine.bootstrap_bradley_terry(*rows, n_models=4, rounds=5)
+        np.testing.assert_allclose(first, second)
+
+    def test_empty_battles(self):
+        self.assertEqual(rating_engine.compute_ratings(rating_engine._empty_battles()), [])
+
+
+class ResolveBattlesTests(TestCase):
+
+    def test_outcomes(self):
+        m0, m1, m2 = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        prompts = [uuid.uuid4() for _ in range(5)]
+        pairs = [(m0, m1), (m1, m2), (m0, m2), (m1, m0), (m2, m2)]
+        replies = []
+        for prompt, (a, b) in zip(prompts, pairs):
+            replies += [([prompt], 'a', a), ([prompt], 'b', b)]
+        votes = [
+            (prompts[0], [m0], 'Hindi'),
+            (prompts[1], [m2], 'Hindi'),
+            (prompts[2], [m0, m2], 'Tamil'),
+            (prompts[3], [], 'Tamil'),
+            (prompts[4], [m2], 'Tamil'),     # same model on both sides
+            (uuid.uuid4(), [m0], 'Tamil'),   # no replies
+        ]
+
+        battles = rating_engine.resolve_battles(votes, replies, extra_fields=('message__language',))
+
+        self.assertEqual(len(battles['outcome']), 4)
+        ids = battles['model_ids']
+        resolved = {
+            (ids[a], ids[b]): int(o)
+            for a, b, o in zip(battles['model_a'], battles['model_b'], battles['outcome'])
+        }
+        self.assertEqual(resolved[(m0, m1)], rating_engine.OUTCOME_A_WINS)
+        self.assertEqual(resolved[(m1, m2)], rating_engine.OUTCOME_B_WINS)
+        self.assertEqual(resolved[(m0, m2)], rating_engine.OUTCOME_TIE)
+        self.assertEqual(resolved[(m1, m0)], rating_engine.OUTCOME_TIE)
+        self.assertEqual(list(battles['message__language']), ['Hindi', 'Hindi', 'Tamil', 'Tamil'])
+
+
+class LeaderboardRowsTests(TestCase):
+
+    @patch('leaderboards.rating_engine.AIModel.objects.in_bulk')
+    def test_overlapping_intervals_share_rank(self, mock_in_bulk):
+        mock_in_bulk.return_value = {
+            k: SimpleNamespace(model_code=f'model-{k}', display_name=f'Model {k}', provider='openai', license='MIT', url=None)
+            for k in range(3)
+        }
+        ratings = [
+            {'model_id': 0, 'score': 1100, 'ci_lower': 1080, 'ci_upper': 1120, 'votes': 10, 'wins': 6, 'ties': 0},
+            {'model_id': 1, 'score': 1070, 'ci_lower': 1040, 'ci_upper': 1090, 'votes': 10, 'wins': 5, 'ties': 0},
+            {'model_id': 2, 'score': 900, 'ci_lower': 880, 'ci_upper': 920, 'votes': 10, 'wins': 1, 'ties': 0},
+        ]
+        rows = rating_engine.build_leaderboard_json(ratings)
+
+        self.assertEqual([r['rank'] for r in rows], [1, 1, 3])
+        self.assertEqual(rows[0]['model'], 'model-0')
+        self.assertEqual(rows[0]['ci'], '+20/-20')
+        self.assertEqual(rows[0]['organization'], 'openai')
+
+class PublishLeaderboardTests(TestCase):
+
+    def test_publish_replaces_active_row(self):
+        Leaderboard.objects.create(
+            leaderboard_json=[], arena_type='llm', organization='ai4b',
+            language='Overall', benchmark_name='Chat Arena',
+        )
+
+        rating_engine.publish_leaderboard([{'rank': 1}], 'llm', language='Overall')
+        rating_engine.publish_leaderboard([{'rank': 2}], 'llm', language='Overall')
+
+        active = Leaderboard.objects.filter(arena_type='llm', language='Overall', is_active=True)
+        self.assertEqual(active.count(), 1)
+        self.assertEqual(active.get().benchmark_name, 'Chat Arena')
+        self.assertEqual(active.get().leaderboard_json, [{'rank': 2}])
+        self.assertEqual(Leaderboard.objects.count(), 3)
+
+    def test_publish_skips_modality_slices(self):
+        Leaderboard.objects.create(
+            leaderboard_json=[{'rank': 9}], arena_type='llm', organization='ai4b',
+            language='Overall', benchmark_name='llm-arena-image',
+        )
+
+        rating_engine.publish_leaderboard([{'rank': 1}], 'llm', language='Overall')
+
+        active = Leaderboard.objects.filter(arena_type='llm', language='Overall', is_active=True)
+        self.assertEqual(
+            dict(active.values_list('benchmark_name', 'leaderboard_json')),
+            {'llm-arena-image': [{'rank': 9}], 'llm-arena': [{'rank': 1}]}
+        )
@@ -0,0 +1,136 @@
+"""
+Tests for the slice-aware leaderboard builder.
+
+Verifies that:
+- Language codes map to Leaderboard language names.
+- group_slices builds Overall, per-language and per-modality slices and
+  drops slices below the vote threshold.
+- rate_slice fits only its rows and matches a direct fit.
+- build_slice_leaderboards leaves the Overall all-modality board to
+  compute_arena_leaderboards.
+- Every default leaderboard lookup (views, languages, sampler stats,
+  benchmark name and publishing) ignores modality slice rows.
+"""
+import json
+from unittest.mock import patch
+
+import numpy as np
+from django.test import RequestFactory, TestCase
+
+from ai_model.sampler import get_leaderboard_stats
+from leaderboards import rating_engine, slice_builder
+from leaderboards.models import Leaderboard
+from leaderboards.views import get_leaderboard_api, get_leaderboard_languages
+
+
+def sliced_battles(n_votes=600, seed=1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 3, n_votes)
+    b = (a + rng.integers(1, 3, n_votes)) % 3
+    return {
+        'model_ids': ['m0', 'm1', 'm2'],
+        'model_a': a.astype(np.int32),
+        'model_b': b.astype(np.int32),
+        'outcome': (a > b).astype(np.int8),
+        'message__language': np.array(['hi', 'ta', None] * (n_votes // 3), dtype=object),
+        'input_modality': np.array(['text', 'text', 'image', 'audio'] * (n_votes // 4), dtype=object),
+    }
+
+
+class LanguageNameTests(TestCase):
+
+    def test_codes_and_names(self):
+        self.assertEqual(slice_builder.get_language_name('hi'), 'Hindi')
+        self.assertEqual(slice_builder.get_language_name('tamil'), 'Tamil')
+        self.assertIsNone(slice_builder.get_language_name('xx'))
+        self.assertIsNone(slice_builder.get_language_name(None))
+
+
+class GroupSlicesTests(TestCase):
+
+    def test_slices(self):
+        slices = slice_builder.group_slices(sliced_battles(), min_votes=40)
+
+        self.assertEqual(len(slices[('Overall', 'all')]), 600)
+        self.assertEqual(len(slices[('Hindi', 'all')]), 200)
+        self.assertEqual(len(slices[('Overall', 'text')]), 300)
+        self.assertIn(('Tamil', 'image'), slices)
+        # Every Hindi row really is Hindi
+        languages = sliced_battles()['message__language']
+        self.assertTrue(all(languages[i] == 'hi' for i in slices[('Hindi', 'all')]))
+
+    def test_threshold(self):
+        slices = slice_builder.group_slices(sliced_battles(), min_votes=250)
+        self.assertEqual(set(slices), {('Overall', 'all'), ('Overall', 'text')})
+
+
+class RateSliceTests(TestCase):
+
+    def test_matches_direct_fit(self):
+        battles = sliced_battles()
+        rows = slice_builder.group_slices(battles, min_votes=1)[('Hindi', 'all')]
+        ratings, seconds = slice_builder.rate_slice(battles, rows, rounds=0)
+
+        direct = rating_engine.compute_ratings({
+            'model_ids': battles['model_ids'],
+            'model_a': battles['model_a'][rows],
+            'model_b': battles['model_b'][rows],
+            'outcome': battles['outcome'][rows],
+        }, rounds=0)
+        self.assertEqual(
+            [(battles['model_ids'][r['model_id']], round(r['score'], 6)) for r in ratings],
+            [(r['model_id'], round(r['score'], 6)) for r in direct],
+        )
+        self.assertGreaterEqual(seconds, 0)
+
+    @patch('leaderboards.rating_engine.build_leaderboard_json', return_value=[])
+    @patch('leaderboards.rating_engine.load_battles')
+    def test_overall_board_is_not_rebuilt(self, mock_load, mock_json):
+        mock_load.return_value = sliced_battles()
+
+        results = slice_builder.build_slice_leaderboards(rounds=0, min_votes=40, publish=False)
+
+        self.assertNotIn(('Overall', 'llm-arena'), results)
+        self.assertIn(('Overall', 'llm-arena-text'), results)
+        self.assertEqual(results[('Hindi', 'llm-arena')]['votes'], 200)
+
+
+class DefaultLeaderboardTests(TestCase):
+
+    def test_modality_slice_not_served_by_default(self):
+        Leaderboard.objects.create(
+            leaderboard_json=[{'board': 'image-board'}], arena_type='llm', organization='ai4b',
+            language='Hindi', benchmark_name='llm-arena-image',
+        )
+        Leaderboard.objects.create(
+            leaderboard_json=[{'board': 'main-board'}], arena_type='llm', organization='ai4b',
+            language='Hindi', benchmark_name='llm-arena',
+        )
+        request = RequestFactory().get('/leaderboard/llm', {'language': 'Hindi'})
+
+        self.assertIn(b'main-board', get_leaderboard_api(request, 'llm').content)
+        self.assertIn(b'image-board', get_leaderboard_api(request, 'llm', 'llm-arena-image').content)
+        self.assertEqual(slice_builder.get_benchmark_name('llm', 'all', language='Hindi'), 'llm-arena')
+
+    def test_every_default_lookup_skips_slices(self):
+        Leaderboard.objects.create(
+            leaderboard_json=[{'model': 'm0', 'score': 1400}], arena_type='llm', organization='ai4b',
+            language='Overall', benchmark_name='llm-arena-audio',
+        )
+        Leaderboard.objects.create(
+            leaderboard_json=[], arena_type='llm', organization='ai4b', language='Tamil', benchmark_name='llm-arena-audio',
+        )
+        request = RequestFactory().get('/leaderboard/llm/languages')
+
+        self.assertEqual(json.loads(get_leaderboard_languages(request, 'llm').content), [])
+        self.assertEqual(get_leaderboard_stats('LLM'), {})
+        self.assertEqual(slice_builder.get_benchmark_name('llm', 'all'), 'llm-arena')
+
+        rating_engine.publish_leaderboard([{'model': 'm0', 'score': 1000}], 'llm')
+
+        self.assertEqual(json.loads(get_leaderboard_languages(request, 'llm').content), ['Overall'])
+        self.assertEqual(
+            sorted(json.loads(get_leaderboard_languages(request, 'llm', 'llm-arena-audio').content)), ['Overall', 'Tamil']
+        )
+        self.assertEqual(get_leaderboard_stats('LLM')['m0']['score'], 1000)
+        self.assertEqual(Leaderboard.objects.filter(benchmark_name='llm-arena-audio', is_active=True).count(), 2)
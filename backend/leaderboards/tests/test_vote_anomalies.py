@@ -0,0 +1,161 @@
+"""
+Tests for vote velocity and bot detection.
+
+Verifies that:
+- Per-user features (peak votes per minute, time to vote, side bias, tie
+  rate) are computed from per-vote arrays.
+- Time to vote is read from tracking_data timestamps, preferring the
+  client's own vote time.
+- Scripted voters are flagged among ordinary ones, while slow careful
+  voters are not.
+- Flags replace the previous run's, cleared flags are kept, and the rating
+  engine down-weights only uncleared flagged voters.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+import numpy as np
+from django.test import TestCase
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from leaderboards import rating_engine, vote_anomalies
+from leaderboards.models import FlaggedVoter
+from message.models import Message
+from user.models import User
+
+START = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+A, B, TIE = rating_engine.OUTCOME_A_WINS, rating_engine.OUTCOME_B_WINS, rating_engine.OUTCOME_TIE
+
+
+def synthetic_votes(humans, bots, slow=(), seed=0):
+    """Per-vote arrays for ordinary voters, scripted voters and slow careful voters."""
+    rng = np.random.default_rng(seed)
+    user_ids, voted_at, outcome, seconds_to_vote = [], [], [], []
+
+    def add(user_id, gaps, outcomes, timings):
+        times = START + np.cumsum(gaps) * timedelta(seconds=1)
+        user_ids.extend([user_id] * len(gaps))
+        voted_at.extend(times)
+        outcome.extend(outcomes)
+        seconds_to_vote.extend(timings)
+
+    for user_id in humans:
+        n = int(rng.integers(25, 60))
+        add(user_id, rng.uniform(40, 900, n), rng.choice([A, B, TIE], n, p=[0.43, 0.43, 0.14]),
+            rng.lognormal(np.log(20), 0.5, n))
+    for user_id in bots:
+        add(user_id, np.full(80, 4.0), np.full(80, A), np.full(80, 0.3))
+    for user_id in slow:
+        add(user_id, np.full(30, 1800.0), rng.choice([A, B], 30), np.full(30, 400.0))
+
+    return (
+        np.asarray(user_ids, dtype=object), np.asarray(voted_at, dtype=object),
+        np.asarray(outcome, dtype=np.int8), np.asarray(seconds_to_vote, dtype=np.float64),
+    )
+
+
+class VoteFeaturesTests(TestCase):
+
+    def test_features(self):
+        times = [START + timedelta(seconds=s) for s in (0, 10, 20, 30, 500, 0, 120)]
+        users, votes, features = vote_anomalies.vote_features(
+            np.array(['u1'] * 5 + ['u2'] * 2, dtype=object), np.array(times, dtype=object),
+            np.array([A, A, A, B, TIE, B, TIE], dtype=np.int8),
+            np.array([1.0, 3.0, np.nan, 1.0, 1.0, np.nan, np.nan]),
+        )
+
+        self.assertEqual(users, ['u1', 'u2'])
+        self.assertEqual(list(votes), [5, 2])
+        self.assertEqual(list(features['votes_per_minute']), [4, 1])
+        self.assertEqual(list(features['side_bias']), [0.5, 1.0])
+        self.assertEqual(list(features['tie_rate']), [0.2, 0.5])
+        # Geometric mean of 1, 3, 1, 1; u2 has no timings and gets the median user
+        expected = np.expm1(np.mean(np.log1p([1.0, 3.0, 1.0, 1.0])))
+        np.testing.assert_allclose(features['time_to_vote_seconds'], [expected, expected])
+
+    def test_time_to_vote(self):
+        voted_at = datetime(2026, 3, 1, 12, 0, 30, tzinfo=dt_timezone.utc)
+        tracking = {
+            'prompt_sent_at': '2026-03-01T12:00:00Z',
+            'turns': [{'response_a_completed': 1772366410000, 'response_b_completed': '2026-03-01T12:00:12+00:00'}],
+        }
+        self.assertEqual(vote_anomalies.time_to_vote(tracking, voted_at), 18.0)
+        # The client's vote time wins over the server's
+        tracking['vote_submitted_at'] = '2026-03-01T12:00:14Z'
+        self.assertEqual(vote_anomalies.time_to_vote(tracking, voted_at), 2.0)
+        self.assertIsNone(vote_anomalies.time_to_vote({}, voted_at))
+        self.assertIsNone(vote_anomalies.time_to_vote({'note': 'n/a', 'flag': True}, voted_at))
+
+
+class ScoreVotersTests(TestCase):
+
+    def test_flags_scripted_not_slow_voters(self):
+        humans = [f'human-{k}' for k in range(300)]
+        votes = synthetic_votes(humans, bots=['bot-1', 'bot-2'], slow=['careful'])
+        users, _, features = vote_anomalies.vote_features(*votes)
+
+        _, flagged = vote_anomalies.score_voters(features, contamination=0.01)
+
+        flagged_users = {users[k] for k in np.flatnonzero(flagged)}
+        self.assertTrue({'bot-1', 'bot-2'} <= flagged_users)
+        self.assertNotIn('careful', flagged_users)
+        self.assertLessEqual(len(flagged_users), 4)
+
+
+class DetectVoteAnomaliesTests(TestCase):
+
+    def setUp(self):
+        self.users = User.objects.bulk_create([
+            User(display_name=f'voter-{k}', auth_provider='google') for k in range(60)
+        ])
+        self.bot, self.cleared, self.humans = self.users[0], self.users[1], self.users[2:]
+
+    @patch('leaderboards.vote_anomalies.load_votes')
+    def test_replaces_flags_and_weights_votes(self, mock_load):
+        stale = User.objects.create(display_name='stale', auth_provider='google')
+        FlaggedVoter.objects.create(user=stale, score=-0.2, vote_weight=0.2)
+        FlaggedVoter.objects.create(user=self.cleared, score=-0.2, vote_weight=0.2, is_cleared=True)
+        mock_load.return_value = synthetic_votes(
+            [user.id for user in self.humans], bots=[self.bot.id, self.cleared.id]
+        )
+
+        self.assertEqual(vote_anomalies.detect_vote_anomalies(contamination=0.03), 2)
+
+        flags = {flag.user_id: flag for flag in FlaggedVoter.objects.all()}
+        self.assertEqual(set(flags), {self.bot.id, self.cleared.id})
+        self.assertTrue(flags[self.cleared.id].is_cleared)
+        self.assertEqual(flags[self.bot.id].features['side_bias'], 1.0)
+        self.assertEqual(flags[self.bot.id].votes, 80)
+
+        weights = rating_engine.vote_weights([self.bot.id, self.cleared.id, self.humans[0].id])
+        self.assertEqual(list(weights), [vote_anomalies.FLAGGED_VOTE_WEIGHT, 1.0, 1.0])
+
+    @patch('leaderboards.vote_anomalies.load_votes')
+    def test_too_few_voters(self, mock_load):
+        FlaggedVoter.objects.create(user=self.bot, score=-0.2, vote_weight=0.2)
+        mock_load.return_value = synthetic_votes([user.id for user in self.humans[:5]], bots=[self.bot.id])
+        self.assertEqual(vote_anomalies.detect_vote_anomalies(), 0)
+        self.assertFalse(FlaggedVoter.objects.exists())
+
+    def test_load_votes(self):
+        model_a_id, model_b_id = create_ai_model('model-a'), create_ai_model('model-b')
+        session = ChatSession.objects.create(user=self.bot, mode='random', session_type='LLM')
+        prompt = Message.objects.create(session=session, role='user', content='Hi', position=0)
+        for index, (participant, model_id) in enumerate([('a', model_a_id), ('b', model_b_id)]):
+            Message.objects.create(
+                session=session, role='assistant', content='Hello', position=index + 1,
+                participant=participant, model_id=model_id, parent_message_ids=[prompt.id]
+            )
+        Feedback.objects.create(
+            user=self.bot, session=session, message=prompt, feedback_type='preference',
+            preferred_model_ids=[model_b_id], additional_feedback_json={},
+            tracking_data={'response_completed_at': '2026-03-01T12:00:00Z', 'vote_submitted_at': '2026-03-01T12:00:05Z'},
+        )
+
+        user_ids, voted_at, outcome, seconds_to_vote = vote_anomalies.load_votes(START)
+
+        self.assertEqual(list(user_ids), [self.bot.id])
+        self.assertEqual(list(outcome), [B])
+        self.assertEqual(list(seconds_to_vote), [5.0])
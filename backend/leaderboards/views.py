@@ -2,6 +2,7 @@ import logging
 from django.shortcuts import render
 
 logger = logging.getLogger(__name__)
+from django.core.cache import cache
 from django.http import JsonResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -10,6 +11,7 @@ from rest_framework.permissions import AllowAny
 from django.db.models import Q
 from .models import Leaderboard
 from .serializers import UserContributorSerializer
+from .services import exclude_modality_slices
 from ai_model.models import AIModel
 
 # Create your views here.
@@ -24,10 +26,14 @@ def get_leaderboard_api(request, arena_type, sub_arena=None):
         'is_active': True
     }
     
+    leaderboards = Leaderboard.objects.filter(**filters)
     if sub_arena:
-        filters['benchmark_name'] = sub_arena
+        leaderboards = leaderboards.filter(benchmark_name=sub_arena)
+    else:
+        # Without a sub-arena serve the all-modality board, not a slice
+        leaderboards = exclude_modality_slices(leaderboards)
 
-    leaderboard_entry = Leaderboard.objects.filter(**filters).first()
+    leaderboard_entry = leaderboards.first()
     
     if leaderboard_entry:
         leaderboard_data = leaderboard_entry.leaderboard_json
@@ -76,6 +82,10 @@ def get_leaderboard_api(request, arena_type, sub_arena=None):
 
 from .services import calculate_top_contributors
 
+# The rollups are refreshed every minute
+TOP_CONTRIBUTORS_CACHE_KEY = 'top_contributors:{tenant}:{arena_type}:{language}'
+TOP_CONTRIBUTORS_CACHE_TTL = 60
+
 class TopContributorsView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
@@ -84,13 +94,19 @@ class TopContributorsView(APIView):
         arena_type_param = request.query_params.get('arena_type')
 
         try:
-            results = calculate_top_contributors(
-                tenant_slug=tenant_slug,
-                language=language,
-                arena_type=arena_type_param
+            cache_key = TOP_CONTRIBUTORS_CACHE_KEY.format(
+                tenant=tenant_slug, arena_type=(arena_type_param or '').lower(), language=(language or '').lower()
             )
-            serializer = UserContributorSerializer(results, many=True)
-            return Response(serializer.data)
+            data = cache.get(cache_key) if tenant_slug else None
+            if data is None:
+                results = calculate_top_contributors(
+                    tenant_slug=tenant_slug,
+                    language=language,
+                    arena_type=arena_type_param
+                )
+                data = UserContributorSerializer(results, many=True).data
+                cache.set(cache_key, data, TOP_CONTRIBUTORS_CACHE_TTL)
+            return Response(data)
         except ValueError as e:
             if str(e) == "Tenant parameter is required":
                 return Response({"error": "Tenant parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
@@ -110,9 +126,12 @@ def get_leaderboard_languages(request, arena_type, sub_arena=None):
         'organization': org_param,
         'is_active': True
     }
+    leaderboards = Leaderboard.objects.filter(**filters)
     if sub_arena:
-        filters['benchmark_name'] = sub_arena
+        leaderboards = leaderboards.filter(benchmark_name=sub_arena)
+    else:
+        leaderboards = exclude_modality_slices(leaderboards)
 
-    languages = Leaderboard.objects.filter(**filters).values_list('language', flat=True).distinct()
+    languages = leaderboards.values_list('language', flat=True).distinct()
     
     return JsonResponse(list(languages), safe=False)
\ No newline at end of file
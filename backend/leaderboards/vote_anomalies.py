@@ -0,0 +1,213 @@
+"""
+Vote velocity and bot detection.
+
+Brigades and scripted voters leave a different trace from people: bursts of
+votes within a minute, votes cast right after (or before) the replies
+finish streaming, always the same side, or always a tie. Per-user features
+are built with NumPy from the pairwise votes of the detection window:
+
+    votes_per_minute      most votes cast within any 60 seconds
+    time_to_vote_seconds  geometric mean time from the end of the replies to
+                          the vote, from Feedback.tracking_data
+    side_bias             |A wins - B wins| / decisive votes
+    tie_rate              share of tie and both-bad votes
+
+Users with enough votes are scored with an IsolationForest. An outlier is
+flagged only when it is also in the automated tail of one of the features
+(faster, burstier, more one-sided or more ties than SUSPICIOUS_QUANTILE of
+voters), so careful slow voters are never flagged. Flags are stored as
+FlaggedVoter rows, and the rating engine counts their votes with
+FLAGGED_VOTE_WEIGHT until an admin clears them.
+"""
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from scipy.stats import rankdata
+from sklearn.ensemble import IsolationForest
+
+from leaderboards import rating_engine
+from leaderboards.models import FlaggedVoter
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_WINDOW_DAYS = int(os.getenv('VOTE_ANOMALY_WINDOW_DAYS', 30))
+ANOMALY_MIN_VOTES = int(os.getenv('VOTE_ANOMALY_MIN_VOTES', 20))
+ANOMALY_MIN_USERS = 20
+ANOMALY_CONTAMINATION = float(os.getenv('VOTE_ANOMALY_CONTAMINATION', 0.01))
+FLAGGED_VOTE_WEIGHT = float(os.getenv('FLAGGED_VOTE_WEIGHT', 0.2))
+SUSPICIOUS_QUANTILE = 0.95
+VELOCITY_WINDOW_SECONDS = 60
+ARENA_TYPES = ('llm', 'asr', 'tts')
+
+FEATURES = ('votes_per_minute', 'time_to_vote_seconds', 'side_bias', 'tie_rate')
+# +1 where high values look automated, -1 where low values do
+SUSPICIOUS_DIRECTION = np.array([1, -1, 1, 1])
+
+
+def _parse_timestamp(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # Epoch milliseconds from the browser, or seconds
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt_timezone.utc)
+    return None
+
+
+def _timestamps(value, key=''):
+    """Yield (key, datetime) for every timestamp in a tracking_data tree."""
+    if isinstance(value, dict):
+        for child_key, child in value.items():
+            yield from _timestamps(child, str(child_key).lower())
+    elif isinstance(value, list):
+        for child in value:
+            yield from _timestamps(child, key)
+    else:
+        parsed = _parse_timestamp(value)
+        if parsed:
+            yield key, parsed
+
+
+def time_to_vote(tracking_data, voted_at):
+    """
+    Seconds from the last reply event in tracking_data to the vote, or None.
+    The vote time recorded by the client is preferred over created_at so
+    both ends come from the same clock.
+    """
+    if not isinstance(tracking_data, dict):
+        return None
+    vote_times, event_times = [], []
+    for key, parsed in _timestamps(tracking_data):
+        (vote_times if 'vote' in key or 'submit' in key else event_times).append(parsed)
+    reference = max(vote_times) if vote_times else voted_at
+    before = [parsed for parsed in event_times if parsed <= reference]
+    if not before:
+        return None
+    return (reference - max(before)).total_seconds()
+
+
+def vote_features(user_ids, voted_at, outcome, seconds_to_vote):
+    """
+    Per-user feature matrix from per-vote arrays.
+    Returns (user ids, vote counts, {feature: array}).
+    """
+    codes, users = pd.factorize(pd.Series(user_ids, dtype=object))
+    n_users = len(users)
+    votes = np.bincount(codes, minlength=n_users)
+    seconds = pd.to_datetime(pd.Series(voted_at), utc=True).to_numpy('datetime64[ns]').astype(np.int64) / 1e9
+
+    # Votes of each user inside [t, t + 60s), with users laid out on disjoint time ranges
+    order = np.lexsort((seconds, codes))
+    span = seconds.max() - seconds.min() + 2 * VELOCITY_WINDOW_SECONDS
+    keys = codes[order] * span + (seconds[order] - seconds.min())
+    in_window = np.searchsorted(keys, keys + VELOCITY_WINDOW_SECONDS, side='left') - np.arange(len(keys))
+    votes_per_minute = np.zeros(n_users)
+    np.maximum.at(votes_per_minute, codes[order], in_window)
+
+    known = ~np.isnan(seconds_to_vote)
+    log_seconds = np.log1p(np.clip(seconds_to_vote[known], 0, None))
+    known_votes = np.bincount(codes[known], minlength=n_users)
+    mean_log = np.bincount(codes[known], log_seconds, minlength=n_users) / np.maximum(known_votes, 1)
+    # Users without timings get the typical value so they are not outliers on it
+    fill = np.median(mean_log[known_votes > 0]) if known_votes.any() else 0.0
+    mean_log = np.where(known_votes > 0, mean_log, fill)
+
+    a_wins = np.bincount(codes, outcome == rating_engine.OUTCOME_A_WINS, minlength=n_users)
+    b_wins = np.bincount(codes, outcome == rating_engine.OUTCOME_B_WINS, minlength=n_users)
+    ties = np.bincount(codes, outcome == rating_engine.OUTCOME_TIE, minlength=n_users)
+
+    features = {
+        'votes_per_minute': votes_per_minute,
+        'time_to_vote_seconds': np.expm1(mean_log),
+        'side_bias': np.abs(a_wins - b_wins) / np.maximum(a_wins + b_wins, 1),
+        'tie_rate': ties / votes,
+    }
+    return list(users), votes, features
+
+
+def score_voters(features, contamination=ANOMALY_CONTAMINATION, seed=0):
+    """Isolation forest scores (lower is more anomalous) and the flagged mask."""
+    matrix = np.column_stack([features[name] for name in FEATURES])
+    forest = IsolationForest(n_estimators=200, contamination=contamination, random_state=seed).fit(matrix)
+    scores = forest.decision_function(matrix)
+    outliers = forest.predict(matrix) == -1
+
+    ranks = rankdata(matrix * SUSPICIOUS_DIRECTION, axis=0) / len(matrix)
+    suspicious = (ranks >= SUSPICIOUS_QUANTILE).any(axis=1)
+    return scores, outliers & suspicious
+
+
+def load_votes(since):
+    """Pairwise votes since `since` across arenas: user ids, vote times, outcomes and times to vote."""
+    user_ids, voted_at, outcome, seconds_to_vote = [], [], [], []
+    for arena_type in ARENA_TYPES:
+        battles = rating_engine.load_battles(
+            arena_type, modes=None, feedback_filter=Q(created_at__gte=since),
+            extra_fields=('created_at', 'tracking_data'),
+        )
+        user_ids.extend(battles['user_id'])
+        voted_at.extend(battles['created_at'])
+        outcome.append(battles['outcome'])
+        seconds_to_vote.extend(
+            math.nan if seconds is None else seconds
+            for seconds in map(time_to_vote, battles['tracking_data'], battles['created_at'])
+        )
+    return (
+        np.asarray(user_ids, dtype=object),
+        np.asarray(voted_at, dtype=object),
+        np.concatenate(outcome),
+        np.asarray(seconds_to_vote, dtype=np.float64),
+    )
+
+
+def detect_vote_anomalies(now=None, window_days=ANOMALY_WINDOW_DAYS, min_votes=ANOMALY_MIN_VOTES,
+                          contamination=ANOMALY_CONTAMINATION, vote_weight=FLAGGED_VOTE_WEIGHT):
+    """Score the voters of the window and replace the FlaggedVoter rows. Returns the number flagged."""
+    since = (now or timezone.now()) - timedelta(days=window_days)
+    user_ids, voted_at, outcome, seconds_to_vote = load_votes(since)
+
+    flagged = []
+    if len(outcome):
+        users, votes, features = vote_features(user_ids, voted_at, outcome, seconds_to_vote)
+        eligible = np.flatnonzero(votes >= min_votes)
+        if len(eligible) >= ANOMALY_MIN_USERS:
+            eligible_features = {name: values[eligible] for name, values in features.items()}
+            scores, mask = score_voters(eligible_features, contamination=contamination)
+            flagged = [
+                FlaggedVoter(
+                    user_id=users[k], score=float(score), votes=int(votes[k]), vote_weight=vote_weight,
+                    features={name: round(float(features[name][k]), 3) for name in FEATURES},
+                )
+                for k, score in zip(eligible[mask], scores[mask])
+            ]
+        else:
+            logger.info(f"Vote anomaly detection skipped: {len(eligible)} users with {min_votes}+ votes")
+
+    with transaction.atomic():
+        # Cleared flags are kept so a reviewed user is not flagged again
+        FlaggedVoter.objects.filter(is_cleared=False).exclude(
+            user_id__in=[flag.user_id for flag in flagged]
+        ).delete()
+        FlaggedVoter.objects.bulk_create(
+            flagged, update_conflicts=True, unique_fields=['user'],
+            update_fields=['score', 'features', 'votes', 'vote_weight', 'detected_at'],
+        )
+
+    logger.info(f"Flagged {len(flagged)} voters from {len(outcome)} votes since {since:%Y-%m-%d}")
+    return len(flagged)
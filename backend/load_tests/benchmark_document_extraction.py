@@ -0,0 +1,92 @@
+"""
+Document extraction throughput benchmark.
+
+Measures docs/s and MB/s of message.document_utils.extract_text_from_bytes,
+serially and across a process pool, so the effect of the token budget and
+the throughput of a given number of Celery worker processes can be checked
+on a given machine.
+
+Usage (from backend/):
+    python load_tests/benchmark_document_extraction.py
+    python load_tests/benchmark_document_extraction.py --files a.pdf b.xlsx --repeat 20 --workers 4
+    python load_tests/benchmark_document_extraction.py --token-budget 8000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arena_backend.settings')
+
+from message.document_utils import extract_text_from_bytes, DOCUMENT_TOKEN_BUDGET  # noqa: E402
+
+
+def synthetic_documents():
+    """A spreadsheet, a plain-text file and a Word document of a few MB each."""
+    rows = "\n".join(f"{i},model-{i % 37},{i * 0.37:.2f},hindi,prompt text number {i}" for i in range(60000))
+    documents = [
+        ('synthetic.csv', 'csv', ("id,model,score,language,prompt\n" + rows).encode('utf-8')),
+        ('synthetic.txt', 'txt', ("The quick brown fox jumps over the lazy dog. " * 60000).encode('utf-8')),
+    ]
+    try:
+        from docx import Document
+        doc = Document()
+        for i in range(5000):
+            doc.add_paragraph(f"Paragraph {i}: " + "lorem ipsum dolor sit amet " * 10)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        documents.append(('synthetic.docx', 'docx', buffer.getvalue()))
+    except ImportError:
+        pass
+    return documents
+
+
+def load_documents(paths):
+    documents = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            documents.append((os.path.basename(path), path.lower().split('.')[-1], f.read()))
+    return documents
+
+
+def run(documents, repeat, token_budget, workers):
+    jobs = [(content, ext, token_budget) for _, ext, content in documents] * repeat
+    total_bytes = sum(len(content) for content, _, _ in jobs)
+
+    start = time.perf_counter()
+    for content, ext, budget in jobs:
+        extract_text_from_bytes(content, ext, budget)
+    serial = time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Warm the pool so process start-up is not measured
+        list(executor.map(extract_text_from_bytes, [b'x'] * workers, ['txt'] * workers))
+        start = time.perf_counter()
+        list(executor.map(extract_text_from_bytes, *zip(*jobs)))
+        pooled = time.perf_counter() - start
+
+    mb = total_bytes / (1024 * 1024)
+    print(f"{len(jobs)} documents, {mb:.1f} MB, token budget {token_budget}")
+    print(f"  serial        : {serial:7.2f}s  {len(jobs) / serial:8.1f} docs/s  {mb / serial:8.1f} MB/s")
+    print(f"  pool ({workers} procs): {pooled:7.2f}s  {len(jobs) / pooled:8.1f} docs/s  {mb / pooled:8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', nargs='*', help='Local documents to benchmark (default: synthetic set)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--token-budget', type=int, default=DOCUMENT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    documents = load_documents(args.files) if args.files else synthetic_documents()
+    for name, _, content in documents:
+        print(f"{name}: {len(content) / 1024:.0f} KB")
+    run(documents, args.repeat, args.token_budget, args.workers)
+
+
+if __name__ == '__main__':
+    main()
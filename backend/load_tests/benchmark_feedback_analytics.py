@@ -0,0 +1,203 @@
+"""
+Feedback analytics benchmark.
+
+Builds a synthetic dataset (1M feedbacks by default) in a throwaway test
+database, then times FeedbackAnalyzer.analyze_user_preferences and
+FeedbackService.get_session_feedback_summary against the former row-by-row
+implementations, with the number of queries each one ran.
+
+Usage (from backend/, with the database settings of the target server):
+    python load_tests/benchmark_feedback_analytics.py
+    python load_tests/benchmark_feedback_analytics.py --feedback 200000 --users 500
+    python load_tests/benchmark_feedback_analytics.py --keepdb   # reuse the generated data
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'arena_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from ai_model.models import AIModel  # noqa: E402
+from chat_session.models import ChatSession  # noqa: E402
+from feedback.analytics import FeedbackAnalyzer  # noqa: E402
+from feedback.models import Feedback  # noqa: E402
+from feedback.services import FeedbackService  # noqa: E402
+from message.models import Message  # noqa: E402
+from user.models import User  # noqa: E402
+
+CATEGORIES = ['accuracy', 'helpfulness', 'creativity', 'fluency', 'safety', 'formatting']
+FEEDBACK_TYPES = ['rating', 'preference', 'report']
+BATCH_SIZE = 10000
+
+
+def generate(feedback_count, user_count, session_count, model_count, seed=7):
+    """Users voting on shared sessions; one power user holds a tenth of the feedback."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    models = AIModel.objects.bulk_create([
+        AIModel(
+            provider='openai', model_name=f'bench-{i}', model_code=f'bench-{i}', display_name=f'Bench {i}',
+            model_type='LLM', release_date=now.date(),
+        )
+        for i in range(model_count)
+    ])
+    users = User.objects.bulk_create([
+        User(display_name=f'bench-{i}', auth_provider='google') for i in range(user_count + 1)
+    ])
+    power_user, users = users[0], users[1:]
+    sessions = ChatSession.objects.bulk_create([
+        ChatSession(user=rng.choice(users), mode='compare', is_public=True) for _ in range(session_count)
+    ], batch_size=BATCH_SIZE)
+    messages = Message.objects.bulk_create([
+        Message(
+            session=session, role='assistant', content='...', position=index, participant=participant,
+            model=models[rng.randrange(model_count)]
+        )
+        for session in sessions for index, participant in enumerate('ab')
+    ], batch_size=BATCH_SIZE)
+
+    def rows():
+        power_share = feedback_count // 10
+        for i in range(feedback_count):
+            if i < power_share:
+                user, slot = power_user, i
+            else:
+                user, slot = users[i % user_count], (i - power_share) // user_count
+            # Distinct (session, message, type) per user
+            session_index, rest = divmod(slot, 6)
+            session_index %= session_count
+            message = messages[session_index * 2 + rest % 2]
+            feedback_type = FEEDBACK_TYPES[rest // 2]
+            yield Feedback(
+                user=user, session=sessions[session_index], message=message, feedback_type=feedback_type,
+                rating=rng.randint(1, 5) if feedback_type == 'rating' else None,
+                preferred_model_ids=[message.model_id] if feedback_type == 'preference' else [],
+                categories=rng.sample(CATEGORIES, rng.randint(0, 3)),
+                comment='benchmark' if rng.random() < 0.05 else '',
+            )
+
+    batch = []
+    for feedback in rows():
+        batch.append(feedback)
+        if len(batch) == BATCH_SIZE:
+            Feedback.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Feedback.objects.bulk_create(batch, ignore_conflicts=True)
+
+    start = now - timedelta(days=90)
+    with connection.cursor() as cursor:
+        # Spread the votes over the last 90 days
+        cursor.execute(
+            "UPDATE feedback SET created_at = %s + random() * interval '90 days'", [start]
+        )
+        cursor.execute("ANALYZE feedback")
+    return power_user, users, sessions
+
+
+def legacy_analyze_user_preferences(user):
+    """The former implementation: one pass per statistic, one query per preferred model and rated message."""
+    feedbacks = Feedback.objects.filter(user=user)
+    analysis = {'total_feedback_given': feedbacks.count(), 'feedback_by_type': {}}
+    for feedback_type in ['rating', 'preference', 'report']:
+        analysis['feedback_by_type'][feedback_type] = feedbacks.filter(feedback_type=feedback_type).count()
+    model_preferences = defaultdict(int)
+    for feedback in feedbacks.filter(feedback_type='preference').exclude(preferred_model_ids=[]):
+        model_preferences[AIModel.objects.get(id=feedback.preferred_model_ids[0]).display_name] += 1
+    category_counts = defaultdict(int)
+    for feedback in feedbacks:
+        for category in feedback.categories or []:
+            category_counts[category] += 1
+    day_counts = defaultdict(int)
+    for date in feedbacks.values_list('created_at', flat=True):
+        day_counts[date.strftime('%A')] += 1
+    model_ratings = defaultdict(list)
+    for feedback in feedbacks.filter(feedback_type='rating', rating__isnull=False, message__model__isnull=False):
+        model_ratings[feedback.message.model_id].append(feedback.rating)
+    scores = [max(0, 100 - statistics.stdev(r) * 20) for r in model_ratings.values() if len(r) > 1]
+    analysis['consistency_score'] = round(sum(scores) / len(scores), 2) if scores else 0.0
+    return analysis
+
+
+def legacy_session_feedback_summary(session):
+    feedbacks = Feedback.objects.filter(session=session)
+    ratings = feedbacks.filter(feedback_type='rating', rating__isnull=False)
+    distribution = {rating: ratings.filter(rating=rating).count() for rating in range(1, 6)}
+    all_categories = []
+    for feedback in feedbacks:
+        all_categories.extend(feedback.categories or [])
+    return distribution, {category: all_categories.count(category) for category in set(all_categories)}
+
+
+def measure(label, function, *args):
+    with CaptureQueriesContext(connection) as captured:
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+    print(f"  {label:<34}: {elapsed * 1000:10.1f} ms  {len(captured.captured_queries):7d} queries")
+    return elapsed
+
+
+def run(power_user, users, sessions, legacy, sample):
+    count = Feedback.objects.filter(user=power_user).count()
+    print(f"\nanalyze_user_preferences, power user ({count} feedbacks)")
+    measure('aggregate pipeline', FeedbackAnalyzer.analyze_user_preferences, power_user)
+    if legacy:
+        measure('row by row', legacy_analyze_user_preferences, power_user)
+
+    print(f"\nanalyze_user_preferences, {sample} regular users")
+    sampled = random.Random(1).sample(users, min(sample, len(users)))
+    total = sum(measure(f'user {user.display_name}', FeedbackAnalyzer.analyze_user_preferences, user) for user in sampled)
+    print(f"  mean: {total / len(sampled) * 1000:.1f} ms")
+
+    session = ChatSession.objects.select_related('model_a', 'model_b').get(id=sessions[0].id)
+    print(f"\nget_session_feedback_summary ({Feedback.objects.filter(session=session).count()} feedbacks)")
+    measure('aggregate pipeline', FeedbackService.get_session_feedback_summary, session)
+    if legacy:
+        measure('row by row', legacy_session_feedback_summary, session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--feedback', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=20000)
+    parser.add_argument('--models', type=int, default=30)
+    parser.add_argument('--sample', type=int, default=20, help='Regular users to time')
+    parser.add_argument('--no-legacy', dest='legacy', action='store_false', help='Skip the row-by-row baseline')
+    parser.add_argument('--keepdb', action='store_true', help='Keep the test database and its data between runs')
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=1, keepdb=args.keepdb)
+    try:
+        power_user = User.objects.filter(display_name='bench-0').first() if args.keepdb else None
+        if power_user:
+            print("Reusing the generated dataset")
+            users = list(User.objects.filter(display_name__startswith='bench-').exclude(id=power_user.id))
+            sessions = list(ChatSession.objects.filter(user__in=users).order_by('created_at')[:1])
+        else:
+            start = time.perf_counter()
+            power_user, users, sessions = generate(args.feedback, args.users, args.sessions, args.models)
+            print(f"Generated {Feedback.objects.count()} feedbacks in {time.perf_counter() - start:.0f}s")
+        run(power_user, users, sessions, args.legacy, args.sample)
+    finally:
+        if not args.keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=1)
+
+
+if __name__ == '__main__':
+    main()
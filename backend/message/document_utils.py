@@ -1,7 +1,10 @@
 import io
+import os
+import hashlib
 import logging
-from google.cloud import storage
+from common.storage_signer import get_bucket
 from django.conf import settings
+from django.core.cache import cache
 import pandas as pd
 import json
 
@@ -18,82 +21,217 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Extraction stops once the prompt would exceed this many tokens; the rest of
+# the document is never parsed. ~4 characters per token is close enough for
+# budgeting and avoids loading a tokenizer.
+DOCUMENT_TOKEN_BUDGET = int(os.getenv('DOCUMENT_TOKEN_BUDGET', 32000))
+CHARS_PER_TOKEN = 4
+DOCUMENT_TEXT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+SPREADSHEET_CHUNK_ROWS = 500
+
+TEXT_EXTENSIONS = ['txt', 'md', 'py', 'js', 'json', 'html', 'css', 'rtf', 'xml', 'yaml', 'yml']
+
+def get_content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _text_cache_key(content_hash, token_budget):
+    return f"document:text:{content_hash}:{token_budget}"
+
+
+def _path_cache_key(file_path):
+    return f"document:hash:{file_path}"
+
+
+def remember_document_hash(file_path, content_hash):
+    """Record which content a stored document path holds, so lookups skip the download."""
+    try:
+        cache.set(_path_cache_key(file_path), content_hash, DOCUMENT_TEXT_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Could not cache document hash: {e}")
+
+
+def get_document_hash(file_path):
+    try:
+        return cache.get(_path_cache_key(file_path))
+    except Exception as e:
+        logger.warning(f"Document hash lookup failed: {e}")
+        return None
+
+
+def get_cached_document_text(content_hash, token_budget=DOCUMENT_TOKEN_BUDGET):
+    try:
+        return cache.get(_text_cache_key(content_hash, token_budget))
+    except Exception as e:
+        logger.warning(f"Document text cache lookup failed: {e}")
+        return None
+
+
 def get_file_content(file_path):
     """Download file content from GCS."""
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(settings.GS_BUCKET_NAME)
-        blob = bucket.blob(file_path)
+        blob = get_bucket().blob(file_path)
         content = blob.download_as_bytes()
         return content
     except Exception as e:
         logger.error(f"Error downloading file from GCS: {e}")
         return None
 
-def extract_text_from_document(file_path):
-    """Extract text from document based on file extension."""
-    if not file_path:
-        return None
-        
-    # Enforce no path traversal
-    if '..' in file_path or '../' in file_path:
-        return "[Security Error: Invalid document path path-traversal detected]"
-        
-    import os
-    # Normalize path and replace backslashes with forward slashes
-    normalized_path = os.path.normpath(file_path).replace('\\', '/')
-    
-    # Enforce safe prefix
-    if not normalized_path.startswith('llm-documents-input/'):
-        return "[Security Error: Unauthorized document path prefix]"
-        
-    content = get_file_content(file_path)
-    if not content:
-        return "[Error: Could not retrieve document content]"
 
-    file_ext = file_path.lower().split('.')[-1]
+class _TextBudget:
+    """Accumulates extracted text until the token budget is spent."""
+
+    def __init__(self, token_budget):
+        self.max_chars = token_budget * CHARS_PER_TOKEN
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, text):
+        """Append text; returns False once the budget is exhausted."""
+        if self.truncated:
+            return False
+        remaining = self.max_chars - self.size
+        if len(text) > remaining:
+            self.parts.append(text[:remaining])
+            self.size = self.max_chars
+            self.truncated = True
+            return False
+        self.parts.append(text)
+        self.size += len(text)
+        return True
+
+    def result(self, unit=None):
+        text = "".join(self.parts)
+        if self.truncated:
+            suffix = f" after {unit}" if unit else ""
+            text += f"\n[Document truncated{suffix}: token budget of {self.max_chars // CHARS_PER_TOKEN} reached]"
+        return text
+
+
+def extract_text_from_bytes(content, file_ext, token_budget=DOCUMENT_TOKEN_BUDGET):
+    """
+    Parse a document held in memory, stopping as soon as the token budget is
+    reached. Module-level and free of Django state so it can be benchmarked
+    on its own.
+    """
     file_stream = io.BytesIO(content)
+    budget = _TextBudget(token_budget)
 
-    text = ""
     try:
         if file_ext == 'pdf':
-            if PdfReader:
-                reader = PdfReader(file_stream)
-                for page in reader.pages:
-                    extract = page.extract_text()
-                    if extract:
-                        text += extract + "\n"
-            else:
+            if not PdfReader:
                 return "[System Message: To extract text from PDFs, please install the 'pypdf' library in your backend environment: pip install pypdf]"
+            reader = PdfReader(file_stream)
+            # Pages are parsed lazily, one at a time
+            for page_number, page in enumerate(reader.pages, start=1):
+                extract = page.extract_text()
+                if extract and not budget.add(extract + "\n"):
+                    return budget.result(f"page {page_number} of {len(reader.pages)}")
+            return budget.result()
 
         elif file_ext in ['docx', 'doc']:
-            if DocxDocument:
-                doc = DocxDocument(file_stream)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-            else:
-                 return "[System Message: To extract text from Word documents, please install the 'python-docx' library in your backend environment: pip install python-docx]"
+            if not DocxDocument:
+                return "[System Message: To extract text from Word documents, please install the 'python-docx' library in your backend environment: pip install python-docx]"
+            doc = DocxDocument(file_stream)
+            for para in doc.paragraphs:
+                if not budget.add(para.text + "\n"):
+                    break
+            return budget.result()
 
         elif file_ext in ['xlsx', 'xls', 'csv']:
-             try:
-                 if file_ext == 'csv':
-                     df = pd.read_csv(file_stream)
-                 else:
-                     df = pd.read_excel(file_stream)
-                 # Convert full dataframe to string representation
-                 text = df.to_string(index=False)
-             except Exception as e:
-                 return f"[Error parsing spreadsheet: {str(e)}]"
-
-        elif file_ext in ['txt', 'md', 'py', 'js', 'json', 'html', 'css', 'rtf', 'xml', 'yaml', 'yml']:
+            try:
+                if file_ext == 'csv':
+                    chunks = pd.read_csv(file_stream, chunksize=SPREADSHEET_CHUNK_ROWS)
+                else:
+                    df = pd.read_excel(file_stream)
+                    chunks = (df.iloc[i:i + SPREADSHEET_CHUNK_ROWS] for i in range(0, len(df), SPREADSHEET_CHUNK_ROWS))
+                rows_read = 0
+                for chunk in chunks:
+                    # Only the first block carries the header row
+                    block = chunk.to_string(index=False, header=rows_read == 0)
+                    rows_read += len(chunk)
+                    if not budget.add(block + "\n"):
+                        return budget.result(f"{rows_read} rows")
+                return budget.result().rstrip("\n")
+            except Exception as e:
+                return f"[Error parsing spreadsheet: {str(e)}]"
+
+        elif file_ext in TEXT_EXTENSIONS:
             # Try utf-8 decoding
-            text = content.decode('utf-8', errors='ignore')
+            budget.add(content[:budget.max_chars * 4].decode('utf-8', errors='ignore'))
+            return budget.result()
 
         else:
-            text = f"[System Message: File type '.{file_ext}' is not currently supported for text extraction]"
+            return f"[System Message: File type '.{file_ext}' is not currently supported for text extraction]"
 
     except Exception as e:
         logger.error(f"Error extracting text: {e}")
-        text = f"[Error extracting text from document: {str(e)}]"
+        return f"[Error extracting text from document: {str(e)}]"
+
+
+def extract_and_cache(content, file_ext, token_budget=DOCUMENT_TOKEN_BUDGET, content_hash=None):
+    """
+    Extract text for raw document bytes, keyed by content hash so identical
+    uploads (re-uploads, duplicated sessions) are parsed once.
 
+    Parsing runs inline. Uploads are parsed by the extract_document_text
+    Celery task, so a request only parses when it beats that task to a
+    document. Web workers never fork a process pool.
+    """
+    content_hash = content_hash or get_content_hash(content)
+    text = get_cached_document_text(content_hash, token_budget)
+    if text is not None:
+        return text
+
+    text = extract_text_from_bytes(content, file_ext, token_budget)
+
+    # Error strings are not cached so a transient failure can be retried
+    if text and not text.startswith("[Error"):
+        try:
+            cache.set(_text_cache_key(content_hash, token_budget), text, DOCUMENT_TEXT_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Could not cache document text: {e}")
     return text
+
+
+def validate_document_path(file_path):
+    """Return an error string for unsafe paths, else None."""
+    # Enforce no path traversal
+    if '..' in file_path or '../' in file_path:
+        return "[Security Error: Invalid document path path-traversal detected]"
+
+    # Normalize path and replace backslashes with forward slashes
+    normalized_path = os.path.normpath(file_path).replace('\\', '/')
+
+    # Enforce safe prefix
+    if not normalized_path.startswith('llm-documents-input/'):
+        return "[Security Error: Unauthorized document path prefix]"
+    return None
+
+
+def extract_text_from_document(file_path, token_budget=DOCUMENT_TOKEN_BUDGET):
+    """Extract text from document based on file extension."""
+    if not file_path:
+        return None
+
+    path_error = validate_document_path(file_path)
+    if path_error:
+        return path_error
+
+    # Fast path: the upload already recorded the content hash and the
+    # background task has (usually) finished extracting it
+    content_hash = get_document_hash(file_path)
+    if content_hash:
+        text = get_cached_document_text(content_hash, token_budget)
+        if text is not None:
+            return text
+
+    content = get_file_content(file_path)
+    if not content:
+        return "[Error: Could not retrieve document content]"
+
+    content_hash = content_hash or get_content_hash(content)
+    remember_document_hash(file_path, content_hash)
+    file_ext = file_path.lower().split('.')[-1]
+    return extract_and_cache(content, file_ext, token_budget, content_hash=content_hash)
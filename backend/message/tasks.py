@@ -5,6 +5,8 @@ import logging
 from message.models import Message
 from message.utils import MessageCache, MessageAnalyzer
 from django.core.cache import cache
+from tenants.config import TENANT_REGISTRY
+from tenants.context import set_current_tenant, clear_current_tenant
 logger = logging.getLogger(__name__)
 
 
@@ -150,4 +152,55 @@ def detect_conversation_loops():
     if sessions_with_loops:
         logger.warning(f"Detected potential loops in {len(sessions_with_loops)} sessions")
     
-    return sessions_with_loops
\ No newline at end of file
+    return sessions_with_loops
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=10)
+def extract_document_text(self, file_path):
+    """
+    Extract and cache the text of an uploaded document ahead of the first
+    prompt that uses it. Results are keyed by content hash, so duplicate
+    uploads are parsed once.
+    """
+    from message.document_utils import extract_text_from_document
+
+    text = extract_text_from_document(file_path)
+    if text and text.startswith("[Error: Could not retrieve"):
+        raise self.retry()
+
+    logger.info(f"Extracted {len(text or '')} characters from {file_path}")
+    return len(text or '')
+
+
+def _expire_streams(cutoff):
+    return Message.objects.filter(status='streaming', created_at__lt=cutoff).update(
+        status='error', failure_reason='Audio synthesis did not finish'
+    )
+
+
+@shared_task
+def expire_stale_tts_streams():
+    """
+    Move progressive TTS messages stuck in 'streaming' to 'error'. Synthesis
+    runs in a thread of the web worker, so a restart mid-stream would leave
+    them streaming forever. Every tenant database is checked once, starting
+    with the default one.
+    """
+    from message.tts_streaming import TTS_STREAM_TIMEOUT_SECONDS
+
+    cutoff = timezone.now() - timedelta(seconds=2 * TTS_STREAM_TIMEOUT_SECONDS)
+    expired = {'default': _expire_streams(cutoff)}
+    for tenant in TENANT_REGISTRY.values():
+        if tenant['db'] in expired:
+            continue
+        set_current_tenant(tenant)
+        try:
+            expired[tenant['db']] = _expire_streams(cutoff)
+        except Exception as e:
+            logger.error(f"Error expiring TTS streams for tenant {tenant['slug']}: {e}")
+        finally:
+            clear_current_tenant()
+
+    total = sum(expired.values())
+    if total:
+        logger.warning(f"Expired {total} stale TTS streams")
+    return total
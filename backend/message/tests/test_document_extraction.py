@@ -0,0 +1,75 @@
+"""
+Tests for budgeted, content-addressed document extraction.
+
+Verifies that:
+- extract_text_from_bytes stops at the token budget and marks the truncation.
+- Extracted text is cached by content hash, so a second path holding the same
+  bytes does not parse again.
+- A path recorded at upload time is served from cache without a download.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from message import document_utils
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ExtractTextFromBytesTests(TestCase):
+
+    def test_text_within_budget_is_untouched(self):
+        text = document_utils.extract_text_from_bytes(b'hello world', 'txt', token_budget=100)
+        self.assertEqual(text, 'hello world')
+
+    def test_text_over_budget_is_truncated(self):
+        text = document_utils.extract_text_from_bytes(b'a' * 1000, 'txt', token_budget=10)
+        self.assertTrue(text.startswith('a' * 40))
+        self.assertNotIn('a' * 41, text)
+        self.assertIn('Document truncated', text)
+
+    def test_csv_stops_reading_rows(self):
+        rows = "\n".join(f"{i},value-{i}" for i in range(5000))
+        text = document_utils.extract_text_from_bytes(f"id,value\n{rows}".encode(), 'csv', token_budget=50)
+        self.assertIn('id', text.splitlines()[0])
+        self.assertIn('Document truncated after', text)
+        self.assertNotIn('value-4999', text)
+
+    def test_unsupported_extension(self):
+        text = document_utils.extract_text_from_bytes(b'data', 'bin')
+        self.assertIn("not currently supported", text)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DocumentTextCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('message.document_utils.extract_text_from_bytes', wraps=document_utils.extract_text_from_bytes)
+    @patch('message.document_utils.get_file_content', return_value=b'same bytes')
+    def test_same_content_parsed_once(self, mock_download, mock_extract):
+        first = document_utils.extract_text_from_document('llm-documents-input/u1/a.txt')
+        second = document_utils.extract_text_from_document('llm-documents-input/u2/b.txt')
+
+        self.assertEqual(first, 'same bytes')
+        self.assertEqual(second, 'same bytes')
+        mock_extract.assert_called_once()
+
+    @patch('message.document_utils.get_file_content')
+    def test_recorded_upload_skips_download(self, mock_download):
+        content = b'uploaded text'
+        content_hash = document_utils.get_content_hash(content)
+        document_utils.extract_and_cache(content, 'txt', content_hash=content_hash)
+        document_utils.remember_document_hash('llm-documents-input/u1/c.txt', content_hash)
+
+        text = document_utils.extract_text_from_document('llm-documents-input/u1/c.txt')
+
+        self.assertEqual(text, 'uploaded text')
+        mock_download.assert_not_called()
+
+    @patch('message.document_utils.get_file_content', return_value=None)
+    def test_download_failure_is_not_cached(self, mock_download):
+        text = document_utils.extract_text_from_document('llm-documents-input/u1/missing.txt')
+        self.assertIn('Could not retrieve', text)
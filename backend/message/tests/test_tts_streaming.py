@@ -0,0 +1,196 @@
+"""
+Tests for progressive TTS streaming helpers.
+
+Verifies that:
+- build_streaming_wav_header produces a 44-byte PCM header with open-ended sizes.
+- upload_tts_pcm wraps raw PCM in a WAV container (dropping a split sample).
+- supports_tts_streaming only enables providers with chunked synthesis.
+- Background synthesis publishes chunks that any relay can replay, uploads
+  the full file and records the outcome, even when the provider fails.
+- The relay is authorized by a signed token instead of the request user,
+  redirects to the stored file once synthesis is over, and stale
+  'streaming' messages are expired to 'error' in every tenant database.
+- Audio already in the TTS cache is stored on the message instead of being
+  synthesized again, so the relay redirects to the cached file.
+"""
+import base64
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from scipy.io import wavfile
+
+from ai_model.tts_interactions import supports_tts_streaming, TTS_STREAM_SAMPLE_RATE
+from chat_session.models import ChatSession
+from message import tts_streaming
+from message.models import Message
+from message.tasks import expire_stale_tts_streams
+from tenants.context import get_current_tenant
+from message.utils import build_streaming_wav_header, upload_tts_pcm
+from message.views import MessageViewSet
+from user.models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+PARAMS = {'text': 'Namaste', 'language': 'hi', 'model_code': 'sonic-2', 'gender': 'female', 'voice': None}
+
+
+class StreamingWavHeaderTests(TestCase):
+
+    def test_header_layout(self):
+        header = build_streaming_wav_header(24000)
+        self.assertEqual(len(header), 44)
+        self.assertEqual(header[:4], b'RIFF')
+        self.assertEqual(header[8:12], b'WAVE')
+        self.assertEqual(header[36:40], b'data')
+        self.assertEqual(int.from_bytes(header[24:28], 'little'), 24000)
+        self.assertEqual(int.from_bytes(header[28:32], 'little'), 48000)
+        # Unknown length: both size fields are left open
+        self.assertEqual(header[4:8], b'\xff\xff\xff\xff')
+        self.assertEqual(header[40:44], b'\xff\xff\xff\xff')
+
+
+class UploadTtsPcmTests(TestCase):
+
+    @patch('message.utils.upload_tts_audio')
+    def test_wraps_pcm_in_wav(self, mock_upload):
+        mock_upload.return_value = {'path': 'tts-audios/x.wav', 'url': 'https://signed'}
+        pcm = (1).to_bytes(2, 'little', signed=True) * 10 + b'\x01'
+
+        result = upload_tts_pcm(pcm, 24000)
+
+        self.assertEqual(result['path'], 'tts-audios/x.wav')
+        wav_bytes = base64.b64decode(mock_upload.call_args[0][0])
+        rate, samples = wavfile.read(io.BytesIO(wav_bytes))
+        self.assertEqual(rate, 24000)
+        self.assertEqual(len(samples), 10)
+
+
+class SupportsTtsStreamingTests(TestCase):
+
+    def test_streaming_providers(self):
+        for model in ['sonic-2', 'gpt-4o-mini-tts', 'gemini-2.5-flash-tts', 'eleven_multilingual_v2']:
+            self.assertTrue(supports_tts_streaming(model), model)
+
+    def test_non_streaming_providers(self):
+        for model in ['elevenlabs', 'indicparlertts', 'ai4bharat_tts', 'bulbul:v2', 'indicf5', 'speech-2.8-hd']:
+            self.assertFalse(supports_tts_streaming(model), model)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TtsStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(display_name='listener', auth_provider='google')
+        session = ChatSession.objects.create(user=user, mode='direct', session_type='TTS')
+        self.message = Message.objects.create(session=session, role='assistant', content='', position=1)
+
+    def relay(self, token):
+        request = APIRequestFactory().get(f'/messages/{self.message.id}/tts_stream/', {'token': token} if token else {})
+        # The router applies the action's own authentication and permission classes
+        view = MessageViewSet.as_view({'get': 'tts_stream'}, **MessageViewSet.tts_stream.kwargs)
+        return view(request, pk=str(self.message.id))
+
+    @patch('message.tts_streaming.upload_tts_pcm', return_value={'path': 'tts-audios/x.wav'})
+    @patch('message.tts_streaming.stream_tts_output', return_value=iter([b'ab', b'cd']))
+    def test_synthesis_publishes_chunks_and_uploads(self, mock_stream, mock_upload):
+        with patch('message.tts_streaming.threading.Thread') as mock_thread:
+            tts_streaming.start_tts_stream(self.message, PARAMS, {})
+        self.assertEqual(Message.objects.get(id=self.message.id).status, 'streaming')
+        target, args = mock_thread.call_args.kwargs['target'], mock_thread.call_args.kwargs['args']
+        mock_thread.return_value.start.assert_called_once()
+
+        target(*args)
+
+        mock_upload.assert_called_once_with(b'abcd', TTS_STREAM_SAMPLE_RATE)
+        message = Message.objects.get(id=self.message.id)
+        self.assertEqual((message.status, message.audio_path), ('success', 'tts-audios/x.wav'))
+        self.assertNotIn('tts_stream', message.metadata)
+        self.assertIn('time_to_first_audio_ms', message.metadata)
+        # Every relay, however late, replays the whole stream
+        self.assertEqual(list(tts_streaming.iter_tts_stream(self.message.id)), [b'ab', b'cd'])
+        self.assertEqual(list(tts_streaming.iter_tts_stream(self.message.id)), [b'ab', b'cd'])
+
+    @patch('message.tts_streaming.stream_tts_output', side_effect=ConnectionError('provider down'))
+    def test_failed_synthesis_ends_the_stream(self, mock_stream):
+        self.message.metadata = {'tts_stream': PARAMS}
+        tts_streaming.run_tts_stream(self.message, PARAMS, {})
+
+        self.assertEqual(Message.objects.get(id=self.message.id).status, 'error')
+        self.assertEqual(list(tts_streaming.iter_tts_stream(self.message.id, timeout=1)), [])
+
+    def test_tokens(self):
+        token = tts_streaming.sign_tts_stream(self.message.id)
+        self.assertTrue(tts_streaming.check_tts_stream_token(self.message.id, token))
+        self.assertFalse(tts_streaming.check_tts_stream_token(self.message.session_id, token))
+        self.assertFalse(tts_streaming.check_tts_stream_token(self.message.id, 'forged'))
+        self.assertFalse(tts_streaming.check_tts_stream_token(self.message.id, None))
+
+    def test_relay_needs_no_credentials(self):
+        Message.objects.filter(id=self.message.id).update(status='streaming')
+        cache.set(tts_streaming.TTS_STREAM_CHUNK_KEY.format(message_id=self.message.id, index=0), b'pcm')
+        cache.set(tts_streaming.TTS_STREAM_DONE_KEY.format(message_id=self.message.id), 1)
+
+        self.assertEqual(self.relay(None).status_code, 403)
+        self.assertEqual(self.relay('forged').status_code, 403)
+
+        response = self.relay(tts_streaming.sign_tts_stream(self.message.id))
+        self.assertEqual(response['Content-Type'], 'audio/wav')
+        self.assertEqual(b''.join(response.streaming_content), build_streaming_wav_header(TTS_STREAM_SAMPLE_RATE) + b'pcm')
+
+    @patch('message.views.generate_signed_url', return_value='https://signed/x.wav')
+    def test_relay_redirects_once_finished(self, mock_sign):
+        Message.objects.filter(id=self.message.id).update(status='success', audio_path='tts-audios/x.wav')
+        response = self.relay(tts_streaming.sign_tts_stream(self.message.id))
+        self.assertEqual((response.status_code, response['Location']), (302, 'https://signed/x.wav'))
+
+    def test_expire_stale_streams(self):
+        Message.objects.filter(id=self.message.id).update(status='streaming')
+        self.assertEqual(expire_stale_tts_streams(), 0)
+
+        Message.objects.filter(id=self.message.id).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(expire_stale_tts_streams(), 1)
+        self.assertEqual(Message.objects.get(id=self.message.id).status, 'error')
+
+    @patch('message.tasks._expire_streams')
+    def test_expire_stale_streams_in_every_tenant(self, mock_expire):
+        tenants = {
+            'arena': {'id': '1', 'name': 'Arena', 'slug': 'arena', 'db': 'default'},
+            'aquarium': {'id': '2', 'name': 'Aquarium', 'slug': 'aquarium', 'db': 'aquarium'},
+            'lake': {'id': '3', 'name': 'Lake', 'slug': 'lake', 'db': 'lake'},
+        }
+        databases = []
+
+        def expire(cutoff):
+            tenant = get_current_tenant()
+            databases.append(tenant['db'] if tenant else 'default')
+            if databases[-1] == 'aquarium':
+                raise ConnectionError('database unavailable')
+            return 2
+
+        mock_expire.side_effect = expire
+        with patch.dict('message.tasks.TENANT_REGISTRY', tenants, clear=True):
+            self.assertEqual(expire_stale_tts_streams(), 4)
+
+        self.assertEqual(databases, ['default', 'aquarium', 'lake'])
+        self.assertIsNone(get_current_tenant())
+
+    @patch('message.views.generate_signed_url', return_value='https://signed/tts-cache/abc.wav')
+    @patch('message.tts_streaming.find_cached_tts_path', return_value='tts-cache/abc.wav')
+    def test_cached_audio_is_not_streamed(self, mock_find, mock_sign):
+        self.assertTrue(tts_streaming.use_cached_tts(self.message, PARAMS))
+
+        mock_find.assert_called_once_with('Namaste', 'hi', 'sonic-2', gender='female', voice=None)
+        message = Message.objects.get(id=self.message.id)
+        self.assertEqual((message.status, message.audio_path), ('success', 'tts-cache/abc.wav'))
+        response = self.relay(tts_streaming.sign_tts_stream(self.message.id))
+        self.assertEqual((response.status_code, response['Location']), (302, 'https://signed/tts-cache/abc.wav'))
+
+    @patch('message.tts_streaming.find_cached_tts_path', return_value=None)
+    def test_cache_miss_leaves_message_alone(self, mock_find):
+        self.assertFalse(tts_streaming.use_cached_tts(self.message, PARAMS))
+        self.assertEqual(Message.objects.get(id=self.message.id).audio_path, None)
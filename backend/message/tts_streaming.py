@@ -0,0 +1,134 @@
+"""
+Progressive TTS audio for stream_audio=true requests.
+
+Synthesis starts as soon as `stream` prepares the assistant message, in a
+background thread of the process that served it. Chunks are published to the
+shared cache as they arrive, so the relay (message tts_stream action) can
+tap into them from any worker, and late or repeated relay requests replay
+from the first chunk. When the provider finishes, the complete WAV is
+uploaded to GCS and stored on the message.
+
+The relay URL carries a signed token instead of relying on request
+authentication, so a plain <audio src> element can load it. Messages whose
+synthesis never finishes (e.g. the worker was restarted) are moved from
+'streaming' to 'error' by the expire_stale_tts_streams task.
+
+Academic requests whose audio is already in the TTS cache are not streamed:
+use_cached_tts stores the cached file on the message, and the relay
+redirects to it.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.core import signing
+from django.core.cache import cache
+
+from ai_model.tts_cache import find_cached_tts_path
+from ai_model.tts_interactions import stream_tts_output, TTS_STREAM_SAMPLE_RATE
+from common.security_utils import sanitize_error_message
+from message.utils import upload_tts_pcm
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for one synthesis; also the lifetime of cached chunks and tokens
+TTS_STREAM_TIMEOUT_SECONDS = int(os.getenv('TTS_STREAM_TIMEOUT_SECONDS', 300))
+TTS_STREAM_POLL_SECONDS = 0.05
+TTS_STREAM_CHUNK_KEY = "tts_stream:{message_id}:chunk:{index}"
+# Number of chunks, set once synthesis has ended (successfully or not)
+TTS_STREAM_DONE_KEY = "tts_stream:{message_id}:done"
+TTS_STREAM_TOKEN_SALT = 'message.tts_stream'
+
+
+def sign_tts_stream(message_id):
+    """Token that authorizes the relay of one message's audio."""
+    return signing.TimestampSigner(salt=TTS_STREAM_TOKEN_SALT).sign(str(message_id))
+
+
+def check_tts_stream_token(message_id, token, max_age=TTS_STREAM_TIMEOUT_SECONDS):
+    try:
+        signed_id = signing.TimestampSigner(salt=TTS_STREAM_TOKEN_SALT).unsign(token or '', max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return signed_id == str(message_id)
+
+
+def run_tts_stream(message, params, context):
+    """
+    Synthesize, publish chunks to the cache, upload the full WAV and record
+    the outcome on the message. Runs to completion whether or not anyone is
+    listening, so audio the provider produced is never lost.
+    """
+    db_alias = message._state.db
+    start_time = time.time()
+    pcm_chunks = []
+    try:
+        for chunk in stream_tts_output(
+            params['text'], params['language'], model=params['model_code'],
+            gender=params['gender'], voice=params['voice'], context=context
+        ):
+            if not pcm_chunks:
+                message.metadata['time_to_first_audio_ms'] = round((time.time() - start_time) * 1000, 2)
+            cache.set(
+                TTS_STREAM_CHUNK_KEY.format(message_id=message.id, index=len(pcm_chunks)),
+                chunk, timeout=TTS_STREAM_TIMEOUT_SECONDS
+            )
+            pcm_chunks.append(chunk)
+        cache.set(TTS_STREAM_DONE_KEY.format(message_id=message.id), len(pcm_chunks), timeout=TTS_STREAM_TIMEOUT_SECONDS)
+
+        output = upload_tts_pcm(b''.join(pcm_chunks), TTS_STREAM_SAMPLE_RATE)
+        message.audio_path = output['path']
+        message.status = 'success'
+    except Exception as e:
+        cache.set(TTS_STREAM_DONE_KEY.format(message_id=message.id), len(pcm_chunks), timeout=TTS_STREAM_TIMEOUT_SECONDS)
+        logger.error(f"Error in progressive TTS for message {message.id}: {sanitize_error_message(e)}")
+        message.status = 'error'
+        message.failure_reason = sanitize_error_message(e)
+    finally:
+        message.metadata.pop('tts_stream', None)
+        message.latency_ms = round((time.time() - start_time) * 1000, 2)
+        message.save(using=db_alias)
+
+
+def start_tts_stream(message, params, context):
+    """Mark the message as streaming and start its synthesis in the background."""
+    if not message.metadata:
+        message.metadata = {}
+    message.metadata['tts_stream'] = params
+    message.status = 'streaming'
+    message.save(update_fields=['metadata', 'status'])
+    threading.Thread(target=run_tts_stream, args=(message, params, context), daemon=True).start()
+
+
+def use_cached_tts(message, params):
+    """Store the cached audio for the params on the message instead of synthesizing it. False on a miss."""
+    path = find_cached_tts_path(
+        params['text'], params['language'], params['model_code'],
+        gender=params['gender'], voice=params['voice']
+    )
+    if not path:
+        return False
+    message.audio_path = path
+    message.status = 'success'
+    message.latency_ms = 0
+    message.save(update_fields=['audio_path', 'status', 'latency_ms'])
+    return True
+
+
+def iter_tts_stream(message_id, timeout=TTS_STREAM_TIMEOUT_SECONDS):
+    """Yield the published PCM chunks of a message, waiting for new ones until synthesis ends."""
+    deadline = time.monotonic() + timeout
+    done_key = TTS_STREAM_DONE_KEY.format(message_id=message_id)
+    index = 0
+    while time.monotonic() < deadline:
+        chunk = cache.get(TTS_STREAM_CHUNK_KEY.format(message_id=message_id, index=index))
+        if chunk is not None:
+            yield chunk
+            index += 1
+            continue
+        # Chunks are published before the done marker, so a missing chunk
+        # after it means the stream has ended (or its chunks have expired)
+        if cache.get(done_key) is not None:
+            return
+        time.sleep(TTS_STREAM_POLL_SECONDS)
@@ -6,8 +6,8 @@ import re
 import json
 import datetime
 from message.models import Message
-from google.cloud import storage
 from django.conf import settings
+from common.storage_signer import get_bucket, sign_url, sign_urls
 import uuid
 import os
 import io
@@ -271,25 +271,13 @@ def format_message_for_export(message: 'Message', format_type: str = 'plain') ->
 def generate_signed_url(blob_name, expiration=300):
     """
     Generates a v4 signed URL for a blob.
+    Signing is local and memoized; see common.storage_signer.
     """
-    try:
-        if not blob_name:
-            return None
-            
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(settings.GS_BUCKET_NAME)
-        blob = bucket.blob(blob_name)
+    return sign_url(blob_name, expiration)
 
-        url = blob.generate_signed_url(
-            version="v4",
-            expiration=datetime.timedelta(seconds=expiration),
-            method="GET",
-        )
-        return url
-    except Exception as e:
-        from common.security_utils import sanitize_error_message
-        print(f"Error generating signed URL: {sanitize_error_message(e)}")
-        return None
+def generate_signed_urls(blob_names, expiration=300):
+    """Batch variant of generate_signed_url, returns {blob_name: url}."""
+    return sign_urls(blob_names, expiration)
 
 def upload_tts_audio(audio_base64, folder='tts-audios'):
     try:
@@ -300,18 +288,15 @@ def upload_tts_audio(audio_base64, folder='tts-audios'):
         audio_file = io.BytesIO(audio_bytes)
 
         # Upload to Google Cloud Storage
-        client = storage.Client()
-        bucket = client.bucket(settings.GS_BUCKET_NAME)
+        bucket = get_bucket()
         blob_name = f"{folder}/{uuid.uuid4()}{'.wav'}"
         blob = bucket.blob(blob_name)
         blob.upload_from_file(audio_file, content_type="audio/wav")
 
         # Generate signed URL
-        signed_url = blob.generate_signed_url(
-            version="v4",
-            expiration=datetime.timedelta(minutes=15),
-            method="GET",
-        )
+        signed_url = sign_url(blob_name, 15 * 60)
+        if not signed_url:
+            raise Exception("Could not sign uploaded audio")
 
         return {
             'path': blob_name,
@@ -320,3 +305,34 @@ def upload_tts_audio(audio_base64, folder='tts-audios'):
 
     except Exception as e:
         raise Exception(f"Failed to upload audio: {str(e)}")
+
+def build_streaming_wav_header(sample_rate, channels=1, bits_per_sample=16):
+    """
+    WAV header for a PCM stream whose total length is not known up front.
+    The RIFF and data sizes are set to 0xFFFFFFFF, which browsers and most
+    decoders treat as "read until end of stream".
+    """
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return (
+        b'RIFF' + (0xFFFFFFFF).to_bytes(4, 'little') + b'WAVE'
+        + b'fmt ' + (16).to_bytes(4, 'little')
+        + (1).to_bytes(2, 'little')
+        + channels.to_bytes(2, 'little')
+        + sample_rate.to_bytes(4, 'little')
+        + byte_rate.to_bytes(4, 'little')
+        + block_align.to_bytes(2, 'little')
+        + bits_per_sample.to_bytes(2, 'little')
+        + b'data' + (0xFFFFFFFF).to_bytes(4, 'little')
+    )
+
+def upload_tts_pcm(pcm_bytes, sample_rate, folder='tts-audios'):
+    """Wrap s16le mono PCM in a proper WAV container and upload it like upload_tts_audio."""
+    import numpy as np
+    from scipy.io.wavfile import write as scipy_wav_write
+
+    # Providers may split a chunk mid-sample; drop a trailing odd byte
+    pcm_bytes = pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2]
+    wav_buffer = io.BytesIO()
+    scipy_wav_write(wav_buffer, sample_rate, np.frombuffer(pcm_bytes, dtype=np.int16))
+    return upload_tts_audio(base64.b64encode(wav_buffer.getvalue()).decode("utf-8"), folder=folder)
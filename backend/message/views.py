@@ -1,7 +1,8 @@
 import time
 from ai_model.llm_interactions import get_model_output
 from ai_model.asr_interactions import get_asr_output
-from ai_model.tts_interactions import get_tts_output
+from ai_model.tts_interactions import get_tts_output, supports_tts_streaming, TTS_STREAM_SAMPLE_RATE
+from ai_model.tts_cache import get_cached_tts_output
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -20,7 +21,7 @@ from message.permissions import IsMessageOwner
 from chat_session.models import ChatSession
 from user.authentication import FirebaseAuthentication, AnonymousTokenAuthentication
 from django.db import transaction
-from django.http import StreamingHttpResponse
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 import threading
 import queue
 from rest_framework.views import APIView
@@ -32,12 +33,17 @@ import subprocess
 import json
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
-from google.cloud import storage
 from django.conf import settings
 import datetime
 import uuid
 import tempfile
-from message.utils import generate_signed_url
+from urllib.parse import urlencode
+import hashlib
+from message.utils import generate_signed_url, build_streaming_wav_header
+from message.tts_streaming import check_tts_stream_token, iter_tts_stream, sign_tts_stream, start_tts_stream, use_cached_tts
+from common.storage_signer import get_bucket
+from message.document_utils import remember_document_hash, get_cached_document_text
+from message.tasks import extract_document_text
 import random
 from academic_prompts.models import AcademicPrompt
 from django.db.models import Min, Q
@@ -719,6 +725,10 @@ class MessageViewSet(viewsets.ModelViewSet):
                 thread_a.join()
                 thread_b.join()
 
+        # Progressive audio: instead of waiting for the full WAV, hand the client a
+        # relay URL (tts_stream action) that pipes provider chunks as they arrive.
+        stream_audio = bool(request.data.get('stream_audio'))
+
         def generate_tts_output():
             # For academic mode, get prompt from database with pre-defined model pairs
             if session.mode == 'academic':
@@ -763,12 +773,47 @@ class MessageViewSet(viewsets.ModelViewSet):
                 gender = random.choice(["male", "female"])
                 voice_a = None
                 voice_b = None
+
+            # Academic prompts repeat the same (text, model, voice) tuples, so
+            # reuse previously synthesized audio instead of calling the provider
+            synthesize_tts = get_cached_tts_output if session.mode == 'academic' else get_tts_output
+
+            def prepare_audio_stream(message_obj, model_code, voice):
+                """
+                Start synthesizing in the background and return the relay URL,
+                or None if the client did not ask for progressive audio or the
+                model cannot stream. Cached academic audio is not synthesized
+                again; the relay redirects to it.
+                """
+                if not stream_audio or not supports_tts_streaming(model_code):
+                    return None
+                params = {
+                    'text': user_message.content,
+                    'language': user_message.language,
+                    'model_code': model_code,
+                    'gender': gender,
+                    'voice': voice,
+                }
+                if session.mode != 'academic' or not use_cached_tts(message_obj, params):
+                    start_tts_stream(message_obj, params, {
+                        'session_id': str(session.id),
+                        'message_id': str(message_obj.id),
+                        'user_email': getattr(request.user, 'email', None),
+                    })
+                token = urlencode({'token': sign_tts_stream(message_obj.id)})
+                return request.build_absolute_uri(f'../{message_obj.id}/tts_stream/?{token}')
             if session.mode == 'direct':
                 start_time = time.time()
                 try:
                     # history = MessageService._get_conversation_history(session)
                     # history.pop()
 
+                    stream_url = prepare_audio_stream(assistant_message, session.model_a.model_code, voice_a)
+                    if stream_url:
+                        yield f'a0:"{stream_url}"\n'
+                        yield 'ad:{"finishReason":"stop"}\n'
+                        return
+
                     context = {'session_id': str(session.id), 'message_id': str(assistant_message.id), 'user_email': getattr(request.user, 'email', None)}
                     output = get_tts_output(user_message.content, user_message.language, model=session.model_a.model_code, gender=gender, voice=voice_a, context=context)
                     # escaped_chunk = chunk.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '')
@@ -797,8 +842,14 @@ class MessageViewSet(viewsets.ModelViewSet):
                     try:
                         # history = MessageService._get_conversation_history(session, 'a')
                         # history.pop()
+                        stream_url_a = prepare_audio_stream(assistant_message_a, session.model_a.model_code, voice_a)
+                        if stream_url_a:
+                            chunk_queue.put(('a', f'a0:"{stream_url_a}"\n'))
+                            chunk_queue.put(('a', 'ad:{"finishReason":"stop"}\n'))
+                            return
+
                         context = {'session_id': str(session.id), 'message_id': str(assistant_message_a.id), 'user_email': getattr(request.user, 'email', None)}
-                        output_a = get_tts_output(user_message.content, user_message.language, model=session.model_a.model_code, gender=gender, voice=voice_a, context=context)
+                        output_a = synthesize_tts(user_message.content, user_message.language, model=session.model_a.model_code, gender=gender, voice=voice_a, context=context)
                         chunk_queue.put(('a', f'a0:"{output_a["url"]}"\n'))
                         
                         assistant_message_a.audio_path = output_a["path"]
@@ -825,8 +876,14 @@ class MessageViewSet(viewsets.ModelViewSet):
                     try:
                         # history = MessageService._get_conversation_history(session, 'b')
                         # history.pop()
+                        stream_url_b = prepare_audio_stream(assistant_message_b, session.model_b.model_code, voice_b)
+                        if stream_url_b:
+                            chunk_queue.put(('b', f'b0:"{stream_url_b}"\n'))
+                            chunk_queue.put(('b', 'bd:{"finishReason":"stop"}\n'))
+                            return
+
                         context = {'session_id': str(session.id), 'message_id': str(assistant_message_b.id), 'user_email': getattr(request.user, 'email', None)}
-                        output_b = get_tts_output(user_message.content, user_message.language, model=session.model_b.model_code, gender=gender, voice=voice_b, context=context)
+                        output_b = synthesize_tts(user_message.content, user_message.language, model=session.model_b.model_code, gender=gender, voice=voice_b, context=context)
                         chunk_queue.put(('b', f'b0:"{output_b["url"]}"\n'))
                         
                         assistant_message_b.audio_path = output_b["path"]
@@ -878,6 +935,43 @@ class MessageViewSet(viewsets.ModelViewSet):
         else:
             return StreamingHttpResponse(generate(), content_type='text/plain')
 
+    @action(
+        detail=True, methods=['get'], url_path='tts_stream',
+        authentication_classes=[], permission_classes=[AllowAny]
+    )
+    def tts_stream(self, request, pk=None):
+        """
+        Relay progressive TTS audio for an assistant message prepared by
+        `stream` with stream_audio=true. Synthesis is already running in the
+        background; this only replays its chunks behind a streaming WAV
+        header. Requests are authorized by the signed token in the URL so an
+        <audio src> element can load it without credentials.
+        """
+        if not check_tts_stream_token(pk, request.query_params.get('token')):
+            return Response({'error': 'Invalid or expired audio stream link'}, status=status.HTTP_403_FORBIDDEN)
+
+        assistant_message = Message.objects.filter(id=pk).only('status', 'audio_path').first()
+        if assistant_message is None:
+            return Response({'error': 'Message not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if assistant_message.status != 'streaming':
+            # Already synthesized - serve the stored file instead
+            if assistant_message.audio_path:
+                return HttpResponseRedirect(generate_signed_url(assistant_message.audio_path, 900))
+            return Response(
+                {'error': 'No audio stream available for this message'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def relay():
+            yield build_streaming_wav_header(TTS_STREAM_SAMPLE_RATE)
+            yield from iter_tts_stream(assistant_message.id)
+
+        response = StreamingHttpResponse(relay(), content_type='audio/wav')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
     @action(detail=True, methods=['post'])
     def regenerate(self, request, pk=None):
         """Regenerate a specific assistant message"""
@@ -1207,8 +1301,7 @@ class MessageViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
             
         try:
-            client = storage.Client()
-            bucket = client.bucket(settings.GS_BUCKET_NAME)
+            bucket = get_bucket()
             ext = os.path.splitext(image_file.name)[1]
             blob_name = f"llm-images-input/{request.user.id}/{uuid.uuid4()}{ext}"
             blob = bucket.blob(blob_name)
@@ -1323,8 +1416,7 @@ class MessageViewSet(viewsets.ModelViewSet):
                 }, status=500)
 
             # Upload the WAV file to GCS
-            client = storage.Client()
-            bucket = client.bucket(settings.GS_BUCKET_NAME)
+            bucket = get_bucket()
 
             # Use asr-audios folder as it seems preferred for ASR
             blob_name = f"asr-audios/{request.user.id}/{uuid.uuid4()}.wav"
@@ -1387,12 +1479,27 @@ class MessageViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            client = storage.Client()
-            bucket = client.bucket(settings.GS_BUCKET_NAME)
+            bucket = get_bucket()
             ext = os.path.splitext(doc_file.name)[1]
             blob_name = f"llm-documents-input/{request.user.id}/{uuid.uuid4()}{ext}"
             blob = bucket.blob(blob_name)
+
+            content_hasher = hashlib.sha256()
+            for chunk in doc_file.chunks():
+                content_hasher.update(chunk)
+            content_hash = content_hasher.hexdigest()
+            doc_file.seek(0)
+
             blob.upload_from_file(doc_file, content_type=doc_file.content_type)
+
+            # Parse in the background so the first prompt finds the text cached;
+            # identical content uploaded before is already extracted
+            remember_document_hash(blob_name, content_hash)
+            if get_cached_document_text(content_hash) is None:
+                try:
+                    extract_document_text.delay(blob_name)
+                except Exception as e:
+                    print(f"Could not queue document extraction: {sanitize_error_message(e)}")
             
             signed_url = generate_signed_url(blob_name)
             
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 import json
-from model_metrics.models import ModelMetric
+from model_metrics.models import ModelMetric, MetricAnomaly
 from django.http import HttpResponse
 from model_metrics.utils import MetricExporter
 from model_metrics.calculators import MetricsCalculator
@@ -262,4 +262,19 @@ class ModelMetricAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         # Metrics should not be edited manually
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(MetricAnomaly)
+class MetricAnomalyAdmin(admin.ModelAdmin):
+    list_display = ['model', 'kind', 'category', 'period', 'observed_at', 'value', 'expected', 'zscore', 'detected_at']
+    list_filter = ['kind', 'category', 'period', 'observed_at']
+    search_fields = ['model__display_name', 'model__model_code']
+    list_select_related = ['model']
+
+    def has_add_permission(self, request):
+        # Anomalies are flagged by the detection task
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
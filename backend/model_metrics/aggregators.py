@@ -1,11 +1,18 @@
 from typing import Dict, List, Optional
-from django.db.models import Count, Avg, Sum, Q
+from django.db.models import Count, Avg, Sum, Q, Max
+from django.db.models.functions import Trunc
 from django.utils import timezone
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-from model_metrics.models import AIModel, ModelMetric
+from ai_model.serializers import AIModelListSerializer
+from model_metrics.models import AIModel, ModelMetric, ModelRating
+from model_metrics.rollups import get_model_totals
 from feedback.models import Feedback
 
+TIME_SERIES_TRUNC = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}
+TIME_SERIES_COLUMNS = ['date', 'model', 'elo_rating', 'win_rate', 'average_rating', 'total_comparisons']
+
 
 class MetricsAggregator:
     """Aggregate metrics across models and time periods"""
@@ -13,11 +20,16 @@ class MetricsAggregator:
     @staticmethod
     def aggregate_provider_metrics(provider: str) -> Dict:
         """Aggregate metrics by provider"""
-        models = AIModel.objects.filter(provider=provider, is_active=True)
+        models = list(AIModel.objects.filter(provider=provider, is_active=True))
+        model_ids = [model.id for model in models]
+        totals = get_model_totals(model_ids)
+        elo_ratings = dict(
+            ModelRating.objects.filter(model_id__in=model_ids).values_list('model_id', 'elo_rating')
+        )
         
         aggregated = {
             'provider': provider,
-            'model_count': models.count(),
+            'model_count': len(models),
             'average_elo': 0,
             'total_comparisons': 0,
             'total_wins': 0,
@@ -29,29 +41,28 @@ class MetricsAggregator:
         ratings = []
         
         for model in models:
-            latest_metric = ModelMetric.objects.filter(
-                model=model,
-                category='overall',
-                period='all_time'
-            ).order_by('-calculated_at').first()
+            if model.id not in elo_ratings and model.id not in totals:
+                continue
+            model_totals = totals.get(model.id, {})
+            elo_rating = round(elo_ratings.get(model.id, 1500), 2)
+            votes = model_totals.get('votes', 0)
+            wins = model_totals.get('wins', 0)
             
-            if latest_metric:
-                total_elo += latest_metric.elo_rating
-                aggregated['total_comparisons'] += latest_metric.total_comparisons
-                aggregated['total_wins'] += latest_metric.wins
-                
-                if latest_metric.average_rating:
-                    ratings.append(latest_metric.average_rating)
-                
-                aggregated['models'].append({
-                    'model': model,
-                    'elo_rating': latest_metric.elo_rating,
-                    'win_rate': (latest_metric.wins / latest_metric.total_comparisons * 100) 
-                               if latest_metric.total_comparisons > 0 else 0
-                })
+            total_elo += elo_rating
+            aggregated['total_comparisons'] += votes
+            aggregated['total_wins'] += wins
+            
+            if model_totals.get('ratings_count'):
+                ratings.append(model_totals['rating_sum'] / model_totals['ratings_count'])
+            
+            aggregated['models'].append({
+                'model': AIModelListSerializer(model).data,
+                'elo_rating': elo_rating,
+                'win_rate': (wins / votes * 100) if votes > 0 else 0
+            })
         
-        if models.count() > 0:
-            aggregated['average_elo'] = round(total_elo / models.count(), 2)
+        if models:
+            aggregated['average_elo'] = round(total_elo / len(models), 2)
         
         if ratings:
             aggregated['average_rating'] = round(sum(ratings) / len(ratings), 2)
@@ -61,49 +72,62 @@ class MetricsAggregator:
         
         return aggregated
     
+    @staticmethod
+    def get_metrics_watermark(period: str = 'daily') -> Optional[datetime]:
+        """
+        Latest write to a period's metrics. calculated_at is truncated to the
+        day, so recalculating the same day would not move it; updated_at does.
+        """
+        return ModelMetric.objects.filter(period=period).aggregate(
+            latest=Max('updated_at')
+        )['latest']
+    
     @staticmethod
     def generate_time_series_metrics(
         models: List[AIModel],
         start_date: datetime,
         end_date: datetime,
-        granularity: str = 'daily'
+        granularity: str = 'daily',
+        category: str = 'overall'
     ) -> pd.DataFrame:
-        """Generate time series metrics for multiple models"""
-        # Determine period based on granularity
-        if granularity == 'daily':
-            period = 'daily'
-            date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        elif granularity == 'weekly':
-            period = 'weekly'
-            date_range = pd.date_range(start=start_date, end=end_date, freq='W')
-        else:  # monthly
-            period = 'monthly'
-            date_range = pd.date_range(start=start_date, end=end_date, freq='M')
-        
-        data = []
-        
-        for date in date_range:
-            for model in models:
-                metric = ModelMetric.objects.filter(
-                    model=model,
-                    category='overall',
-                    period=period,
-                    calculated_at__date=date.date()
-                ).first()
-                
-                if metric:
-                    data.append({
-                        'date': date,
-                        'model': model.display_name,
-                        'elo_rating': metric.elo_rating,
-                        'win_rate': (metric.wins / metric.total_comparisons * 100) 
-                                   if metric.total_comparisons > 0 else 0,
-                        'average_rating': metric.average_rating,
-                        'total_comparisons': metric.total_comparisons
-                    })
-        
-        df = pd.DataFrame(data)
-        return df
+        """
+        Generate time series metrics for multiple models. Daily metrics are
+        downsampled to the granularity with date_trunc in a single query,
+        whatever the number of models or days.
+        """
+        names = {model.id: model.display_name for model in models}
+        
+        rows = ModelMetric.objects.filter(
+            model_id__in=list(names),
+            category=category,
+            period='daily',
+            calculated_at__date__gte=start_date.date(),
+            calculated_at__date__lte=end_date.date()
+        ).annotate(
+            date=Trunc('calculated_at', TIME_SERIES_TRUNC[granularity])
+        ).values('date', 'model_id').annotate(
+            elo_rating=Avg('elo_rating'),
+            average_rating=Avg('average_rating'),
+            total_comparisons=Sum('total_comparisons'),
+            wins=Sum('wins')
+        ).order_by('date', 'model_id')
+        
+        df = pd.DataFrame.from_records(
+            list(rows),
+            columns=['date', 'model_id', 'elo_rating', 'average_rating', 'total_comparisons', 'wins']
+        )
+        if df.empty:
+            return pd.DataFrame(columns=TIME_SERIES_COLUMNS)
+        
+        comparisons = df['total_comparisons'].to_numpy(dtype=float)
+        df['model'] = df['model_id'].map(names)
+        df['elo_rating'] = df['elo_rating'].astype(float).round(2)
+        df['average_rating'] = df['average_rating'].astype(float).round(2)
+        df['win_rate'] = np.divide(
+            df['wins'].to_numpy(dtype=float) * 100, comparisons,
+            out=np.zeros_like(comparisons), where=comparisons > 0
+        )
+        return df[TIME_SERIES_COLUMNS]
     
     @staticmethod
     def calculate_category_dominance() -> Dict[str, List[Dict]]:
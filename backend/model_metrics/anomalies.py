@@ -0,0 +1,172 @@
+"""
+Vectorized anomaly detection over ModelMetric history.
+
+The last N days of metrics for every model are loaded in one query. Each
+(model, category) series is then compared against its own preceding points
+with pandas groupby:
+- rating_jump: the Elo change from the previous point has a rolling z-score
+  beyond ANOMALY_Z_THRESHOLD (and is at least ELO_JUMP_MIN points), or is
+  more than ELO_JUMP_ABSOLUTE points.
+- vote_spike: the comparisons in a period have a rolling z-score beyond the
+  threshold and exceed VOTE_SPIKE_RATIO times their EWMA. This is how vote
+  brigading usually shows up.
+Rolling statistics only use points before the one being scored, so a spike
+does not hide itself. Flags are upserted into MetricAnomaly, so reruns over
+the same window are idempotent and keep each flag's first detected_at. Only
+flags in the newest period are reported; older ones were reported by the
+run that first saw them.
+"""
+import logging
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from model_metrics.models import MetricAnomaly, ModelMetric
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_LOOKBACK_DAYS = int(os.getenv('METRIC_ANOMALY_LOOKBACK_DAYS', 30))
+ANOMALY_WINDOW = 7
+ANOMALY_MIN_HISTORY = 3
+ANOMALY_Z_THRESHOLD = float(os.getenv('METRIC_ANOMALY_Z_THRESHOLD', 3.0))
+EWMA_SPAN = 7
+# Smaller changes are day-to-day noise whatever their z-score
+ELO_JUMP_MIN = 25
+# A change this large is flagged even without enough history for a z-score
+ELO_JUMP_ABSOLUTE = 100
+VOTE_SPIKE_RATIO = 2.0
+VOTE_SPIKE_MIN_COMPARISONS = 20
+
+SERIES_KEYS = ['model_id', 'category']
+HISTORY_COLUMNS = ['model_id', 'category', 'calculated_at', 'elo_rating', 'total_comparisons']
+ANOMALY_COLUMNS = ['model_id', 'category', 'kind', 'observed_at', 'value', 'expected', 'zscore']
+
+
+def load_metric_history(days=ANOMALY_LOOKBACK_DAYS, period='daily'):
+    """All metrics of a period from the last `days` days, in one query."""
+    rows = ModelMetric.objects.filter(
+        period=period,
+        calculated_at__gte=timezone.now() - timedelta(days=days)
+    ).values_list(*HISTORY_COLUMNS)
+    return pd.DataFrame.from_records(list(rows), columns=HISTORY_COLUMNS)
+
+
+def _baseline(frame, column, window=ANOMALY_WINDOW, min_history=ANOMALY_MIN_HISTORY, span=EWMA_SPAN):
+    """Rolling mean/std and EWMA of each series, over the points before each row."""
+    previous = frame.groupby(SERIES_KEYS, sort=False)[column].shift(1)
+    by_series = previous.groupby([frame[key] for key in SERIES_KEYS], sort=False)
+
+    def align(result):
+        # groupby().rolling() prepends the group keys to the index
+        return result.reset_index(level=list(range(len(SERIES_KEYS))), drop=True).reindex(frame.index)
+
+    rolling = by_series.rolling(window, min_periods=min_history)
+    return (
+        align(rolling.mean()),
+        align(rolling.std()),
+        align(by_series.ewm(span=span, min_periods=1).mean()),
+    )
+
+
+def _zscore(values, mean, std):
+    values, mean, std = (np.asarray(a, dtype=float) for a in (values, mean, std))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (values - mean) / std
+    return np.where(std > 0, z, np.nan)
+
+
+def detect_anomalies(history, z_threshold=ANOMALY_Z_THRESHOLD):
+    """Flag rating jumps and vote spikes in a metric history frame. Returns an ANOMALY_COLUMNS frame."""
+    if history.empty:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+    frame = history.sort_values(SERIES_KEYS + ['calculated_at']).reset_index(drop=True)
+    frame['elo_rating'] = frame['elo_rating'].astype(float)
+    frame['total_comparisons'] = frame['total_comparisons'].astype(float)
+    frame['elo_change'] = frame.groupby(SERIES_KEYS, sort=False)['elo_rating'].diff()
+
+    change_mean, change_std, change_ewma = _baseline(frame, 'elo_change')
+    change_z = _zscore(frame['elo_change'], change_mean, change_std)
+    change = frame['elo_change'].abs()
+    jumps = frame['elo_change'].notna() & (
+        ((np.abs(np.nan_to_num(change_z)) >= z_threshold) & (change >= ELO_JUMP_MIN))
+        | (change > ELO_JUMP_ABSOLUTE)
+    )
+
+    votes_mean, votes_std, votes_ewma = _baseline(frame, 'total_comparisons')
+    votes_z = _zscore(frame['total_comparisons'], votes_mean, votes_std)
+    spikes = (
+        (np.nan_to_num(votes_z) >= z_threshold)
+        & (frame['total_comparisons'] >= VOTE_SPIKE_MIN_COMPARISONS)
+        & (frame['total_comparisons'] >= VOTE_SPIKE_RATIO * votes_ewma.fillna(np.inf))
+    )
+
+    flagged = [
+        pd.DataFrame({
+            'model_id': frame.loc[jumps, 'model_id'],
+            'category': frame.loc[jumps, 'category'],
+            'kind': 'rating_jump',
+            'observed_at': frame.loc[jumps, 'calculated_at'],
+            'value': frame.loc[jumps, 'elo_change'],
+            'expected': change_ewma[jumps],
+            'zscore': change_z[jumps.to_numpy()],
+        }),
+        pd.DataFrame({
+            'model_id': frame.loc[spikes, 'model_id'],
+            'category': frame.loc[spikes, 'category'],
+            'kind': 'vote_spike',
+            'observed_at': frame.loc[spikes, 'calculated_at'],
+            'value': frame.loc[spikes, 'total_comparisons'],
+            'expected': votes_ewma[spikes],
+            'zscore': votes_z[spikes.to_numpy()],
+        }),
+    ]
+    return pd.concat(flagged, ignore_index=True)[ANOMALY_COLUMNS]
+
+
+def _optional(value):
+    return None if pd.isna(value) else round(float(value), 4)
+
+
+def save_anomalies(anomalies, period='daily'):
+    """Upsert flagged points into MetricAnomaly."""
+    records = [
+        MetricAnomaly(
+            model_id=row.model_id,
+            category=row.category,
+            period=period,
+            kind=row.kind,
+            observed_at=row.observed_at,
+            value=round(float(row.value), 4),
+            expected=_optional(row.expected),
+            zscore=_optional(row.zscore),
+        )
+        for row in anomalies.itertuples(index=False)
+    ]
+    MetricAnomaly.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=['model', 'category', 'period', 'kind', 'observed_at'],
+        update_fields=['value', 'expected', 'zscore'],
+        batch_size=1000,
+    )
+    return records
+
+
+def run_anomaly_detection(days=ANOMALY_LOOKBACK_DAYS, period='daily'):
+    """Load, score and store. Returns the anomalies flagged in the newest period."""
+    history = load_metric_history(days, period)
+    records = save_anomalies(detect_anomalies(history), period)
+    if not records:
+        return []
+
+    newest = history['calculated_at'].max()
+    new_records = [record for record in records if record.observed_at == newest]
+    logger.info(
+        f"Metric anomaly detection: {len(new_records)} new in the newest period, "
+        f"{len(records)} flagged over {days} days of {period} metrics"
+    )
+    return new_records
@@ -1,19 +1,39 @@
-from typing import Dict, Optional, Tuple
-from django.db.models import Count, Avg, Q
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db.models import Count, Avg, Q, F
 from django.db.models.functions import Length
 from django.utils import timezone
 from datetime import timedelta
 import math
 from ai_model.models import AIModel
-from model_metrics.models import ModelMetric
+from model_metrics.models import ModelMetric, ModelRating
 from feedback.models import Feedback
 from message.models import Message
 from scipy import stats
 
+# Session modes whose preference votes count as head-to-head comparisons
+COMPARISON_MODES = ('compare', 'random', 'academic')
+
 
 class MetricsCalculator:
     """Calculate various metrics for models"""
     
+    @staticmethod
+    def get_period_window(period: str) -> Tuple[Optional[timezone.datetime], timezone.datetime]:
+        """Return (start of the counted window, calculated_at key) for a period"""
+        now = timezone.now()
+        if period == 'daily':
+            start_date = now - timedelta(days=1)
+        elif period == 'weekly':
+            start_date = now - timedelta(weeks=1)
+        elif period == 'monthly':
+            start_date = now - timedelta(days=30)
+        else:  # all_time
+            start_date = None
+
+        # One row per model/category/period per day; reruns upsert it
+        calculated_at = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start_date, calculated_at
+
     @staticmethod
     def calculate_category_metrics(
         model: AIModel,
@@ -21,132 +41,155 @@ class MetricsCalculator:
         period: str = 'all_time'
     ) -> ModelMetric:
         """Calculate metrics for a specific category"""
-        # Determine time range
-        if period == 'daily':
-            start_date = timezone.now() - timedelta(days=1)
-        elif period == 'weekly':
-            start_date = timezone.now() - timedelta(weeks=1)
-        elif period == 'monthly':
-            start_date = timezone.now() - timedelta(days=30)
-        else:  # all_time
-            start_date = None
-        
-        # Get or create metric
-        metric, created = ModelMetric.objects.get_or_create(
-            model=model,
-            category=category,
+        metrics = MetricsCalculator.calculate_period_metrics(
             period=period,
-            calculated_at__date=timezone.now().date() if period != 'all_time' else None,
-            defaults={
-                'calculated_at': timezone.now(),
-                'elo_rating': 1500  # Default ELO
-            }
+            categories=[category],
+            models=[model]
         )
-        
-        # Base feedback query
+        return metrics[(model.id, category)]
+
+    @staticmethod
+    def calculate_period_metrics(
+        period: str = 'all_time',
+        categories: Optional[List[str]] = None,
+        models: Optional[Iterable[AIModel]] = None
+    ) -> Dict[Tuple, ModelMetric]:
+        """
+        Calculate every (model, category) metric for a period with grouped
+        queries: one for ratings, one per comparison side and one for usage,
+        each computing all categories with FILTER clauses, then one bulk
+        upsert. The query count does not depend on the number of models
+        or categories.
+        """
+        categories = categories or ['overall']
+        start_date, calculated_at = MetricsCalculator.get_period_window(period)
+
+        if models is None:
+            models = AIModel.objects.filter(is_active=True)
+        model_ids = [m.id for m in models]
+
         feedback_query = Feedback.objects.all()
         if start_date:
             feedback_query = feedback_query.filter(created_at__gte=start_date)
-        
-        # Calculate ratings
-        if category == 'overall':
-            ratings = feedback_query.filter(
-                feedback_type='rating',
-                rating__isnull=False,
-                message__model=model
-            )
-        else:
-            # Category-specific ratings
-            ratings = feedback_query.filter(
-                feedback_type='rating',
-                rating__isnull=False,
-                message__model=model,
-                categories__contains=[category]
-            )
-        
-        if ratings.exists():
-            metric.average_rating = ratings.aggregate(avg=Avg('rating'))['avg']
-        
-        # Calculate comparison stats
-        if category == 'overall':
-            comparisons = feedback_query.filter(
-                feedback_type='preference',
-                session__mode='compare'
-            ).filter(
-                Q(session__model_a=model) | Q(session__model_b=model)
-            )
-        else:
-            comparisons = feedback_query.filter(
-                feedback_type='preference',
-                session__mode='compare',
-                categories__contains=[category]
-            ).filter(
-                Q(session__model_a=model) | Q(session__model_b=model)
-            )
-        
-        metric.total_comparisons = comparisons.count()
-        metric.wins = comparisons.filter(preferred_model=model).count()
-        metric.losses = comparisons.exclude(
-            preferred_model=model
-        ).exclude(
-            preferred_model__isnull=True
-        ).count()
-        metric.ties = metric.total_comparisons - metric.wins - metric.losses
-        
-        # Calculate usage metrics
-        usage_metrics = MetricsCalculator._calculate_usage_metrics(
-            model, category, start_date
+
+        def category_filter(category):
+            if category == 'overall':
+                return Q()
+            return Q(categories__contains=[category])
+
+        # Average rating per model, one FILTER column per category
+        rating_rows = feedback_query.filter(
+            feedback_type='rating',
+            rating__isnull=False,
+            message__model_id__in=model_ids
+        ).values('message__model_id').annotate(**{
+            f'avg_{index}': Avg('rating', filter=category_filter(category))
+            for index, category in enumerate(categories)
+        })
+
+        totals = {}
+        for row in rating_rows:
+            for index, category in enumerate(categories):
+                totals.setdefault((row['message__model_id'], category), {})['average_rating'] = row[f'avg_{index}']
+
+        # Comparisons, counted once from each side of the pair
+        comparisons = feedback_query.filter(
+            feedback_type='preference',
+            session__mode__in=COMPARISON_MODES
         )
-        
-        # Store additional data in metadata
-        if not hasattr(metric, 'metadata'):
-            metric.metadata = {}
-        
-        metric.metadata.update(usage_metrics)
-        
-        # Save metric
-        metric.save()
-        
-        return metric
-    
+        for side in ('model_a', 'model_b'):
+            own_model = F(f'session__{side}')
+            single_pick = Q(preferred_model_ids__len=1)
+            won = single_pick & Q(preferred_model_ids__0=own_model)
+            lost = single_pick & ~Q(preferred_model_ids__0=own_model)
+
+            annotations = {}
+            for index, category in enumerate(categories):
+                in_category = category_filter(category)
+                annotations[f'total_{index}'] = Count('id', filter=in_category)
+                annotations[f'wins_{index}'] = Count('id', filter=in_category & won)
+                annotations[f'losses_{index}'] = Count('id', filter=in_category & lost)
+
+            side_rows = comparisons.filter(
+                **{f'session__{side}_id__in': model_ids}
+            ).values(f'session__{side}_id').annotate(**annotations)
+
+            for row in side_rows:
+                for index, category in enumerate(categories):
+                    entry = totals.setdefault((row[f'session__{side}_id'], category), {})
+                    for field in ('total', 'wins', 'losses'):
+                        entry[field] = entry.get(field, 0) + row[f'{field}_{index}']
+
+        usage = MetricsCalculator._calculate_usage_metrics(model_ids, start_date)
+        elo_ratings = dict(
+            ModelRating.objects.filter(model_id__in=model_ids).values_list('model_id', 'elo_rating')
+        )
+
+        metrics = {}
+        for model_id in model_ids:
+            for category in categories:
+                entry = totals.get((model_id, category), {})
+                total = entry.get('total', 0)
+                wins = entry.get('wins', 0)
+                losses = entry.get('losses', 0)
+                average_rating = entry.get('average_rating')
+                elo_rating = elo_ratings.get(model_id) if category == 'overall' else None
+
+                metric = ModelMetric(
+                    model_id=model_id,
+                    category=category,
+                    period=period,
+                    calculated_at=calculated_at,
+                    total_comparisons=total,
+                    wins=wins,
+                    losses=losses,
+                    ties=total - wins - losses,
+                    average_rating=round(average_rating, 2) if average_rating is not None else None,
+                    elo_rating=round(elo_rating) if elo_rating is not None else 1500,
+                )
+                # Not a model field; kept for callers that report usage
+                metric.metadata = usage.get(model_id, {})
+                metrics[(model_id, category)] = metric
+
+        ModelMetric.objects.bulk_create(
+            list(metrics.values()),
+            update_conflicts=True,
+            unique_fields=['model', 'category', 'period', 'calculated_at'],
+            update_fields=['total_comparisons', 'wins', 'losses', 'ties', 'average_rating', 'elo_rating', 'updated_at'],
+        )
+        return metrics
+
     @staticmethod
     def _calculate_usage_metrics(
-        model: AIModel,
-        category: str,
+        model_ids: List,
         start_date: Optional[timezone.datetime]
     ) -> Dict:
-        """Calculate usage-based metrics"""
-        message_query = Message.objects.filter(model=model)
-        
+        """Calculate usage-based metrics for many models in one grouped query"""
+        message_query = Message.objects.filter(model_id__in=model_ids)
+
         if start_date:
             message_query = message_query.filter(created_at__gte=start_date)
-        
-        usage_metrics = {
-            'total_messages': message_query.count(),
-            'unique_sessions': message_query.values('session').distinct().count(),
-            'unique_users': message_query.values('session__user').distinct().count(),
-            'avg_response_length': None,
-            'success_rate': None
-        }
-        
-        # Average response length
-        avg_length = message_query.aggregate(
-            avg_length=Avg(Length('content'))
-        )['avg_length']
-        
-        if avg_length:
-            usage_metrics['avg_response_length'] = round(avg_length, 2)
-        
-        # Success rate
-        total_messages = usage_metrics['total_messages']
-        if total_messages > 0:
-            successful = message_query.filter(status='success').count()
-            usage_metrics['success_rate'] = round(
-                (successful / total_messages) * 100, 2
-            )
-        
-        return usage_metrics
-    
+
+        rows = message_query.values('model_id').annotate(
+            total_messages=Count('id'),
+            unique_sessions=Count('session', distinct=True),
+            unique_users=Count('session__user', distinct=True),
+            avg_length=Avg(Length('content')),
+            successful=Count('id', filter=Q(status='success')),
+        )
+
+        usage = {}
+        for row in rows:
+            total_messages = row['total_messages']
+            usage[row['model_id']] = {
+                'total_messages': total_messages,
+                'unique_sessions': row['unique_sessions'],
+                'unique_users': row['unique_users'],
+                'avg_response_length': round(row['avg_length'], 2) if row['avg_length'] else None,
+                'success_rate': round((row['successful'] / total_messages) * 100, 2) if total_messages else None,
+            }
+        return usage
+
     @staticmethod
     def calculate_percentile_rank(
         model: AIModel,
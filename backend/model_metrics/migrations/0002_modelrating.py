@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_model', '0012_merge_0011_aimodel_url_0011_alter_aimodel_provider'),
+        ('model_metrics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('elo_rating', models.FloatField(default=1500)),
+                ('total_comparisons', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('ties', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('model', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_state', to='ai_model.aimodel')),
+            ],
+            options={
+                'db_table': 'model_ratings',
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_model', '0012_merge_0011_aimodel_url_0011_alter_aimodel_provider'),
+        ('model_metrics', '0002_modelrating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('processed_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='ModelPairRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the hour')),
+                ('mode', models.CharField(max_length=50)),
+                ('votes', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('ties', models.IntegerField(default=0)),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pair_rollups', to='ai_model.aimodel')),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ai_model.aimodel')),
+            ],
+            options={
+                'db_table': 'model_pair_rollups',
+                'indexes': [models.Index(fields=['model', 'opponent', 'bucket'], name='model_pair__model_i_360dc2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'opponent', 'bucket', 'mode'), name='unique_model_pair_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ModelStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the hour')),
+                ('mode', models.CharField(max_length=50)),
+                ('session_type', models.CharField(max_length=100)),
+                ('input_modality', models.CharField(blank=True, help_text='Blank for message-derived counts', max_length=20)),
+                ('language', models.CharField(blank=True, max_length=100)),
+                ('votes', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('ties', models.IntegerField(default=0)),
+                ('ratings_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('message_count', models.IntegerField(default=0)),
+                ('session_count', models.IntegerField(default=0, help_text='Distinct sessions within the bucket')),
+                ('latency_count', models.IntegerField(default=0)),
+                ('latency_sum', models.FloatField(default=0)),
+                ('latency_p50', models.FloatField(blank=True, null=True)),
+                ('latency_p95', models.FloatField(blank=True, null=True)),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_rollups', to='ai_model.aimodel')),
+            ],
+            options={
+                'db_table': 'model_stats_rollups',
+                'indexes': [models.Index(fields=['model', 'bucket'], name='model_stats_model_i_606ebd_idx'), models.Index(fields=['bucket'], name='model_stats_bucket_5ade92_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'bucket', 'mode', 'session_type', 'input_modality', 'language'), name='unique_model_stats_rollup')],
+            },
+        ),
+    ]
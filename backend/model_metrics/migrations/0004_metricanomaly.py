@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_model', '0012_merge_0011_aimodel_url_0011_alter_aimodel_provider'),
+        ('model_metrics', '0003_rollupwatermark_modelpairrollup_modelstatsrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('period', models.CharField(max_length=50)),
+                ('kind', models.CharField(choices=[('rating_jump', 'Rating Jump'), ('vote_spike', 'Vote Spike')], max_length=20)),
+                ('observed_at', models.DateTimeField(help_text='calculated_at of the flagged metric')),
+                ('value', models.FloatField(help_text='Elo change for rating jumps, comparisons for vote spikes')),
+                ('expected', models.FloatField(blank=True, help_text='EWMA of the preceding points', null=True)),
+                ('zscore', models.FloatField(blank=True, help_text='Against the rolling window before the point', null=True)),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_anomalies', to='ai_model.aimodel')),
+            ],
+            options={
+                'db_table': 'metric_anomalies',
+                'ordering': ['-observed_at'],
+                'indexes': [models.Index(fields=['kind', '-observed_at'], name='metric_anom_kind_dd7030_idx'), models.Index(fields=['model', '-observed_at'], name='metric_anom_model_i_adc439_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'category', 'period', 'kind', 'observed_at'), name='unique_metric_anomaly')],
+            },
+        ),
+    ]
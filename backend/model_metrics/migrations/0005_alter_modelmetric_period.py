@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_metrics', '0004_metricanomaly'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modelmetric',
+            name='period',
+            field=models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('all_time', 'All Time'), ('running', 'Running')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_metrics', '0005_alter_modelmetric_period'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modelstatsrollup',
+            name='session_count',
+            field=models.IntegerField(default=0, help_text='Sessions whose first reply from the model falls in the bucket'),
+        ),
+    ]
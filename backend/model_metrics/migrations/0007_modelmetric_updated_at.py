@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_metrics', '0006_alter_modelstatsrollup_session_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelmetric',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
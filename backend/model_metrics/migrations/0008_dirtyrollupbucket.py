@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model_metrics', '0007_modelmetric_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyRollupBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'dirty_rollup_buckets',
+            },
+        ),
+    ]
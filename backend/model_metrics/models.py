@@ -8,7 +8,9 @@ class ModelMetric(models.Model):
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
         ('monthly', 'Monthly'),
-        ('all_time', 'All Time')
+        ('all_time', 'All Time'),
+        # Hourly snapshots of the event-driven ModelRating
+        ('running', 'Running')
     ]
     
     CATEGORY_CHOICES = [
@@ -33,6 +35,7 @@ class ModelMetric(models.Model):
     elo_rating = models.IntegerField(default=1500)
     period = models.CharField(max_length=50, choices=PERIOD_CHOICES)
     calculated_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'model_metrics'
@@ -51,4 +54,160 @@ class ModelMetric(models.Model):
         return (self.wins / self.total_comparisons) * 100
     
     def __str__(self):
-        return f"{self.model.display_name} - {self.category} ({self.period})"
\ No newline at end of file
+        return f"{self.model.display_name} - {self.category} ({self.period})"
+
+
+class ModelRating(models.Model):
+    """
+    Running rating and win/loss/tie totals, maintained incrementally by the
+    feedback event consumer and snapshotted into ModelMetric.
+    """
+    model = models.OneToOneField(AIModel, on_delete=models.CASCADE, related_name='rating_state')
+    elo_rating = models.FloatField(default=1500)
+    total_comparisons = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    ties = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'model_ratings'
+
+    def __str__(self):
+        return f"{self.model_id}: {self.elo_rating:.0f}"
+
+
+class ModelStatsRollup(models.Model):
+    """
+    Hourly per-model counters, keyed by the dimensions the stats endpoints
+    filter on. Rebuilt bucket by bucket by model_metrics.rollups.
+    """
+    model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='stats_rollups')
+    bucket = models.DateTimeField(help_text="Start of the hour")
+    mode = models.CharField(max_length=50)
+    session_type = models.CharField(max_length=100)
+    input_modality = models.CharField(max_length=20, blank=True, help_text="Blank for message-derived counts")
+    language = models.CharField(max_length=100, blank=True)
+
+    votes = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    ties = models.IntegerField(default=0)
+
+    ratings_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    message_count = models.IntegerField(default=0)
+    session_count = models.IntegerField(default=0, help_text="Sessions whose first reply from the model falls in the bucket")
+    latency_count = models.IntegerField(default=0)
+    latency_sum = models.FloatField(default=0)
+    latency_p50 = models.FloatField(null=True, blank=True)
+    latency_p95 = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'model_stats_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model', 'bucket', 'mode', 'session_type', 'input_modality', 'language'],
+                name='unique_model_stats_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['model', 'bucket']),
+            models.Index(fields=['bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_id} @ {self.bucket:%Y-%m-%d %H:00} ({self.mode}/{self.session_type})"
+
+
+class ModelPairRollup(models.Model):
+    """Hourly head-to-head counters from the point of view of `model`."""
+    model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='pair_rollups')
+    opponent = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='+')
+    bucket = models.DateTimeField(help_text="Start of the hour")
+    mode = models.CharField(max_length=50)
+    votes = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    ties = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'model_pair_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model', 'opponent', 'bucket', 'mode'],
+                name='unique_model_pair_rollup'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['model', 'opponent', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_id} vs {self.opponent_id} @ {self.bucket:%Y-%m-%d %H:00}"
+
+
+class RollupWatermark(models.Model):
+    """Everything before `processed_until` has been rolled up."""
+    name = models.CharField(max_length=100, unique=True)
+    processed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+
+    def __str__(self):
+        return f"{self.name} @ {self.processed_until}"
+
+
+class DirtyRollupBucket(models.Model):
+    """An hour whose rollups are rebuilt on the next refresh because one of its votes was deleted."""
+    bucket = models.DateTimeField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'dirty_rollup_buckets'
+
+    def __str__(self):
+        return f"{self.bucket:%Y-%m-%d %H:00}"
+
+
+class MetricAnomaly(models.Model):
+    """A metric point flagged by model_metrics.anomalies against the model's own recent history."""
+    KIND_CHOICES = [
+        ('rating_jump', 'Rating Jump'),
+        ('vote_spike', 'Vote Spike'),
+    ]
+
+    model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='metric_anomalies')
+    category = models.CharField(max_length=100)
+    period = models.CharField(max_length=50)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    observed_at = models.DateTimeField(help_text="calculated_at of the flagged metric")
+    value = models.FloatField(help_text="Elo change for rating jumps, comparisons for vote spikes")
+    expected = models.FloatField(null=True, blank=True, help_text="EWMA of the preceding points")
+    zscore = models.FloatField(null=True, blank=True, help_text="Against the rolling window before the point")
+    detected_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'metric_anomalies'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model', 'category', 'period', 'kind', 'observed_at'],
+                name='unique_metric_anomaly'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['kind', '-observed_at']),
+            models.Index(fields=['model', '-observed_at']),
+        ]
+        ordering = ['-observed_at']
+
+    def __str__(self):
+        return f"{self.kind} {self.model_id} {self.category} @ {self.observed_at:%Y-%m-%d}"
@@ -0,0 +1,294 @@
+"""
+Hourly model stats rollups.
+
+refresh_model_rollups() rebuilds every hour bucket from the watermark up to
+the current hour using grouped queries over Feedback and Message. Each
+bucket's rows are deleted and re-inserted in one transaction. The current
+hour is always rebuilt again on the next run, so late rows within the hour
+are picked up. Hours before the watermark are rebuilt again when one of
+their votes changes (Feedback.updated_at since the watermark) or is deleted
+(a DirtyRollupBucket flagged by feedback.signals). The stats endpoints read
+the summed rollups through
+get_model_totals() and get_pair_totals() instead of counting raw rows.
+"""
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Aggregate, Count, Exists, F, FloatField, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from feedback.models import Feedback
+from message.models import Message
+from model_metrics.models import DirtyRollupBucket, ModelPairRollup, ModelStatsRollup, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_WATERMARK = 'model_stats'
+ROLLUP_CHUNK = timedelta(days=1)
+ROLLUP_HOUR = timedelta(hours=1)
+# Votes saved just before a run but committed after it are caught by the next one
+REVOTE_OVERLAP = timedelta(minutes=5)
+STAT_FIELDS = [
+    'votes', 'wins', 'losses', 'ties',
+    'ratings_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    'message_count', 'session_count', 'latency_count', 'latency_sum',
+]
+PAIR_FIELDS = ['votes', 'wins', 'losses', 'ties']
+
+
+class PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+def floor_hour(value):
+    """Start of the UTC hour; buckets are UTC hours whatever TIME_ZONE is (Asia/Kolkata is off by 30 minutes)."""
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _vote_rows(start, end):
+    """Pairwise votes grouped per hour, dimensions and (model, opponent), from both sides."""
+    votes = Feedback.objects.filter(
+        feedback_type='preference',
+        created_at__gte=start,
+        created_at__lt=end,
+        session__model_a__isnull=False,
+        session__model_b__isnull=False,
+    )
+    for side, other in (('model_a', 'model_b'), ('model_b', 'model_a')):
+        own_model = F(f'session__{side}')
+        single_pick = Q(preferred_model_ids__len=1)
+        yield from votes.values(
+            'input_modality',
+            bucket=TruncHour('created_at', tzinfo=dt_timezone.utc),
+            model_id=F(f'session__{side}_id'),
+            opponent_id=F(f'session__{other}_id'),
+            mode=F('session__mode'),
+            session_type=F('session__session_type'),
+            language=Coalesce('message__language', Value('')),
+        ).annotate(
+            votes=Count('id'),
+            wins=Count('id', filter=single_pick & Q(preferred_model_ids__0=own_model)),
+            losses=Count('id', filter=single_pick & ~Q(preferred_model_ids__0=own_model)),
+        )
+
+
+def _rating_rows(start, end):
+    return Feedback.objects.filter(
+        feedback_type='rating',
+        rating__isnull=False,
+        message__model__isnull=False,
+        created_at__gte=start,
+        created_at__lt=end,
+    ).values(
+        'input_modality',
+        bucket=TruncHour('created_at', tzinfo=dt_timezone.utc),
+        model_id=F('message__model_id'),
+        mode=F('session__mode'),
+        session_type=F('session__session_type'),
+        language=Coalesce('message__language', Value('')),
+    ).annotate(
+        ratings_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{value}': Count('id', filter=Q(rating=value)) for value in range(1, 6)},
+    )
+
+
+def _message_rows(start, end):
+    # A session is counted in the bucket of its first reply from the model,
+    # so summing session_count over buckets gives an exact distinct count
+    earlier_reply = Message.objects.filter(
+        Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id')),
+        session_id=OuterRef('session_id'),
+        model_id=OuterRef('model_id'),
+        role='assistant',
+    )
+    return Message.objects.filter(
+        role='assistant',
+        model__isnull=False,
+        created_at__gte=start,
+        created_at__lt=end,
+    ).values(
+        'model_id',
+        bucket=TruncHour('created_at', tzinfo=dt_timezone.utc),
+        mode=F('session__mode'),
+        session_type=F('session__session_type'),
+        message_language=Coalesce('language', Value('')),
+    ).annotate(
+        message_count=Count('id'),
+        session_count=Count('session_id', distinct=True, filter=~Exists(earlier_reply)),
+        latency_count=Count('latency_ms'),
+        latency_sum=Coalesce(Sum('latency_ms'), Value(0.0)),
+        latency_p50=PercentileCont('latency_ms', 0.5),
+        latency_p95=PercentileCont('latency_ms', 0.95),
+    )
+
+
+def build_rollups(start, end):
+    """Compute rollup rows for [start, end) without saving them."""
+    stats = {}
+    pairs = {}
+
+    def stats_row(key):
+        if key not in stats:
+            model_id, bucket, mode, session_type, input_modality, language = key
+            stats[key] = ModelStatsRollup(
+                model_id=model_id, bucket=bucket, mode=mode, session_type=session_type,
+                input_modality=input_modality, language=language,
+            )
+        return stats[key]
+
+    for row in _vote_rows(start, end):
+        key = (row['model_id'], row['bucket'], row['mode'], row['session_type'], row['input_modality'], row['language'])
+        ties = row['votes'] - row['wins'] - row['losses']
+        rollup = stats_row(key)
+        rollup.votes += row['votes']
+        rollup.wins += row['wins']
+        rollup.losses += row['losses']
+        rollup.ties += ties
+
+        pair_key = (row['model_id'], row['opponent_id'], row['bucket'], row['mode'])
+        pair = pairs.setdefault(pair_key, ModelPairRollup(
+            model_id=row['model_id'], opponent_id=row['opponent_id'], bucket=row['bucket'], mode=row['mode'],
+        ))
+        pair.votes += row['votes']
+        pair.wins += row['wins']
+        pair.losses += row['losses']
+        pair.ties += ties
+
+    for row in _rating_rows(start, end):
+        key = (row['model_id'], row['bucket'], row['mode'], row['session_type'], row['input_modality'], row['language'])
+        rollup = stats_row(key)
+        for field in ('ratings_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'):
+            setattr(rollup, field, getattr(rollup, field) + row[field])
+
+    for row in _message_rows(start, end):
+        key = (row['model_id'], row['bucket'], row['mode'], row['session_type'], '', row['message_language'])
+        rollup = stats_row(key)
+        for field in ('message_count', 'session_count', 'latency_count', 'latency_sum', 'latency_p50', 'latency_p95'):
+            setattr(rollup, field, row[field])
+
+    return list(stats.values()), list(pairs.values())
+
+
+def refresh_window(start, end):
+    """Replace the rollups of every bucket in [start, end)."""
+    stats, pairs = build_rollups(start, end)
+    with transaction.atomic():
+        ModelStatsRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        ModelPairRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        ModelStatsRollup.objects.bulk_create(stats, batch_size=1000)
+        ModelPairRollup.objects.bulk_create(pairs, batch_size=1000)
+    return len(stats)
+
+
+def _initial_watermark():
+    first = [
+        Feedback.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+        Message.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+    ]
+    first = [value for value in first if value]
+    return floor_hour(min(first)) if first else floor_hour(timezone.now())
+
+
+def _changed_buckets(before):
+    """
+    Hours before `before` whose votes were changed since then (minus the
+    overlap) or deleted. Consumes the delete flags, so call it with the
+    watermark locked.
+    """
+    changed = set(Feedback.objects.filter(
+        updated_at__gte=before - REVOTE_OVERLAP,
+        created_at__lt=before,
+    ).annotate(
+        bucket=TruncHour('created_at', tzinfo=dt_timezone.utc),
+    ).values_list('bucket', flat=True).distinct())
+
+    dirty = list(DirtyRollupBucket.objects.values_list('id', 'bucket'))
+    if dirty:
+        DirtyRollupBucket.objects.filter(id__in=[flag_id for flag_id, _ in dirty]).delete()
+        # Hours from the watermark on are rebuilt by the main loop anyway
+        changed.update(bucket for _, bucket in dirty if bucket < before)
+    return sorted(changed)
+
+
+def mark_bucket_dirty(created_at, using=None):
+    """Flag the hour of a deleted vote for the next refresh."""
+    flags = DirtyRollupBucket.objects.using(using) if using else DirtyRollupBucket.objects
+    flags.bulk_create([DirtyRollupBucket(bucket=floor_hour(created_at))], ignore_conflicts=True)
+
+
+def refresh_model_rollups(now=None):
+    """
+    Roll up everything from the watermark to the end of the current hour,
+    one day at a time. The watermark stops at the start of the current hour,
+    so that hour is rebuilt on the next run.
+
+    Hours before the watermark with changed or deleted votes are rebuilt
+    first. Each chunk runs with the watermark row locked and advances it on
+    commit, so overlapping runs take turns instead of rebuilding the same
+    buckets, and a failed run keeps the chunks it finished.
+    """
+    now = now or timezone.now()
+    current_hour = floor_hour(now)
+    RollupWatermark.objects.get_or_create(
+        name=ROLLUP_WATERMARK,
+        defaults={'processed_until': _initial_watermark()},
+    )
+
+    rows = 0
+    with transaction.atomic():
+        watermark = RollupWatermark.objects.select_for_update().get(name=ROLLUP_WATERMARK)
+        changed = _changed_buckets(watermark.processed_until)
+        for bucket in changed:
+            rows += refresh_window(bucket, bucket + ROLLUP_HOUR)
+    if changed:
+        logger.info(f"Rebuilt {len(changed)} model rollup hours with changed or deleted votes")
+
+    while True:
+        with transaction.atomic():
+            watermark = RollupWatermark.objects.select_for_update().get(name=ROLLUP_WATERMARK)
+            start = watermark.processed_until
+            if start > current_hour:
+                # A run with a later clock got here first
+                break
+            end = min(start + ROLLUP_CHUNK, current_hour + ROLLUP_HOUR)
+            rows += refresh_window(start, end)
+            watermark.processed_until = min(end, current_hour)
+            watermark.save(update_fields=['processed_until', 'updated_at'])
+        if end > current_hour:
+            break
+
+    logger.info(f"Model rollups refreshed up to {now:%Y-%m-%d %H:%M} ({rows} rows)")
+    return rows
+
+
+def get_model_totals(model_ids, since=None, **filters):
+    """
+    Summed rollup counters per model id. `filters` are ModelStatsRollup
+    lookups (e.g. mode__in=[...], language='hi').
+    """
+    rollups = ModelStatsRollup.objects.filter(model_id__in=model_ids, **filters)
+    if since:
+        rollups = rollups.filter(bucket__gte=floor_hour(since))
+    rows = rollups.values('model_id').annotate(**{field: Sum(field) for field in STAT_FIELDS})
+    return {row['model_id']: row for row in rows}
+
+
+def get_pair_totals(model_id, opponent_ids=None, since=None, modes=None):
+    """Summed head-to-head counters of `model_id` against each opponent."""
+    rollups = ModelPairRollup.objects.filter(model_id=model_id)
+    if opponent_ids is not None:
+        rollups = rollups.filter(opponent_id__in=opponent_ids)
+    if since:
+        rollups = rollups.filter(bucket__gte=floor_hour(since))
+    if modes:
+        rollups = rollups.filter(mode__in=modes)
+    rows = rollups.values('opponent_id').annotate(**{field: Sum(field) for field in PAIR_FIELDS})
+    return {row['opponent_id']: row for row in rows}
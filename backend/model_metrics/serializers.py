@@ -54,10 +54,10 @@ class ModelMetricSerializer(serializers.ModelSerializer):
 
 
 class LeaderboardSerializer(serializers.Serializer):
-    """Serializer for leaderboard entries"""
+    """Serializer for leaderboard entries (already-serialized payload from ModelMetricsService)"""
     rank = serializers.IntegerField()
-    model = AIModelListSerializer()
-    metrics = ModelMetricSerializer()
+    model = serializers.DictField()
+    metrics = serializers.DictField()
     change = serializers.IntegerField(help_text="Position change from previous period")
     stats = serializers.DictField()
 
@@ -96,6 +96,10 @@ class MetricAggregationSerializer(serializers.Serializer):
         choices=['daily', 'weekly', 'monthly', 'all_time'],
         default='all_time'
     )
+    granularity = serializers.ChoiceField(
+        choices=['daily', 'weekly', 'monthly'],
+        default='daily'
+    )
     start_date = serializers.DateTimeField(required=False)
     end_date = serializers.DateTimeField(required=False)
 
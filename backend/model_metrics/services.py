@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Tuple
-from django.db.models import Avg, Count, Q, F, Window
+from django.db.models import Avg, Case, Count, Func, IntegerField, OuterRef, Q, F, Subquery, When, Window
 from django.db.models.functions import Rank, DenseRank
 from django.utils import timezone
 from django.core.cache import cache
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from ai_model.models import AIModel
+from ai_model.serializers import AIModelListSerializer
 from model_metrics.models import ModelMetric
 from feedback.models import Feedback
 from message.models import Message
@@ -26,17 +27,13 @@ class ModelMetricsService:
         if categories is None:
             categories = ['overall'] + list(model.capabilities or [])
         
-        metrics = {}
-        
-        for category in categories:
-            metric = MetricsCalculator.calculate_category_metrics(
-                model=model,
-                category=category,
-                period=period
-            )
-            metrics[category] = metric
+        metrics = MetricsCalculator.calculate_period_metrics(
+            period=period,
+            categories=categories,
+            models=[model]
+        )
         
-        return metrics
+        return {category: metric for (_, category), metric in metrics.items()}
     
     @staticmethod
     def get_leaderboard(
@@ -44,80 +41,60 @@ class ModelMetricsService:
         period: str = 'all_time',
         limit: int = 20
     ) -> List[Dict]:
-        """Get leaderboard for a specific category"""
+        """
+        Get leaderboard for a specific category as a JSON-serializable payload.
+        Ranking, previous rank and 7-day stats come from three queries
+        regardless of the number of entries.
+        """
         cache_key = f"leaderboard:{category}:{period}:{limit}"
         cached = cache.get(cache_key)
         
-        if cached:
+        if cached is not None:
             return cached
         
-        # Get latest metrics for each model
-        latest_metrics = ModelMetric.objects.filter(
-            category=category,
-            period=period
-        ).order_by(
-            'model', '-calculated_at'
-        ).distinct('model')
-        
-        # Sort by ELO rating
-        sorted_metrics = sorted(
-            latest_metrics,
-            key=lambda x: x.elo_rating,
-            reverse=True
-        )[:limit]
+        ranked = ModelMetricsService._fetch_ranked_metrics(category, period, limit)
+        model_ids = [row['model_id'] for row in ranked]
         
-        leaderboard = []
+        models = {}
+        stats = {}
+        if model_ids:
+            models = {
+                data['id']: data
+                for data in AIModelListSerializer(AIModel.objects.filter(id__in=model_ids), many=True).data
+            }
+            stats = ModelMetricsService._fetch_recent_stats(model_ids, timezone.now() - timedelta(days=7))
         
-        for idx, metric in enumerate(sorted_metrics, 1):
-            # Get previous rank
-            previous_metric = ModelMetric.objects.filter(
-                model=metric.model,
-                category=category,
-                period=period,
-                calculated_at__lt=metric.calculated_at
-            ).order_by('-calculated_at').first()
-            
-            previous_rank = None
-            if previous_metric:
-                previous_rank = ModelMetric.objects.filter(
-                    category=category,
-                    period=period,
-                    calculated_at__date=previous_metric.calculated_at.date(),
-                    elo_rating__gt=previous_metric.elo_rating
-                ).count() + 1
-            
-            change = 0
-            if previous_rank:
-                change = previous_rank - idx
-            
-            # Additional stats
-            recent_feedback = Feedback.objects.filter(
-                Q(message__model=metric.model) |
-                Q(preferred_model=metric.model)
-            ).filter(
-                created_at__gte=timezone.now() - timedelta(days=7)
-            )
+        leaderboard = []
+        for row in ranked:
+            model_id = str(row['model_id'])
+            previous_elo = row['previous_elo']
             
-            stats = {
-                'recent_ratings': recent_feedback.filter(
-                    feedback_type='rating',
-                    rating__isnull=False
-                ).count(),
-                'recent_comparisons': recent_feedback.filter(
-                    feedback_type='preference'
-                ).count(),
-                'usage_7d': Message.objects.filter(
-                    model=metric.model,
-                    created_at__gte=timezone.now() - timedelta(days=7)
-                ).count()
-            }
+            if previous_elo is None or row['elo_rating'] == previous_elo:
+                trend = 'stable'
+            else:
+                trend = 'up' if row['elo_rating'] > previous_elo else 'down'
             
+            total = row['total_comparisons']
             leaderboard.append({
-                'rank': idx,
-                'model': metric.model,
-                'metrics': metric,
-                'change': change,
-                'stats': stats
+                'rank': row['rank'],
+                'model': models.get(model_id),
+                'metrics': {
+                    'id': str(row['id']),
+                    'category': row['category'],
+                    'period': row['period'],
+                    'total_comparisons': total,
+                    'wins': row['wins'],
+                    'losses': row['losses'],
+                    'ties': row['ties'],
+                    'average_rating': float(row['average_rating']) if row['average_rating'] is not None else None,
+                    'elo_rating': row['elo_rating'],
+                    'calculated_at': row['calculated_at'].isoformat(),
+                    'win_rate': round((row['wins'] / total) * 100, 2) if total else 0.0,
+                    'rank': row['rank'],
+                    'trend': trend,
+                },
+                'change': row['previous_rank'] - row['rank'] if row['previous_rank'] else 0,
+                'stats': stats.get(model_id, {'recent_ratings': 0, 'recent_comparisons': 0, 'usage_7d': 0}),
             })
         
         # Cache for 1 hour
@@ -125,6 +102,71 @@ class ModelMetricsService:
         
         return leaderboard
     
+    @staticmethod
+    def _fetch_ranked_metrics(category: str, period: str, limit: int) -> List[Dict]:
+        """
+        Latest metric per model ranked by Elo, with the model's previous
+        snapshot: its Elo and the rank it held among all models' snapshots
+        of that same day (1 + the number of higher Elos then).
+        """
+        metrics = ModelMetric.objects.filter(category=category, period=period)
+        latest_ids = metrics.order_by('model_id', '-calculated_at').distinct('model_id').values('id')
+        previous = metrics.filter(
+            model_id=OuterRef('model_id'),
+            calculated_at__lt=OuterRef('calculated_at'),
+        ).order_by('-calculated_at')
+        higher_then = metrics.filter(
+            calculated_at=OuterRef('previous_at'),
+            elo_rating__gt=OuterRef('previous_elo'),
+        ).order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+
+        ranked = metrics.filter(id__in=latest_ids).annotate(
+            rank=Window(Rank(), order_by=F('elo_rating').desc()),
+            previous_elo=Subquery(previous.values('elo_rating')[:1]),
+            previous_at=Subquery(previous.values('calculated_at')[:1]),
+        ).annotate(
+            previous_rank=Case(
+                When(previous_elo__isnull=True, then=None),
+                default=Subquery(higher_then) + 1,
+                output_field=IntegerField(),
+            ),
+        ).order_by('rank', 'model_id')
+        return list(ranked.values(
+            'id', 'model_id', 'category', 'period', 'total_comparisons', 'wins', 'losses', 'ties',
+            'average_rating', 'elo_rating', 'calculated_at', 'previous_elo', 'rank', 'previous_rank',
+        )[:limit])
+    
+    @staticmethod
+    def _fetch_recent_stats(model_ids: List, since: datetime) -> Dict[str, Dict]:
+        """Messages, ratings and comparisons per model since a date, in one query"""
+        def count(queryset):
+            counted = queryset.order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+            return Subquery(counted, output_field=IntegerField())
+
+        rows = AIModel.objects.filter(id__in=model_ids).values('id').annotate(
+            recent_ratings=count(Feedback.objects.filter(
+                feedback_type='rating',
+                rating__isnull=False,
+                message__model_id=OuterRef('id'),
+                created_at__gte=since,
+            )),
+            recent_comparisons=count(Feedback.objects.filter(
+                Q(session__model_a_id=OuterRef('id')) | Q(session__model_b_id=OuterRef('id')),
+                feedback_type='preference',
+                created_at__gte=since,
+            )),
+            usage_7d=count(Message.objects.filter(model_id=OuterRef('id'), created_at__gte=since)),
+        )
+        return {
+            str(row['id']): {
+                'recent_ratings': row['recent_ratings'],
+                'recent_comparisons': row['recent_comparisons'],
+                'usage_7d': row['usage_7d'],
+            }
+            for row in rows
+            if row['recent_ratings'] or row['recent_comparisons'] or row['usage_7d']
+        }
+    
     @staticmethod
     def get_model_performance_analysis(
         model: AIModel,
@@ -11,6 +11,7 @@ from ai_model.models import AIModel
 from django.core.mail import send_mail
 from django.conf import settings
 from model_metrics.aggregators import MetricsAggregator
+from model_metrics import anomalies, rollups
 logger = logging.getLogger(__name__)
 
 
@@ -18,39 +19,34 @@ logger = logging.getLogger(__name__)
 def calculate_daily_metrics():
     """Calculate daily metrics for all active models"""
     
-    active_models = AIModel.objects.filter(is_active=True)
-    
     categories = ['overall', 'code', 'creative', 'reasoning', 'conversation']
     
-    for model in active_models:
-        for category in categories:
-            try:
-                MetricsCalculator.calculate_category_metrics(
-                    model=model,
-                    category=category,
-                    period='daily'
-                )
-                logger.info(f"Calculated {category} daily metrics for {model.display_name}")
-            except Exception as e:
-                logger.error(f"Error calculating metrics for {model.display_name}: {e}")
-    
-    return f"Calculated metrics for {active_models.count()} models"
+    metrics = MetricsCalculator.calculate_period_metrics(
+        period='daily',
+        categories=categories
+    )
+    model_count = len({model_id for model_id, _ in metrics})
+    logger.info(f"Calculated daily metrics for {model_count} models across {len(categories)} categories")
+    
+    return f"Calculated metrics for {model_count} models"
 
 
 @shared_task
 def calculate_weekly_metrics():
     """Calculate weekly metrics for all active models"""
     
-    active_models = AIModel.objects.filter(is_active=True)
-    
-    for model in active_models:
-        MetricsCalculator.calculate_category_metrics(
-            model=model,
-            category='overall',
-            period='weekly'
-        )
+    metrics = MetricsCalculator.calculate_period_metrics(
+        period='weekly',
+        categories=['overall']
+    )
     
-    return f"Calculated weekly metrics for {active_models.count()} models"
+    return f"Calculated weekly metrics for {len(metrics)} models"
+
+
+@shared_task
+def refresh_model_rollups():
+    """Roll up feedback and message stats since the last watermark"""
+    return rollups.refresh_model_rollups()
 
 
 @shared_task
@@ -75,40 +71,24 @@ def update_leaderboard_cache():
 
 @shared_task
 def detect_anomalous_metrics():
-    """Detect anomalous metric changes"""
-    
-    # Check for sudden ELO changes
-    recent_metrics = ModelMetric.objects.filter(
-        calculated_at__gte=timezone.now() - timedelta(hours=24)
-    )
-    
-    anomalies = []
-    
-    for metric in recent_metrics:
-        # Get previous metric
-        previous = ModelMetric.objects.filter(
-            model=metric.model,
-            category=metric.category,
-            period=metric.period,
-            calculated_at__lt=metric.calculated_at
-        ).order_by('-calculated_at').first()
-        
-        if previous:
-            elo_change = abs(metric.elo_rating - previous.elo_rating)
-            
-            # Flag large changes (>100 points)
-            if elo_change > 100:
-                anomalies.append({
-                    'model': metric.model.display_name,
-                    'category': metric.category,
-                    'change': elo_change,
-                    'direction': 'increase' if metric.elo_rating > previous.elo_rating else 'decrease'
-                })
-    
-    if anomalies:
-        logger.warning(f"Detected {len(anomalies)} anomalous metric changes: {anomalies}")
-    
-    return anomalies
+    """Flag rating jumps and vote spikes in recent metric history"""
+    
+    records = anomalies.run_anomaly_detection()
+    
+    if records:
+        logger.warning(f"Detected {len(records)} anomalous metric points")
+    
+    return [
+        {
+            'model_id': str(record.model_id),
+            'category': record.category,
+            'kind': record.kind,
+            'observed_at': record.observed_at.isoformat(),
+            'value': record.value,
+            'zscore': record.zscore
+        }
+        for record in records
+    ]
 
 @shared_task
 def generate_metric_report():
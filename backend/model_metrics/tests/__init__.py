@@ -0,0 +1 @@
+# model_metrics tests package
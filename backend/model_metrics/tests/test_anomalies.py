@@ -0,0 +1,174 @@
+"""
+Tests for vectorized metric anomaly detection.
+
+Verifies that:
+- Only the injected rating jump and vote spike are flagged in an otherwise
+  noisy history, each scored against the points before it.
+- The history is loaded in a single query and an empty history flags nothing.
+- Flags are upserted, so reruns over the same window are idempotent, and
+  keep the time they were first detected.
+- A run only reports the flags of the newest period, not every flag in the
+  lookback window again.
+- MetricStatistics outliers and trends are computed without mutating input,
+  and trends accept timezone-aware dates without warnings.
+- The anomalies endpoint is admin only and rejects a model_id that is not a UUID.
+"""
+import uuid
+import warnings
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from model_metrics import anomalies
+from model_metrics.utils import MetricStatistics
+from model_metrics.views import MetricAnomalyView
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_history(model_ids, days=30, seed=3):
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+    rows = []
+    for model_id in model_ids:
+        rating = 1500.0
+        for day in range(days):
+            rating += rng.normal(0, 4)
+            rows.append({
+                'model_id': model_id,
+                'category': 'overall',
+                'calculated_at': start + timedelta(days=day),
+                'elo_rating': round(rating),
+                'total_comparisons': int(rng.integers(40, 60)),
+            })
+    return pd.DataFrame(rows, columns=anomalies.HISTORY_COLUMNS)
+
+
+class DetectAnomaliesTests(TestCase):
+
+    def setUp(self):
+        self.models = [uuid.uuid4() for _ in range(5)]
+        self.history = make_history(self.models)
+
+    def test_flags_injected_anomalies_only(self):
+        jumped, brigaded = self.models[0], self.models[1]
+        jump_rows = (self.history['model_id'] == jumped) & (self.history['calculated_at'].dt.day >= 20)
+        self.history.loc[jump_rows, 'elo_rating'] += 150
+        spike_row = (self.history['model_id'] == brigaded) & (self.history['calculated_at'].dt.day == 15)
+        self.history.loc[spike_row, 'total_comparisons'] = 400
+
+        flagged = anomalies.detect_anomalies(self.history.sample(frac=1, random_state=1))
+
+        self.assertEqual(
+            sorted((row.model_id, row.kind, row.observed_at.day) for row in flagged.itertuples()),
+            sorted([(jumped, 'rating_jump', 20), (brigaded, 'vote_spike', 15)])
+        )
+        spike = flagged[flagged['kind'] == 'vote_spike'].iloc[0]
+        self.assertEqual(spike['value'], 400)
+        self.assertLess(spike['expected'], 100)
+
+    def test_steady_history_flags_nothing(self):
+        self.assertTrue(anomalies.detect_anomalies(self.history).empty)
+
+    def test_empty_history(self):
+        flagged = anomalies.detect_anomalies(pd.DataFrame(columns=anomalies.HISTORY_COLUMNS))
+        self.assertTrue(flagged.empty)
+        self.assertEqual(list(flagged.columns), anomalies.ANOMALY_COLUMNS)
+
+    def test_loads_history_in_one_query(self):
+        with self.assertNumQueries(1):
+            history = anomalies.load_metric_history(days=30)
+        self.assertEqual(list(history.columns), anomalies.HISTORY_COLUMNS)
+
+
+class SaveAnomaliesTests(TestCase):
+
+    @patch('model_metrics.anomalies.MetricAnomaly.objects.bulk_create')
+    def test_upserts_flags(self, mock_bulk_create):
+        flagged = pd.DataFrame([{
+            'model_id': uuid.uuid4(), 'category': 'overall', 'kind': 'vote_spike',
+            'observed_at': datetime(2026, 1, 15, tzinfo=dt_timezone.utc),
+            'value': 400.0, 'expected': 52.123456, 'zscore': np.nan,
+        }], columns=anomalies.ANOMALY_COLUMNS)
+
+        records = anomalies.save_anomalies(flagged)
+
+        kwargs = mock_bulk_create.call_args.kwargs
+        self.assertTrue(kwargs['update_conflicts'])
+        self.assertEqual(kwargs['unique_fields'], ['model', 'category', 'period', 'kind', 'observed_at'])
+        self.assertNotIn('detected_at', kwargs['update_fields'])
+        self.assertEqual((records[0].expected, records[0].zscore), (52.1235, None))
+
+
+    @patch('model_metrics.anomalies.MetricAnomaly.objects.bulk_create')
+    @patch('model_metrics.anomalies.load_metric_history')
+    def test_reports_newest_period_only(self, mock_history, mock_bulk_create):
+        old_jump, new_jump = uuid.uuid4(), uuid.uuid4()
+        history = make_history([old_jump, new_jump])
+        history.loc[(history['model_id'] == old_jump) & (history['calculated_at'].dt.day >= 20), 'elo_rating'] += 150
+        history.loc[(history['model_id'] == new_jump) & (history['calculated_at'].dt.day == 30), 'elo_rating'] += 150
+        mock_history.return_value = history
+
+        records = anomalies.run_anomaly_detection()
+
+        self.assertEqual(len(mock_bulk_create.call_args.args[0]), 2)
+        self.assertEqual([(record.model_id, record.observed_at.day) for record in records], [(new_jump, 30)])
+
+    @patch('model_metrics.anomalies.load_metric_history')
+    def test_empty_run(self, mock_history):
+        mock_history.return_value = pd.DataFrame(columns=anomalies.HISTORY_COLUMNS)
+        self.assertEqual(anomalies.run_anomaly_detection(), [])
+
+
+class MetricStatisticsTests(TestCase):
+
+    def test_detect_outliers(self):
+        self.assertEqual(MetricStatistics.detect_outliers([10, 10, 11, 9, 10, 10, 10, 10, 60], threshold=2), [8])
+        self.assertEqual(MetricStatistics.detect_outliers([5, 5, 5]), [])
+
+    def test_trend_does_not_reorder_input(self):
+        start = datetime(2026, 1, 1)
+        points = [(start + timedelta(days=2), 3.0), (start, 1.0), (start + timedelta(days=1), 2.0)]
+
+        trend = MetricStatistics.calculate_trend(points)
+
+        self.assertEqual(trend['direction'], 'improving')
+        self.assertAlmostEqual(trend['slope'], 1.0)
+        self.assertEqual(points[0][1], 3.0)
+
+    def test_trend_with_aware_dates(self):
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone(timedelta(hours=5, minutes=30)))
+        points = [(start + timedelta(days=day), 10.0 - day) for day in range(4)]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            trend = MetricStatistics.calculate_trend(points)
+
+        self.assertEqual(trend['direction'], 'declining')
+        self.assertAlmostEqual(trend['slope'], -1.0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MetricAnomalyViewTests(TestCase):
+
+    def test_requires_admin(self):
+        request = APIRequestFactory().get('/anomalies/')
+        force_authenticate(request, user=SimpleNamespace(pk=2, is_staff=False, is_authenticated=True))
+        self.assertEqual(MetricAnomalyView.as_view()(request).status_code, 403)
+
+    def test_lists_recent_anomalies(self):
+        request = APIRequestFactory().get('/anomalies/', {'kind': 'vote_spike', 'days': 14})
+        force_authenticate(request, user=SimpleNamespace(pk=1, is_staff=True, is_authenticated=True))
+        response = MetricAnomalyView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['days'], response.data['count']), (14, 0))
+
+    def test_rejects_invalid_model_id(self):
+        request = APIRequestFactory().get('/anomalies/', {'model_id': 'gpt-4'})
+        force_authenticate(request, user=SimpleNamespace(pk=1, is_staff=True, is_authenticated=True))
+        self.assertEqual(MetricAnomalyView.as_view()(request).status_code, 400)
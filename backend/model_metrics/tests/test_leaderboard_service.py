@@ -0,0 +1,121 @@
+"""
+Tests for the window-function ModelMetricsService.get_leaderboard.
+
+Verifies that:
+- Ranking, previous rank and 7-day stats SQL runs on PostgreSQL.
+- The previous rank is the rank the model held among all models' snapshots
+  of its previous snapshot day, not a re-ranking of the latest rows.
+- 7-day stats count ratings, both sides of a comparison and messages, and
+  skip models without activity.
+- Ties share a rank, and change/trend come from the previous snapshot.
+- The payload is plain data, so it can be cached and rendered without
+  further queries.
+"""
+import datetime
+import json
+import uuid
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from model_metrics.models import ModelMetric
+from model_metrics.services import ModelMetricsService
+from user.models import User
+
+DAY = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def ranked_row(rank, elo, previous_elo=None, previous_rank=None, wins=3, total=4):
+    return {
+        'id': uuid.uuid4(), 'model_id': uuid.uuid4(), 'category': 'overall', 'period': 'all_time',
+        'total_comparisons': total, 'wins': wins, 'losses': total - wins, 'ties': 0,
+        'average_rating': None, 'elo_rating': elo,
+        'calculated_at': datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+        'previous_elo': previous_elo, 'rank': rank, 'previous_rank': previous_rank,
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LeaderboardServiceTests(TestCase):
+
+    def test_sql_runs(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(ModelMetricsService._fetch_ranked_metrics('overall', 'all_time', 20), [])
+        since = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(ModelMetricsService._fetch_recent_stats([uuid.uuid4()], since), {})
+
+    @patch('model_metrics.services.ModelMetricsService._fetch_recent_stats')
+    @patch('model_metrics.services.ModelMetricsService._fetch_ranked_metrics')
+    @patch('model_metrics.services.AIModelListSerializer')
+    def test_payload(self, mock_serializer, mock_ranked, mock_stats):
+        rows = [ranked_row(1, 1600, 1500, 2), ranked_row(1, 1600), ranked_row(3, 1400, 1450, 1, wins=0, total=0)]
+        mock_ranked.return_value = rows
+        mock_serializer.return_value.data = [
+            {'id': str(row['model_id']), 'display_name': f'Model {index}'} for index, row in enumerate(rows)
+        ]
+        mock_stats.return_value = {str(rows[0]['model_id']): {'recent_ratings': 1, 'recent_comparisons': 2, 'usage_7d': 3}}
+
+        with patch('model_metrics.services.AIModel.objects.filter'):
+            leaderboard = ModelMetricsService.get_leaderboard('overall', 'all_time', 20)
+
+        self.assertEqual([entry['rank'] for entry in leaderboard], [1, 1, 3])
+        self.assertEqual([entry['change'] for entry in leaderboard], [1, 0, -2])
+        self.assertEqual([entry['metrics']['trend'] for entry in leaderboard], ['up', 'stable', 'down'])
+        self.assertEqual(leaderboard[0]['metrics']['win_rate'], 75.0)
+        self.assertEqual(leaderboard[2]['metrics']['win_rate'], 0.0)
+        self.assertEqual(leaderboard[0]['model']['display_name'], 'Model 0')
+        self.assertEqual(leaderboard[1]['stats']['usage_7d'], 0)
+        json.dumps(leaderboard)
+
+        # Served from cache the second time
+        ModelMetricsService.get_leaderboard('overall', 'all_time', 20)
+        mock_ranked.assert_called_once()
+
+    def test_previous_rank_from_previous_snapshot_day(self):
+        a, b, c = (create_ai_model(code) for code in ('model-a', 'model-b', 'model-c'))
+        snapshots = {
+            DAY: {a: 1400, b: 1600, c: 1500},
+            DAY + datetime.timedelta(days=1): {a: 1700, b: 1550},
+        }
+        for calculated_at, elos in snapshots.items():
+            for model_id, elo in elos.items():
+                ModelMetric.objects.create(
+                    model_id=model_id, category='overall', period='daily',
+                    calculated_at=calculated_at, elo_rating=elo,
+                )
+        ModelMetric.objects.create(model_id=c, category='code', period='daily', calculated_at=DAY, elo_rating=1900)
+
+        rows = ModelMetricsService._fetch_ranked_metrics('overall', 'daily', 20)
+
+        ranks = [(row['model_id'], row['rank'], row['previous_elo'], row['previous_rank']) for row in rows]
+        # c last snapshotted on the first day; a climbed from third that day,
+        # where re-ranking the previous Elos of the latest rows would say second
+        self.assertEqual(ranks, [(a, 1, 1400, 3), (b, 2, 1600, 1), (c, 3, None, None)])
+        self.assertEqual(len(ModelMetricsService._fetch_ranked_metrics('overall', 'daily', 1)), 1)
+
+    def test_recent_stats_counts(self):
+        a, b, idle = (create_ai_model(code) for code in ('model-a', 'model-b', 'model-idle'))
+        user = User.objects.create(display_name='voter', auth_provider='google')
+        session = ChatSession.objects.create(
+            user=user, mode='random', session_type='LLM', model_a_id=a, model_b_id=b
+        )
+        message = Message.objects.create(session=session, role='assistant', content='Hi', position=0, model_id=a)
+        Message.objects.create(session=session, role='assistant', content='Hi', position=1, model_id=b)
+        Feedback.objects.create(user=user, session=session, feedback_type='preference', preferred_model_ids=[a])
+        Feedback.objects.create(user=user, session=session, message=message, feedback_type='rating', rating=4)
+        old = Message.objects.create(session=session, role='assistant', content='Hi', position=2, model_id=a)
+        Message.objects.filter(id=old.id).update(created_at=DAY - datetime.timedelta(days=30))
+
+        with self.assertNumQueries(1):
+            stats = ModelMetricsService._fetch_recent_stats([a, b, idle], DAY)
+
+        self.assertEqual(stats, {
+            str(a): {'recent_ratings': 1, 'recent_comparisons': 1, 'usage_7d': 1},
+            str(b): {'recent_ratings': 0, 'recent_comparisons': 1, 'usage_7d': 1},
+        })
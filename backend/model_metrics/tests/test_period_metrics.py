@@ -0,0 +1,160 @@
+"""
+Tests for the grouped MetricsCalculator.calculate_period_metrics.
+
+Verifies that:
+- The number of queries does not grow with models or categories.
+- The grouped SQL (FILTER clauses, array index lookups) runs on PostgreSQL.
+- Metrics are upserted in one bulk statement keyed on the day.
+- On real votes (wins, ties, both_bad and multi-pick votes, category tags,
+  ratings and old votes outside the period) the grouped counts match the
+  per-model counts, and reruns upsert the same rows.
+"""
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db.models import Avg, Q
+from django.test import TestCase
+from django.utils import timezone
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from model_metrics.calculators import COMPARISON_MODES, MetricsCalculator
+from model_metrics.models import ModelMetric, ModelRating
+from user.models import User
+
+CATEGORIES = ['overall', 'code', 'creative', 'reasoning', 'conversation']
+
+
+@patch('model_metrics.calculators.ModelMetric.objects.bulk_create')
+class CalculatePeriodMetricsTests(TestCase):
+
+    def models(self, count):
+        return [SimpleNamespace(id=uuid.uuid4()) for _ in range(count)]
+
+    def test_query_count_is_constant(self, mock_bulk_create):
+        # ratings + comparisons (a side, b side) + usage + running Elo
+        with self.assertNumQueries(5):
+            MetricsCalculator.calculate_period_metrics('daily', ['overall'], models=self.models(1))
+        with self.assertNumQueries(5):
+            MetricsCalculator.calculate_period_metrics('daily', CATEGORIES, models=self.models(50))
+
+    def test_one_metric_per_model_and_category(self, mock_bulk_create):
+        models = self.models(3)
+        metrics = MetricsCalculator.calculate_period_metrics('all_time', CATEGORIES, models=models)
+
+        self.assertEqual(len(metrics), 15)
+        metric = metrics[(models[0].id, 'overall')]
+        self.assertEqual((metric.total_comparisons, metric.wins, metric.losses, metric.ties), (0, 0, 0, 0))
+        self.assertEqual(metric.elo_rating, 1500)
+        self.assertEqual(metric.calculated_at.hour, 0)
+
+        mock_bulk_create.assert_called_once()
+        self.assertEqual(len(mock_bulk_create.call_args[0][0]), 15)
+        self.assertTrue(mock_bulk_create.call_args[1]['update_conflicts'])
+
+
+def per_model_counts(model_id, category, start_date=None):
+    """The per-model queries the grouped calculation replaced."""
+    feedback = Feedback.objects.all()
+    if start_date:
+        feedback = feedback.filter(created_at__gte=start_date)
+    if category != 'overall':
+        feedback = feedback.filter(categories__contains=[category])
+
+    votes = feedback.filter(
+        feedback_type='preference', session__mode__in=COMPARISON_MODES
+    ).filter(Q(session__model_a_id=model_id) | Q(session__model_b_id=model_id))
+    picks = [vote.preferred_model_ids for vote in votes]
+    wins = sum(1 for pick in picks if pick == [model_id])
+    losses = sum(1 for pick in picks if len(pick) == 1 and pick != [model_id])
+    average = feedback.filter(
+        feedback_type='rating', rating__isnull=False, message__model_id=model_id
+    ).aggregate(avg=Avg('rating'))['avg']
+    return {
+        'total_comparisons': len(picks),
+        'wins': wins,
+        'losses': losses,
+        'ties': len(picks) - wins - losses,
+        'average_rating': round(average, 2) if average is not None else None,
+    }
+
+
+class PeriodMetricsOnVotesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='voter', auth_provider='google')
+        self.model_ids = [create_ai_model(code) for code in ('model-a', 'model-b', 'model-c')]
+        self.models = [SimpleNamespace(id=model_id) for model_id in self.model_ids]
+        a, b, c = self.model_ids
+        ModelRating.objects.create(model_id=a, elo_rating=1612.4)
+
+        def vote(mode, pair, preferred, categories=()):
+            session = ChatSession.objects.create(
+                user=self.user, mode=mode, session_type='LLM', model_a_id=pair[0], model_b_id=pair[1]
+            )
+            return Feedback.objects.create(
+                user=self.user, session=session, feedback_type='preference',
+                preferred_model_ids=preferred, categories=list(categories),
+            )
+
+        vote('random', (a, b), [a], ['code'])
+        vote('random', (a, b), [b])
+        vote('compare', (a, b), [a, b], ['code'])  # both good: a tie
+        vote('academic', (b, c), [], ['creative'])  # both bad: a tie
+        vote('compare', (c, a), [c], ['code', 'creative'])
+        vote('direct', (a, b), [a])  # not a head-to-head mode
+        old = vote('random', (a, c), [a])
+        Feedback.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=3))
+
+        session = ChatSession.objects.create(user=self.user, mode='direct', session_type='LLM')
+        for position, (model_id, rating, categories) in enumerate(
+            [(a, 4, ['code']), (a, 5, []), (b, 2, ['code']), (c, 3, ['creative'])]
+        ):
+            message = Message.objects.create(
+                session=session, role='assistant', content='Hello', position=position, model_id=model_id
+            )
+            Feedback.objects.create(
+                user=self.user, session=session, message=message, feedback_type='rating',
+                rating=rating, categories=categories,
+            )
+
+    def assert_matches_per_model(self, period, start_date):
+        categories = ['overall', 'code', 'creative']
+        metrics = MetricsCalculator.calculate_period_metrics(period, categories, models=self.models)
+
+        for model_id in self.model_ids:
+            for category in categories:
+                metric = metrics[(model_id, category)]
+                grouped = {field: getattr(metric, field) for field in
+                           ('total_comparisons', 'wins', 'losses', 'ties', 'average_rating')}
+                self.assertEqual(grouped, per_model_counts(model_id, category, start_date), (model_id, category))
+        return metrics
+
+    def test_all_time_matches_per_model_counts(self):
+        a, b, c = self.model_ids
+        metrics = self.assert_matches_per_model('all_time', None)
+
+        overall = metrics[(a, 'overall')]
+        self.assertEqual((overall.total_comparisons, overall.wins, overall.losses, overall.ties), (5, 2, 2, 1))
+        self.assertEqual(overall.average_rating, 4.5)
+        self.assertEqual(overall.elo_rating, 1612)
+        self.assertEqual(metrics[(b, 'overall')].ties, 2)
+        self.assertEqual(metrics[(a, 'code')].elo_rating, 1500)
+
+    def test_daily_skips_older_votes(self):
+        a, _, c = self.model_ids
+        start_date, _ = MetricsCalculator.get_period_window('daily')
+        metrics = self.assert_matches_per_model('daily', start_date)
+
+        self.assertEqual(metrics[(a, 'overall')].total_comparisons, 4)
+        self.assertEqual(metrics[(c, 'overall')].total_comparisons, 2)
+
+    def test_rerun_upserts_the_same_rows(self):
+        MetricsCalculator.calculate_period_metrics('all_time', ['overall'], models=self.models)
+        MetricsCalculator.calculate_period_metrics('all_time', ['overall'], models=self.models)
+
+        self.assertEqual(ModelMetric.objects.filter(period='all_time').count(), 3)
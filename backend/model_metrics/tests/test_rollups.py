@@ -0,0 +1,215 @@
+"""
+Tests for the hourly model stats rollups.
+
+Verifies that:
+- Vote, rating and message rows for the same bucket merge into one rollup,
+  with ties derived from votes minus wins and losses.
+- Each vote side also produces a head-to-head pair row.
+- The grouped rollup SQL (TruncHour, FILTER, PERCENTILE_CONT) runs on PostgreSQL.
+- Buckets are UTC hours, so a window's rows never spill into the bucket of
+  the previous window.
+- A session replied to across several hours is counted once, in the hour of
+  its first reply, so summed session counts are exact.
+- The watermark advances to the current hour, and that hour is rebuilt on the next run.
+- The watermark advances after each chunk, so a failed run keeps the chunks it finished.
+- An hour behind the watermark is rebuilt when one of its votes is changed or deleted.
+- The stats services read their counters from the rollups.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from feedback.services import FeedbackService
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from model_metrics import rollups
+from model_metrics.models import DirtyRollupBucket, ModelStatsRollup, RollupWatermark
+from user.models import User
+
+MODEL_A = uuid.uuid4()
+MODEL_B = uuid.uuid4()
+BUCKET = datetime(2026, 1, 1, 10, tzinfo=dt_timezone.utc)
+
+
+def vote_row(model_id, opponent_id, votes, wins, losses, **dims):
+    return {
+        'model_id': model_id, 'opponent_id': opponent_id, 'bucket': BUCKET, 'mode': 'random',
+        'session_type': 'LLM', 'input_modality': 'text', 'language': 'hi',
+        'votes': votes, 'wins': wins, 'losses': losses, **dims,
+    }
+
+
+class BuildRollupsTests(TestCase):
+
+    @patch('model_metrics.rollups._message_rows')
+    @patch('model_metrics.rollups._rating_rows')
+    @patch('model_metrics.rollups._vote_rows')
+    def test_rows_merge_per_bucket(self, mock_votes, mock_ratings, mock_messages):
+        mock_votes.return_value = [
+            vote_row(MODEL_A, MODEL_B, votes=5, wins=3, losses=1),
+            vote_row(MODEL_B, MODEL_A, votes=5, wins=1, losses=3),
+        ]
+        mock_ratings.return_value = [{
+            'model_id': MODEL_A, 'bucket': BUCKET, 'mode': 'random', 'session_type': 'LLM',
+            'input_modality': 'text', 'language': 'hi', 'ratings_count': 2, 'rating_sum': 9,
+            'rating_1': 0, 'rating_2': 0, 'rating_3': 0, 'rating_4': 1, 'rating_5': 1,
+        }]
+        mock_messages.return_value = [{
+            'model_id': MODEL_A, 'bucket': BUCKET, 'mode': 'random', 'session_type': 'LLM',
+            'message_language': 'hi', 'message_count': 7, 'session_count': 4,
+            'latency_count': 7, 'latency_sum': 700.0, 'latency_p50': 90.0, 'latency_p95': 180.0,
+        }]
+
+        stats, pairs = rollups.build_rollups(BUCKET, BUCKET + timedelta(hours=1))
+
+        self.assertEqual(len(stats), 3)
+        voted = next(s for s in stats if s.model_id == MODEL_A and s.input_modality == 'text')
+        self.assertEqual((voted.votes, voted.wins, voted.losses, voted.ties), (5, 3, 1, 1))
+        self.assertEqual((voted.ratings_count, voted.rating_sum, voted.rating_5), (2, 9, 1))
+        # Message counts have no input modality
+        messages = next(s for s in stats if s.model_id == MODEL_A and s.input_modality == '')
+        self.assertEqual((messages.message_count, messages.latency_p95), (7, 180.0))
+
+        self.assertEqual(len(pairs), 2)
+        pair = next(p for p in pairs if p.model_id == MODEL_B)
+        self.assertEqual((pair.opponent_id, pair.wins, pair.losses, pair.ties), (MODEL_A, 1, 3, 1))
+
+    def test_grouped_sql_runs(self):
+        stats, pairs = rollups.build_rollups(BUCKET, BUCKET + timedelta(days=1))
+        self.assertEqual((stats, pairs), ([], []))
+
+    def test_buckets_are_utc_hours(self):
+        model_id = create_ai_model('model-a')
+        user = User.objects.create(display_name='owner', auth_provider='google')
+        session = ChatSession.objects.create(user=user, mode='direct', session_type='LLM')
+        for position, minutes in enumerate([10, 50]):
+            message = Message.objects.create(
+                session=session, role='assistant', content='Hello', position=position, model_id=model_id
+            )
+            Message.objects.filter(id=message.id).update(created_at=BUCKET + timedelta(minutes=minutes))
+
+        stats, _ = rollups.build_rollups(BUCKET, BUCKET + timedelta(hours=1))
+
+        self.assertEqual([(s.bucket, s.message_count) for s in stats], [(BUCKET, 2)])
+        ist = BUCKET.astimezone(dt_timezone(timedelta(hours=5, minutes=30)))
+        self.assertEqual(rollups.floor_hour(ist + timedelta(minutes=45)), BUCKET)
+
+    def test_session_counted_in_first_hour(self):
+        model_id = create_ai_model('model-a')
+        user = User.objects.create(display_name='owner', auth_provider='google')
+        session = ChatSession.objects.create(user=user, mode='direct', session_type='LLM')
+        for position, hours in enumerate([0, 0, 1, 2]):
+            message = Message.objects.create(
+                session=session, role='assistant', content='Hello', position=position, model_id=model_id
+            )
+            Message.objects.filter(id=message.id).update(created_at=BUCKET + timedelta(hours=hours, minutes=position))
+
+        stats, _ = rollups.build_rollups(BUCKET, BUCKET + timedelta(days=1))
+
+        counts = [(s.message_count, s.session_count) for s in sorted(stats, key=lambda s: s.bucket)]
+        self.assertEqual(counts, [(2, 1), (1, 0), (1, 0)])
+
+
+class RefreshModelRollupsTests(TestCase):
+
+    @patch('model_metrics.rollups.refresh_window', return_value=0)
+    def test_watermark_stops_at_current_hour(self, mock_refresh):
+        RollupWatermark.objects.create(name=rollups.ROLLUP_WATERMARK, processed_until=BUCKET)
+        now = BUCKET + timedelta(days=1, hours=2, minutes=30)
+
+        rollups.refresh_model_rollups(now=now)
+
+        windows = [call.args for call in mock_refresh.call_args_list]
+        self.assertEqual(windows[0], (BUCKET, BUCKET + timedelta(days=1)))
+        self.assertEqual(windows[-1][1], BUCKET + timedelta(days=1, hours=3))
+        watermark = RollupWatermark.objects.get(name=rollups.ROLLUP_WATERMARK)
+        self.assertEqual(watermark.processed_until, BUCKET + timedelta(days=1, hours=2))
+
+        # The current hour is rebuilt on the next run
+        mock_refresh.reset_mock()
+        rollups.refresh_model_rollups(now=now)
+        mock_refresh.assert_called_once_with(BUCKET + timedelta(days=1, hours=2), BUCKET + timedelta(days=1, hours=3))
+
+    @patch('model_metrics.rollups.refresh_window', side_effect=[0, RuntimeError('database went away')])
+    def test_watermark_advances_per_chunk(self, mock_refresh):
+        RollupWatermark.objects.create(name=rollups.ROLLUP_WATERMARK, processed_until=BUCKET)
+
+        with self.assertRaises(RuntimeError):
+            rollups.refresh_model_rollups(now=BUCKET + timedelta(days=3))
+
+        watermark = RollupWatermark.objects.get(name=rollups.ROLLUP_WATERMARK)
+        self.assertEqual(watermark.processed_until, BUCKET + timedelta(days=1))
+
+    def test_changed_and_deleted_votes_rebuild_their_hour(self):
+        model_a, model_b = create_ai_model('model-a'), create_ai_model('model-b')
+        user = User.objects.create(display_name='owner', auth_provider='google')
+        session = ChatSession.objects.create(
+            user=user, mode='random', session_type='LLM', model_a_id=model_a, model_b_id=model_b
+        )
+        feedback = Feedback.objects.create(
+            user=user, session=session, feedback_type='preference',
+            preferred_model_ids=[str(model_a)], input_modality='text',
+        )
+        Feedback.objects.filter(id=feedback.id).update(created_at=BUCKET + timedelta(minutes=20))
+        RollupWatermark.objects.create(name=rollups.ROLLUP_WATERMARK, processed_until=BUCKET)
+
+        def wins_and_losses():
+            rows = ModelStatsRollup.objects.filter(model_id=model_a, bucket=BUCKET)
+            return [(row.votes, row.wins, row.losses) for row in rows]
+
+        rollups.refresh_model_rollups(now=BUCKET + timedelta(hours=1, minutes=30))
+        self.assertEqual(wins_and_losses(), [(1, 1, 0)])
+
+        # Re-vote after the hour was rolled up and the watermark moved past it
+        feedback.refresh_from_db()
+        feedback.preferred_model_ids = [str(model_b)]
+        feedback.save()
+        rollups.refresh_model_rollups(now=BUCKET + timedelta(hours=3, minutes=30))
+        self.assertEqual(wins_and_losses(), [(1, 0, 1)])
+
+        feedback.delete()
+        self.assertTrue(DirtyRollupBucket.objects.filter(bucket=BUCKET).exists())
+        rollups.refresh_model_rollups(now=BUCKET + timedelta(hours=3, minutes=30))
+        self.assertEqual(wins_and_losses(), [])
+        self.assertFalse(DirtyRollupBucket.objects.exists())
+
+    def test_refresh_on_empty_tables(self):
+        self.assertEqual(rollups.refresh_model_rollups(), 0)
+        self.assertTrue(RollupWatermark.objects.filter(name=rollups.ROLLUP_WATERMARK).exists())
+
+
+class RollupReadersTests(TestCase):
+
+    @patch('feedback.services.get_model_totals')
+    def test_model_feedback_stats_from_rollups(self, mock_totals):
+        mock_totals.side_effect = [
+            {MODEL_A: {'ratings_count': 4, 'rating_sum': 14, 'rating_1': 0, 'rating_2': 1,
+                       'rating_3': 0, 'rating_4': 2, 'rating_5': 1}},
+            {MODEL_A: {'votes': 10, 'wins': 6, 'losses': 3}},
+        ]
+        stats = FeedbackService.get_model_feedback_stats(SimpleNamespace(id=MODEL_A), timedelta(days=7))
+
+        self.assertEqual(stats['average_rating'], 3.5)
+        self.assertEqual(stats['rating_breakdown'][4], 2)
+        self.assertEqual((stats['total_preferences'], stats['win_count'], stats['win_rate']), (10, 6, 60.0))
+
+    @patch('feedback.services.get_pair_totals')
+    def test_comparison_stats_from_pair_rollups(self, mock_pairs):
+        mock_pairs.return_value = {MODEL_B: {'votes': 8, 'wins': 5, 'losses': 2, 'ties': 1}}
+        stats = FeedbackService.calculate_model_comparison_stats(
+            SimpleNamespace(id=MODEL_A), SimpleNamespace(id=MODEL_B)
+        )
+
+        self.assertEqual(stats['total_comparisons'], 8)
+        self.assertEqual(stats['model_a']['wins'], 5)
+        self.assertEqual(stats['model_b']['wins'], 2)
+        self.assertEqual(stats['ties'], 1)
+
+    def test_totals_sql_runs(self):
+        self.assertEqual(rollups.get_model_totals([MODEL_A], since=BUCKET, mode__in=['random']), {})
+        self.assertEqual(rollups.get_pair_totals(MODEL_A, opponent_ids=[MODEL_B], modes=['compare']), {})
@@ -0,0 +1,131 @@
+"""
+Tests for the time-series metrics aggregation.
+
+Verifies that:
+- generate_time_series_metrics issues one query however many models are requested.
+- The date_trunc downsampling SQL runs for every granularity.
+- The metrics watermark moves when the same day is recalculated.
+- The aggregation view caches its response on the metrics watermark and
+  recomputes once new daily metrics are written.
+- The cached response is kept apart per tenant and per active model pool.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from feedback.tests.test_vote_resolution import create_ai_model
+from model_metrics.aggregators import TIME_SERIES_COLUMNS, MetricsAggregator
+from model_metrics.calculators import MetricsCalculator
+from model_metrics.views import MetricAggregationView
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+START = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class GenerateTimeSeriesTests(TestCase):
+
+    def models(self, count):
+        return [SimpleNamespace(id=uuid.uuid4(), display_name=f"Model {i}") for i in range(count)]
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            MetricsAggregator.generate_time_series_metrics(self.models(40), START, START + timedelta(days=90))
+
+    def test_every_granularity(self):
+        for granularity in ('daily', 'weekly', 'monthly'):
+            df = MetricsAggregator.generate_time_series_metrics(
+                self.models(2), START, START + timedelta(days=90), granularity=granularity
+            )
+            self.assertTrue(df.empty)
+            self.assertEqual(list(df.columns), TIME_SERIES_COLUMNS)
+
+    def test_watermark_moves_on_recalculation(self):
+        models = [SimpleNamespace(id=create_ai_model('model-a'))]
+        MetricsCalculator.calculate_period_metrics('daily', models=models)
+        first = MetricsAggregator.get_metrics_watermark('daily')
+
+        MetricsCalculator.calculate_period_metrics('daily', models=models)
+
+        self.assertGreater(MetricsAggregator.get_metrics_watermark('daily'), first)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MetricAggregationViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.frame = pd.DataFrame([{
+            'date': START, 'model': 'Model 0', 'elo_rating': 1510.0,
+            'win_rate': 50.0, 'average_rating': 4.0, 'total_comparisons': 10,
+        }])
+
+    def post(self, models=(uuid.UUID(int=1),)):
+        request = self.factory.post('/aggregate/', {
+            'models': [str(model_id) for model_id in models],
+            'start_date': '2026-01-01T00:00:00Z',
+            'end_date': '2026-03-01T00:00:00Z',
+            'granularity': 'weekly',
+        }, format='json')
+        return MetricAggregationView.as_view()(request)
+
+    @patch('model_metrics.views.AIModel.objects.filter')
+    @patch('model_metrics.aggregators.MetricsAggregator.get_metrics_watermark')
+    @patch('model_metrics.aggregators.MetricsAggregator.generate_time_series_metrics')
+    def test_cached_until_watermark_moves(self, mock_generate, mock_watermark, mock_models):
+        mock_models.return_value = [SimpleNamespace(id=uuid.UUID(int=1), display_name='Model 0')]
+        mock_generate.return_value = self.frame
+        mock_watermark.return_value = START
+
+        first = self.post()
+        second = self.post()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.data['data'][0]['elo_rating'], 1510.0)
+        self.assertEqual(second.data['granularity'], 'weekly')
+        mock_generate.assert_called_once()
+
+        mock_watermark.return_value = START + timedelta(days=1)
+        self.post()
+        self.assertEqual(mock_generate.call_count, 2)
+
+    @patch('model_metrics.views.get_current_tenant')
+    @patch('model_metrics.views.AIModel.objects.filter')
+    @patch('model_metrics.aggregators.MetricsAggregator.get_metrics_watermark', return_value=START)
+    @patch('model_metrics.aggregators.MetricsAggregator.generate_time_series_metrics')
+    def test_cached_per_tenant(self, mock_generate, mock_watermark, mock_models, mock_tenant):
+        mock_models.return_value = [SimpleNamespace(id=uuid.UUID(int=1), display_name='Model 0')]
+        mock_generate.return_value = self.frame
+
+        mock_tenant.return_value = None
+        self.post()
+        mock_tenant.return_value = {'slug': 'aquarium'}
+        self.post()
+        self.post()
+
+        self.assertEqual(mock_generate.call_count, 2)
+
+    @patch('model_metrics.views.AIModel.objects.filter')
+    @patch('model_metrics.aggregators.MetricsAggregator.get_metrics_watermark', return_value=START)
+    @patch('model_metrics.aggregators.MetricsAggregator.generate_time_series_metrics')
+    def test_active_scope_follows_model_pool(self, mock_generate, mock_watermark, mock_models):
+        pool = MagicMock()
+        pool.__iter__.return_value = []
+        pool.values_list.return_value = [uuid.UUID(int=1)]
+        mock_models.return_value = pool
+        mock_generate.return_value = self.frame
+
+        self.post(models=())
+        self.post(models=())
+        self.assertEqual(mock_generate.call_count, 1)
+
+        # A model switched on changes the pool, so the entry is not reused
+        pool.values_list.return_value = [uuid.UUID(int=1), uuid.UUID(int=2)]
+        self.post(models=())
+        self.assertEqual(mock_generate.call_count, 2)
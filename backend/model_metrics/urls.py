@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from model_metrics.views import (
     ModelMetricViewSet, LeaderboardView, CategoryLeaderboardView,
     ModelPerformanceView, ModelComparisonView, MetricAggregationView,
-    ProviderMetricsView, CategoryDominanceView, ModelRankingsView
+    ProviderMetricsView, CategoryDominanceView, ModelRankingsView,
+    MetricAnomalyView
 )
 
 app_name = 'model_metrics'
@@ -21,6 +22,7 @@ urlpatterns = [
     path('aggregate/', MetricAggregationView.as_view(), name='metric-aggregation'),
     path('providers/', ProviderMetricsView.as_view(), name='provider-metrics'),
     path('dominance/', CategoryDominanceView.as_view(), name='category-dominance'),
+    path('anomalies/', MetricAnomalyView.as_view(), name='metric-anomalies'),
 ]
 
 # URL patterns will be:
@@ -33,4 +35,5 @@ urlpatterns = [
 # GET /api/compare/ - Compare two models
 # POST /api/aggregate/ - Get aggregated metrics
 # GET /api/providers/ - Get metrics by provider
-# GET /api/dominance/ - Get category dominance analysis
\ No newline at end of file
+# GET /api/dominance/ - Get category dominance analysis
+# GET /api/anomalies/ - Get recently flagged metric anomalies (admin)
@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional, Tuple
 import numpy as np
+import pandas as pd
 from scipy import stats
 from datetime import datetime, timedelta
 import json
@@ -22,12 +23,12 @@ class MetricStatistics:
                 'change_percent': 0
             }
         
-        # Sort by date
-        data_points.sort(key=lambda x: x[0])
-        
-        # Convert to arrays
-        x = np.array([(point[0] - data_points[0][0]).days for point in data_points])
-        y = np.array([point[1] for point in data_points])
+        # Convert to arrays sorted by date, as epoch seconds (naive dates are taken as UTC)
+        dates, values = zip(*data_points)
+        seconds = pd.to_datetime(list(dates), utc=True).to_numpy('datetime64[ns]').astype(np.int64) / 1e9
+        order = np.argsort(seconds, kind='stable')
+        x = np.floor((seconds[order] - seconds[order][0]) / 86400)
+        y = np.asarray(values, dtype=float)[order]
         
         # Calculate linear regression
         slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
@@ -65,15 +66,15 @@ class MetricStatistics:
         if len(data) < 3:
             return []
         
-        mean = np.mean(data)
-        std = np.std(data)
+        values = np.asarray(data, dtype=float)
+        std = values.std()
         
         if std == 0:
             return []
         
-        z_scores = [(x - mean) / std for x in data]
+        z_scores = (values - values.mean()) / std
         
-        return [i for i, z in enumerate(z_scores) if abs(z) > threshold]
+        return np.flatnonzero(np.abs(z_scores) > threshold).tolist()
 
 
 class LeaderboardFormatter:
@@ -212,12 +213,12 @@ class MetricExporter:
         for entry in leaderboard:
             export_data['entries'].append({
                 'rank': entry['rank'],
-                'model': entry['model'].display_name,
-                'provider': entry['model'].provider,
-                'elo_rating': entry['metrics'].elo_rating,
-                'win_rate': entry.get('win_rate', 0),
-                'total_battles': entry['metrics'].total_comparisons,
-                'average_rating': entry['metrics'].average_rating
+                'model': entry['model']['display_name'],
+                'provider': entry['model']['provider'],
+                'elo_rating': entry['metrics']['elo_rating'],
+                'win_rate': entry['metrics']['win_rate'],
+                'total_battles': entry['metrics']['total_comparisons'],
+                'average_rating': entry['metrics']['average_rating']
             })
         
         return json.dumps(export_data, indent=2)
\ No newline at end of file
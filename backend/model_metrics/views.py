@@ -1,12 +1,15 @@
 from rest_framework import viewsets, views, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import datetime, timedelta
+import hashlib
+import uuid
 from ai_model.models import AIModel
-from model_metrics.models import ModelMetric
+from model_metrics.models import ModelMetric, MetricAnomaly
 from model_metrics.serializers import (
     ModelMetricSerializer, LeaderboardSerializer, CategoryLeaderboardSerializer,
     ModelPerformanceSerializer, MetricAggregationSerializer,
@@ -15,6 +18,7 @@ from model_metrics.serializers import (
 from model_metrics.services import ModelMetricsService, ModelComparisonService
 from model_metrics.aggregators import MetricsAggregator
 from model_metrics.calculators import MetricsCalculator
+from tenants.context import get_current_tenant
 
 
 class ModelMetricViewSet(viewsets.ReadOnlyModelViewSet):
@@ -170,23 +174,46 @@ class MetricAggregationView(views.APIView):
         serializer = MetricAggregationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Get models
         model_ids = serializer.validated_data.get('models', [])
-        if model_ids:
-            models = AIModel.objects.filter(id__in=model_ids)
-        else:
-            models = AIModel.objects.filter(is_active=True)
+        granularity = serializer.validated_data['granularity']
         
         # Time range
         start_date = serializer.validated_data.get('start_date', timezone.now() - timedelta(days=30))
         end_date = serializer.validated_data.get('end_date', timezone.now())
         
+        # The response only changes when daily metrics are written, or for
+        # the active pool when models are added or switched off
+        watermark = MetricsAggregator.get_metrics_watermark('daily')
+        if model_ids:
+            scope = ','.join(sorted(str(model_id) for model_id in model_ids))
+        else:
+            active_ids = AIModel.objects.filter(is_active=True).values_list('id', flat=True)
+            scope = 'active:' + ','.join(sorted(str(model_id) for model_id in active_ids))
+        tenant = get_current_tenant()
+        cache_key = "metrics_timeseries:{}:{}:{}:{}:{}:{}".format(
+            tenant['slug'] if tenant else 'default',
+            hashlib.md5(scope.encode()).hexdigest(),
+            start_date.date().isoformat(),
+            end_date.date().isoformat(),
+            granularity,
+            watermark.isoformat() if watermark else 'none'
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+        
+        # Get models
+        if model_ids:
+            models = list(AIModel.objects.filter(id__in=model_ids))
+        else:
+            models = list(AIModel.objects.filter(is_active=True))
+        
         # Generate time series
         df = MetricsAggregator.generate_time_series_metrics(
-            models=list(models),
+            models=models,
             start_date=start_date,
             end_date=end_date,
-            granularity='daily'
+            granularity=granularity
         )
         
         # Convert to response format
@@ -195,10 +222,12 @@ class MetricAggregationView(views.APIView):
                 'start': start_date,
                 'end': end_date
             },
+            'granularity': granularity,
             'models': [m.display_name for m in models],
             'data': df.to_dict('records') if not df.empty else []
         }
         
+        cache.set(cache_key, response_data, 3600)
         return Response(response_data)
 
 
@@ -265,10 +294,46 @@ class ModelRankingsView(views.APIView):
             
             rank = None
             for idx, entry in enumerate(leaderboard):
-                if entry['model'].id == model.id:
+                if entry['model'] and entry['model']['id'] == str(model.id):
                     rank = idx + 1
                     break
             
             rankings['rankings'][category] = rank
         
-        return Response(rankings)
\ No newline at end of file
+        return Response(rankings)
+
+
+class MetricAnomalyView(views.APIView):
+    """Recent rating jumps and vote spikes flagged by the anomaly detection task (admin only)"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        try:
+            days = min(int(request.query_params.get('days', 7)), 90)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = MetricAnomaly.objects.filter(
+            observed_at__gte=timezone.now() - timedelta(days=days)
+        )
+        kind = request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        model_id = request.query_params.get('model_id')
+        if model_id:
+            try:
+                model_id = uuid.UUID(model_id)
+            except ValueError:
+                return Response({'error': 'model_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(model_id=model_id)
+        
+        anomalies = list(queryset.values(
+            'model_id', 'model__display_name', 'category', 'period', 'kind',
+            'observed_at', 'value', 'expected', 'zscore', 'detected_at'
+        )[:500])
+        
+        return Response({
+            'days': days,
+            'count': len(anomalies),
+            'anomalies': anomalies
+        })
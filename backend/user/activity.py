@@ -0,0 +1,220 @@
+"""
+Per-user activity summary behind the stats endpoint.
+
+UserActivitySummary holds running counters. They are bumped in place with a
+single UPDATE whenever a session, message or vote is created (user.signals,
+and write_votes for batched votes), so reading a user's stats is one row
+read however much history they have.
+
+A user without a summary row gets one rebuilt from the full history on
+their first stats read. Increments only touch existing rows, so a user is
+never left with a partial count; the rebuild stores the empty row before
+recounting, so votes landing meanwhile are not dropped. Deleting a session or a feedback drops the
+row, and the next read rebuilds it.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ai_model.models import AIModel
+from feedback.models import Feedback
+from message.models import Message
+from user.models import UserActivitySummary
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_MODELS_LIMIT = 5
+
+SESSION_SQL = """
+    UPDATE user_activity_summaries SET
+        total_sessions = total_sessions + 1,
+        session_breakdown = jsonb_set(
+            session_breakdown, ARRAY[%(mode)s],
+            to_jsonb(COALESCE((session_breakdown ->> %(mode)s)::int, 0) + 1)
+        ),
+        current_streak = CASE
+            WHEN last_active_date IS NULL THEN 1
+            WHEN %(day)s <= last_active_date THEN current_streak
+            WHEN %(day)s = last_active_date + 1 THEN current_streak + 1
+            ELSE 1
+        END,
+        last_active_date = GREATEST(last_active_date, %(day)s),
+        updated_at = now()
+    WHERE user_id = %(user_id)s
+"""
+
+USER_MESSAGE_SQL = """
+    UPDATE user_activity_summaries SET total_messages = total_messages + 1, updated_at = now()
+    WHERE user_id = (SELECT user_id FROM chat_sessions WHERE id = %(session_id)s)
+"""
+
+MODEL_MESSAGE_SQL = """
+    UPDATE user_activity_summaries SET
+        model_usage = jsonb_set(
+            model_usage, ARRAY[%(model_id)s],
+            to_jsonb(COALESCE((model_usage ->> %(model_id)s)::int, 0) + 1)
+        ),
+        updated_at = now()
+    WHERE user_id = (SELECT user_id FROM chat_sessions WHERE id = %(session_id)s)
+"""
+
+VOTES_SQL = """
+    UPDATE user_activity_summaries AS summary SET
+        feedback_given = summary.feedback_given + counts.feedback_given,
+        llm_random_votes_count = summary.llm_random_votes_count + counts.llm_random_votes,
+        detailed_votes_count = summary.detailed_votes_count + counts.detailed_votes,
+        updated_at = now()
+    FROM (VALUES {values}) AS counts (user_id, feedback_given, llm_random_votes, detailed_votes)
+    WHERE summary.user_id = counts.user_id::uuid
+"""
+
+
+def _execute(sql, params, using=None):
+    using = using or router.db_for_write(UserActivitySummary)
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def record_session(session, using=None):
+    _execute(SESSION_SQL, {
+        'user_id': session.user_id,
+        'mode': session.mode,
+        'day': timezone.localdate(session.created_at),
+    }, using)
+
+
+def record_message(message, using=None):
+    if message.role == 'user':
+        _execute(USER_MESSAGE_SQL, {'session_id': message.session_id}, using)
+    elif message.role == 'assistant' and message.model_id:
+        _execute(MODEL_MESSAGE_SQL, {'session_id': message.session_id, 'model_id': str(message.model_id)}, using)
+
+
+def vote_counts(session_mode, session_type, additional_feedback_json, created, became_detailed=False):
+    """(feedback_given, llm_random_votes, detailed_votes) added by writing one feedback."""
+    is_detailed = session_mode == 'academic' and session_type == 'TTS' and bool(additional_feedback_json)
+    if not created:
+        return 0, 0, int(is_detailed and became_detailed)
+    return 1, int(session_mode == 'random' and session_type == 'LLM'), int(is_detailed)
+
+
+def record_votes(counts, using=None):
+    """Add {user_id: (feedback_given, llm_random_votes, detailed_votes)} in one UPDATE."""
+    rows = [(str(user_id), *deltas) for user_id, deltas in counts.items() if any(deltas)]
+    if not rows:
+        return
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    _execute(VOTES_SQL.format(values=values), [value for row in rows for value in row], using)
+
+
+def drop_summary(user_id, using=None):
+    UserActivitySummary.objects.using(using or router.db_for_write(UserActivitySummary)).filter(
+        user_id=user_id
+    ).delete()
+
+
+def _activity_streak(user, using):
+    """Consecutive days with a new session, ending at the most recent one."""
+    active_days = list(
+        user.chat_sessions.using(using).annotate(day=TruncDate('created_at'))
+        .values_list('day', flat=True).distinct().order_by('-day')
+    )
+    if not active_days:
+        return 0, None
+
+    streak = 1
+    for previous, day in zip(active_days, active_days[1:]):
+        if day != previous - timedelta(days=1):
+            break
+        streak += 1
+    return streak, active_days[0]
+
+
+def _recount(user, using):
+    streak, last_active_date = _activity_streak(user, using)
+    model_usage = Message.objects.using(using).filter(
+        session__user=user, role='assistant', model__isnull=False
+    ).values_list('model_id').annotate(usage_count=Count('id')).order_by()
+    session_breakdown = user.chat_sessions.using(using).values_list('mode').annotate(
+        count=Count('id')
+    ).order_by('mode')
+
+    return dict(
+        total_sessions=user.chat_sessions.using(using).count(),
+        total_messages=Message.objects.using(using).filter(session__user=user, role='user').count(),
+        feedback_given=Feedback.objects.using(using).filter(user=user).count(),
+        detailed_votes_count=Feedback.objects.using(using).filter(
+            user=user,
+            session__mode='academic',
+            session__session_type='TTS',
+            additional_feedback_json__isnull=False
+        ).exclude(additional_feedback_json={}).count(),
+        llm_random_votes_count=Feedback.objects.using(using).filter(
+            user=user,
+            session__mode='random',
+            session__session_type='LLM'
+        ).count(),
+        session_breakdown=dict(session_breakdown),
+        model_usage={str(model_id): count for model_id, count in model_usage},
+        current_streak=streak,
+        last_active_date=last_active_date,
+    )
+
+
+def rebuild_summary(user, using=None):
+    """
+    Recompute a user's summary from their full history and store it.
+
+    The empty row is committed first, so increments from concurrent writes
+    find it instead of being dropped. The recount then runs with the row
+    locked: writes that bumped it before the lock are part of the recount,
+    and later ones wait and apply on top of it.
+    """
+    using = using or router.db_for_write(UserActivitySummary)
+    summaries = UserActivitySummary.objects.using(using)
+    summaries.bulk_create([UserActivitySummary(user=user)], ignore_conflicts=True)
+
+    with transaction.atomic(using=using):
+        summary = summaries.select_for_update().get(user_id=user.pk)
+        counts = _recount(user, using)
+        for field, value in counts.items():
+            setattr(summary, field, value)
+        summary.save(using=using, update_fields=[*counts, 'updated_at'])
+    return summary
+
+
+def get_summary(user, using=None):
+    """The user's activity summary, rebuilt on first use."""
+    using = using or router.db_for_read(UserActivitySummary)
+    summary = UserActivitySummary.objects.using(using).filter(user_id=user.pk).first()
+    if summary is None:
+        logger.info(f"Building activity summary for user {user.pk}")
+        summary = rebuild_summary(user)
+    return summary
+
+
+def get_favorite_models(summary, limit=FAVORITE_MODELS_LIMIT):
+    """Most used models, in the shape of the former Message aggregate."""
+    top = sorted(summary.model_usage.items(), key=lambda item: item[1], reverse=True)[:limit]
+    if not top:
+        return []
+    models = {
+        str(model['id']): model
+        for model in AIModel.objects.filter(id__in=[model_id for model_id, _ in top]).values(
+            'id', 'display_name', 'provider'
+        )
+    }
+    return [
+        {
+            'model__id': models[model_id]['id'],
+            'model__display_name': models[model_id]['display_name'],
+            'model__provider': models[model_id]['provider'],
+            'usage_count': count,
+        }
+        for model_id, count in top if model_id in models
+    ]
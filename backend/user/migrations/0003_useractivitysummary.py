@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_add_phone_authentication'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivitySummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_summary', serialize=False, to='user.user')),
+                ('total_sessions', models.IntegerField(default=0)),
+                ('total_messages', models.IntegerField(default=0, help_text='User messages across all sessions')),
+                ('feedback_given', models.IntegerField(default=0)),
+                ('detailed_votes_count', models.IntegerField(default=0, help_text='Detailed feedback in TTS academic sessions')),
+                ('llm_random_votes_count', models.IntegerField(default=0)),
+                ('session_breakdown', models.JSONField(blank=True, default=dict, help_text='Sessions per mode')),
+                ('model_usage', models.JSONField(blank=True, default=dict, help_text='Assistant messages per model id')),
+                ('current_streak', models.IntegerField(default=0, help_text='Consecutive days with a new session, up to last_active_date')),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'user_activity_summaries',
+            },
+        ),
+    ]
@@ -54,3 +54,28 @@ class User(models.Model):
         This is required for Django REST Framework's IsAuthenticated permission
         """
         return True
+
+
+class UserActivitySummary(models.Model):
+    """
+    Running per-user counters behind the stats endpoint. Kept up to date by
+    user.activity as sessions, messages and votes are created, and rebuilt
+    from scratch when missing.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='activity_summary')
+    total_sessions = models.IntegerField(default=0)
+    total_messages = models.IntegerField(default=0, help_text="User messages across all sessions")
+    feedback_given = models.IntegerField(default=0)
+    detailed_votes_count = models.IntegerField(default=0, help_text="Detailed feedback in TTS academic sessions")
+    llm_random_votes_count = models.IntegerField(default=0)
+    session_breakdown = models.JSONField(default=dict, blank=True, help_text="Sessions per mode")
+    model_usage = models.JSONField(default=dict, blank=True, help_text="Assistant messages per model id")
+    current_streak = models.IntegerField(default=0, help_text="Consecutive days with a new session, up to last_active_date")
+    last_active_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_activity_summaries'
+
+    def __str__(self):
+        return f"Activity of {self.user_id}"
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from message.models import Message
+from user import activity
+
+
+@receiver(post_save, sender=ChatSession)
+def session_created(sender, instance, created, using='default', **kwargs):
+    if created:
+        activity.record_session(instance, using=using)
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, using='default', **kwargs):
+    if created:
+        activity.record_message(instance, using=using)
+
+
+@receiver(post_save, sender=Feedback)
+def feedback_created(sender, instance, created, using='default', **kwargs):
+    if created:
+        session = instance.session
+        counts = activity.vote_counts(
+            session.mode, session.session_type, instance.additional_feedback_json, created=True
+        )
+        activity.record_votes({instance.user_id: counts}, using=using)
+
+
+@receiver(post_delete, sender=ChatSession)
+@receiver(post_delete, sender=Feedback)
+def activity_deleted(sender, instance, using='default', **kwargs):
+    # Rebuilt from the remaining history on the next stats read
+    activity.drop_summary(instance.user_id, using=using)
@@ -0,0 +1,198 @@
+"""
+Tests for the maintained user activity summary.
+
+Verifies that:
+- The first stats read rebuilds the summary from the full history.
+- Creating sessions, messages and votes bumps an existing summary to the
+  same numbers a rebuild gives.
+- The streak extends on the next day, holds within a day and restarts after
+  a gap.
+- The stats endpoint reads the summary instead of aggregating the history.
+- Deleting a session drops the summary so the next read rebuilds it.
+- A rebuild stores the row before reading the history, so concurrent
+  increments have a row to bump, and overwrites it with the recount.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat_session.models import ChatSession
+from feedback.models import Feedback
+from feedback.tests.test_vote_resolution import create_ai_model
+from message.models import Message
+from user import activity
+from user.models import User, UserActivitySummary
+from user.views import UserStatsView
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+SUMMARY_FIELDS = [
+    'total_sessions', 'total_messages', 'feedback_given', 'detailed_votes_count',
+    'llm_random_votes_count', 'session_breakdown', 'model_usage', 'current_streak', 'last_active_date',
+]
+
+
+class ActivityFixtureMixin:
+
+    def setUp(self):
+        self.user = User.objects.create(display_name='member', auth_provider='google')
+        self.model_id = create_ai_model('model-a')
+
+    def add_turn(self, mode='random', session_type='LLM', detailed=False):
+        session = ChatSession.objects.create(user=self.user, mode=mode, session_type=session_type)
+        prompt = Message.objects.create(session=session, role='user', content='Hi', position=0)
+        Message.objects.create(
+            session=session, role='assistant', content='Hello', position=1,
+            model_id=self.model_id, parent_message_ids=[prompt.id]
+        )
+        Feedback.objects.create(
+            user=self.user, session=session, message=prompt, feedback_type='preference',
+            additional_feedback_json={'naturalness': 4} if detailed else {}
+        )
+        return session
+
+    def snapshot(self, summary):
+        return {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+
+
+class ActivitySummaryTests(ActivityFixtureMixin, TestCase):
+
+    def test_first_read_rebuilds_from_history(self):
+        self.add_turn()
+        self.add_turn(mode='academic', session_type='TTS', detailed=True)
+        self.assertFalse(UserActivitySummary.objects.exists())
+
+        summary = activity.get_summary(self.user)
+
+        self.assertEqual(self.snapshot(summary), {
+            'total_sessions': 2,
+            'total_messages': 2,
+            'feedback_given': 2,
+            'detailed_votes_count': 1,
+            'llm_random_votes_count': 1,
+            'session_breakdown': {'academic': 1, 'random': 1},
+            'model_usage': {str(self.model_id): 2},
+            'current_streak': 1,
+            'last_active_date': timezone.localdate(),
+        })
+        self.assertTrue(UserActivitySummary.objects.filter(user=self.user).exists())
+
+    def test_increments_match_rebuild(self):
+        self.add_turn()
+        activity.get_summary(self.user)
+
+        self.add_turn()
+        self.add_turn(mode='academic', session_type='TTS', detailed=True)
+        self.add_turn(mode='direct')
+        maintained = UserActivitySummary.objects.get(user=self.user)
+
+        UserActivitySummary.objects.all().delete()
+        rebuilt = activity.rebuild_summary(self.user)
+
+        self.assertEqual(self.snapshot(maintained), self.snapshot(rebuilt))
+        self.assertEqual(maintained.total_sessions, 4)
+
+    def test_rebuild_overwrites_existing_row(self):
+        self.add_turn()
+        UserActivitySummary.objects.create(user=self.user, total_sessions=7, feedback_given=9)
+
+        rebuilt = activity.rebuild_summary(self.user)
+
+        stored = UserActivitySummary.objects.get(user=self.user)
+        self.assertEqual((stored.total_sessions, stored.feedback_given), (1, 1))
+        self.assertEqual(self.snapshot(stored), self.snapshot(rebuilt))
+
+    def test_row_exists_while_history_is_read(self):
+        self.add_turn()
+        read_history = activity._activity_streak
+        seen = []
+
+        def check_then_read(user, using):
+            # Increments from votes landing now need a row to bump
+            seen.append(UserActivitySummary.objects.filter(user=user).exists())
+            return read_history(user, using)
+
+        with patch('user.activity._activity_streak', side_effect=check_then_read):
+            activity.rebuild_summary(self.user)
+
+        self.assertEqual(seen, [True])
+        self.assertEqual(UserActivitySummary.objects.get(user=self.user).total_sessions, 1)
+
+    def test_detailed_follow_up_counts_once(self):
+        session = self.add_turn(mode='academic', session_type='TTS')
+        activity.get_summary(self.user)
+
+        counts = activity.vote_counts('academic', 'TTS', {'naturalness': 4}, created=False, became_detailed=True)
+        activity.record_votes({self.user.pk: counts})
+        activity.record_votes({self.user.pk: activity.vote_counts(
+            'academic', 'TTS', {'naturalness': 5}, created=False
+        )})
+
+        summary = UserActivitySummary.objects.get(user=self.user)
+        self.assertEqual((summary.feedback_given, summary.detailed_votes_count), (1, 1))
+        self.assertEqual(session.feedbacks.count(), 1)
+
+    def test_streak(self):
+        activity.get_summary(self.user)
+        today = timezone.localdate()
+
+        for last_active, streak, expected in [
+            (today - timedelta(days=1), 3, 4),
+            (today, 3, 3),
+            (today - timedelta(days=3), 3, 1),
+        ]:
+            UserActivitySummary.objects.filter(user=self.user).update(
+                last_active_date=last_active, current_streak=streak
+            )
+            ChatSession.objects.create(user=self.user, mode='direct')
+            summary = UserActivitySummary.objects.get(user=self.user)
+            self.assertEqual((summary.current_streak, summary.last_active_date), (expected, today))
+
+    def test_rebuilt_streak_counts_consecutive_days(self):
+        now = timezone.now()
+        for days_ago in [0, 1, 2, 4]:
+            session = ChatSession.objects.create(user=self.user, mode='direct')
+            ChatSession.objects.filter(id=session.id).update(created_at=now - timedelta(days=days_ago))
+
+        self.assertEqual(activity.get_summary(self.user).current_streak, 3)
+
+    def test_session_delete_drops_summary(self):
+        session = self.add_turn()
+        activity.get_summary(self.user)
+
+        session.delete()
+
+        self.assertFalse(UserActivitySummary.objects.exists())
+        self.assertEqual(activity.get_summary(self.user).total_sessions, 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UserStatsViewTests(ActivityFixtureMixin, TestCase):
+
+    def get(self):
+        request = APIRequestFactory().get('/users/stats/')
+        force_authenticate(request, user=self.user)
+        return UserStatsView.as_view()(request)
+
+    def test_reads_summary(self):
+        self.add_turn()
+        self.add_turn(mode='direct')
+        activity.get_summary(self.user)
+
+        # Summary row and the favorite models' names
+        with self.assertNumQueries(2):
+            response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_sessions'], 2)
+        self.assertEqual(response.data['session_breakdown'], {'direct': 1, 'random': 1})
+        self.assertEqual(response.data['activity_streak'], 1)
+        self.assertEqual(response.data['favorite_models'], [{
+            'model__id': self.model_id,
+            'model__display_name': 'model-a',
+            'model__provider': 'openai',
+            'usage_count': 2,
+        }])
@@ -18,10 +18,7 @@ from .serializers import (
 from .services import UserService
 from .authentication import AnonymousTokenAuthentication, FirebaseAuthentication
 from .permissions import IsOwnerOrReadOnly
-from django.db.models import Count
-from message.models import Message
-from django.db.models.functions import TruncDate
-from datetime import datetime, timedelta
+from user import activity
 from common.security_utils import sanitize_error_message
                 
 logger = logging.getLogger(__name__)
@@ -230,21 +227,20 @@ class UserStatsView(views.APIView):
     def get(self, request):
         try:
             user = request.user
+            # Maintained counters, see user.activity
+            summary = activity.get_summary(user)
             
             # Get user stats
             stats = {
-                'total_sessions': user.chat_sessions.count(),
-                'total_messages': Message.objects.filter(
-                    session__user=user,
-                    role='user'
-                ).count(),
-                'favorite_models': self._get_favorite_models(user),
-                'activity_streak': self._calculate_activity_streak(user),
+                'total_sessions': summary.total_sessions,
+                'total_messages': summary.total_messages,
+                'favorite_models': activity.get_favorite_models(summary),
+                'activity_streak': summary.current_streak,
                 'member_since': user.created_at,
-                'feedback_given': user.feedbacks.count(),
-                'session_breakdown': self._get_session_breakdown(user),
-                'detailed_votes_count': self._get_detailed_votes_count(user),
-                'llm_random_votes_count': self._get_llm_random_votes_count(user)
+                'feedback_given': summary.feedback_given,
+                'session_breakdown': dict(sorted(summary.session_breakdown.items())),
+                'detailed_votes_count': summary.detailed_votes_count,
+                'llm_random_votes_count': summary.llm_random_votes_count
             }
             
             return Response(stats)
@@ -256,82 +252,3 @@ class UserStatsView(views.APIView):
                 endpoint='/users/stats/',
                 log_context=log_context
             )
-    
-    def _get_favorite_models(self, user):
-        """Get user's most used models"""
-        
-        favorite_models = Message.objects.filter(
-            session__user=user,
-            role='assistant',
-            model__isnull=False
-        ).values(
-            'model__id',
-            'model__display_name',
-            'model__provider'
-        ).annotate(
-            usage_count=Count('id')
-        ).order_by('-usage_count')[:5]
-        
-        return list(favorite_models)
-    
-    def _calculate_activity_streak(self, user):
-        """Calculate user's activity streak in days"""
-        
-        # Get all unique days user was active
-        active_days = user.chat_sessions.annotate(
-            day=TruncDate('created_at')
-        ).values('day').distinct().order_by('-day')
-        
-        if not active_days:
-            return 0
-        
-        streak = 1
-        current_date = active_days[0]['day']
-        
-        for i in range(1, len(active_days)):
-            if active_days[i]['day'] == current_date - timedelta(days=1):
-                streak += 1
-                current_date = active_days[i]['day']
-            else:
-                break
-        
-        return streak
-    
-    def _get_session_breakdown(self, user):
-        """Get breakdown of sessions by mode"""
-        
-        breakdown = user.chat_sessions.values('mode').annotate(
-            count=Count('id')
-        ).order_by('mode')
-        
-        return {item['mode']: item['count'] for item in breakdown}
-    
-    def _get_detailed_votes_count(self, user):
-        """Get count of detailed votes submitted (TTS Academic mode with additional_feedback_json)"""
-        from feedback.models import Feedback
-        
-        # Count feedbacks that have additional_feedback_json (detailed TTS evaluation feedback)
-        # in academic mode sessions with TTS type
-        detailed_votes = Feedback.objects.filter(
-            user=user,
-            session__mode='academic',
-            session__session_type='TTS',
-            additional_feedback_json__isnull=False
-        ).exclude(
-            additional_feedback_json={}
-        ).count()
-        
-        return detailed_votes
-    
-    def _get_llm_random_votes_count(self, user):
-        """Get count of votes submitted in LLM Random mode"""
-        from feedback.models import Feedback
-        
-        # Count all feedbacks in random mode LLM sessions
-        llm_random_votes = Feedback.objects.filter(
-            user=user,
-            session__mode='random',
-            session__session_type='LLM'
-        ).count()
-        
-        return llm_random_votes
\ No newline at end of file